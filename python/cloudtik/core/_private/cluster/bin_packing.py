@@ -0,0 +1,466 @@
+"""Vectorized bin packing for the resource demand scheduler.
+
+The resources of the nodes and the node types are dense matrices over a
+fixed index of the resource names, and the resource demands are packed as
+the shapes of identical bundles with counts, so that the cost depends on
+the number of distinct shapes instead of the number of bundles. The
+functions make the same decisions as the list of dicts based bin packing of
+the resource demand scheduler:
+
+- The groups are packed in the order the bundles would be sorted and each
+  node takes as many bundles of a group as fit before the next node is
+  tried, the same as the first fit of the bundles one by one.
+- If all the resource quantities are integers, the number of bundles
+  fitting a node is computed by division. Otherwise, the bundles are
+  subtracted one by one for all the nodes at once, so that the float
+  results are the same as the one by one subtractions.
+
+The functions return None if the resources are not supported (negative
+quantities) or the results are inconsistent, and the caller should use the
+list of dicts based functions.
+"""
+import collections
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from cloudtik.core._private.cluster.resource_demand_shapes import DemandShape, \
+    aggregate_demands, expand_demand_shapes
+from cloudtik.core._private.constants import CLOUDTIK_CONSERVE_GPU_NODES
+
+logger = logging.getLogger(__name__)
+
+# Floats represent all the integers with absolute value up to this exactly
+_MAX_EXACT_INTEGER = 2 ** 53
+
+
+class _ResourceIndex:
+    """The column index of the resource names."""
+
+    def __init__(self):
+        self.columns = {}
+
+    def add_keys(self, resources_list):
+        columns = self.columns
+        for resources in resources_list:
+            for key in resources:
+                if key not in columns:
+                    columns[key] = len(columns)
+
+    def to_matrix(self, resources_list) -> np.ndarray:
+        columns = self.columns
+        matrix = np.zeros((len(resources_list), len(columns)))
+        for i, resources in enumerate(resources_list):
+            row = matrix[i]
+            for key, value in resources.items():
+                row[columns[key]] = value
+        return matrix
+
+
+class _DemandGroup:
+    """The identical resource bundles with the count."""
+
+    __slots__ = ("key", "demand", "count", "has_gpu")
+
+    def __init__(self, key, demand, count):
+        self.key = key
+        self.demand = demand
+        self.count = count
+        self.has_gpu = "GPU" in demand
+
+
+def _demand_sort_key(demand):
+    # The same order of the bundles packed by get_bin_pack_residual
+    return (len(demand.values()),
+            sum(demand.values()),
+            sorted(demand.items()))
+
+
+def _group_sorted(shapes: List[DemandShape]) -> List[_DemandGroup]:
+    """Group the shapes in the sorted order of the bin packing."""
+    groups = {}
+    for demand, count in shapes:
+        key = tuple(sorted(demand.items()))
+        group = groups.get(key)
+        if group is None:
+            groups[key] = _DemandGroup(key, demand, count)
+        else:
+            group.count += count
+    return sorted(
+        groups.values(), key=lambda group: _demand_sort_key(group.demand),
+        reverse=True)
+
+
+def _group_runs(shapes: List[DemandShape]) -> List[_DemandGroup]:
+    """Group the consecutive identical shapes keeping the list order."""
+    runs = []
+    last_key = None
+    for demand, count in shapes:
+        key = tuple(sorted(demand.items()))
+        if runs and key == last_key:
+            runs[-1].count += count
+        else:
+            runs.append(_DemandGroup(key, demand, count))
+            last_key = key
+    return runs
+
+
+def _is_supported(resources_list) -> bool:
+    for resources in resources_list:
+        for value in resources.values():
+            if value < 0:
+                return False
+    return True
+
+
+def _is_exact_integers(*matrices) -> bool:
+    for matrix in matrices:
+        if matrix.size == 0:
+            continue
+        if not np.all(np.abs(matrix) < _MAX_EXACT_INTEGER):
+            return False
+        if not np.all(matrix == np.floor(matrix)):
+            return False
+    return True
+
+
+class _GroupVector:
+    """The demand vector of a group restricted to the keys of the bundle."""
+
+    __slots__ = ("columns", "values", "positive", "zero")
+
+    def __init__(self, index: _ResourceIndex, demand):
+        columns = index.columns
+        self.columns = np.array(
+            [columns[key] for key in demand], dtype=np.intp)
+        self.values = np.array(
+            [demand[key] for key in demand], dtype=float)
+        self.positive = self.values > 0
+        self.zero = ~self.positive
+
+
+def _fit_counts(remaining, vector: _GroupVector, limit, exact):
+    """Return the number of bundles fitting each row one by one.
+
+    The counts are limited by the limit. For the non exact case, the
+    remaining resources after subtracting the counts are also returned.
+    """
+    num_rows = remaining.shape[0]
+    values = vector.values
+    sub = remaining[:, vector.columns]
+    if exact or not vector.positive.any():
+        if vector.positive.any():
+            quotients = np.floor(
+                sub[:, vector.positive] / values[vector.positive])
+            counts = np.min(quotients, axis=1)
+            counts = np.minimum(np.maximum(counts, 0), limit)
+        else:
+            # Nothing to subtract, the rows fit without limit
+            counts = np.full(num_rows, float(limit))
+        if vector.zero.any():
+            # A zero quantity fits only if the node has non negative value
+            counts[~np.all(sub[:, vector.zero] >= 0, axis=1)] = 0
+        return counts, sub
+
+    # Subtract one by one for all the rows at once
+    counts = np.zeros(num_rows)
+    active = np.ones(num_rows, dtype=bool)
+    sub = sub.copy()
+    for _ in range(limit):
+        fit = active & np.all(sub >= values, axis=1)
+        if not fit.any():
+            break
+        sub[fit] -= values
+        counts[fit] += 1
+        active = fit
+    return counts, sub
+
+
+def _subtract_one_by_one(row, vector: _GroupVector, count):
+    values = vector.values
+    sub = row[vector.columns]
+    for _ in range(int(count)):
+        sub = sub - values
+    row[vector.columns] = sub
+
+
+def _pack_group(remaining, vector: _GroupVector, count, exact):
+    """First fit the bundles of the group to the rows in order.
+
+    The remaining is updated in place and the number of bundles packed
+    is returned.
+    """
+    if remaining.shape[0] == 0 or count == 0:
+        return 0
+    counts, fitted = _fit_counts(remaining, vector, count, exact)
+    before = np.cumsum(counts) - counts
+    takes = np.minimum(np.maximum(count - before, 0), counts)
+    if exact:
+        taken_rows = np.nonzero(takes)[0]
+        if taken_rows.size:
+            remaining[np.ix_(taken_rows, vector.columns)] -= (
+                takes[taken_rows, None] * vector.values)
+    else:
+        full_rows = np.nonzero((takes == counts) & (counts > 0))[0]
+        if full_rows.size:
+            remaining[np.ix_(full_rows, vector.columns)] = fitted[full_rows]
+        # At most one row takes part of its fit count
+        for i in np.nonzero((takes > 0) & (takes < counts))[0]:
+            _subtract_one_by_one(remaining[i], vector, takes[i])
+    return int(takes.sum())
+
+
+def _to_resource_dicts(index: _ResourceIndex, remaining, node_resources):
+    columns = index.columns
+    nodes = []
+    for i, resources in enumerate(node_resources):
+        row = remaining[i]
+        node = {}
+        for key, value in resources.items():
+            new_value = row[columns[key]].item()
+            if isinstance(value, int) and new_value == int(new_value):
+                new_value = int(new_value)
+            node[key] = new_value
+        nodes.append(node)
+    return nodes
+
+
+def get_bin_pack_residual(
+        node_resources: List[Dict[str, Any]],
+        resource_demands: List[Dict[str, Any]]
+) -> Optional[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+    """Return the resource demands that cannot fit in the nodes and the
+    updated node resources, or None if the resources are not supported."""
+    result = get_bin_pack_residual_for_shapes(
+        node_resources, aggregate_demands(resource_demands))
+    if result is None:
+        return None
+    unfulfilled, nodes = result
+    return expand_demand_shapes(unfulfilled), nodes
+
+
+def get_bin_pack_residual_for_shapes(
+        node_resources: List[Dict[str, Any]],
+        demand_shapes: List[DemandShape]
+) -> Optional[Tuple[List[DemandShape], List[Dict[str, Any]]]]:
+    """The same as get_bin_pack_residual with the resource demands and the
+    residual in shapes."""
+    demands = [demand for demand, _ in demand_shapes]
+    if not _is_supported(node_resources) or not _is_supported(demands):
+        return None
+
+    index = _ResourceIndex()
+    index.add_keys(node_resources)
+    index.add_keys(demands)
+    remaining = index.to_matrix(node_resources)
+    groups = _group_sorted(demand_shapes)
+    demand_matrix = index.to_matrix([group.demand for group in groups])
+    exact = _is_exact_integers(remaining, demand_matrix)
+
+    unfulfilled = []
+    for group in groups:
+        packed = _pack_group(
+            remaining, _GroupVector(index, group.demand), group.count, exact)
+        if packed < group.count:
+            unfulfilled.append((group.demand, group.count - packed))
+
+    return unfulfilled, _to_resource_dicts(index, remaining, node_resources)
+
+
+class _NodeTypeScorer:
+    """Score the node types for the bundles the same as _utilization_score."""
+
+    def __init__(self, index: _ResourceIndex, node_types, node_type_names):
+        self.index = index
+        self.node_type_names = node_type_names
+        self.node_resources = [
+            node_types[node_type]["resources"] for node_type in node_type_names]
+        self.matrix = index.to_matrix(self.node_resources)
+        columns = index.columns
+        # The (key, column, value) of resources with value >= 1 in dict order
+        self.util_items = [
+            [(key, columns[key], value)
+             for key, value in resources.items() if not value < 1]
+            for resources in self.node_resources
+        ]
+        self.is_gpu_node = [
+            "GPU" in resources and resources["GPU"] > 0
+            for resources in self.node_resources
+        ]
+
+    def score(self, rows, groups, counts, vectors, exact):
+        remaining = self.matrix[rows].copy()
+        fitted = np.zeros(len(rows))
+        for group_index, count in enumerate(counts):
+            if count:
+                fitted += _pack_rows_independently(
+                    remaining, vectors[group_index], count, exact)
+
+        active_groups = [i for i, count in enumerate(counts) if count]
+        resource_types = set()
+        any_gpu_task = False
+        for i in active_groups:
+            for key, value in groups[i].demand.items():
+                if value > 0:
+                    resource_types.add(key)
+            if groups[i].has_gpu:
+                any_gpu_task = True
+
+        scores = []
+        for position, row in enumerate(rows):
+            if not fitted[position]:
+                scores.append(None)
+                continue
+            util_by_resources = []
+            num_matching_resource_types = 0
+            row_remaining = remaining[position]
+            for key, column, value in self.util_items[row]:
+                if key in resource_types:
+                    num_matching_resource_types += 1
+                util = (value - float(row_remaining[column])) / value
+                util_by_resources.append(value * (util**3))
+            if not util_by_resources:
+                scores.append(None)
+                continue
+            gpu_ok = True
+            if CLOUDTIK_CONSERVE_GPU_NODES:
+                if self.is_gpu_node[row] and not any_gpu_task:
+                    gpu_ok = False
+            scores.append((
+                gpu_ok,
+                num_matching_resource_types,
+                min(util_by_resources),
+                float(sum(util_by_resources)) / len(util_by_resources),
+            ))
+        return scores
+
+
+def _pack_rows_independently(remaining, vector: _GroupVector, count, exact):
+    """Fit the bundles of the group to each row as if it is the only row.
+
+    The remaining is updated in place and the counts of each row returned.
+    """
+    counts, fitted = _fit_counts(remaining, vector, count, exact)
+    taken_rows = np.nonzero(counts)[0]
+    if taken_rows.size:
+        if exact:
+            remaining[np.ix_(taken_rows, vector.columns)] -= (
+                counts[taken_rows, None] * vector.values)
+        else:
+            remaining[np.ix_(taken_rows, vector.columns)] = fitted[taken_rows]
+    return counts
+
+
+def get_nodes_for(
+        node_types: Dict[str, Dict[str, Any]],
+        existing_nodes: Dict[str, int],
+        head_node_type: str,
+        max_to_add: int,
+        resources: List[Dict[str, Any]],
+) -> Optional[Tuple[Dict[str, int], List[Dict[str, Any]]]]:
+    """Determine the nodes to add for the resource demands with the default
+    utilization scorer, or None if the resources are not supported."""
+    result = get_nodes_for_shapes(
+        node_types, existing_nodes, head_node_type, max_to_add,
+        aggregate_demands(resources))
+    if result is None:
+        return None
+    nodes_to_add, residual = result
+    return nodes_to_add, expand_demand_shapes(residual)
+
+
+def get_nodes_for_shapes(
+        node_types: Dict[str, Dict[str, Any]],
+        existing_nodes: Dict[str, int],
+        head_node_type: str,
+        max_to_add: int,
+        demand_shapes: List[DemandShape],
+) -> Optional[Tuple[Dict[str, int], List[DemandShape]]]:
+    """The same as get_nodes_for with the resource demands and the residual
+    in shapes."""
+    node_type_names = list(node_types)
+    node_type_resources = [
+        node_types[node_type]["resources"] for node_type in node_type_names]
+    demands = [demand for demand, _ in demand_shapes]
+    if not _is_supported(node_type_resources) or not _is_supported(demands):
+        return None
+
+    index = _ResourceIndex()
+    index.add_keys(node_type_resources)
+    index.add_keys(demands)
+    scorer = _NodeTypeScorer(index, node_types, node_type_names)
+
+    # The first scoring uses the order given, the residuals are sorted
+    groups = _group_runs(demand_shapes)
+    vectors = [_GroupVector(index, group.demand) for group in groups]
+    counts = [group.count for group in groups]
+    exact = _is_exact_integers(
+        scorer.matrix, index.to_matrix([group.demand for group in groups]))
+    sorted_groups = False
+
+    nodes_to_add = collections.defaultdict(int)
+    num_to_add = 0
+    while sum(counts) and num_to_add < max_to_add:
+        rows = []
+        for row, node_type in enumerate(node_type_names):
+            max_workers_of_node_type = node_types[node_type].get(
+                "max_workers", 0)
+            if head_node_type == node_type:
+                # Add 1 to account for head node.
+                max_workers_of_node_type = max_workers_of_node_type + 1
+            if (existing_nodes.get(node_type, 0) + nodes_to_add.get(
+                    node_type, 0) >= max_workers_of_node_type):
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        f"Will not launch node of {node_type} type as it already "
+                        f"exceeds the max number ({max_workers_of_node_type})")
+                continue
+            rows.append(row)
+
+        utilization_scores = []
+        if rows:
+            scores = scorer.score(rows, groups, counts, vectors, exact)
+            for row, score in zip(rows, scores):
+                if score is not None:
+                    utilization_scores.append((score, node_type_names[row]))
+
+        # Give up, no feasible node.
+        if not utilization_scores:
+            logger.warning(
+                f"The scaler could not find a node type to satisfy the "
+                f"request: {_get_residual(groups, counts)}. "
+            )
+            break
+
+        utilization_scores = sorted(utilization_scores, reverse=True)
+        best_node_type = utilization_scores[0][1]
+        nodes_to_add[best_node_type] += 1
+        num_to_add += 1
+
+        if not sorted_groups:
+            # The residual of get_bin_pack_residual is in the sorted order
+            groups = _group_sorted(_get_residual(groups, counts))
+            vectors = [_GroupVector(index, group.demand) for group in groups]
+            counts = [group.count for group in groups]
+            sorted_groups = True
+
+        remaining = scorer.matrix[[node_type_names.index(best_node_type)]].copy()
+        num_before = sum(counts)
+        for i in range(len(groups)):
+            if counts[i]:
+                counts[i] -= _pack_group(
+                    remaining, vectors[i], counts[i], exact)
+        if sum(counts) >= num_before:
+            # The node type scored can always take a bundle
+            logger.warning(
+                "No resource demands packed to the node type {}. "
+                "Using the list based bin packing.".format(best_node_type))
+            return None
+
+    return nodes_to_add, _get_residual(groups, counts)
+
+
+def _get_residual(groups, counts) -> List[DemandShape]:
+    return [(group.demand, count)
+            for group, count in zip(groups, counts) if count]
@@ -2,14 +2,23 @@ import json
 import os
 from typing import Any, Dict, Optional
 
+import cloudtik
+from cloudtik.core._private.constants import CLOUDTIK_USER_TEMPLATES
+from cloudtik.core._private.util.config_dependencies import track_config_dependencies, \
+    get_config_dependency_hashes, is_config_dependency_changed
 from cloudtik.core._private.util.core_utils import get_cloudtik_temp_dir, get_json_object_hash, open_with_mode
 from cloudtik.core._private.debug import log_once
 from cloudtik.core._private.utils import prepare_config, decrypt_config, runtime_prepare_config, validate_config, \
-    verify_config, encrypt_config, RUNTIME_CONFIG_KEY, runtime_bootstrap_config, load_yaml_config
+    verify_config, encrypt_config, RUNTIME_CONFIG_KEY, runtime_bootstrap_config, load_yaml_config, \
+    get_file_hash_cache
 from cloudtik.core._private.provider_factory import _NODE_PROVIDERS, _PROVIDER_PRETTY_NAMES
 from cloudtik.core._private.cli_logger import cli_logger, cf
 
-CONFIG_CACHE_VERSION = 1
+CONFIG_CACHE_VERSION = 2
+
+# The config is cached after each stage of resolving
+CONFIG_CACHE_STAGE_PREPARED = "prepared"
+CONFIG_CACHE_STAGE_RESOLVED = "resolved"
 
 
 def try_logging_config(config: Dict[str, Any]) -> None:
@@ -34,6 +43,83 @@ def try_reload_log_state(provider_config: Dict[str, Any],
         return reload_log_state(log_state)
 
 
+def _get_config_cache_key(stage: str, inputs) -> str:
+    # The cache is addressed by the hash of the inputs of the stage
+    # and the version of the software processing the inputs
+    inputs_hash = get_json_object_hash(
+        [stage, cloudtik.__version__, inputs])
+    return os.path.join(
+        get_cloudtik_temp_dir(), "configs",
+        "cloudtik-config-{}-{}".format(stage, inputs_hash))
+
+
+def _load_config_stage_cache(cache_key: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(cache_key):
+        return None
+    try:
+        with open(cache_key) as f:
+            config_cache = json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+    if config_cache.get("_version", -1) != CONFIG_CACHE_VERSION:
+        cli_logger.warning(
+            "Found cached cluster config "
+            "but the version " + cf.bold("{}") + " "
+            "(expected " + cf.bold("{}") + ") does not match.\n"
+            "This is normal if cluster launcher was updated.\n"
+            "Config will be re-resolved.",
+            config_cache.get("_version", "none"), CONFIG_CACHE_VERSION)
+        return None
+    # The templates or the defaults the config was resolved from changed
+    if is_config_dependency_changed(
+            config_cache.get("dependencies", {}), get_file_hash_cache()):
+        return None
+    return config_cache
+
+
+def _save_config_stage_cache(
+        cache_key: str, config: Dict[str, Any], dependencies,
+        **kwargs) -> None:
+    file_hash_cache = get_file_hash_cache()
+    config_cache = {
+        "_version": CONFIG_CACHE_VERSION,
+        "dependencies": get_config_dependency_hashes(
+            dependencies, file_hash_cache),
+        "config": encrypt_config(config),
+    }
+    config_cache.update(kwargs)
+    file_hash_cache.save()
+
+    os.makedirs(os.path.dirname(cache_key), exist_ok=True)
+    with open_with_mode(cache_key, "w", os_mode=0o600) as f:
+        f.write(json.dumps(config_cache))
+
+
+def _prepare_config(
+        config: Dict[str, Any],
+        no_config_cache: bool = False,
+        init_config_cache: bool = False) -> Dict[str, Any]:
+    """Merge the config with the templates and the defaults.
+
+    The result is cached with the template and default files merged, so that
+    the merge is done again only when the config or these files change.
+    """
+    cache_key = _get_config_cache_key(
+        CONFIG_CACHE_STAGE_PREPARED,
+        [config, os.environ.get(CLOUDTIK_USER_TEMPLATES)])
+    if not no_config_cache:
+        config_cache = _load_config_stage_cache(cache_key)
+        if config_cache is not None:
+            return decrypt_config(config_cache["config"])
+
+    with track_config_dependencies() as dependencies:
+        prepared_config = prepare_config(config)
+
+    if not no_config_cache or init_config_cache:
+        _save_config_stage_cache(cache_key, prepared_config, dependencies)
+    return prepared_config
+
+
 def _bootstrap_config(
         config: Dict[str, Any],
         no_config_cache: bool = False,
@@ -43,23 +129,19 @@ def _bootstrap_config(
     if config.get("bootstrapped", False):
         return config
 
-    config = prepare_config(config)
+    config = _prepare_config(
+        config, no_config_cache=no_config_cache,
+        init_config_cache=init_config_cache)
     # NOTE: multi-node-type cluster scaler is guaranteed to be in use after this.
 
-    config_hash = get_json_object_hash([config])
-    config_cache_dir = os.path.join(get_cloudtik_temp_dir(), "configs")
-    cache_key = os.path.join(
-        config_cache_dir,
-        "cloudtik-config-{}".format(config_hash))
+    # The config resolved from the same prepared config is reused even if
+    # the user config changed in the ways not making a difference
+    cache_key = _get_config_cache_key(
+        CONFIG_CACHE_STAGE_RESOLVED, [config, skip_runtime_bootstrap])
 
-    if os.path.exists(cache_key) and not no_config_cache:
-        with open(cache_key) as f:
-            config_cache = json.loads(f.read())
-        if config_cache.get("_version", -1) == CONFIG_CACHE_VERSION:
-            # todo: is it fine to re-resolve? afaik it should be.
-            # we can have migrations otherwise or something
-            # but this seems overcomplicated given that resolving is
-            # relatively cheap
+    if not no_config_cache:
+        config_cache = _load_config_stage_cache(cache_key)
+        if config_cache is not None:
             cached_config = decrypt_config(config_cache["config"])
             try_reload_log_state(
                 cached_config["provider"],
@@ -75,14 +157,6 @@ def _bootstrap_config(
                     "the command with {}.", cf.bold("--no-config-cache"))
 
             return cached_config
-        else:
-            cli_logger.warning(
-                "Found cached cluster config "
-                "but the version " + cf.bold("{}") + " "
-                "(expected " + cf.bold("{}") + ") does not match.\n"
-                "This is normal if cluster launcher was updated.\n"
-                "Config will be re-resolved.",
-                config_cache.get("_version", "none"), CONFIG_CACHE_VERSION)
 
     importer = _NODE_PROVIDERS.get(config["provider"]["type"])
     if not importer:
@@ -95,42 +169,37 @@ def _bootstrap_config(
         "Checking {} environment settings",
         _PROVIDER_PRETTY_NAMES.get(config["provider"]["type"]))
 
-    config = provider_cls.post_prepare(config)
+    with track_config_dependencies() as dependencies:
+        config = provider_cls.post_prepare(config)
 
-    if not skip_runtime_bootstrap:
-        config = runtime_prepare_config(
-            config.get(RUNTIME_CONFIG_KEY), config)
+        if not skip_runtime_bootstrap:
+            config = runtime_prepare_config(
+                config.get(RUNTIME_CONFIG_KEY), config)
 
-    try:
-        validate_config(
-            config, skip_runtime_validate=skip_runtime_bootstrap)
-    except (ModuleNotFoundError, ImportError):
-        cli_logger.abort(
-            "Not all dependencies were found. Please "
-            "update your install command.")
+        try:
+            validate_config(
+                config, skip_runtime_validate=skip_runtime_bootstrap)
+        except (ModuleNotFoundError, ImportError):
+            cli_logger.abort(
+                "Not all dependencies were found. Please "
+                "update your install command.")
 
-    resolved_config = provider_cls.bootstrap_config(config)
+        resolved_config = provider_cls.bootstrap_config(config)
 
-    if not skip_runtime_bootstrap:
-        # final round to runtime for config prepare
-        resolved_config = runtime_bootstrap_config(
-            config.get(RUNTIME_CONFIG_KEY), resolved_config)
+        if not skip_runtime_bootstrap:
+            # final round to runtime for config prepare
+            resolved_config = runtime_bootstrap_config(
+                config.get(RUNTIME_CONFIG_KEY), resolved_config)
 
     # add a verify step
     verify_config(
         resolved_config, skip_runtime_verify=skip_runtime_bootstrap)
 
     if not no_config_cache or init_config_cache:
-        os.makedirs(config_cache_dir, exist_ok=True)
-        with open_with_mode(cache_key, "w", os_mode=0o600) as f:
-            encrypted_config = encrypt_config(resolved_config)
-            config_cache = {
-                "_version": CONFIG_CACHE_VERSION,
-                "provider_log_info": try_get_log_state(
-                    resolved_config["provider"]),
-                "config": encrypted_config
-            }
-            f.write(json.dumps(config_cache))
+        _save_config_stage_cache(
+            cache_key, resolved_config, dependencies,
+            provider_log_info=try_get_log_state(
+                resolved_config["provider"]))
     return resolved_config
 
 
@@ -3,7 +3,8 @@ import logging
 import os
 import sys
 import threading
-from typing import Any, Dict
+import zlib
+from typing import Any, Dict, List
 
 import colorama
 import redis
@@ -25,6 +26,51 @@ LOGGING_DATA_NODE_TYPE = "type"
 LOGGING_DATA_PID = "pid"
 LOGGING_DATA_RUNTIME = "runtime"
 
+# The header of a message with a batch of logging data: magic, version, codec
+LOGGING_BATCH_MAGIC = b"CTL"
+LOGGING_BATCH_VERSION = b"1"
+LOGGING_BATCH_CODEC_NONE = b"n"
+LOGGING_BATCH_CODEC_ZLIB = b"z"
+LOGGING_BATCH_HEADER_SIZE = len(LOGGING_BATCH_MAGIC) + 2
+
+# Compress the batch only if it is larger than this size
+LOGGING_BATCH_COMPRESS_MIN_BYTES = 1024
+
+
+def encode_logs_batch(batch: List[Dict[str, Any]], compress: bool = True) -> bytes:
+    """Encode a list of logging data to a message published."""
+    payload = json.dumps(batch).encode("utf-8")
+    codec = LOGGING_BATCH_CODEC_NONE
+    if compress and len(payload) >= LOGGING_BATCH_COMPRESS_MIN_BYTES:
+        payload = zlib.compress(payload, 1)
+        codec = LOGGING_BATCH_CODEC_ZLIB
+    return LOGGING_BATCH_MAGIC + LOGGING_BATCH_VERSION + codec + payload
+
+
+def decode_logs_message(message) -> List[Dict[str, Any]]:
+    """Decode a message published to a list of logging data.
+
+    A message is either a batch of logging data or a single logging data
+    in JSON published by the log monitor of an old version.
+    """
+    if isinstance(message, str):
+        message = message.encode("utf-8")
+    if not message.startswith(LOGGING_BATCH_MAGIC):
+        return [json.loads(core_utils.decode(message))]
+
+    version = message[len(LOGGING_BATCH_MAGIC):len(LOGGING_BATCH_MAGIC) + 1]
+    if version != LOGGING_BATCH_VERSION:
+        raise ValueError(
+            "Unsupported logging batch version: {}".format(version))
+    codec = message[LOGGING_BATCH_HEADER_SIZE - 1:LOGGING_BATCH_HEADER_SIZE]
+    payload = message[LOGGING_BATCH_HEADER_SIZE:]
+    if codec == LOGGING_BATCH_CODEC_ZLIB:
+        payload = zlib.decompress(payload)
+    elif codec != LOGGING_BATCH_CODEC_NONE:
+        raise ValueError(
+            "Unsupported logging batch codec: {}".format(codec))
+    return json.loads(payload.decode("utf-8"))
+
 
 def print_logs(
         redis_address, redis_password,
@@ -203,13 +249,12 @@ class PrintLogsWorker:
                         "logs to the driver, use "
                         "'ray.init(log_to_driver=False)'.")
 
-                data = json.loads(core_utils.decode(msg["data"]))
-
-                if self._filtered(data):
-                    continue
+                for data in decode_logs_message(msg["data"]):
+                    if self._filtered(data):
+                        continue
 
-                data["localhost"] = localhost
-                global_standard_stream_dispatcher.emit(data)
+                    data["localhost"] = localhost
+                    global_standard_stream_dispatcher.emit(data)
 
         except (OSError, redis.exceptions.ConnectionError) as e:
             logger.error(f"print_logs: {e}")
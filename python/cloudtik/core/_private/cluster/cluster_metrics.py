@@ -10,8 +10,10 @@ from cloudtik.core._private.constants import CLOUDTIK_MEMORY_RESOURCE_UNIT_BYTES
     CLOUDTIK_MAX_RESOURCE_DEMAND_VECTOR_SIZE
 from cloudtik.core._private.cluster.resource_demand_scheduler import \
     NodeIP, ResourceDict
+from cloudtik.core._private.cluster.resource_demand_shapes import aggregate_demands, \
+    normalize_demand_shapes, expand_demand_shapes, clip_demand_shapes
 from cloudtik.core.scaling_policy import SCALING_INSTRUCTIONS_RESOURCE_DEMANDS, SCALING_INSTRUCTIONS_SCALING_TIME, \
-    SCALING_INSTRUCTIONS_RESOURCE_REQUESTS
+    SCALING_INSTRUCTIONS_RESOURCE_REQUESTS, SCALING_INSTRUCTIONS_RESOURCE_DEMAND_SHAPES
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +77,17 @@ def freq_of_dicts(
     return as_list
 
 
+def freq_of_shapes(shapes: List[Tuple[Dict, int]]) -> List[DictCount]:
+    """Count the bundles of a list of resource demand shapes.
+
+    The same as freq_of_dicts for the expanded bundles of the shapes.
+    """
+    freqs = Counter()
+    for bundle, count in shapes:
+        freqs[frozenset(bundle.items())] += count
+    return [(dict(as_set), count) for as_set, count in freqs.items()]
+
+
 class ClusterMetrics:
     """Container for cluster load metrics.
 
@@ -103,7 +116,8 @@ class ClusterMetrics:
         # Resource requests (on demand or autoscale)
         self.autoscaling_instructions = {}
         self.last_demanding_time = 0
-        self.resource_demands = []
+        # The resource demands as the shapes of identical bundles with counts
+        self.resource_demand_shapes = []
         self.last_requesting_time = 0
         self.resource_requests = []
 
@@ -136,20 +150,27 @@ class ClusterMetrics:
     def _update_resource_demands(
             self,
             autoscaling_instructions: Dict[str, Any]):
-        # resource_demands is a List[Dict[str, float]]
-        resource_demands = []
+        # The demands are the shapes of List[Tuple[Dict[str, float], int]]
+        # or the bundles of List[Dict[str, float]] from the scaling policies
+        resource_demand_shapes = []
         if autoscaling_instructions is not None:
             scaling_time = autoscaling_instructions.get(
                 SCALING_INSTRUCTIONS_SCALING_TIME)
+            _resource_demand_shapes = normalize_demand_shapes(
+                autoscaling_instructions.get(
+                    SCALING_INSTRUCTIONS_RESOURCE_DEMAND_SHAPES))
             _resource_demands = autoscaling_instructions.get(
                 SCALING_INSTRUCTIONS_RESOURCE_DEMANDS)
+            if _resource_demands:
+                _resource_demand_shapes = normalize_demand_shapes(
+                    aggregate_demands(_resource_demands) + _resource_demand_shapes)
 
             # Only the new demanding will be updated
-            if scaling_time > self.last_demanding_time and _resource_demands:
-                resource_demands = _resource_demands
+            if scaling_time > self.last_demanding_time and _resource_demand_shapes:
+                resource_demand_shapes = _resource_demand_shapes
                 self.last_demanding_time = scaling_time
 
-        self.resource_demands = resource_demands
+        self.resource_demand_shapes = resource_demand_shapes
 
     def _update_resource_requests(
             self, autoscaling_instructions: Dict[str, Any]) -> bool:
@@ -307,16 +328,20 @@ class ClusterMetrics:
         return resources_used, resources_total
 
     def get_resource_demands(self, clip=True):
+        return expand_demand_shapes(
+            self.get_resource_demand_shapes(clip=clip))
+
+    def get_resource_demand_shapes(self, clip=True):
         if clip:
             # Bound the total number of bundles to
             # CLOUDTIK_MAX_RESOURCE_DEMAND_VECTOR_SIZE. This guarantees the resource
             # demand scheduler bin packing algorithm takes a reasonable amount
             # of time to run.
-            return (
-                self.resource_demands[:CLOUDTIK_MAX_RESOURCE_DEMAND_VECTOR_SIZE]
-            )
+            return clip_demand_shapes(
+                self.resource_demand_shapes,
+                CLOUDTIK_MAX_RESOURCE_DEMAND_VECTOR_SIZE)
         else:
-            return self.resource_demands
+            return self.resource_demand_shapes
 
     def get_resource_requests(self):
         return self.resource_requests
@@ -356,8 +381,8 @@ class ClusterMetrics:
                 total = total_resources[key]
                 usage_dict[key] = (total - available_resources[key], total)
 
-        summarized_resource_demands = freq_of_dicts(
-            self.get_resource_demands(clip=False))
+        summarized_resource_demands = freq_of_shapes(
+            self.get_resource_demand_shapes(clip=False))
         summarized_resource_requests = freq_of_dicts(
             self.get_resource_requests())
 
@@ -13,6 +13,8 @@ import time
 import urllib
 import urllib.parse
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from shlex import quote
 from types import ModuleType
 from typing import Any, Dict, List, Optional, Tuple, Union
@@ -35,15 +37,18 @@ from cloudtik.core._private.cluster.cluster_dump import Archive, \
 from cloudtik.core._private.cluster.cluster_exec import exec_cluster
 from cloudtik.core._private.cluster.cluster_logging import print_logs
 from cloudtik.core._private.cluster.cluster_metrics import ClusterMetricsSummary
+from cloudtik.core._private.cluster.cluster_rsync import get_rsync_source_path, get_path_checksum, \
+    get_path_checksum_cmd, get_relay_path, get_relay_cmd, ssh_agent, distribute_in_tree
 from cloudtik.core._private.cluster.cluster_scaler import ClusterScalerSummary
 from cloudtik.core._private.cluster.cluster_tunnel_request import request_tunnel_to_head
 from cloudtik.core._private.cluster.cluster_utils import create_node_updater_for_exec
 from cloudtik.core._private.cluster.node_availability_tracker import NodeAvailabilitySummary
+from cloudtik.core._private.cluster.node_terminator import NodeTerminator
 from cloudtik.core._private.cluster.resource_demand_scheduler import ResourceDict, \
     get_node_type_counts, get_unfulfilled_for_bundles
 from cloudtik.core._private.constants import \
     CLOUDTIK_RESOURCE_REQUESTS, \
-    MAX_PARALLEL_SHUTDOWN_WORKERS, \
+    MAX_PARALLEL_SHUTDOWN_WORKERS, MAX_PARALLEL_RSYNC_NODES, \
     CLOUDTIK_REDIS_DEFAULT_PASSWORD, CLOUDTIK_CLUSTER_STATUS_STOPPED, CLOUDTIK_CLUSTER_STATUS_RUNNING, \
     CLOUDTIK_RUNTIME_NAME, CLOUDTIK_KV_NAMESPACE_HEALTHCHECK, SESSION_LATEST, CLOUDTIK_CLUSTER_STATUS_UNHEALTHY, \
     CLOUDTIK_BOOTSTRAP_CONFIG_FILE, CLOUDTIK_BOOTSTRAP_KEY_FILE
@@ -56,6 +61,7 @@ from cloudtik.core._private.runtime_factory import _get_runtime_cls
 from cloudtik.core._private.service_discovery.naming import get_cluster_head_hostname, _get_worker_node_hosts, \
     get_cluster_head_host
 from cloudtik.core._private.service_discovery.utils import ServiceRegisterException
+from cloudtik.core._private.metrics.metrics_codec import NodeMetricsDecoder
 from cloudtik.core._private.state import kv_store
 from cloudtik.core._private.state.control_state import ControlState
 from cloudtik.core._private.state.kv_store import kv_put, kv_initialize_with_address, kv_get
@@ -67,7 +73,7 @@ from cloudtik.core._private.util.core_utils import stop_process_tree, double_quo
 from cloudtik.core._private.util.redis_utils import validate_redis_address, get_address_to_use_or_die
 from cloudtik.core._private.utils import format_info_string, get_node_provider_of, get_provider_config, \
     get_cluster_name, get_available_node_types, get_runtime_types
-from cloudtik.core._private.utils import hash_runtime_conf, \
+from cloudtik.core._private.utils import hash_runtime_conf, get_file_hash_cache, \
     hash_launch_conf, get_proxy_process_file, get_safe_proxy_process, \
     get_head_working_ip, get_node_cluster_ip, is_use_internal_ip, \
     get_attach_command, is_alive_time, is_docker_enabled, get_proxy_bind_address_to_show, \
@@ -101,7 +107,7 @@ from cloudtik.core.tags import (
 
 logger = logging.getLogger(__name__)
 
-RUN_ENV_TYPES = ["auto", "host", "docker"]
+RUN_ENV_TYPES = constants.RUN_ENV_TYPES
 
 POLL_INTERVAL = 5
 
@@ -237,9 +243,12 @@ def create_or_update_cluster(
         override_workspace_name: Optional[str] = None,
         no_config_cache: bool = False,
         redirect_command_output: Optional[bool] = False,
-        use_login_shells: bool = True) -> Dict[str, Any]:
+        use_login_shells: bool = True,
+        rehash: bool = False) -> Dict[str, Any]:
     """Creates or updates an scaling cluster from a config json."""
     _cli_logger = call_context.cli_logger
+    if rehash:
+        get_file_hash_cache().clear()
 
     def handle_yaml_error(e):
         _cli_logger.error(
@@ -637,20 +646,22 @@ def teardown_cluster_nodes(
             "Terminating {}...".format(node_type),
             _numbered=("()", current_step, total_steps)):
         current_step += 1
-        with LogTimer("teardown_cluster: done."):
-            while remaining:
-                provider.terminate_nodes(remaining)
-
-                _cli_logger.print(
-                    "Requested {} {} to shut down.",
-                    cf.bold(len(remaining)), node_type,
-                    _tags=dict(interval="1s"))
+        if workers_only:
+            def list_nodes():
+                return provider.non_terminated_nodes({
+                    CLOUDTIK_TAG_NODE_KIND: NODE_KIND_WORKER
+                })
+        else:
+            def list_nodes():
+                return provider.non_terminated_nodes({})
 
-                time.sleep(POLL_INTERVAL)  # todo: interval should be a variable
-                head, remaining = remaining_nodes()
-                _cli_logger.print(
-                    "{} {} remaining after {} second(s).",
-                    cf.bold(len(remaining)), node_type, POLL_INTERVAL)
+        with LogTimer("teardown_cluster: done."):
+            # The workers launched in the meantime are also terminated
+            # unless a number of random workers are kept
+            NodeTerminator(provider, call_context).terminate(
+                remaining, list_nodes,
+                include_new_nodes=not keep_min_workers,
+                node_type=node_type)
             _cli_logger.print(cf.bold("No {} remaining."), node_type)
 
 
@@ -1000,12 +1011,23 @@ def get_or_create_head_node(
         # No need to pass in cluster_sync_files because we use this
         # hash to set up the head node
         config_for_runtime_hash = prepare_config_for_runtime_hash(provider, config)
+        file_hash_cache = get_file_hash_cache()
+        file_hash_cache.reset_stats()
+        hash_start_time = time.time()
         (runtime_hash,
          file_mounts_contents_hash,
          runtime_hash_for_node_types) = hash_runtime_conf(
             file_mounts=config_for_runtime_hash["file_mounts"],
             cluster_synced_files=None,
             extra_objs=config_for_runtime_hash)
+        hash_stats = file_hash_cache.get_stats()
+        _cli_logger.print(
+            "Hashed runtime config in {:.2f}s "
+            "({} files hashed with {} MB, {} files unchanged)",
+            time.time() - hash_start_time,
+            hash_stats["hashed_files"],
+            round(hash_stats["hashed_bytes"] / (1024 * 1024), 1),
+            hash_stats["cached_files"])
         # Even we don't need controller on head, we still need config and cluster keys on head
         # because head depends a lot on the cluster config file and cluster keys to do cluster
         # operations and connect to the worker.
@@ -1410,7 +1432,10 @@ def _rsync(
         node_ip: Optional[str] = None,
         all_nodes: bool = False,
         use_internal_ip: bool = False,
-        _runner: ModuleType = subprocess) -> None:
+        _runner: ModuleType = subprocess,
+        max_parallel: Optional[int] = None,
+        checksum: bool = True,
+        fan_out: Optional[int] = None) -> None:
     if bool(source) != bool(target):
         cli_logger.abort(
             "Expected either both a source and a target, or neither.")
@@ -1484,7 +1509,10 @@ def _rsync(
                 target=target,
                 down=False,
                 node_ip=None,
-                all_workers=all_nodes)
+                all_workers=all_nodes,
+                max_parallel=max_parallel,
+                checksum=checksum,
+                fan_out=fan_out)
     else:
         # for the cases that specified sync up or down with specific node
         # both source and target must be specified
@@ -1574,7 +1602,10 @@ def rsync_to_node_from_head(
         target: str,
         down: bool,
         node_ip: str = None,
-        all_workers: bool = False
+        all_workers: bool = False,
+        max_parallel: Optional[int] = None,
+        checksum: bool = True,
+        fan_out: Optional[int] = None
 ) -> None:
     """Exec the rsync on head command to do rsync with the target worker"""
     cmds = [
@@ -1596,6 +1627,12 @@ def rsync_to_node_from_head(
             cmds += ["--all-workers"]
         else:
             cmds += ["--no-all-workers"]
+        if max_parallel is not None:
+            cmds += ["--max-parallel={}".format(max_parallel)]
+        if not checksum:
+            cmds += ["--no-checksum"]
+        if fan_out is not None:
+            cmds += ["--fan-out={}".format(fan_out)]
 
     with_verbose_option(cmds, call_context)
     final_cmd = " ".join(cmds)
@@ -1612,7 +1649,10 @@ def rsync_node_on_head(
         target: str,
         down: bool,
         node_ip: str = None,
-        all_workers: bool = False):
+        all_workers: bool = False,
+        max_parallel: Optional[int] = None,
+        checksum: bool = True,
+        fan_out: Optional[int] = None):
     provider = get_node_provider_of(config)
 
     is_file_mount = False
@@ -1622,8 +1662,8 @@ def rsync_node_on_head(
                 is_file_mount = True
                 break
 
-    def rsync_to_node(node_id, source, target):
-        updater = create_node_updater_for_exec(
+    def get_updater(node_id, call_context):
+        return create_node_updater_for_exec(
             config=config,
             call_context=call_context,
             node_id=node_id,
@@ -1632,6 +1672,9 @@ def rsync_node_on_head(
             is_head_node=False,
             process_runner=subprocess,
             use_internal_ip=True)
+
+    def rsync_to_node(node_id, source, target, call_context, check_checksum=True):
+        updater = get_updater(node_id, call_context)
         if down:
             rsync = updater.rsync_down
         else:
@@ -1645,9 +1688,14 @@ def rsync_node_on_head(
                 # rsync up, expand user for source (on head) if it is not handled
                 source = os.path.expanduser(source)
 
+            if check_checksum and source_checksum and source_checksum == _get_node_checksum(
+                    updater, target):
+                call_context.cli_logger.print(
+                    "Skipped {} which is up to date.", node_id)
+                return
             # print rsync progress for single file rsync
-            if cli_logger.verbosity > 0:
-                call_context.set_output_redirected(False)
+            if (cli_logger.verbosity > 0
+                    and not call_context.is_output_redirected()):
                 call_context.set_rsync_silent(False)
             rsync(source, target, is_file_mount)
         else:
@@ -1661,8 +1709,170 @@ def rsync_node_on_head(
         if all_workers:
             nodes.extend(_get_worker_nodes(config))
 
-    for node_id in nodes:
-        rsync_to_node(node_id, source, target)
+    source_checksum = None
+    if checksum and not down and source and target:
+        source_path = get_rsync_source_path(os.path.expanduser(source))
+        if source_path:
+            source_checksum = get_path_checksum(source_path)
+
+    if max_parallel is None:
+        max_parallel = MAX_PARALLEL_RSYNC_NODES
+    elif max_parallel < 1:
+        raise ValueError(
+            "The max parallel must be at least 1: {}".format(max_parallel))
+    if fan_out is not None and fan_out < 1:
+        raise ValueError("The fan-out must be at least 1: {}".format(fan_out))
+    if fan_out is not None and len(nodes) > 1 and not down and source and target:
+        relay_path = get_relay_path(os.path.expanduser(source), target)
+        if relay_path is not None and _rsync_nodes_in_tree(
+                config, call_context, nodes,
+                get_updater=get_updater,
+                rsync_to_node=lambda node_id, call_context: rsync_to_node(
+                    node_id, source, target, call_context, check_checksum=False),
+                relay_path=relay_path,
+                source_checksum=source_checksum,
+                max_parallel=max_parallel,
+                fan_out=fan_out):
+            return
+
+    if len(nodes) <= 1 or max_parallel <= 1:
+        if cli_logger.verbosity > 0:
+            call_context.set_output_redirected(False)
+        for node_id in nodes:
+            rsync_to_node(node_id, source, target, call_context)
+        return
+
+    # The nodes are synced from head concurrently
+    start_time = time.time()
+
+    def rsync_node(node_id, call_context):
+        rsync_to_node(node_id, source, target, call_context)
+
+    succeeded, failures, skipped = run_in_parallel_on_nodes(
+        rsync_node,
+        call_context=call_context,
+        nodes=nodes,
+        max_workers=max_parallel)
+    cli_logger.print(
+        "Synced {} of {} nodes in {:.1f} second(s).",
+        succeeded, len(nodes), time.time() - start_time)
+    if failures:
+        raise RuntimeError(
+            "Failed to sync {} of {} nodes.".format(failures, len(nodes)))
+
+
+def _is_relay_available(nodes, get_node_updater, max_parallel):
+    def get_ssh_host(node_id):
+        try:
+            return get_node_updater(node_id).cmd_executor.get_ssh_host()
+        except Exception as e:
+            logger.debug(
+                "Failed to get the ssh host of node {}: {}".format(node_id, e))
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+        return all(
+            ssh_host is not None
+            for ssh_host in executor.map(get_ssh_host, nodes))
+
+
+def _rsync_nodes_in_tree(
+        config, call_context, nodes, get_updater, rsync_to_node,
+        relay_path, source_checksum, max_parallel, fan_out) -> bool:
+    """The head syncs the files to some nodes and the synced nodes relay the
+    files to the other nodes with the credentials of a local ssh agent
+    forwarded, each source syncing up to fan_out nodes at the same time.
+
+    Return False without syncing if the nodes cannot relay over ssh, so
+    that the nodes are synced from head.
+    """
+    path, is_dir = relay_path
+    start_time = time.time()
+
+    def get_node_updater(node_id):
+        return get_updater(node_id, call_context.new_call_context())
+
+    if not _is_relay_available(nodes, get_node_updater, max_parallel):
+        cli_logger.print(
+            "The nodes cannot relay the files over ssh. "
+            "Sync all the nodes from head.")
+        return False
+
+    with ExitStack() as stack:
+        ssh_private_key = config["auth"].get("ssh_private_key")
+        try:
+            ssh_agent_socket = stack.enter_context(ssh_agent(ssh_private_key))
+        except (OSError, subprocess.CalledProcessError, RuntimeError) as e:
+            cli_logger.print(
+                "Failed to start the ssh agent for relaying: {}. "
+                "Sync all the nodes from head.", str(e))
+            return False
+
+        # This is to ensure that the parallel SSH calls below do not mess with
+        # the users terminal.
+        output_redir = call_context.is_output_redirected()
+        call_context.set_output_redirected(True)
+        allow_interactive = call_context.does_allow_interactive()
+        call_context.set_allow_interactive(False)
+
+        try:
+            synced_nodes = set()
+            if source_checksum:
+                with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+                    node_checksums = executor.map(
+                        lambda node_id: _get_node_checksum(
+                            get_node_updater(node_id), path), nodes)
+                    synced_nodes = {
+                        node_id for node_id, node_checksum in zip(
+                            nodes, node_checksums)
+                        if node_checksum == source_checksum}
+                if synced_nodes:
+                    cli_logger.print(
+                        "Skipped {} nodes which are up to date.", len(synced_nodes))
+            nodes_to_sync = [
+                node_id for node_id in nodes if node_id not in synced_nodes]
+
+            def relay(source_node_id, node_id):
+                source_executor = get_node_updater(source_node_id).cmd_executor
+                target_executor = get_node_updater(node_id).cmd_executor
+                source_executor.run_with_ssh_agent(
+                    get_relay_cmd(source_executor, target_executor, path, is_dir),
+                    ssh_agent_socket)
+
+            def sync_from_head(node_id):
+                rsync_to_node(node_id, call_context.new_call_context())
+
+            succeeded, failures = distribute_in_tree(
+                nodes_to_sync,
+                synced_nodes=synced_nodes,
+                fan_out=fan_out,
+                max_workers=max_parallel,
+                sync_from_head=sync_from_head,
+                relay=relay)
+        finally:
+            call_context.set_output_redirected(output_redir)
+            call_context.set_allow_interactive(allow_interactive)
+
+    cli_logger.print(
+        "Synced {} of {} nodes in {:.1f} second(s) with fan-out {}.",
+        succeeded + len(synced_nodes), len(nodes),
+        time.time() - start_time, fan_out)
+    if failures:
+        raise RuntimeError(
+            "Failed to sync {} of {} nodes.".format(failures, len(nodes)))
+    return True
+
+
+def _get_node_checksum(updater, path):
+    try:
+        output = updater.cmd_executor.run(
+            get_path_checksum_cmd(path),
+            with_output=True, silent=True)
+    except Exception:
+        return None
+    if isinstance(output, bytes):
+        output = output.decode("utf-8")
+    return output.strip() if output else None
 
 
 def get_worker_cpus(config, provider):
@@ -4853,9 +5063,11 @@ def get_cluster_metrics(
         control_state.initialize_control_state(
             ip_address, port, redis_password)
         node_metrics_table = control_state.get_node_metrics_table()
-        return node_metrics_table.get_all().values()
+        node_metrics_base_table = control_state.get_node_metrics_base_table()
+        return list(NodeMetricsDecoder().decode_all(
+            node_metrics_table.iter_all(), node_metrics_base_table))
 
-    node_metrics_rows = request_tunnel_to_head(
+    node_metrics_list = request_tunnel_to_head(
         config=config,
         target_port=redis_port,
         on_head=on_head,
@@ -4863,7 +5075,7 @@ def get_cluster_metrics(
     )
 
     # Organize the node resource state
-    nodes_metrics = _get_nodes_metrics(node_metrics_rows)
+    nodes_metrics = _get_nodes_metrics(node_metrics_list)
     nodes_resource_metrics = get_nodes_resource_metrics(
         nodes_metrics
     )
@@ -4874,10 +5086,9 @@ def get_cluster_metrics(
     return resource_metrics
 
 
-def _get_nodes_metrics(node_metrics_rows):
+def _get_nodes_metrics(node_metrics_list):
     nodes_metrics = []
-    for node_metrics_row in node_metrics_rows:
-        node_metrics = json.loads(node_metrics_row)
+    for node_metrics in node_metrics_list:
         node_id = node_metrics[NODE_STATE_NODE_ID]
         node_ip = node_metrics[NODE_STATE_NODE_IP]
         if not node_id or not node_ip:
@@ -0,0 +1,255 @@
+import hashlib
+import logging
+import os
+import re
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from shlex import quote
+from typing import Optional, Tuple, Callable, List, Set
+
+logger = logging.getLogger(__name__)
+
+CHECKSUM_READ_BUFFER_SIZE = 1024 * 1024
+
+# The head as the source of the nodes to sync
+HEAD_SOURCE = ""
+
+# The ssh options of a node to reach the other nodes for relaying
+RELAY_SSH_OPTIONS = [
+    "-o", "StrictHostKeyChecking=no",
+    "-o", "UserKnownHostsFile=/dev/null",
+    "-o", "BatchMode=yes",
+    "-o", "LogLevel=ERROR",
+]
+
+
+def _get_file_checksum(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHECKSUM_READ_BUFFER_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _get_directory_checksum(path: str) -> str:
+    # The same as the output of the checksum command of a directory
+    files = []
+    for root, dirs, file_names in os.walk(path):
+        for file_name in file_names:
+            file_path = os.path.join(root, file_name)
+            if os.path.islink(file_path) or not os.path.isfile(file_path):
+                continue
+            relative_path = "./" + os.path.relpath(file_path, path)
+            files.append((os.fsencode(relative_path), file_path))
+    files.sort()
+
+    h = hashlib.sha256()
+    for relative_path, file_path in files:
+        h.update("{}  ".format(_get_file_checksum(file_path)).encode())
+        h.update(relative_path + b"\n")
+    return h.hexdigest()
+
+
+def get_rsync_source_path(source: str) -> Optional[str]:
+    """Return the path for the checksum of the rsync source or None if the
+    source is a directory to be synced as a subdirectory of the target."""
+    if os.path.isfile(source):
+        return source
+    if source.endswith("/."):
+        return source[:-2] or "/"
+    if source.endswith("/"):
+        return source
+    return None
+
+
+def get_path_checksum(path: str) -> Optional[str]:
+    """Get the checksum of a local file or the files of a local directory.
+    The checksum of a directory covers the relative path and the content of
+    each file."""
+    path = os.path.expanduser(path)
+    if os.path.isfile(path):
+        return _get_file_checksum(path)
+    if os.path.isdir(path):
+        return _get_directory_checksum(path)
+    return None
+
+
+def _quote_remote_path(path: str) -> str:
+    # Keep the home expanding by the remote shell
+    if path == "~":
+        return "~"
+    if path.startswith("~/"):
+        return "~/" + quote(path[2:])
+    return quote(path)
+
+
+def get_path_checksum_cmd(path: str) -> str:
+    """The command to print the checksum of a file or a directory on a node
+    which matches get_path_checksum. It prints nothing if the path doesn't
+    exist."""
+    quoted_path = _quote_remote_path(path.rstrip("/") or "/")
+    return (
+        "(if [ -f {path} ]; then sha256sum < {path} | cut -d ' ' -f 1; "
+        "elif [ -d {path} ]; then cd {path} && find . -type f -print0 "
+        "| LC_ALL=C sort -z | xargs -0 -r sha256sum "
+        "| sha256sum | cut -d ' ' -f 1; fi) 2>/dev/null || true").format(
+        path=quoted_path)
+
+
+def get_relay_path(source: str, target: str) -> Optional[Tuple[str, bool]]:
+    """Get the path on the nodes synced from the rsync source to the target
+    and whether it is a directory. The synced files at the path are relayed
+    to the other nodes. None if the source doesn't exist."""
+    if os.path.isdir(source):
+        target = target.rstrip("/") or "/"
+        if source.endswith("/.") or source.endswith("/"):
+            return target, True
+        return os.path.join(
+            target, os.path.basename(source.rstrip("/"))), True
+    if os.path.isfile(source):
+        if target.endswith("/"):
+            return os.path.join(target, os.path.basename(source)), False
+        return target, False
+    return None
+
+
+def get_relay_cmd(
+        source_executor, target_executor, path: str, is_dir: bool) -> str:
+    """The command to run on the host of the source node which streams the
+    files at the path on the source node to the same path on the target node.
+
+    The files are sent with tar through ssh to the target node with the
+    credentials of a forwarded ssh agent. The send and the receive commands
+    run in the container of the node if the node is a container.
+    """
+    if is_dir:
+        directory, name = path, "."
+        send_cmd = "cd {} && tar -cf - .".format(_quote_remote_path(directory))
+    else:
+        directory, name = os.path.split(path)
+        directory = directory or "/"
+        # Fails if the file is not there, for example synced into a directory
+        send_cmd = "cd {dir} && [ -f {name} ] && tar -cf - {name}".format(
+            dir=_quote_remote_path(directory), name=quote(name))
+    receive_cmd = "mkdir -p {dir} && cd {dir} && tar -xf -".format(
+        dir=_quote_remote_path(directory))
+
+    ssh_user, ssh_ip, ssh_port = target_executor.get_ssh_host()
+    ssh_cmd = ["ssh"] + RELAY_SSH_OPTIONS
+    if ssh_port:
+        ssh_cmd += ["-p", str(ssh_port)]
+    ssh_cmd += ["{}@{}".format(ssh_user, ssh_ip)]
+    relay_cmd = "set -o pipefail; {} | {} {}".format(
+        source_executor.with_node_cmd(send_cmd),
+        " ".join(quote(arg) for arg in ssh_cmd),
+        quote(target_executor.with_node_cmd(receive_cmd, with_input=True)))
+    return "bash -c {}".format(quote(relay_cmd))
+
+
+@contextmanager
+def ssh_agent(ssh_private_key: Optional[str]):
+    """Start a local ssh agent with the private key added to forward the
+    credentials to the relaying nodes. Yields the agent socket.
+
+    Raises RuntimeError if there is no private key, OSError if the ssh agent
+    is not installed or CalledProcessError if the key fails to be added."""
+    if not ssh_private_key:
+        raise RuntimeError("No ssh private key to forward.")
+    output = subprocess.check_output(
+        ["ssh-agent", "-s"], stderr=subprocess.DEVNULL).decode()
+    agent_env = dict(re.findall(
+        r"(SSH_AUTH_SOCK|SSH_AGENT_PID)=([^;\s]+);", output))
+    if "SSH_AUTH_SOCK" not in agent_env:
+        raise RuntimeError("Failed to start the ssh agent: {}".format(output))
+    env = dict(os.environ, **agent_env)
+    try:
+        subprocess.check_call(
+            ["ssh-add", "-q", os.path.expanduser(ssh_private_key)], env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        yield agent_env["SSH_AUTH_SOCK"]
+    finally:
+        subprocess.call(
+            ["ssh-agent", "-k"], env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _get_free_source(busy, fan_out):
+    free_source = None
+    for source, count in busy.items():
+        if count >= fan_out:
+            continue
+        # The least busy source with the synced nodes before the head
+        if free_source is None or count < busy[free_source] or (
+                count == busy[free_source] and free_source == HEAD_SOURCE):
+            free_source = source
+    return free_source
+
+
+def distribute_in_tree(
+        nodes: List[str],
+        synced_nodes: Set[str],
+        fan_out: int,
+        max_workers: int,
+        sync_from_head: Callable[[str], None],
+        relay: Callable[[str, str], None]) -> Tuple[int, int]:
+    """Sync the nodes from the head and the synced nodes in a tree.
+
+    Each source (the head or a synced node) syncs up to fan_out nodes at
+    the same time and a node becomes a source once it is synced, so that
+    the number of sources grows with the synced nodes. A node failed to
+    relay from a synced node is synced from the head.
+
+    Returns:
+        The number of the nodes synced and the number of the nodes failed.
+    """
+    if fan_out < 1:
+        raise ValueError("The fan-out must be at least 1: {}".format(fan_out))
+    if max_workers < 1:
+        raise ValueError(
+            "The max workers must be at least 1: {}".format(max_workers))
+    pending = deque(nodes)
+    busy = {HEAD_SOURCE: 0}
+    for node_id in synced_nodes:
+        busy[node_id] = 0
+
+    def sync_node(source, node_id):
+        if source != HEAD_SOURCE:
+            try:
+                relay(source, node_id)
+                return
+            except Exception as e:
+                logger.warning(
+                    "Failed to relay from {} to {}: {}. "
+                    "Sync from head instead.".format(source, node_id, e))
+        sync_from_head(node_id)
+
+    succeeded = 0
+    failures = 0
+    futures = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or futures:
+            while pending and len(futures) < max_workers:
+                source = _get_free_source(busy, fan_out)
+                if source is None:
+                    break
+                node_id = pending.popleft()
+                busy[source] += 1
+                futures[executor.submit(
+                    sync_node, source, node_id)] = (source, node_id)
+
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                source, node_id = futures.pop(future)
+                busy[source] -= 1
+                try:
+                    future.result()
+                except Exception as e:
+                    failures += 1
+                    logger.error(
+                        "Failed to sync node {}: {}".format(node_id, e))
+                    continue
+                succeeded += 1
+                busy[node_id] = 0
+    return succeeded, failures
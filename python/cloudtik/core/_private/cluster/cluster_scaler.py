@@ -43,10 +43,12 @@ from cloudtik.core._private.prometheus_metrics import ClusterPrometheusMetrics
 from cloudtik.core._private.node.node_updater import NodeUpdaterThread
 from cloudtik.core._private.cluster.node_launcher import NodeLauncher, LAUNCH_ARGS_QUORUM_ID, PendingLaunches, \
     LAUNCH_ARGS_SEQ_ID
+from cloudtik.core._private.cluster.node_state_index import NodeStateIndex
 from cloudtik.core._private.cluster.node_tracker import NodeTracker
+from cloudtik.core._private.cluster.resource_demand_shapes import DemandShape
 from cloudtik.core._private.cluster.resource_demand_scheduler import \
     get_bin_pack_residual, ResourceDemandScheduler, NodeType, NodeID, NodeIP, \
-    ResourceDict
+    ResourceDict, get_scheduling_fingerprint, BIN_PACKING_ENGINE_PYTHON
 from cloudtik.core._private.utils import validate_config, \
     hash_launch_conf, hash_runtime_conf, \
     format_info_string, get_commands_to_run, with_head_node_ip_environment_variables, \
@@ -87,9 +89,15 @@ class ClusterScalerSummary:
 class NonTerminatedNodes:
     """Class to extract and organize information on non-terminated nodes."""
 
-    def __init__(self, provider: NodeProvider):
-        # All non-terminated nodes
-        self.all_node_ids = provider.non_terminated_nodes({})
+    def __init__(self, provider: NodeProvider,
+                 node_state_index: Optional[NodeStateIndex] = None):
+        if node_state_index is not None:
+            # Apply only the delta of nodes to the persistent index
+            node_state_index.update()
+            self.all_node_ids = list(node_state_index.all_node_ids)
+        else:
+            # All non-terminated nodes
+            self.all_node_ids = provider.non_terminated_nodes({})
 
         # Managed worker nodes (node kind "worker"):
         self.worker_ids: List[NodeID] = []
@@ -97,7 +105,10 @@ class NonTerminatedNodes:
         self.head_id: Optional[NodeID] = None
 
         for node in self.all_node_ids:
-            node_kind = provider.node_tags(node)[CLOUDTIK_TAG_NODE_KIND]
+            if node_state_index is not None:
+                node_kind = node_state_index.get_node_kind(node)
+            else:
+                node_kind = provider.node_tags(node)[CLOUDTIK_TAG_NODE_KIND]
             if node_kind == NODE_KIND_WORKER:
                 self.worker_ids.append(node)
             elif node_kind == NODE_KIND_HEAD:
@@ -237,6 +248,13 @@ class ClusterScaler:
         self.quorum_manager = QuorumManager(
             self.config, self.provider)
 
+        # For incremental reconciliation, the persistent index of the
+        # non-terminated nodes and the last scheduling inputs and results
+        self.incremental_reconciliation = False
+        self.node_state_index: Optional[NodeStateIndex] = None
+        self.last_scheduling_fingerprint = None
+        self.last_scheduling_result = None
+
         self.reset(errors_fatal=True)
 
         self.max_failures = max_failures
@@ -412,10 +430,13 @@ class ClusterScaler:
 
         self.last_update_time = now
 
+        node_state_index = self._get_node_state_index()
+
         # Make a weak consistency snapshot of non_terminated_nodes and pending_launches
         with self.pending_launches.lock():
             # Query the provider to update the list of non-terminated nodes
-            self.non_terminated_nodes = NonTerminatedNodes(self.provider)
+            self.non_terminated_nodes = NonTerminatedNodes(
+                self.provider, node_state_index)
             self._pending_launches = self.pending_launches.counter()
             self._pending_seq_ids = self.pending_launches.seq_ids()
 
@@ -427,10 +448,14 @@ class ClusterScaler:
         self.prometheus_metrics.running_workers.set(num_workers)
 
         # Remove from LoadMetrics the ips unknown to the NodeProvider.
-        self.cluster_metrics.prune_active_ips(active_ips=[
-            self.provider.internal_ip(node_id)
-            for node_id in self.non_terminated_nodes.all_node_ids
-        ])
+        if node_state_index is not None:
+            active_ips = node_state_index.get_internal_ips()
+        else:
+            active_ips = [
+                self.provider.internal_ip(node_id)
+                for node_id in self.non_terminated_nodes.all_node_ids
+            ]
+        self.cluster_metrics.prune_active_ips(active_ips=active_ips)
 
         # Update status strings
         if CLOUDTIK_SCALER_PERIODIC_STATUS_LOG:
@@ -462,16 +487,8 @@ class ClusterScaler:
         #    from resource demands from #2
         # 4. The total resources of each node reported by runtime is used to update the node type
         #    resource information. (get_static_node_resources_by_ip)
-        # Dict[NodeType, int], List[ResourceDict]
-        to_launch, unfulfilled = (
-            self.resource_demand_scheduler.get_nodes_to_launch(
-                self.non_terminated_nodes.all_node_ids,
-                self._pending_launches,
-                self.cluster_metrics.get_resource_demands(),
-                self.cluster_metrics.get_resource_utilization(),
-                self.cluster_metrics.get_static_node_resources_by_ip(),
-                ensure_min_cluster_size=self.cluster_metrics.get_resource_requests(),
-                node_availability_summary=self.node_availability_tracker.summary(),))
+        # Dict[NodeType, int], List[DemandShape]
+        to_launch, unfulfilled = self._get_nodes_to_launch()
         self._report_pending_infeasible(unfulfilled)
 
         self.launch_required_nodes(to_launch)
@@ -481,6 +498,55 @@ class ClusterScaler:
         update_time = time.time() - self.last_update_time
         self.prometheus_metrics.update_time.observe(update_time)
 
+    def _get_node_state_index(self) -> Optional[NodeStateIndex]:
+        if not self.incremental_reconciliation:
+            self.node_state_index = None
+            return None
+        if self.node_state_index is None:
+            self.node_state_index = NodeStateIndex(self.provider)
+        else:
+            self.node_state_index.reset(self.provider)
+        return self.node_state_index
+
+    def _get_nodes_to_launch(self):
+        resource_demand_shapes = self.cluster_metrics.get_resource_demand_shapes()
+        unused_resources_by_ip = self.cluster_metrics.get_resource_utilization()
+        max_resources_by_ip = self.cluster_metrics.get_static_node_resources_by_ip()
+        ensure_min_cluster_size = self.cluster_metrics.get_resource_requests()
+        node_availability_summary = self.node_availability_tracker.summary()
+
+        scheduling_fingerprint = None
+        if self.incremental_reconciliation:
+            # Skip the scheduling if neither the demands nor the inventory changed
+            scheduling_fingerprint = get_scheduling_fingerprint(
+                self.non_terminated_nodes.all_node_ids,
+                self._pending_launches,
+                resource_demand_shapes,
+                unused_resources_by_ip,
+                max_resources_by_ip,
+                ensure_min_cluster_size,
+                node_availability_summary)
+            if (self.last_scheduling_fingerprint is not None
+                    and scheduling_fingerprint == self.last_scheduling_fingerprint):
+                self.prometheus_metrics.scheduling_skipped.inc()
+                to_launch, unfulfilled = self.last_scheduling_result
+                return copy.deepcopy(to_launch), unfulfilled
+
+        to_launch, unfulfilled = (
+            self.resource_demand_scheduler.get_nodes_to_launch_for_shapes(
+                self.non_terminated_nodes.all_node_ids,
+                self._pending_launches,
+                resource_demand_shapes,
+                unused_resources_by_ip,
+                max_resources_by_ip,
+                ensure_min_cluster_size=ensure_min_cluster_size,
+                node_availability_summary=node_availability_summary,))
+
+        if scheduling_fingerprint is not None:
+            self.last_scheduling_fingerprint = scheduling_fingerprint
+            self.last_scheduling_result = (copy.deepcopy(to_launch), unfulfilled)
+        return to_launch, unfulfilled
+
     def terminate_nodes_to_enforce_config_constraints(self, now: float):
         """Terminates nodes to enforce constraints defined by the autoscaling
         config.
@@ -622,7 +688,10 @@ class ClusterScaler:
         # Do runtime specific internal preparation for termination
         self.drain_nodes_gracefully(self.nodes_to_terminate)
         # Terminate the nodes
+        terminate_start_time = time.time()
         self.provider.terminate_nodes(self.nodes_to_terminate)
+        self.prometheus_metrics.worker_terminate_nodes_time.observe(
+            time.time() - terminate_start_time)
         for node in self.nodes_to_terminate:
             self.node_tracker.untrack(node)
             self.prometheus_metrics.stopped_nodes.inc()
@@ -630,6 +699,8 @@ class ClusterScaler:
         # Update internal node lists
         self.non_terminated_nodes.remove_terminating_nodes(
             self.nodes_to_terminate)
+        if self.node_state_index is not None:
+            self.node_state_index.remove_nodes(self.nodes_to_terminate)
         self.quorum_manager.remove_terminating_nodes(
             self.nodes_to_terminate)
 
@@ -774,19 +845,19 @@ class ClusterScaler:
                 num_recovering += 1
         self.prometheus_metrics.recovering_nodes.set(num_recovering)
 
-    def _report_pending_infeasible(self, unfulfilled: List[ResourceDict]):
+    def _report_pending_infeasible(self, unfulfilled: List[DemandShape]):
         """Emit event messages for infeasible or unschedulable tasks.
 
         This adds messages to the event summarizer for warning on infeasible
         or "cluster full" resource requests.
 
         Args:
-            unfulfilled: List of resource demands that would be unfulfilled
-                even after full scale-up.
+            unfulfilled: The shapes of resource demands that would be
+                unfulfilled even after full scale-up.
         """
         pending = []
         infeasible = []
-        for bundle in unfulfilled:
+        for bundle, _ in unfulfilled:
             placement_group = any(
                 "_group_" in k or k == "bundle" for k in bundle)
             if placement_group:
@@ -1009,6 +1080,12 @@ class ClusterScaler:
         self.available_node_types = self.config["available_node_types"]
         self._update_runtime_hashes(self.config)
 
+        self.incremental_reconciliation = get_config_option(
+            self.config, "incremental_reconciliation", False)
+        # The scheduling inputs of the new config are not the same
+        self.last_scheduling_fingerprint = None
+        self.last_scheduling_result = None
+
         upscaling_speed = get_config_option(self.config, "upscaling_speed")
         target_utilization_fraction = self.config.get(
             "target_utilization_fraction")
@@ -1019,16 +1096,19 @@ class ClusterScaler:
         else:
             upscaling_speed = 1.0
 
+        bin_packing_engine = get_config_option(
+            self.config, "bin_packing_engine", BIN_PACKING_ENGINE_PYTHON)
+
         if self.resource_demand_scheduler:
             self.resource_demand_scheduler.reset_config(
                 self.provider, self.available_node_types,
                 self.config["max_workers"], self.config["head_node_type"],
-                upscaling_speed)
+                upscaling_speed, bin_packing_engine)
         else:
             self.resource_demand_scheduler = ResourceDemandScheduler(
                 self.provider, self.available_node_types,
                 self.config["max_workers"], self.config["head_node_type"],
-                upscaling_speed)
+                upscaling_speed, bin_packing_engine)
 
         # Push the runtime config to redis encrypted with secrets
         self._publish_runtime_configs()
@@ -1048,6 +1128,7 @@ class ClusterScaler:
             "storage": config["provider"].get(PROVIDER_STORAGE_CONFIG_KEY, {}),
             "database": config["provider"].get(PROVIDER_DATABASE_CONFIG_KEY, {})
         }
+        hash_start_time = time.time()
         (new_runtime_hash,
          new_file_mounts_contents_hash,
          new_runtime_hash_for_node_types) = hash_runtime_conf(
@@ -1059,6 +1140,9 @@ class ClusterScaler:
             generate_node_types_runtime_hash=True,
             config=config
         )
+        logger.info(
+            "Hashed runtime config in {:.2f}s.".format(
+                time.time() - hash_start_time))
 
         self.runtime_hash = new_runtime_hash
         self.file_mounts_contents_hash = new_file_mounts_contents_hash
@@ -0,0 +1,113 @@
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+from cloudtik.core.node_provider import NodeProvider
+from cloudtik.core.tags import CLOUDTIK_TAG_NODE_KIND
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class NodeState:
+    """The attributes of a node which will not change for the life of the node."""
+    node_id: str
+    node_kind: Optional[str] = None
+    node_ip: Optional[str] = None
+
+
+@dataclass
+class NodeStateDelta:
+    added: List[str]
+    removed: List[str]
+
+    def __bool__(self) -> bool:
+        return bool(self.added) or bool(self.removed)
+
+
+class NodeStateIndex:
+    """A persistent index of the non-terminated nodes of the cluster.
+
+    The index is kept across the scaler update ticks. For each update,
+    the provider is queried once for the non-terminated nodes and only
+    the nodes added since last update will be queried for the tags and
+    internal ip. The nodes removed are dropped from the index. The node
+    kind and internal ip of a node don't change once the node is created
+    so they are served from the index for the known nodes.
+
+    Only the nodes added and removed are tracked. The scheduling reads only
+    the node kind and node type tags which don't change for a node, and the
+    heartbeats reach the scheduling through the cluster metrics.
+    """
+
+    def __init__(self, provider: NodeProvider):
+        self.provider = provider
+        self.node_states: Dict[str, NodeState] = {}
+        self.all_node_ids: List[str] = []
+
+    def reset(self, provider: NodeProvider):
+        if provider is not self.provider:
+            self.provider = provider
+            self.node_states = {}
+            self.all_node_ids = []
+
+    def update(self) -> NodeStateDelta:
+        all_node_ids = self.provider.non_terminated_nodes({})
+        node_id_set: Set[str] = set(all_node_ids)
+
+        removed = [node_id for node_id in self.node_states
+                   if node_id not in node_id_set]
+        for node_id in removed:
+            del self.node_states[node_id]
+
+        added = []
+        for node_id in all_node_ids:
+            node_state = self.node_states.get(node_id)
+            if node_state is None:
+                node_state = NodeState(node_id)
+                self._refresh_node_state(node_state)
+                self.node_states[node_id] = node_state
+                added.append(node_id)
+            elif node_state.node_ip is None:
+                # The ip may not be available for a pending node
+                node_state.node_ip = self.provider.internal_ip(node_id)
+
+        self.all_node_ids = all_node_ids
+        delta = NodeStateDelta(added, removed)
+        if delta:
+            logger.debug(
+                "Node state index: {} nodes added, {} nodes removed.".format(
+                    len(added), len(removed)))
+        return delta
+
+    def _refresh_node_state(self, node_state: NodeState):
+        node_id = node_state.node_id
+        tags = self.provider.node_tags(node_id)
+        node_state.node_kind = tags.get(CLOUDTIK_TAG_NODE_KIND)
+        node_state.node_ip = self.provider.internal_ip(node_id)
+
+    def remove_nodes(self, node_ids: List[str]):
+        node_ids = set(node_ids)
+        removed = False
+        for node_id in node_ids:
+            if self.node_states.pop(node_id, None) is not None:
+                removed = True
+        if removed:
+            self.all_node_ids = [
+                node_id for node_id in self.all_node_ids
+                if node_id not in node_ids]
+
+    def get_node_kind(self, node_id: str) -> Optional[str]:
+        node_state = self.node_states.get(node_id)
+        if node_state is None:
+            return self.provider.node_tags(node_id).get(CLOUDTIK_TAG_NODE_KIND)
+        return node_state.node_kind
+
+    def get_internal_ip(self, node_id: str) -> Optional[str]:
+        node_state = self.node_states.get(node_id)
+        if node_state is None or node_state.node_ip is None:
+            return self.provider.internal_ip(node_id)
+        return node_state.node_ip
+
+    def get_internal_ips(self) -> List[str]:
+        return [self.get_internal_ip(node_id) for node_id in self.all_node_ids]
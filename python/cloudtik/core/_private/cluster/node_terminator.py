@@ -0,0 +1,151 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from cloudtik.core._private.call_context import CallContext
+from cloudtik.core._private.cli_logger import cf
+from cloudtik.core._private.constants import MAX_PARALLEL_SHUTDOWN_WORKERS
+from cloudtik.core.node_provider import NodeProvider
+
+# The interval to check the nodes terminated which doubles till the max
+TERMINATION_POLL_INTERVAL_S = 1
+TERMINATION_MAX_POLL_INTERVAL_S = 5
+
+# The interval to request again for a node not terminated which doubles
+# for each request till the max
+TERMINATION_RETRY_INTERVAL_S = 10
+TERMINATION_MAX_RETRY_INTERVAL_S = 60
+
+# Abort if all the termination requests of these rounds in a row failed
+TERMINATION_MAX_FAILED_ROUNDS = 3
+
+
+class NodeTerminator:
+    """Terminate the nodes and wait until they are terminated.
+
+    The nodes are requested in chunks of the max number of nodes the provider
+    can terminate in one request (or split evenly to the workers if there is
+    no such limit), and the chunks are requested concurrently.
+    The nodes are checked with one list call for each poll with the poll
+    interval backing off, and a node still listed is requested again
+    with its own backoff.
+    """
+
+    def __init__(
+            self,
+            provider: NodeProvider,
+            call_context: CallContext,
+            max_workers: int = MAX_PARALLEL_SHUTDOWN_WORKERS,
+            poll_interval: float = TERMINATION_POLL_INTERVAL_S,
+            max_poll_interval: float = TERMINATION_MAX_POLL_INTERVAL_S,
+            retry_interval: float = TERMINATION_RETRY_INTERVAL_S,
+            max_retry_interval: float = TERMINATION_MAX_RETRY_INTERVAL_S):
+        self.provider = provider
+        self.call_context = call_context
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+
+    def terminate(
+            self,
+            nodes: List[str],
+            list_nodes: Callable[[], List[str]],
+            include_new_nodes: bool = False,
+            node_type: str = "nodes"):
+        """Terminate the nodes and wait for them.
+
+        Args:
+            nodes: The nodes to terminate.
+            list_nodes: The function returning the non-terminated nodes
+                in which the nodes to terminate are checked.
+            include_new_nodes: Whether to terminate the nodes listed by
+                list_nodes which are not in the nodes to terminate.
+            node_type: The name of the nodes for the messages.
+        """
+        _cli_logger = self.call_context.cli_logger
+        start_time = time.time()
+        # Keep the order of the nodes
+        pending = dict.fromkeys(nodes)
+        terminated = set()
+        # node id -> (number of requests, the time to request again)
+        requests = {}
+        poll_interval = self.poll_interval
+        failed_rounds = 0
+
+        while pending:
+            now = time.time()
+            to_request = [
+                node_id for node_id in pending
+                if node_id not in requests or requests[node_id][1] <= now]
+            if to_request:
+                if self._request_termination(to_request):
+                    failed_rounds = 0
+                else:
+                    failed_rounds += 1
+                    if failed_rounds >= TERMINATION_MAX_FAILED_ROUNDS:
+                        raise RuntimeError(
+                            "Failed to request the termination of {} {}.".format(
+                                len(to_request), node_type))
+                for node_id in to_request:
+                    num_requests = requests.get(node_id, (0, 0))[0]
+                    retry_interval = min(
+                        self.retry_interval * (2 ** num_requests),
+                        self.max_retry_interval)
+                    requests[node_id] = (num_requests + 1, now + retry_interval)
+                _cli_logger.print(
+                    "Requested {} {} to shut down.",
+                    cf.bold(len(to_request)), node_type)
+
+            time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, self.max_poll_interval)
+
+            non_terminated_nodes = list_nodes()
+            non_terminated = set(non_terminated_nodes)
+            for node_id in list(pending.keys()):
+                if node_id not in non_terminated:
+                    del pending[node_id]
+                    terminated.add(node_id)
+            if include_new_nodes:
+                for node_id in non_terminated_nodes:
+                    if node_id not in pending and node_id not in terminated:
+                        pending[node_id] = None
+            _cli_logger.print(
+                "{} {} terminated and {} remaining after {:.1f} second(s).",
+                cf.bold(len(terminated)), node_type, cf.bold(len(pending)),
+                time.time() - start_time)
+
+        _cli_logger.print(
+            "Terminated {} {} in {:.1f} second(s).",
+            cf.bold(len(terminated)), node_type, time.time() - start_time)
+
+    def _request_termination(self, nodes: List[str]) -> bool:
+        """Request the termination of the nodes in chunks.
+        Return False if all the chunks failed."""
+        max_terminate_nodes = self.provider.max_terminate_nodes
+        if max_terminate_nodes is None or max_terminate_nodes <= 0:
+            # The provider terminates the nodes of a request one by one,
+            # split the nodes evenly to the workers for concurrency
+            max_terminate_nodes = max(
+                math.ceil(len(nodes) / max(self.max_workers, 1)), 1)
+        chunks = [nodes[i:i + max_terminate_nodes]
+                  for i in range(0, len(nodes), max_terminate_nodes)]
+        if len(chunks) == 1:
+            results = [self._terminate_chunk(chunks[0])]
+        else:
+            max_workers = min(self.max_workers, len(chunks))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(self._terminate_chunk, chunks))
+        return any(results)
+
+    def _terminate_chunk(self, nodes: List[str]) -> bool:
+        try:
+            self.provider.terminate_nodes(nodes)
+            return True
+        except Exception as e:
+            # The nodes not terminated will be requested again
+            self.call_context.cli_logger.warning(
+                "Failed to request {} nodes to shut down: {}", len(nodes), str(e))
+            return False
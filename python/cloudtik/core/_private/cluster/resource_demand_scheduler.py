@@ -11,14 +11,18 @@ import copy
 import logging
 import collections
 import os
+from dataclasses import asdict
 from functools import partial
 from numbers import Real
 from typing import Dict, Any, Callable, List, Optional, Tuple
 
+from cloudtik.core._private.cluster import bin_packing
 from cloudtik.core._private.cluster.node_availability_tracker import NodeAvailabilitySummary
+from cloudtik.core._private.cluster.resource_demand_shapes import DemandShape, \
+    aggregate_demands, expand_demand_shapes
 from cloudtik.core._private.cluster.resource_utilization import UtilizationScorer, NodeResources, ResourceDemands, \
     UtilizationScore
-from cloudtik.core._private.util.core_utils import load_class
+from cloudtik.core._private.util.core_utils import load_class, get_json_object_hash
 from cloudtik.core.node_provider import NodeProvider
 from cloudtik.core._private.constants import CLOUDTIK_CONSERVE_GPU_NODES, to_memory_units, \
     CLOUDTIK_RESOURCE_UTILIZATION_SCORER_KEY
@@ -31,6 +35,11 @@ logger = logging.getLogger(__name__)
 # The minimum number of nodes to launch concurrently.
 UPSCALING_INITIAL_NUM_NODES = 5
 
+# The bin packing engines: "python" works on the lists of resource dicts,
+# "numpy" works on the resource matrices and makes the same decisions.
+BIN_PACKING_ENGINE_PYTHON = "python"
+BIN_PACKING_ENGINE_NUMPY = "numpy"
+
 # e.g., cpu_4_ondemand.
 NodeType = str
 
@@ -54,13 +63,15 @@ class ResourceDemandScheduler:
             node_types: Dict[NodeType, NodeTypeConfigDict],
             max_workers: int,
             head_node_type: NodeType,
-            upscaling_speed: float = 1) -> None:
+            upscaling_speed: float = 1,
+            bin_packing_engine: str = BIN_PACKING_ENGINE_PYTHON) -> None:
         self.provider = provider
         self.node_types = _convert_memory_unit(node_types)
         self.node_resource_updated = set()
         self.max_workers = max_workers
         self.head_node_type = head_node_type
         self.upscaling_speed = upscaling_speed
+        self.bin_packing_engine = bin_packing_engine
 
         utilization_scorer_func = os.environ.get(
             CLOUDTIK_RESOURCE_UTILIZATION_SCORER_KEY,
@@ -91,7 +102,8 @@ class ResourceDemandScheduler:
             node_types: Dict[NodeType, NodeTypeConfigDict],
             max_workers: int,
             head_node_type: NodeType,
-            upscaling_speed: float = 1) -> None:
+            upscaling_speed: float = 1,
+            bin_packing_engine: str = BIN_PACKING_ENGINE_PYTHON) -> None:
         """Updates the class state variables.
         """
         new_node_types = copy.deepcopy(node_types)
@@ -103,6 +115,7 @@ class ResourceDemandScheduler:
         self.max_workers = max_workers
         self.head_node_type = head_node_type
         self.upscaling_speed = upscaling_speed
+        self.bin_packing_engine = bin_packing_engine
 
     def is_feasible(self, bundle: ResourceDict) -> bool:
         for node_type, config in self.node_types.items():
@@ -125,6 +138,29 @@ class ResourceDemandScheduler:
     ) -> (Dict[NodeType, int], List[ResourceDict]):
         """Given resource demands, return node types to add to the cluster.
 
+        The same as get_nodes_to_launch_for_shapes with the resource demands
+        and the residual as the lists of resource bundles.
+        """
+        total_nodes_to_add, final_unfulfilled = \
+            self.get_nodes_to_launch_for_shapes(
+                nodes, launching_nodes, aggregate_demands(resource_demands),
+                unused_resources_by_ip, max_resources_by_ip,
+                ensure_min_cluster_size=ensure_min_cluster_size,
+                node_availability_summary=node_availability_summary)
+        return total_nodes_to_add, expand_demand_shapes(final_unfulfilled)
+
+    def get_nodes_to_launch_for_shapes(
+            self,
+            nodes: List[NodeID],
+            launching_nodes: Dict[NodeType, int],
+            resource_demand_shapes: List[DemandShape],
+            unused_resources_by_ip: Dict[NodeIP, ResourceDict],
+            max_resources_by_ip: Dict[NodeIP, ResourceDict],
+            ensure_min_cluster_size: List[ResourceDict],
+            node_availability_summary: NodeAvailabilitySummary,
+    ) -> (Dict[NodeType, int], List[DemandShape]):
+        """Given resource demand shapes, return node types to add to the cluster.
+
         This method:
             (1) calculates the resources present in the cluster.
             (2) calculates the remaining nodes to add to respect min_workers
@@ -136,7 +172,8 @@ class ResourceDemandScheduler:
         Args:
             nodes: List of existing nodes in the cluster.
             launching_nodes: Summary of node types currently being launched.
-            resource_demands: Vector of resource demands from the scheduler.
+            resource_demand_shapes: The resource demands from the scheduler
+                as the shapes of identical bundles with counts.
             unused_resources_by_ip: Mapping from ip to available resources.
             max_resources_by_ip: Mapping from ip to static node resources.
             ensure_min_cluster_size: Try to ensure the cluster can fit at least
@@ -145,12 +182,18 @@ class ResourceDemandScheduler:
             node_availability_summary: A snapshot of the current
                 NodeAvailabilitySummary.
         Returns:
-            Dict of count to add for each node type, and residual of resources
-            that still cannot be fulfilled.
+            Dict of count to add for each node type, and residual shapes of
+            resources that still cannot be fulfilled.
         """
         utilization_scorer = partial(
             self.utilization_scorer, node_availability_summary=node_availability_summary
         )
+        if (self.bin_packing_engine == BIN_PACKING_ENGINE_NUMPY
+                and self.utilization_scorer is _default_utilization_scorer):
+            # The numpy engine scores with the default utilization scorer
+            bin_packing_engine = BIN_PACKING_ENGINE_NUMPY
+        else:
+            bin_packing_engine = BIN_PACKING_ENGINE_PYTHON
         # Note: currently, we don't update the total resources from runtime
         # But we use the node types static memory information here
         # self._update_node_resources_from_runtime(nodes, max_resources_by_ip)
@@ -175,25 +218,28 @@ class ResourceDemandScheduler:
             _add_min_workers_nodes(
                 node_resources, node_type_counts, self.node_types,
                 self.max_workers, self.head_node_type, ensure_min_cluster_size,
-                utilization_scorer=utilization_scorer)
+                utilization_scorer=utilization_scorer,
+                bin_packing_engine=bin_packing_engine)
 
         # Add 1 to account for the head node.
         max_to_add = self.max_workers + 1 - sum(node_type_counts.values())
 
         # Step 3/4: add nodes for pending tasks
-        unfulfilled, _ = get_bin_pack_residual(
+        unfulfilled, _ = _get_bin_pack_residual(
             node_resources,
-            resource_demands)
+            resource_demand_shapes,
+            bin_packing_engine)
         if logger.isEnabledFor(logging.DEBUG):
             logger.debug(
-                "Resource demands: {}".format(resource_demands))
+                "Resource demands: {}".format(resource_demand_shapes))
             logger.debug(
                 "Unfulfilled demands: {}".format(unfulfilled))
 
-        nodes_to_add_based_on_demand, final_unfulfilled = get_nodes_for(
+        nodes_to_add_based_on_demand, final_unfulfilled = _get_nodes_for(
             self.node_types, node_type_counts, self.head_node_type,
             max_to_add, unfulfilled,
-            utilization_scorer=utilization_scorer)
+            utilization_scorer=utilization_scorer,
+            bin_packing_engine=bin_packing_engine)
 
         if logger.isEnabledFor(logging.DEBUG):
             logger.debug(
@@ -455,6 +501,7 @@ def _add_min_workers_nodes(
         head_node_type: NodeType, ensure_min_cluster_size: List[ResourceDict],
         utilization_scorer: Callable[
             [NodeResources, ResourceDemands, str], Optional[UtilizationScore]],
+        bin_packing_engine: str = BIN_PACKING_ENGINE_PYTHON,
 ) -> (List[ResourceDict], Dict[NodeType, int], Dict[NodeType, int]):
     """Updates resource demands to respect the min_workers and
     request_resources() constraints.
@@ -468,6 +515,7 @@ def _add_min_workers_nodes(
         utilization_scorer: A function that, given a node
             type, its resources, and resource demands, returns what its
             utilization would be.
+        bin_packing_engine: The bin packing engine to use.
     Returns:
         node_resources: The updated node resources after adding min_workers
             and request_resources() constraints per node type.
@@ -502,13 +550,15 @@ def _add_min_workers_nodes(
                 for _ in range(node_type_counts[node_type])
             ])
         # Get the unfulfilled to ensure min cluster size.
-        resource_requests_unfulfilled, _ = get_bin_pack_residual(
-            max_node_resources, ensure_min_cluster_size)
+        resource_requests_unfulfilled, _ = _get_bin_pack_residual(
+            max_node_resources, aggregate_demands(ensure_min_cluster_size),
+            bin_packing_engine)
         # Get the nodes to meet the unfulfilled.
-        nodes_to_add_request_resources, _ = get_nodes_for(
+        nodes_to_add_request_resources, _ = _get_nodes_for(
             node_types, node_type_counts, head_node_type,
             max_to_add, resource_requests_unfulfilled,
-            utilization_scorer=utilization_scorer,)
+            utilization_scorer=utilization_scorer,
+            bin_packing_engine=bin_packing_engine)
         # Update the resources, counts and total nodes to add.
         for node_type in nodes_to_add_request_resources:
             nodes_to_add = nodes_to_add_request_resources.get(node_type, 0)
@@ -526,6 +576,30 @@ def _add_min_workers_nodes(
     return node_resources, node_type_counts, total_nodes_to_add_dict
 
 
+def _get_nodes_for(
+        node_types: Dict[NodeType, NodeTypeConfigDict],
+        existing_nodes: Dict[NodeType, int],
+        head_node_type: NodeType,
+        max_to_add: int,
+        demand_shapes: List[DemandShape],
+        utilization_scorer: Callable[
+            [NodeResources, ResourceDemands, str], Optional[UtilizationScore]],
+        bin_packing_engine: str,
+) -> (Dict[NodeType, int], List[DemandShape]):
+    # The numpy engine is only used with the default utilization scorer
+    if bin_packing_engine == BIN_PACKING_ENGINE_NUMPY:
+        result = bin_packing.get_nodes_for_shapes(
+            node_types, existing_nodes, head_node_type, max_to_add,
+            demand_shapes)
+        if result is not None:
+            return result
+    nodes_to_add, residual = get_nodes_for(
+        node_types, existing_nodes, head_node_type, max_to_add,
+        expand_demand_shapes(demand_shapes),
+        utilization_scorer=utilization_scorer)
+    return nodes_to_add, aggregate_demands(residual)
+
+
 def get_nodes_for(
         node_types: Dict[NodeType, NodeTypeConfigDict],
         existing_nodes: Dict[NodeType, int],
@@ -672,6 +746,21 @@ def _default_utilization_scorer(
     return _utilization_score(node_resources, resources)
 
 
+def _get_bin_pack_residual(
+        node_resources: List[ResourceDict],
+        demand_shapes: List[DemandShape],
+        bin_packing_engine: str,
+) -> (List[DemandShape], List[ResourceDict]):
+    if bin_packing_engine == BIN_PACKING_ENGINE_NUMPY:
+        result = bin_packing.get_bin_pack_residual_for_shapes(
+            node_resources, demand_shapes)
+        if result is not None:
+            return result
+    unfulfilled, nodes = get_bin_pack_residual(
+        node_resources, expand_demand_shapes(demand_shapes))
+    return aggregate_demands(unfulfilled), nodes
+
+
 def get_bin_pack_residual(
         node_resources: List[ResourceDict],
         resource_demands: List[ResourceDict],
@@ -779,6 +868,30 @@ def get_node_type_counts(
     return node_type_counts
 
 
+def get_scheduling_fingerprint(
+        nodes: List[NodeID],
+        launching_nodes: Dict[NodeType, int],
+        resource_demand_shapes: List[DemandShape],
+        unused_resources_by_ip: Dict[NodeIP, ResourceDict],
+        max_resources_by_ip: Dict[NodeIP, ResourceDict],
+        ensure_min_cluster_size: List[ResourceDict],
+        node_availability_summary: NodeAvailabilitySummary) -> str:
+    """Returns the hash of all the inputs of get_nodes_to_launch.
+
+    The scheduling result will be the same for the same fingerprint
+    as long as the scheduler config is not changed.
+    """
+    return get_json_object_hash([
+        sorted(str(node_id) for node_id in nodes),
+        launching_nodes,
+        resource_demand_shapes,
+        unused_resources_by_ip,
+        max_resources_by_ip,
+        ensure_min_cluster_size,
+        asdict(node_availability_summary),
+    ])
+
+
 def get_unfulfilled_for_bundles(
         bundles: List[ResourceDict], node_types, node_type_counts):
     max_node_resources = []
@@ -0,0 +1,82 @@
+"""The resource demands in the compact form of shapes and counts.
+
+A resource demand shape is a pair of a resource bundle and the number of
+the identical bundles, for example ({"CPU": 4}, 100) instead of 100 dicts
+of {"CPU": 4}. A list of shapes keeps the order of the bundles: expanding
+the shapes in order gives the list of bundles.
+"""
+from numbers import Real
+from typing import Dict, List, Optional, Tuple
+
+# e.g., ({"CPU": 4}, 100).
+DemandShape = Tuple[Dict[str, Real], int]
+
+
+def _get_shape_key(bundle):
+    return tuple(sorted(bundle.items()))
+
+
+def aggregate_demands(bundles: List[Dict[str, Real]]) -> List[DemandShape]:
+    """Collapse the consecutive identical bundles into shapes."""
+    shapes = []
+    last_key = None
+    for bundle in bundles:
+        key = _get_shape_key(bundle)
+        if shapes and key == last_key:
+            shapes[-1] = (shapes[-1][0], shapes[-1][1] + 1)
+        else:
+            shapes.append((bundle, 1))
+            last_key = key
+    return shapes
+
+
+def normalize_demand_shapes(shapes) -> List[DemandShape]:
+    """Merge the consecutive identical shapes and remove the empty counts.
+
+    The shapes loaded from JSON are lists which are converted to tuples.
+    """
+    normalized = []
+    last_key = None
+    for bundle, count in shapes or []:
+        count = int(count)
+        if count <= 0:
+            continue
+        key = _get_shape_key(bundle)
+        if normalized and key == last_key:
+            normalized[-1] = (normalized[-1][0], normalized[-1][1] + count)
+        else:
+            normalized.append((bundle, count))
+            last_key = key
+    return normalized
+
+
+def expand_demand_shapes(
+        shapes: List[DemandShape],
+        limit: Optional[int] = None) -> List[Dict[str, Real]]:
+    """Expand the shapes to the list of bundles up to the limit."""
+    bundles = []
+    for bundle, count in shapes:
+        if limit is not None:
+            count = min(count, limit - len(bundles))
+            if count <= 0:
+                break
+        bundles += [dict(bundle) for _ in range(count)]
+    return bundles
+
+
+def clip_demand_shapes(
+        shapes: List[DemandShape], limit: int) -> List[DemandShape]:
+    """Return the shapes of the first limit number of bundles."""
+    clipped = []
+    remaining = limit
+    for bundle, count in shapes:
+        if remaining <= 0:
+            break
+        count = min(count, remaining)
+        clipped.append((bundle, count))
+        remaining -= count
+    return clipped
+
+
+def count_demands(shapes: List[DemandShape]) -> int:
+    return sum(count for _, count in shapes)
@@ -1,4 +1,3 @@
-import json
 import logging
 from typing import Any, Dict, Optional
 import time
@@ -6,6 +5,7 @@ import math
 
 from cloudtik.core import tags
 from cloudtik.core._private import constants
+from cloudtik.core._private.metrics.metrics_codec import NodeMetricsDecoder
 from cloudtik.core._private.state.control_state import ControlState
 from cloudtik.core._private.state.state_utils import NODE_STATE_NODE_ID, NODE_STATE_NODE_IP, NODE_STATE_NODE_KIND, \
     NODE_STATE_TIME, NODE_STATE_NODE_TYPE
@@ -13,9 +13,9 @@ from cloudtik.core._private.util.core_utils import get_list_for_update
 from cloudtik.core._private.utils import \
     convert_nodes_to_cpus, convert_nodes_to_memory, get_resource_requests_for_cpu, \
     _sum_min_workers, get_available_node_types, get_head_node_type, _get_scaling_config, _get_min_workers, \
-    get_resource_requests_for, convert_nodes_to_resource, get_resource_demands_for
+    get_resource_requests_for, convert_nodes_to_resource, get_resource_demand_shapes_for
 from cloudtik.core.scaling_policy import ScalingPolicy, ScalingState, SCALING_INSTRUCTIONS_SCALING_TIME, \
-    SCALING_INSTRUCTIONS_RESOURCE_DEMANDS, SCALING_INSTRUCTIONS_RESOURCE_REQUESTS, \
+    SCALING_INSTRUCTIONS_RESOURCE_DEMAND_SHAPES, SCALING_INSTRUCTIONS_RESOURCE_REQUESTS, \
     SCALING_NODE_STATE_TOTAL_RESOURCES, SCALING_NODE_STATE_AVAILABLE_RESOURCES, \
     SCALING_NODE_STATE_RESOURCE_LOAD
 
@@ -39,6 +39,9 @@ SCALING_WITH_TIME_PERIODIC_DAILY = "daily"
 SCALING_WITH_TIME_PERIODIC_WEEKLY = "weekly"
 SCALING_WITH_TIME_PERIODIC_MONTHLY = "monthly"
 
+# The interval to delete the node metrics keyframes of the nodes which are gone
+NODE_METRICS_BASE_CLEANUP_INTERVAL_S = 300
+
 
 class ScalingWithResources(ScalingPolicy):
     def __init__(
@@ -56,6 +59,9 @@ class ScalingWithResources(ScalingPolicy):
             head_host,
             constants.CLOUDTIK_DEFAULT_PORT,
             constants.CLOUDTIK_REDIS_DEFAULT_PASSWORD)
+        # Keep the keyframes of the nodes across the updates
+        self.node_metrics_decoder = NodeMetricsDecoder()
+        self.last_base_cleanup_time = time.time()
 
         self.in_use_cpu_load_threshold = SCALING_WITH_LOAD_IN_USE_CPU_LOAD_THRESHOLD_DEFAULT
         self._reset_resources_config()
@@ -156,17 +162,41 @@ class ScalingWithResources(ScalingPolicy):
         return node_resource_states, lost_nodes
 
     def _get_all_node_metrics(self, node_metrics_table):
-        node_metrics_rows = node_metrics_table.get_all().values()
+        # Process the rows as streamed from the shards
         node_metrics_list = []
-        for node_metrics_as_json in node_metrics_rows:
-            node_metrics = json.loads(node_metrics_as_json)
+        live_nodes = set()
+        now = time.time()
+        node_metrics_base_table = self.control_state.get_node_metrics_base_table()
+        for node_metrics in self.node_metrics_decoder.decode_all(
+                node_metrics_table.iter_all(), node_metrics_base_table):
+            last_metrics_time = node_metrics.get(NODE_STATE_TIME, 0)
+            if now - last_metrics_time < constants.CLOUDTIK_HEARTBEAT_TIMEOUT_S:
+                live_nodes.add(node_metrics[NODE_STATE_NODE_ID])
             # filter out the head node
             if node_metrics[NODE_STATE_NODE_KIND] == tags.NODE_KIND_HEAD:
                 continue
 
             node_metrics_list.append(node_metrics)
+
+        if now - self.last_base_cleanup_time >= NODE_METRICS_BASE_CLEANUP_INTERVAL_S:
+            self.last_base_cleanup_time = now
+            self._delete_gone_node_metrics_bases(
+                node_metrics_base_table, live_nodes, now)
         return node_metrics_list
 
+    def _delete_gone_node_metrics_bases(self, node_metrics_base_table, live_nodes, now):
+        try:
+            num_deleted = self.node_metrics_decoder.delete_gone_bases(
+                node_metrics_base_table, live_nodes,
+                now - constants.CLOUDTIK_HEARTBEAT_TIMEOUT_S)
+            if num_deleted:
+                logger.debug(
+                    "Deleted the node metrics keyframes of {} nodes.".format(
+                        num_deleted))
+        except Exception as e:
+            logger.warning(
+                "Failed to delete the node metrics keyframes: {}".format(e))
+
 
 class ScalingWithLoad(ScalingWithResources):
     def __init__(
@@ -255,7 +285,7 @@ class ScalingWithLoad(ScalingWithResources):
 
     def _get_autoscaling_instructions(self, node_metrics_list):
         autoscaling_instructions = {}
-        resource_demands = []
+        resource_demand_shapes = []
 
         # Use the following information to make the decisions
         cluster_metrics = self._get_cluster_metrics(node_metrics_list)
@@ -267,9 +297,8 @@ class ScalingWithLoad(ScalingWithResources):
             resource_requesting = self._need_more_resources(cluster_metrics)
             if resource_requesting:
                 for resource_id, resource_amount in resource_requesting.items():
-                    resource_demands_for_resource = get_resource_demands_for(
+                    resource_demand_shapes += get_resource_demand_shapes_for(
                         resource_amount, resource_id, self.config)
-                    resource_demands += resource_demands_for_resource
                     self._log_scaling(resource_id, resource_amount, cluster_metrics)
 
                 self.last_resource_demands_time = self.last_state_time
@@ -282,10 +311,11 @@ class ScalingWithLoad(ScalingWithResources):
                 }
 
         autoscaling_instructions[SCALING_INSTRUCTIONS_SCALING_TIME] = self.last_state_time
-        autoscaling_instructions[SCALING_INSTRUCTIONS_RESOURCE_DEMANDS] = resource_demands
-        if len(resource_demands) > 0 and logger.isEnabledFor(logging.DEBUG):
+        autoscaling_instructions[
+            SCALING_INSTRUCTIONS_RESOURCE_DEMAND_SHAPES] = resource_demand_shapes
+        if len(resource_demand_shapes) > 0 and logger.isEnabledFor(logging.DEBUG):
             logger.debug(
-                "Resource demands: {}".format(resource_demands))
+                "Resource demands: {}".format(resource_demand_shapes))
 
         return autoscaling_instructions
 
@@ -660,12 +690,12 @@ class ScalingByNodeType(ScalingWithResources):
             self, autoscaling_instructions, autoscaling_instructions_of_node_type):
         if not autoscaling_instructions_of_node_type:
             return
-        resource_demands_to_add = autoscaling_instructions_of_node_type.get(
-            SCALING_INSTRUCTIONS_RESOURCE_DEMANDS)
-        if resource_demands_to_add:
-            resource_demands = get_list_for_update(
-                autoscaling_instructions, SCALING_INSTRUCTIONS_RESOURCE_DEMANDS)
-            resource_demands += resource_demands_to_add
+        resource_demand_shapes_to_add = autoscaling_instructions_of_node_type.get(
+            SCALING_INSTRUCTIONS_RESOURCE_DEMAND_SHAPES)
+        if resource_demand_shapes_to_add:
+            resource_demand_shapes = get_list_for_update(
+                autoscaling_instructions, SCALING_INSTRUCTIONS_RESOURCE_DEMAND_SHAPES)
+            resource_demand_shapes += resource_demand_shapes_to_add
         resource_requests_to_add = autoscaling_instructions_of_node_type.get(
             SCALING_INSTRUCTIONS_RESOURCE_REQUESTS)
         if resource_requests_to_add:
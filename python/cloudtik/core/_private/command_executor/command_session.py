@@ -0,0 +1,113 @@
+import logging
+import subprocess
+import uuid
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+COMMAND_SESSION_EXIT_MARKER = "__CLOUDTIK_COMMAND_EXIT_"
+COMMAND_SESSION_CLOSE_TIMEOUT_S = 5
+
+# The warnings of an interactive bash without a terminal
+NO_TERMINAL_WARNINGS = [
+    b"bash: cannot set terminal process group",
+    b"bash: no job control in this shell",
+]
+
+
+class CommandSessionError(RuntimeError):
+    pass
+
+
+class CommandSession:
+    """A long-lived remote shell which runs a stream of commands one after
+    another and gets the exit code and the output of each command.
+
+    Each command runs in a subshell with the stdin from /dev/null and the
+    stderr merged into the stdout. The end of a command is marked by a
+    unique line with its exit code.
+    """
+
+    def __init__(self, session_cmd: List[str]):
+        self.session_cmd = session_cmd
+        self.process = None
+
+    def start(self):
+        self.process = subprocess.Popen(
+            self.session_cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT)
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def run(
+            self, cmd: str,
+            output_file=None,
+            with_output: bool = False) -> Tuple[int, Optional[bytes]]:
+        """Run the command in the session and return the exit code and the
+        output if with_output. The output is also written to the output file
+        as it comes if the output file is not None."""
+        if not self.is_alive():
+            raise CommandSessionError("The command session is not running.")
+
+        marker = "{}{}_".format(
+            COMMAND_SESSION_EXIT_MARKER, uuid.uuid4().hex).encode()
+        # The newline before the marker ends the last line without a newline
+        script = "( {}\n) </dev/null 2>&1; printf '\\n%s%d\\n' {} $?\n".format(
+            cmd, marker.decode())
+        try:
+            self.process.stdin.write(script.encode())
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            self.close()
+            raise CommandSessionError(
+                "Failed to write to the command session: {}".format(e))
+
+        output = [] if with_output else None
+
+        def write_output(data):
+            for warning in NO_TERMINAL_WARNINGS:
+                if data.startswith(warning):
+                    return
+            if output is not None:
+                output.append(data)
+            if output_file is not None:
+                output_file.write(data.decode("utf-8", errors="replace"))
+
+        # Hold one line back to remove the newline added before the marker
+        pending = None
+        while True:
+            line = self.process.stdout.readline()
+            if not line:
+                self.close()
+                raise CommandSessionError(
+                    "The command session exited unexpectedly.")
+            if line.startswith(marker):
+                exit_code = int(line[len(marker):].strip())
+                if pending is not None and pending != b"\n":
+                    write_output(pending[:-1])
+                break
+            if pending is not None:
+                write_output(pending)
+            pending = line
+
+        if output_file is not None:
+            output_file.flush()
+        return exit_code, b"".join(output) if output is not None else None
+
+    def close(self):
+        if self.process is None:
+            return
+        process = self.process
+        self.process = None
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=COMMAND_SESSION_CLOSE_TIMEOUT_S)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
@@ -2,6 +2,7 @@ from typing import Dict, List
 import json
 import logging
 import os
+from shlex import quote
 
 from cloudtik.core._private.command_executor.command_executor import _with_environment_variables, _with_interactive, \
     _with_shutdown
@@ -221,6 +222,20 @@ class DockerCommandExecutor(CommandExecutor):
         return inner_str + " {} exec -it {} /bin/bash\n".format(
             self.get_docker_cmd(), self.container_name)
 
+    def with_node_cmd(self, cmd, with_input=False):
+        return "{docker_cmd} exec {interactive}{container} /bin/bash -c {cmd}".format(
+            docker_cmd=self.get_docker_cmd(),
+            interactive="-i " if with_input else "",
+            container=self.container_name,
+            cmd=quote(cmd))
+
+    def get_ssh_host(self):
+        return self.host_command_executor.get_ssh_host()
+
+    def run_with_ssh_agent(self, cmd, ssh_agent_socket):
+        return self.host_command_executor.run_with_ssh_agent(
+            cmd, ssh_agent_socket)
+
     def get_docker_cmd(self):
         return get_docker_cmd(self.docker_cmd, self.docker_with_sudo)
 
@@ -542,14 +557,25 @@ class DockerCommandExecutor(CommandExecutor):
         return ["{}/{}".format(mount_point, data_disks) for data_disks in data_disks]
 
     def _with_docker_exec(self, cmd, cmd_to_print=None):
+        # There is no terminal for docker exec in a command session
+        with_interactive = self.call_context.is_using_login_shells() and (
+            not self._in_command_session())
         cmd = with_docker_exec(
             [cmd],
             container_name=self.container_name,
-            with_interactive=self.call_context.is_using_login_shells(),
+            with_interactive=with_interactive,
             docker_cmd=self.get_docker_cmd())[0]
         cmd_to_print = with_docker_exec(
             [cmd_to_print],
             container_name=self.container_name,
-            with_interactive=self.call_context.is_using_login_shells(),
+            with_interactive=with_interactive,
             docker_cmd=self.get_docker_cmd())[0] if cmd_to_print else None
         return cmd, cmd_to_print
+
+    def _in_command_session(self):
+        in_command_session = getattr(
+            self.host_command_executor, "in_command_session", None)
+        return in_command_session is not None and in_command_session()
+
+    def command_session(self):
+        return self.host_command_executor.command_session()
@@ -103,29 +103,35 @@ class HostCommandExecutor(CommandExecutor):
             else:
                 return self.process_runner.check_output(final_cmd)
         except subprocess.CalledProcessError as e:
-            joined_cmd = " ".join(final_cmd if cmd_to_print is None else cmd_to_print)
-            if (not self.call_context.is_using_login_shells()) or (
-                    self.call_context.is_call_from_api()):
-                raise ProcessRunnerError(
-                    "Command failed",
-                    "ssh_command_failed",
-                    code=e.returncode,
-                    command=joined_cmd,
-                    output=e.output)
-
-            if exit_on_fail:
-                msg = "Command failed"
-                if self.cli_logger.verbosity > 0:
-                    msg += ":\n\n  {}\n".format(joined_cmd)
-                else:
-                    msg += ". Use -v for more details.".format(joined_cmd)
-                raise click.ClickException(
-                    msg) from None
+            self._handle_command_failed(
+                e, final_cmd, exit_on_fail, cmd_to_print=cmd_to_print)
+
+    def _handle_command_failed(
+            self, e, final_cmd, exit_on_fail, cmd_to_print=None):
+        """Raise the error of the command failed with the exception."""
+        joined_cmd = " ".join(final_cmd if cmd_to_print is None else cmd_to_print)
+        if (not self.call_context.is_using_login_shells()) or (
+                self.call_context.is_call_from_api()):
+            raise ProcessRunnerError(
+                "Command failed",
+                "ssh_command_failed",
+                code=e.returncode,
+                command=joined_cmd,
+                output=e.output)
+
+        if exit_on_fail:
+            msg = "Command failed"
+            if self.cli_logger.verbosity > 0:
+                msg += ":\n\n  {}\n".format(joined_cmd)
             else:
-                fail_msg = "SSH command failed."
-                if self.call_context.is_output_redirected():
-                    fail_msg += " See above for the output from the failure."
-                raise click.ClickException(fail_msg) from None
+                msg += ". Use -v for more details.".format(joined_cmd)
+            raise click.ClickException(
+                msg) from None
+        else:
+            fail_msg = "SSH command failed."
+            if self.call_context.is_output_redirected():
+                fail_msg += " See above for the output from the failure."
+            raise click.ClickException(fail_msg) from None
 
     def _create_rsync_filter_args(self, options):
         rsync_excludes = options.get("rsync_exclude") or []
@@ -1,19 +1,24 @@
 import copy
+from contextlib import contextmanager
 from getpass import getuser
 from typing import Dict
 import hashlib
 import logging
 import os
 import subprocess
+import sys
 import time
 
 from cloudtik.core._private.command_executor.command_executor \
     import _with_shutdown, _with_environment_variables, _with_interactive
+from cloudtik.core._private.command_executor.command_session import CommandSession, \
+    CommandSessionError
 from cloudtik.core._private.command_executor.host_command_executor import HostCommandExecutor
 from cloudtik.core._private.constants import \
     CLOUDTIK_NODE_START_WAIT_S
 from cloudtik.core._private.util.core_utils import get_cloudtik_temp_dir
 from cloudtik.core._private.log_timer import LogTimer
+from cloudtik.core._private.subprocess_output_util import get_output_redirected_file
 
 from cloudtik.core._private.cli_logger import cf
 
@@ -100,6 +105,7 @@ class SSHCommandExecutor(HostCommandExecutor):
             ssh_port=self.ssh_port,
             control_path=self.ssh_control_path,
             **self.ssh_extra_options)
+        self._command_session = None
         if self.ssh_ip:
             self._init_ssh_control_path()
 
@@ -167,6 +173,14 @@ class SSHCommandExecutor(HostCommandExecutor):
 
         self._set_ssh_ip_if_required()
 
+        if (self._command_session is not None and cmd
+                and not port_forward and not shutdown_after_run
+                and not ssh_options_override_ssh_key):
+            return self._run_in_session(
+                cmd, with_output, exit_on_fail,
+                environment_variables=environment_variables,
+                silent=silent, cmd_to_print=cmd_to_print)
+
         if self.call_context.is_using_login_shells():
             ssh = ["ssh", "-tt"]
         else:
@@ -222,6 +236,77 @@ class SSHCommandExecutor(HostCommandExecutor):
                 final_cmd, with_output, exit_on_fail,
                 silent=silent, cmd_to_print=final_cmd_to_print)
 
+    def in_command_session(self):
+        return self._command_session is not None
+
+    @contextmanager
+    def command_session(self):
+        """Run the commands in the context through one ssh process with a
+        long-lived remote shell instead of one ssh process for each."""
+        if self._command_session is not None or (
+                self.process_runner is not subprocess):
+            yield
+            return
+
+        self._set_ssh_ip_if_required()
+        session_cmd = ["ssh"] + self.ssh_options.to_ssh_options_list() + [
+            "{}@{}".format(self.ssh_user, self.ssh_ip), "bash -s"]
+        command_session = CommandSession(session_cmd)
+        try:
+            command_session.start()
+        except OSError as e:
+            self.cli_logger.verbose(
+                "Failed to start the command session: {}", str(e))
+            yield
+            return
+
+        self._command_session = command_session
+        try:
+            yield
+        finally:
+            self._command_session = None
+            command_session.close()
+
+    def _run_in_session(
+            self, cmd, with_output, exit_on_fail,
+            environment_variables=None, silent=False, cmd_to_print=None):
+        if environment_variables:
+            cmd, cmd_to_print = _with_environment_variables(
+                cmd, environment_variables, cmd_to_print=cmd_to_print)
+        if self.call_context.is_using_login_shells():
+            cmd = " ".join(_with_interactive(cmd))
+            if cmd_to_print:
+                cmd_to_print = " ".join(_with_interactive(cmd_to_print))
+
+        self.cli_logger.verbose(
+            "Running `{}` in the command session",
+            cf.bold(cmd if cmd_to_print is None else cmd_to_print))
+
+        output_file = None
+        if not with_output and (not silent or self.cli_logger.verbosity > 0):
+            if self.call_context.is_output_redirected():
+                output_file = get_output_redirected_file("ssh")
+            else:
+                output_file = sys.stdout
+        try:
+            exit_code, output = self._command_session.run(
+                cmd, output_file=output_file, with_output=with_output)
+        except CommandSessionError as e:
+            # The following commands will run without the session
+            self._command_session = None
+            self.cli_logger.verbose("{}", str(e))
+            exit_code, output = 255, None
+        finally:
+            if output_file is not None and output_file is not sys.stdout:
+                output_file.close()
+
+        if exit_code != 0:
+            e = subprocess.CalledProcessError(exit_code, cmd, output=output)
+            self._handle_command_failed(
+                e, [cmd], exit_on_fail,
+                cmd_to_print=[cmd_to_print] if cmd_to_print else None)
+        return output if with_output else exit_code
+
     def run_rsync_up(self, source, target, options=None):
         self._set_ssh_ip_if_required()
         options = options or {}
@@ -257,6 +342,29 @@ class SSHCommandExecutor(HostCommandExecutor):
         self.cli_logger.verbose("Running `{}`", cf.bold(" ".join(command)))
         self._run_helper(command, silent=self.call_context.is_rsync_silent())
 
+    def get_ssh_host(self):
+        self._set_ssh_ip_if_required()
+        return self.ssh_user, self.ssh_ip, self.ssh_port
+
+    def run_with_ssh_agent(self, cmd, ssh_agent_socket):
+        self._set_ssh_ip_if_required()
+        # A new connection without the control master which is not
+        # started with the ssh agent to forward
+        ssh_options = SSHOptions(
+            self.call_context,
+            self.ssh_private_key,
+            ssh_port=self.ssh_port,
+            ForwardAgent="yes",
+            **self.ssh_extra_options)
+        final_cmd = [
+            "env", "SSH_AUTH_SOCK={}".format(ssh_agent_socket), "ssh"
+        ] + ssh_options.to_ssh_options_list(timeout=120) + [
+            "{}@{}".format(self.ssh_user, self.ssh_ip), cmd
+        ]
+        self.cli_logger.verbose("Running `{}`", cf.bold(cmd))
+        self._run_helper(
+            final_cmd, silent=self.call_context.is_rsync_silent())
+
     def remote_shell_command_str(self):
         self._set_ssh_ip_if_required()
         command = "ssh -o IdentitiesOnly=yes"
@@ -50,6 +50,9 @@ LOGGER_LEVEL_CHOICES = ["debug", "info", "warning", "error", "critical"]
 LOGGER_LEVEL_HELP = ("The logging level threshold, choices=['debug', 'info',"
                      " 'warning', 'error', 'critical'], default='info'")
 
+# The environments to run the cluster commands
+RUN_ENV_TYPES = ["auto", "host", "docker"]
+
 LOGGING_ROTATE_MAX_BYTES = 512 * 1024 * 1024  # 512MB.
 LOGGING_ROTATE_BACKUP_COUNT = 5  # 5 Backup files at max.
 
@@ -135,6 +138,12 @@ CLOUDTIK_NODE_RESOURCE_STATE_TIMEOUT_S = env_integer("CLOUDTIK_NODE_RESOURCE_STA
 
 CLOUDTIK_HEARTBEAT_PERIOD_SECONDS = env_integer("CLOUDTIK_HEARTBEAT_PERIOD_SECONDS", 1)
 
+# Whether the node agent publishes the node metrics in the compact format
+# which is delta encoded against a keyframe published every number of updates
+CLOUDTIK_NODE_METRICS_COMPACT = env_bool("CLOUDTIK_NODE_METRICS_COMPACT", False)
+CLOUDTIK_NODE_METRICS_KEYFRAME_INTERVAL = env_integer(
+    "CLOUDTIK_NODE_METRICS_KEYFRAME_INTERVAL", 12)
+
 CLOUDTIK_NODE_AVAILABILITY_MAX_STALENESS_S = env_integer(
     "CLOUDTIK_NODE_AVAILABILITY_MAX_STALENESS_S", 30 * 60
 )
@@ -159,6 +168,8 @@ CLOUDTIK_MAX_RESOURCE_DEMAND_VECTOR_SIZE = 1000
 # Port that controller prometheus metrics will be exported to
 CLOUDTIK_METRIC_PORT = env_integer("CLOUDTIK_METRIC_PORT", 44217)
 CLOUDTIK_METRIC_ADDRESS_KEY = "ControllerMetricsAddress"
+# Port that node agent prometheus metrics will be exported to. 0 for not export.
+CLOUDTIK_NODE_METRIC_PORT = env_integer("CLOUDTIK_NODE_METRIC_PORT", 0)
 
 # The request for a specific list of resource bundles
 CLOUDTIK_RESOURCE_REQUESTS = b"cloudtik_resource_requests"
@@ -198,6 +209,8 @@ CLOUDTIK_PROCESSES = [
 MAX_PARALLEL_SHUTDOWN_WORKERS = env_integer("MAX_PARALLEL_SHUTDOWN_WORKERS", 50)
 # Max Concurrent SSH Calls to run on nodes
 MAX_PARALLEL_EXEC_NODES = env_integer("MAX_PARALLEL_EXEC_NODES", 50)
+# Max Concurrent rsync from head to the nodes
+MAX_PARALLEL_RSYNC_NODES = env_integer("MAX_PARALLEL_RSYNC_NODES", 16)
 
 # Constants used to define the different process types.
 PROCESS_TYPE_CLUSTER_CONTROLLER = "cloudtik_cluster_controller"
@@ -235,6 +248,12 @@ LOG_MONITOR_NUM_LINES_TO_READ = int(
     os.environ.get("CLOUDTIK_LOG_MONITOR_NUM_LINES_TO_READ", "1000")
 )
 
+# The maximum bytes to be read from a file in a single iteration. The lines
+# are read in one chunk and split in bulk.
+LOG_MONITOR_READ_CHUNK_BYTES = int(
+    os.environ.get("CLOUDTIK_LOG_MONITOR_READ_CHUNK_BYTES", str(1024 * 1024))
+)
+
 LOG_FILE_CHANNEL = "CLOUDKIT_LOG_CHANNEL"
 
 DEFAULT_PROXY_PORT = 6000
@@ -262,6 +281,12 @@ CLOUDTIK_WAIT_FOR_CLUSTER_READY_TIMEOUT_S = env_integer("CLOUDTIK_WAIT_FOR_CLUST
 CLOUDTIK_WAIT_FOR_CLUSTER_READY_INTERVAL_S = env_integer("CLOUDTIK_WAIT_FOR_CLUSTER_READY_INTERVAL_S", 5)
 CLOUDTIK_WAIT_FOR_JOB_FINISHED_INTERVAL_S = env_integer("CLOUDTIK_WAIT_FOR_JOB_FINISHED_INTERVAL_S", 5)
 
+# The services queried from Consul are reused in this time by the queries
+# of the same service selector on the same node. Set to 0 to disable.
+CLOUDTIK_CONSUL_CATALOG_SNAPSHOT_TTL_S = env_integer("CLOUDTIK_CONSUL_CATALOG_SNAPSHOT_TTL_S", 5)
+# The maximum number of the services to query from Consul at the same time
+CLOUDTIK_CONSUL_MAX_PARALLEL_QUERIES = env_integer("CLOUDTIK_CONSUL_MAX_PARALLEL_QUERIES", 8)
+
 # Cloudtik env exported for running commands
 CLOUDTIK_RUNTIME_ENV_RUNTIMES = "CLOUDTIK_RUNTIMES"
 CLOUDTIK_RUNTIME_ENV_WORKSPACE = "CLOUDTIK_WORKSPACE"
@@ -0,0 +1,290 @@
+"""Compact wire format of the node metrics.
+
+A node metrics record is encoded as a positional JSON array with a fixed
+schema of slots, so that the field names are not sent for every record:
+
+    [version, epoch, seq, base_seq, state_time, mask, value, value, ...]
+
+The mask is a bit set of the slots whose values follow in slot order. The
+epoch is the time the encoder started (in milliseconds) so that the seq
+numbers restarting from the beginning after an agent restart never refer to
+a keyframe of the agent before the restart.
+
+The node agent publishes a full record (a keyframe, with seq == base_seq)
+periodically to both the node metrics table and the node metrics base table.
+The records in between are deltas against the last keyframe, carrying only
+the slots whose values differ from the keyframe. Because the store keeps
+only the latest record of a node, the deltas are against the keyframe instead
+of the previous sample so that any single record can be decoded with the
+keyframe alone.
+
+Records which are not compact frames (JSON objects) are decoded as is, so
+the decoder can be used for nodes publishing in either format.
+"""
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from cloudtik.core._private.state.state_utils import NODE_STATE_NODE_ID, NODE_STATE_NODE_IP, \
+    NODE_STATE_NODE_KIND, NODE_STATE_NODE_TYPE, NODE_STATE_TIME
+
+logger = logging.getLogger(__name__)
+
+COMPACT_FORMAT_VERSION = 1
+
+NODE_METRICS_KEY = "metrics"
+
+HEADER_SLOTS = (
+    NODE_STATE_NODE_ID,
+    NODE_STATE_NODE_IP,
+    NODE_STATE_NODE_KIND,
+    NODE_STATE_NODE_TYPE,
+)
+
+METRICS_SLOTS = (
+    "now",
+    "cpu",
+    "cpus",
+    "mem",
+    "boot_time",
+    "load_avg",
+    "disk_io",
+    "disk_io_speed",
+    "network",
+    "network_speed",
+    "gpu",
+)
+
+# The slots for the header and metrics keys not in the fixed schema
+EXTRA_HEADER_SLOT = len(HEADER_SLOTS) + len(METRICS_SLOTS)
+EXTRA_METRICS_SLOT = EXTRA_HEADER_SLOT + 1
+NUM_SLOTS = EXTRA_METRICS_SLOT + 1
+
+_FRAME_HEADER_SIZE = 6
+_HEADER_KEYS = frozenset(HEADER_SLOTS + (NODE_METRICS_KEY, NODE_STATE_TIME))
+_METRICS_KEYS = frozenset(METRICS_SLOTS)
+
+
+def _to_slots(node_metrics: Dict[str, Any]):
+    metrics = node_metrics.get(NODE_METRICS_KEY) or {}
+    slots = [node_metrics.get(key) for key in HEADER_SLOTS]
+    slots += [metrics.get(key) for key in METRICS_SLOTS]
+    extra_header = {k: v for k, v in node_metrics.items()
+                    if k not in _HEADER_KEYS}
+    extra_metrics = {k: v for k, v in metrics.items()
+                     if k not in _METRICS_KEYS}
+    slots.append(extra_header or None)
+    slots.append(extra_metrics or None)
+    return slots
+
+
+def _from_slots(slots, state_time) -> Dict[str, Any]:
+    # The slots with None values are omitted
+    node_metrics = {}
+    for i, key in enumerate(HEADER_SLOTS):
+        if slots[i] is not None:
+            node_metrics[key] = slots[i]
+    metrics = {}
+    offset = len(HEADER_SLOTS)
+    for i, key in enumerate(METRICS_SLOTS):
+        value = slots[offset + i]
+        if value is not None:
+            metrics[key] = value
+    if slots[EXTRA_HEADER_SLOT]:
+        node_metrics.update(slots[EXTRA_HEADER_SLOT])
+    if slots[EXTRA_METRICS_SLOT]:
+        metrics.update(slots[EXTRA_METRICS_SLOT])
+    node_metrics[NODE_METRICS_KEY] = metrics
+    node_metrics[NODE_STATE_TIME] = state_time
+    return node_metrics
+
+
+def _normalize(value):
+    # Values are compared in the form as they will be decoded from JSON
+    if isinstance(value, tuple):
+        return [_normalize(x) for x in value]
+    if isinstance(value, list):
+        return [_normalize(x) for x in value]
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    return value
+
+
+def _dumps(frame):
+    return json.dumps(frame, separators=(",", ":"))
+
+
+def is_compact_frame(row: str) -> bool:
+    return row.startswith("[")
+
+
+class NodeMetricsEncoder:
+    """Encode the node metrics of a node to compact frames.
+
+    Encoding returns the frame to publish as the node metrics and the
+    keyframe to publish as the base if a new keyframe is made.
+    """
+
+    def __init__(self, keyframe_interval: int = 12, epoch: Optional[int] = None):
+        self.keyframe_interval = max(keyframe_interval, 1)
+        self.epoch = epoch if epoch is not None else int(time.time() * 1000)
+        self.seq = 0
+        self.base_seq = 0
+        self.base_slots = None
+        self.deltas_since_keyframe = 0
+
+    def encode(self, node_metrics: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+        state_time = node_metrics.get(NODE_STATE_TIME)
+        slots = [_normalize(value) for value in _to_slots(node_metrics)]
+        self.seq += 1
+        if (self.base_slots is None
+                or self.deltas_since_keyframe >= self.keyframe_interval):
+            self.base_seq = self.seq
+            self.base_slots = slots
+            self.deltas_since_keyframe = 0
+            keyframe = self._make_frame(
+                state_time, range(NUM_SLOTS), slots)
+            return keyframe, keyframe
+
+        self.deltas_since_keyframe += 1
+        changed = [i for i in range(NUM_SLOTS)
+                   if slots[i] != self.base_slots[i]]
+        return self._make_frame(state_time, changed, slots), None
+
+    def _make_frame(self, state_time, slot_indices, slots):
+        mask = 0
+        frame = [COMPACT_FORMAT_VERSION, self.epoch, self.seq, self.base_seq,
+                 state_time, 0]
+        for i in slot_indices:
+            mask |= (1 << i)
+            frame.append(slots[i])
+        frame[5] = mask
+        return _dumps(frame)
+
+
+def _decode_frame(frame, base_slots=None):
+    version, _, _, _, state_time, mask = frame[:_FRAME_HEADER_SIZE]
+    if version != COMPACT_FORMAT_VERSION:
+        raise ValueError(
+            "Unsupported node metrics format version: {}".format(version))
+    slots = list(base_slots) if base_slots is not None else [None] * NUM_SLOTS
+    values = frame[_FRAME_HEADER_SIZE:]
+    value_index = 0
+    for i in range(NUM_SLOTS):
+        if mask & (1 << i):
+            # IndexError if the frame has less values than the mask
+            slots[i] = values[value_index]
+            value_index += 1
+    return slots, state_time
+
+
+class NodeMetricsDecoder:
+    """Decode the node metrics records of the nodes on the head.
+
+    The keyframes of the nodes are cached and the base table is only read
+    when a delta refers to a keyframe not in the cache. A decoder instance
+    kept across the updates reads only the node metrics table in the steady
+    state.
+    """
+
+    def __init__(self):
+        # node id -> ((epoch, base seq), base slots)
+        self._bases = {}
+
+    def decode_all(
+            self, node_metrics_rows: Iterable[Tuple[str, str]],
+            base_table=None) -> Iterator[Dict[str, Any]]:
+        """Decode the (node id, row) pairs to the node metrics dicts.
+
+        The rows which cannot be decoded are skipped.
+        """
+        pending_deltas = []
+        seen_nodes = set()
+        for node_id, row in node_metrics_rows:
+            seen_nodes.add(node_id)
+            try:
+                if not is_compact_frame(row):
+                    yield json.loads(row)
+                    continue
+
+                frame = json.loads(row)
+                node_metrics = self._decode_compact(node_id, frame)
+            except (ValueError, KeyError, IndexError) as e:
+                logger.warning(
+                    "Failed to decode the node metrics of node {}: {}".format(
+                        node_id, str(e)))
+                continue
+            if node_metrics is None:
+                pending_deltas.append((node_id, frame))
+            else:
+                yield node_metrics
+
+        if pending_deltas and base_table is not None:
+            self._load_bases(base_table)
+            for node_id, frame in pending_deltas:
+                try:
+                    node_metrics = self._decode_compact(node_id, frame)
+                except (ValueError, KeyError, IndexError) as e:
+                    logger.warning(
+                        "Failed to decode the node metrics of node {}: {}".format(
+                            node_id, str(e)))
+                    continue
+                if node_metrics is None:
+                    logger.debug(
+                        "No keyframe of node {} for the node metrics.".format(
+                            node_id))
+                    continue
+                yield node_metrics
+
+        # Forget the nodes which are gone
+        for node_id in list(self._bases.keys()):
+            if node_id not in seen_nodes:
+                del self._bases[node_id]
+
+    def _decode_compact(self, node_id, frame) -> Optional[Dict[str, Any]]:
+        epoch, seq, base_seq = frame[1], frame[2], frame[3]
+        if seq == base_seq:
+            # A keyframe
+            slots, state_time = _decode_frame(frame)
+            self._bases[node_id] = ((epoch, base_seq), slots)
+            return _from_slots(slots, state_time)
+
+        base = self._bases.get(node_id)
+        if base is None or base[0] != (epoch, base_seq):
+            return None
+        slots, state_time = _decode_frame(frame, base[1])
+        return _from_slots(slots, state_time)
+
+    def _load_bases(self, base_table):
+        for node_id, row in base_table.iter_all():
+            try:
+                frame = json.loads(row)
+                slots, _ = _decode_frame(frame)
+            except (ValueError, KeyError, IndexError) as e:
+                logger.warning(
+                    "Failed to decode the node metrics keyframe of node {}: {}".format(
+                        node_id, str(e)))
+                continue
+            self._bases[node_id] = ((frame[1], frame[3]), slots)
+
+    def delete_gone_bases(self, base_table, live_nodes, expiry_time) -> int:
+        """Delete the keyframes of the nodes which are gone from the base
+        table. A node is gone if it is not one of the live nodes and its
+        keyframe is made before the expiry time. Return the number of the
+        keyframes deleted."""
+        gone_nodes = []
+        for node_id, row in base_table.iter_all():
+            if node_id in live_nodes:
+                continue
+            try:
+                state_time = json.loads(row)[4]
+            except (ValueError, KeyError, IndexError):
+                # A keyframe which cannot be decoded is not useful anyway
+                state_time = None
+            if state_time is None or state_time < expiry_time:
+                gone_nodes.append(node_id)
+        for node_id in gone_nodes:
+            base_table.delete(node_id)
+            self._bases.pop(node_id, None)
+        return len(gone_nodes)
@@ -1,11 +1,13 @@
 import logging
 import os
 import warnings
+from array import array
 
 import psutil
 import datetime
 import sys
 
+from cloudtik.core._private import constants
 from cloudtik.core._private.util.core_utils import get_num_cpus, get_system_memory, get_used_memory
 from cloudtik.core._private.debug import log_once
 from cloudtik.core._private.metrics import k8s_utils
@@ -40,10 +42,98 @@ except ImportError as e:
         )
 
 
+# The windows in seconds of the average rates like load average: 1m, 5m, 15m
+RATE_WINDOWS = (60, 300, 900)
+
+# The number of the latest samples used for the instant speed
+INSTANT_SPEED_SAMPLES = 7
+
+
 def to_posix_time(dt):
     return (dt - datetime.datetime(1970, 1, 1)).total_seconds()
 
 
+class StatsHistory:
+    """A fixed capacity ring buffer of the samples of counter stats.
+
+    Each sample is a time and a fixed number of counter values. The samples
+    are stored in a preallocated array and the oldest sample is overwritten
+    when the buffer is full, so the memory is bounded for the life of the
+    node agent.
+    """
+
+    def __init__(self, num_values: int, capacity: int):
+        self.num_values = num_values
+        self.capacity = max(capacity, 2)
+        self._stride = num_values + 1
+        self._samples = array("d", [0.0] * (self.capacity * self._stride))
+        # The position of the next sample to write
+        self._next = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, time, values):
+        offset = self._next * self._stride
+        self._samples[offset] = time
+        self._samples[offset + 1:offset + self._stride] = array("d", values)
+        self._next = (self._next + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def _get(self, index):
+        # The index counts from the oldest sample
+        position = (self._next - self._size + index) % self.capacity
+        offset = position * self._stride
+        return (self._samples[offset],
+                self._samples[offset + 1:offset + self._stride])
+
+    def _rate(self, first, last):
+        then, prev_values = self._get(first)
+        now, now_values = self._get(last)
+        time_delta = now - then
+        if time_delta <= 0:
+            return (0.0,) * self.num_values
+        return tuple((y - x) / time_delta for x, y in zip(prev_values, now_values))
+
+    def get_rate(self, num_samples: int):
+        """The rate over the latest number of samples."""
+        if self._size < 2:
+            return (0.0,) * self.num_values
+        first = max(self._size - num_samples, 0)
+        return self._rate(first, self._size - 1)
+
+    def get_window_rate(self, window: float):
+        """The rate over the samples in the latest time window.
+
+        If the history is shorter than the window, the rate is over all the
+        samples available.
+        """
+        if self._size < 2:
+            return (0.0,) * self.num_values
+        last = self._size - 1
+        start_time = self._get(last)[0] - window
+        # Find the oldest sample within the window with binary search
+        low, high = 0, last
+        while low < high:
+            mid = (low + high) // 2
+            if self._get(mid)[0] < start_time:
+                low = mid + 1
+            else:
+                high = mid
+        return self._rate(min(low, last - 1), last)
+
+    def get_window_rates(self, windows=RATE_WINDOWS):
+        return tuple(self.get_window_rate(window) for window in windows)
+
+
+def _get_history_capacity():
+    # Enough samples for the longest window at the update interval
+    interval = max(constants.CLOUDTIK_UPDATE_INTERVAL_S, 1)
+    return max(RATE_WINDOWS) // interval + 2
+
+
 class MetricsCollector:
     def __init__(self):
         """Initialize the collector object."""
@@ -62,20 +152,23 @@ class MetricsCollector:
 
         self._cpu_counts = (logical_cpu_count, physical_cpu_count)
 
-        self._network_stats_hist = [(0, (0.0, 0.0))]  # time, (sent, recv)
-        self._disk_io_stats_hist = [
-            (0, (0.0, 0.0, 0, 0))
-        ]  # time, (bytes read, bytes written, read ops, write ops)
+        capacity = _get_history_capacity()
+        # time, (sent, recv)
+        self._network_stats_hist = StatsHistory(2, capacity)
+        # time, (bytes read, bytes written, read ops, write ops)
+        self._disk_io_stats_hist = StatsHistory(4, capacity)
 
     def get_all_metrics(self):
         now = to_posix_time(datetime.datetime.utcnow())
         network_stats = self._get_network_stats()
-        self._network_stats_hist.append((now, network_stats))
-        network_speed_stats = self._compute_speed_from_hist(self._network_stats_hist)
+        self._network_stats_hist.append(now, network_stats)
+        network_speed_stats = self._network_stats_hist.get_rate(
+            INSTANT_SPEED_SAMPLES)
 
         disk_stats = self._get_disk_io_stats()
-        self._disk_io_stats_hist.append((now, disk_stats))
-        disk_speed_stats = self._compute_speed_from_hist(self._disk_io_stats_hist)
+        self._disk_io_stats_hist.append(now, disk_stats)
+        disk_speed_stats = self._disk_io_stats_hist.get_rate(
+            INSTANT_SPEED_SAMPLES)
 
         return {
             "now": now,
@@ -86,8 +179,11 @@ class MetricsCollector:
             "load_avg": self._get_load_avg(),
             "disk_io": disk_stats,
             "disk_io_speed": disk_speed_stats,
+            # The 1m, 5m, 15m average speeds
+            "disk_io_speed_avg": self._disk_io_stats_hist.get_window_rates(),
             "network": network_stats,
             "network_speed": network_speed_stats,
+            "network_speed_avg": self._network_stats_hist.get_window_rates(),
             "gpu": self._get_gpu_usage(),
         }
 
@@ -174,12 +270,3 @@ class MetricsCollector:
         sent = sum((iface.bytes_sent for iface in ifaces))
         recv = sum((iface.bytes_recv for iface in ifaces))
         return sent, recv
-
-    @staticmethod
-    def _compute_speed_from_hist(hist):
-        while len(hist) > 7:
-            hist.pop(0)
-        then, prev_stats = hist[0]
-        now, now_stats = hist[-1]
-        time_delta = now - then
-        return tuple((y - x) / time_delta for x, y in zip(prev_stats, now_stats))
@@ -0,0 +1,85 @@
+import hashlib
+from shlex import quote
+from typing import Any, Dict, List, Optional
+
+from cloudtik.core._private.command_executor.command_executor import _with_interactive, \
+    _with_environment_variables
+
+# The scripts are kept private to the user and removed after the run
+COMMAND_BUNDLE_DIR = "~/.cloudtik/commands"
+COMMAND_BUNDLE_STEP_PREFIX = "[cloudtik-step"
+
+COMMAND_BUNDLE_HEADER = """#!/bin/bash
+# The commands of {group_name} bundled by cloudtik
+cloudtik_run_step() {{
+    local step=$1 total=$2 retries=$3 interval=$4 description=$5 cmd=$6
+    local attempt=1 code
+    printf '%s %s/%s] start: %s\\n' "{prefix}" "$step" "$total" "$description"
+    while true; do
+        bash -c "$cmd"
+        code=$?
+        if [ $code -eq 0 ]; then
+            printf '%s %s/%s] done\\n' "{prefix}" "$step" "$total"
+            return 0
+        fi
+        if [ $attempt -ge $retries ]; then
+            printf '%s %s/%s] failed with exit code %s\\n' \\
+                "{prefix}" "$step" "$total" "$code"
+            return $code
+        fi
+        printf '%s %s/%s] failed with exit code %s. Retrying in %s seconds.\\n' \\
+            "{prefix}" "$step" "$total" "$code" "$interval"
+        attempt=$((attempt + 1))
+        sleep $interval
+    done
+}}
+"""
+
+
+def render_command_bundle(
+        group_name: str,
+        commands: List[str],
+        cmds_to_print: List[str],
+        number_of_retries: int,
+        retry_interval: int,
+        use_login_shells: bool,
+        environment_variables: Optional[Dict[str, Any]] = None) -> str:
+    """Render the commands of a command group into a script which runs the
+    commands one after another with the retries of each command and prints
+    a status line when each step starts and ends. The script exits with the
+    exit code of the first failed command.
+
+    The environment variables are exported in each command so that they
+    override the values set by the bashrc as running the command separately.
+    """
+    lines = [COMMAND_BUNDLE_HEADER.format(
+        group_name=group_name.replace("\n", " "),
+        prefix=COMMAND_BUNDLE_STEP_PREFIX)]
+    total = len(commands)
+    for i, (cmd, cmd_to_print) in enumerate(zip(commands, cmds_to_print)):
+        if environment_variables:
+            cmd, _ = _with_environment_variables(cmd, environment_variables)
+        if use_login_shells:
+            # Each command sources the bashrc which may be changed by the
+            # previous commands as running the command separately
+            cmd = " ".join(_with_interactive(cmd))
+        lines.append("cloudtik_run_step {} {} {} {} {} {} || exit $?".format(
+            i + 1, total, max(number_of_retries, 1), retry_interval,
+            quote(cmd_to_print), quote(cmd)))
+    lines.append("")
+    return "\n".join(lines)
+
+
+def get_command_bundle_path(script: str) -> str:
+    script_hash = hashlib.sha1(script.encode()).hexdigest()
+    return "{}/cloudtik-commands-{}.sh".format(COMMAND_BUNDLE_DIR, script_hash)
+
+
+def get_command_bundle_dir_cmd() -> str:
+    return "mkdir -p {dir} && chmod 700 {dir}".format(dir=COMMAND_BUNDLE_DIR)
+
+
+def get_command_bundle_run_cmd(script_path: str) -> str:
+    """The command to run the script and remove it keeping the exit code."""
+    return "bash {path}; code=$?; rm -f {path}; exit $code".format(
+        path=script_path)
@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+import weakref
+from collections import defaultdict
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+# The interval to write the buffered node status tags to the provider
+NODE_STATUS_REPORT_INTERVAL_S = 1
+
+# Drop the tags of a node after the writes of the node failed in a row
+NODE_STATUS_REPORT_MAX_FAILURES = 3
+
+_reporters_lock = threading.Lock()
+_reporters = weakref.WeakKeyDictionary()
+
+
+def get_node_status_reporter(provider) -> "NodeStatusReporter":
+    """Get the status reporter shared by all the node updaters of a provider."""
+    with _reporters_lock:
+        reporter = _reporters.get(provider)
+        if reporter is None:
+            reporter = NodeStatusReporter(provider)
+            _reporters[provider] = reporter
+        return reporter
+
+
+class NodeStatusReporter:
+    """Buffers the node tags set by the node updaters and writes the tags of
+    all the nodes to the provider in one batch on a short interval. The tags
+    set for the same node within an interval are merged so that only the
+    latest status is written. A flush write (for the terminal status) is done
+    immediately together with the pending tags of the node.
+
+    If a batch write fails, the nodes of the batch are written one by one so
+    that a node which is gone doesn't fail the other nodes, and the tags of
+    a node are dropped after its writes failed a few times in a row.
+    """
+
+    def __init__(self, provider, interval=NODE_STATUS_REPORT_INTERVAL_S):
+        # Don't keep the provider alive from the reporting thread
+        self._provider_ref = weakref.ref(provider)
+        self.interval = interval
+        self.lock = threading.Lock()
+        # Writes are serialized so that the buffered tags of a node
+        # never overwrite the tags written later by a flush
+        self.write_lock = threading.Lock()
+        self.pending = defaultdict(dict)
+        # node id -> the number of the failed writes in a row
+        self.failures = {}
+        self.thread = None
+
+    def set_node_tags(
+            self, node_id: str, tags: Dict[str, str], flush: bool = False):
+        if not flush:
+            with self.lock:
+                self.pending[node_id].update(tags)
+                self._start()
+            return
+
+        with self.write_lock:
+            with self.lock:
+                tags_to_set = self.pending.pop(node_id, {})
+            tags_to_set.update(tags)
+            self._get_provider().set_node_tags(node_id, tags_to_set)
+
+    def flush(self):
+        with self.write_lock:
+            with self.lock:
+                nodes_tags = dict(self.pending)
+                self.pending.clear()
+            if not nodes_tags:
+                return
+            provider = self._get_provider()
+            try:
+                provider.set_nodes_tags(nodes_tags)
+            except Exception as e:
+                logger.warning(
+                    "Failed to set the status tags of {} nodes: {}".format(
+                        len(nodes_tags), e))
+                self._set_nodes_tags_one_by_one(provider, nodes_tags)
+            else:
+                for node_id in nodes_tags:
+                    self.failures.pop(node_id, None)
+
+    def _set_nodes_tags_one_by_one(self, provider, nodes_tags):
+        for node_id, tags in nodes_tags.items():
+            try:
+                provider.set_node_tags(node_id, tags)
+            except Exception as e:
+                failures = self.failures.get(node_id, 0) + 1
+                if failures >= NODE_STATUS_REPORT_MAX_FAILURES:
+                    logger.warning(
+                        "Dropped the status tags of node {} after {} "
+                        "failed writes: {}".format(node_id, failures, e))
+                    self.failures.pop(node_id, None)
+                    continue
+                self.failures[node_id] = failures
+                # Retry at the next interval without overriding newer tags
+                with self.lock:
+                    self.pending[node_id] = {
+                        **tags, **self.pending.get(node_id, {})}
+            else:
+                self.failures.pop(node_id, None)
+
+    def _get_provider(self):
+        provider = self._provider_ref()
+        if provider is None:
+            raise RuntimeError("The node provider is no longer available.")
+        return provider
+
+    def _start(self):
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(
+            target=self._run, name="NodeStatusReporter", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if self._provider_ref() is None:
+                return
+            self.flush()
@@ -2,6 +2,7 @@ import click
 import logging
 import os
 import subprocess
+import tempfile
 import time
 from typing import Dict
 from threading import Thread
@@ -11,7 +12,10 @@ from cloudtik.core._private.service_discovery.naming import with_node_host_envir
 from cloudtik.core._private.utils import with_runtime_environment_variables, with_node_ip_environment_variables, \
     _get_cluster_uri, _is_use_internal_ip, get_node_type, get_runtime_shared_memory_ratio, \
     with_head_node_ip_environment_variables, get_default_python_version, get_config_option
-from cloudtik.core.command_executor import get_cmd_to_print
+from cloudtik.core.command_executor import get_cmd_to_print, COMMAND_RUN_DEFAULT_RETRY_DELAY_S
+from cloudtik.core._private.node.command_bundle import render_command_bundle, get_command_bundle_path, \
+    get_command_bundle_dir_cmd, get_command_bundle_run_cmd
+from cloudtik.core._private.node.node_status_reporter import get_node_status_reporter
 from cloudtik.core.tags import CLOUDTIK_TAG_NODE_STATUS, CLOUDTIK_TAG_RUNTIME_CONFIG, \
     CLOUDTIK_TAG_FILE_MOUNTS_CONTENTS, \
     STATUS_UP_TO_DATE, STATUS_UPDATE_FAILED, STATUS_WAITING_FOR_SSH, \
@@ -108,6 +112,7 @@ class NodeUpdater:
         self.node_id = node_id
         self.provider_type = provider_config.get("type")
         self.provider = provider
+        self.status_reporter = get_node_status_reporter(provider)
         # Some node providers don't specify empty structures as
         # defaults. Better to be defensive.
         file_mounts = file_mounts or {}
@@ -169,8 +174,8 @@ class NodeUpdater:
             node_tags = self.provider.node_tags(self.node_id)
             if CLOUDTIK_TAG_QUORUM_JOIN in node_tags:
                 tags_to_set[CLOUDTIK_TAG_QUORUM_JOIN] = QUORUM_JOIN_STATUS_FAILED
-            self.provider.set_node_tags(
-                self.node_id, tags_to_set)
+            self.status_reporter.set_node_tags(
+                self.node_id, tags_to_set, flush=True)
             self.cli_logger.error(
                 self._prefix_message(
                     "New status: {}"), cf.bold(STATUS_UPDATE_FAILED))
@@ -206,7 +211,8 @@ class NodeUpdater:
             tags_to_set[
                 CLOUDTIK_TAG_FILE_MOUNTS_CONTENTS] = self.file_mounts_contents_hash
 
-        self.provider.set_node_tags(self.node_id, tags_to_set)
+        self.status_reporter.set_node_tags(
+            self.node_id, tags_to_set, flush=True)
         self.cli_logger.labeled_value(
             self._prefix_message(
                 "New status"), STATUS_UP_TO_DATE)
@@ -431,7 +437,7 @@ class NodeUpdater:
         return str(msg_prefix) + ": " + msg
 
     def do_update(self):
-        self.provider.set_node_tags(
+        self.status_reporter.set_node_tags(
             self.node_id, {CLOUDTIK_TAG_NODE_STATUS: STATUS_WAITING_FOR_SSH})
         self.cli_logger.labeled_value(
             self._prefix_message(
@@ -490,14 +496,14 @@ class NodeUpdater:
                 _tags=dict(hash=self.runtime_hash))
 
             # The first step is to format and mount the data disks on host machine
-            self.provider.set_node_tags(
+            self.status_reporter.set_node_tags(
                 self.node_id, {CLOUDTIK_TAG_NODE_STATUS: STATUS_BOOTSTRAPPING_DATA_DISKS})
             self.cli_logger.labeled_value(
                 self._prefix_message(
                     "New status"), STATUS_BOOTSTRAPPING_DATA_DISKS)
             self.bootstrap_data_disks(step_numbers=(2, NUM_SETUP_STEPS))
 
-            self.provider.set_node_tags(
+            self.status_reporter.set_node_tags(
                 self.node_id, {CLOUDTIK_TAG_NODE_STATUS: STATUS_SYNCING_FILES})
             self.cli_logger.labeled_value(
                 self._prefix_message(
@@ -510,7 +516,7 @@ class NodeUpdater:
             # file_mounts folders have changed.
             if node_tags.get(CLOUDTIK_TAG_RUNTIME_CONFIG) != self.runtime_hash:
                 # Run init commands
-                self.provider.set_node_tags(
+                self.status_reporter.set_node_tags(
                     self.node_id, {CLOUDTIK_TAG_NODE_STATUS: STATUS_SETTING_UP})
                 self.cli_logger.labeled_value(
                     self._prefix_message(
@@ -624,7 +630,7 @@ class NodeUpdater:
             {"node_id": self.node_id})
         with LogTimer(
                 self.log_prefix + "Setup commands",
-                show_status=True):
+                show_status=True), self.cmd_executor.command_session():
 
             total = len(self.setup_commands)
             for i, command_group in enumerate(self.setup_commands):
@@ -635,6 +641,16 @@ class NodeUpdater:
                         command_group_name,
                         _numbered=("()", i + 1, total)):
                     commands = command_group.get("commands", [])
+                    if self._is_bundle_commands(commands):
+                        self._exec_command_bundle(
+                            command_group_name, commands, runtime_envs,
+                            retry=get_config_option(
+                                self.config, "retry_setup_command", True),
+                            number_of_retries=get_config_option(
+                                self.config, "number_of_retries",
+                                SETUP_COMMAND_DEFAULT_NUMBER_OF_RETRIES),
+                            failure_message="Setup command failed.")
+                        continue
                     if command_group_name == CLOUDTIK_RUNTIME_NAME:
                         # Use a single install message for all commands
                         cmd_to_print = "{} runtime install".format(command_group_name)
@@ -686,7 +702,8 @@ class NodeUpdater:
             CreateClusterEvent.start_cloudtik_runtime,
             {"node_id": self.node_id})
         with LogTimer(
-                self.log_prefix + "Start commands", show_status=True):
+                self.log_prefix + "Start commands",
+                show_status=True), self.cmd_executor.command_session():
             total = len(self.start_commands)
             for i, command_group in enumerate(self.start_commands):
                 command_group_name = command_group.get("group_name", "")
@@ -696,6 +713,20 @@ class NodeUpdater:
                         command_group_name,
                         _numbered=("()", i + 1, total)):
                     commands = command_group.get("commands", [])
+                    if self._is_bundle_commands(commands):
+                        old_redirected = self.call_context.is_output_redirected()
+                        self.call_context.set_output_redirected(False)
+                        self._exec_command_bundle(
+                            command_group_name, commands,
+                            self._get_start_command_envs(runtime_envs),
+                            retry=get_config_option(
+                                self.config, "retry_start_command", True),
+                            number_of_retries=get_config_option(
+                                self.config, "number_of_retries",
+                                START_COMMAND_DEFAULT_NUMBER_OF_RETRIES),
+                            failure_message="Start command failed.")
+                        self.call_context.set_output_redirected(old_redirected)
+                        continue
                     for cmd in commands:
                         self._exec_start_command(cmd, runtime_envs)
         global_event_system.execute_callback(
@@ -703,7 +734,7 @@ class NodeUpdater:
             CreateClusterEvent.start_cloudtik_runtime_completed,
             {"node_id": self.node_id})
 
-    def _exec_start_command(self, cmd, runtime_envs):
+    def _get_start_command_envs(self, runtime_envs):
         # Add a resource override env variable if needed:
         if self.provider_type == "onpremise":
             # Local NodeProvider doesn't need resource override.
@@ -715,6 +746,10 @@ class NodeUpdater:
         else:
             env_vars = {}
         env_vars.update(runtime_envs)
+        return env_vars
+
+    def _exec_start_command(self, cmd, runtime_envs):
+        env_vars = self._get_start_command_envs(runtime_envs)
 
         cmd_to_print = self.get_cmd_to_print(cmd)
         self.cli_logger.print(
@@ -748,9 +783,61 @@ class NodeUpdater:
             raise click.ClickException(
                 self._prefix_message("Start command failed."))
 
+    def _is_bundle_commands(self, commands):
+        return len(commands) > 1 and get_config_option(
+            self.config, "bundle_commands", False)
+
+    def _exec_command_bundle(
+            self, command_group_name, commands, env_vars,
+            retry, number_of_retries, failure_message):
+        """Run the commands of a command group as one script which is
+        synced to the node and run with one remote invocation."""
+        cmds_to_print = [self.get_cmd_to_print(cmd) for cmd in commands]
+        script = render_command_bundle(
+            command_group_name, commands, cmds_to_print,
+            number_of_retries=number_of_retries if retry else 1,
+            retry_interval=get_config_option(
+                self.config, "retry_interval",
+                COMMAND_RUN_DEFAULT_RETRY_DELAY_S),
+            use_login_shells=self.call_context.is_using_login_shells(),
+            environment_variables=env_vars)
+        script_path = get_command_bundle_path(script)
+        self.cli_logger.print(
+            cf.bold("- " + self._prefix_message("{} ({} commands bundled)")),
+            command_group_name, len(commands))
+
+        # The temporary file is only accessible to the user (0600)
+        # which is kept by rsync for the synced script
+        with tempfile.NamedTemporaryFile(
+                "w", prefix="cloudtik-commands-", suffix=".sh") as f:
+            f.write(script)
+            f.flush()
+            try:
+                self.cmd_executor.run(
+                    get_command_bundle_dir_cmd(), run_env="auto")
+                self.rsync_up(f.name, script_path)
+            except Exception as e:
+                raise click.ClickException(
+                    self._prefix_message(
+                        "Failed to sync the commands: {}".format(e))) from None
+
+        try:
+            # Runs in the container if docker is in use
+            self.cmd_executor.run(
+                get_command_bundle_run_cmd(script_path),
+                run_env="auto")
+        except ProcessRunnerError as e:
+            if e.msg_type == "ssh_command_failed":
+                self.cli_logger.error("Failed.")
+                self.cli_logger.error("See above for the failed step.")
+
+            raise click.ClickException(
+                self._prefix_message(failure_message))
+
     def exec_commands(self, action_name, commands, envs):
         with LogTimer(
-                self.log_prefix + "Exec commands", show_status=True):
+                self.log_prefix + "Exec commands",
+                show_status=True), self.cmd_executor.command_session():
             total = len(commands)
             for i, command_group in enumerate(commands):
                 command_group_name = command_group.get("group_name", "")
@@ -63,6 +63,17 @@ try:
                 registry=self.registry,
                 buckets=histogram_buckets,
             ).labels(SessionName=session_name)
+            self.worker_terminate_nodes_time: Histogram = Histogram(
+                "worker_terminate_nodes_time_seconds",
+                "Worker termination time. This is the time it takes for a "
+                "call to a node provider's terminate_nodes method to return "
+                "for a batch of the nodes scheduled to terminate.",
+                labelnames=("SessionName",),
+                unit="seconds",
+                namespace="cloudtik",
+                registry=self.registry,
+                buckets=update_time_buckets,
+            ).labels(SessionName=session_name)
             self.worker_update_time: Histogram = Histogram(
                 "worker_update_time_seconds",
                 "Worker update time. This is the time between when an updater "
@@ -231,6 +242,15 @@ try:
                 namespace="cloudtik",
                 registry=self.registry,
             ).labels(SessionName=session_name)
+            self.scheduling_skipped: Counter = Counter(
+                "scheduling_skipped",
+                "Number of update iterations which skipped the scheduling "
+                "because neither the demands nor the nodes changed.",
+                labelnames=("SessionName",),
+                unit="iterations",
+                namespace="cloudtik",
+                registry=self.registry,
+            ).labels(SessionName=session_name)
             self.pending_nodes_of_type: Gauge = Gauge(
                 "pending_nodes_of_type",
                 "Number of nodes pending to be started.",
@@ -270,6 +290,38 @@ try:
         def session_name(self):
             return self._session_name
 
+    class NodePrometheusMetrics:
+        def __init__(self, node_id: str = None, registry: Optional[CollectorRegistry] = None):
+            self.registry: CollectorRegistry = registry or \
+                                               CollectorRegistry(
+                                                   auto_describe=True)
+            self._node_id = node_id
+            # Buckets: 1 millisecond to 10 seconds.
+            scan_time_buckets = [.001, .005, .01, .05, .1, .5, 1, 5, 10]
+            self.process_scan_time: Histogram = Histogram(
+                "process_scan_time",
+                "Process scan time. This is the time for the node agent "
+                "to scan the processes of the node and find the status of "
+                "the processes to check.",
+                labelnames=("NodeId",),
+                unit="seconds",
+                namespace="cloudtik_node",
+                registry=self.registry,
+                buckets=scan_time_buckets,
+            ).labels(NodeId=node_id)
+            self.processes_scanned: Gauge = Gauge(
+                "processes_scanned",
+                "Number of processes of the node in the last process scan.",
+                labelnames=("NodeId",),
+                unit="processes",
+                namespace="cloudtik_node",
+                registry=self.registry,
+            ).labels(NodeId=node_id)
+
+        @property
+        def node_id(self):
+            return self._node_id
+
 except ImportError:
 
     class ClusterPrometheusMetrics(object):
@@ -278,3 +330,10 @@ except ImportError:
 
         def __getattr__(self, attr):
             return NullMetric()
+
+    class NodePrometheusMetrics(object):
+        def __init__(self, node_id: str = None):
+            pass
+
+        def __getattr__(self, attr):
+            return NullMetric()
@@ -6,6 +6,7 @@ import inspect
 import yaml
 
 from cloudtik.core._private.concurrent_cache import ConcurrentObjectCache
+from cloudtik.core._private.util.config_dependencies import record_config_dependency
 from cloudtik.core._private.util.core_utils import load_class
 
 logger = logging.getLogger(__name__)
@@ -233,6 +234,7 @@ def _get_provider_config_object(provider_config, object_name: str):
     else:
         path_to_home = load_config_home()
     path_to_config_file = os.path.join(path_to_home, object_name)
+    record_config_dependency(path_to_config_file)
     # if the config object file doesn't exist, from global defaults
     if not os.path.exists(path_to_config_file):
         return {"from": object_name}
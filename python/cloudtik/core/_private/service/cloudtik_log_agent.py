@@ -1,7 +1,6 @@
 import argparse
 import errno
 import glob
-import json
 import logging.handlers
 import os
 from pathlib import Path
@@ -14,9 +13,12 @@ import traceback
 import cloudtik.core._private.constants as constants
 import cloudtik.core._private.utils as utils
 from cloudtik.core._private.cluster.cluster_logging import LOGGER_ID_CLUSTER_CONTROLLER, LOGGER_ID_NODE_MONITOR, \
-    LOGGING_DATA_NODE_ID, LOGGING_DATA_NODE_IP, LOGGING_DATA_NODE_TYPE, LOGGING_DATA_PID, LOGGING_DATA_RUNTIME
+    LOGGING_DATA_NODE_ID, LOGGING_DATA_NODE_IP, LOGGING_DATA_NODE_TYPE, LOGGING_DATA_PID, LOGGING_DATA_RUNTIME, \
+    encode_logs_batch
 from cloudtik.core._private.runtime_factory import _get_runtime_cls
 from cloudtik.core._private.util.core_utils import get_node_ip_address, split_list
+from cloudtik.core._private.util.inotify_utils import is_inotify_available, InotifyWatcher, IN_MODIFY, \
+    IN_CLOSE_WRITE, IN_CREATE, IN_MOVED_TO, IN_Q_OVERFLOW, IN_ONLYDIR
 from cloudtik.core._private.util.logging_utils import setup_component_logger
 from cloudtik.core._private.util.redis_utils import create_redis_client
 
@@ -42,6 +44,43 @@ LOG_NAME_UPDATE_INTERVAL_S = float(
 LOG_MONITOR_MANY_FILES_THRESHOLD = int(
     os.getenv("CLOUDTIK_LOG_MONITOR_MANY_FILES_THRESHOLD", 1000))
 
+# Whether to use inotify to wake up only on the writes and creates of the log
+# files instead of polling. Polling is used if inotify is not available.
+LOG_MONITOR_USE_INOTIFY = os.getenv(
+    "CLOUDTIK_LOG_MONITOR_USE_INOTIFY", "true").lower() == "true"
+# With inotify, the time to wait for the events before checking again and
+# the interval to rescan the log dirs for the dirs not able to watch.
+LOG_MONITOR_INOTIFY_WAIT_S = float(
+    os.getenv("CLOUDTIK_LOG_MONITOR_INOTIFY_WAIT_S", 1.0))
+LOG_MONITOR_RESCAN_INTERVAL_S = float(
+    os.getenv("CLOUDTIK_LOG_MONITOR_RESCAN_INTERVAL_S", 10.0))
+# The events are processed at most once in this interval when busy and the
+# writes following a wake up are batched for this time, which lets the kernel
+# merge the repeated write events of a file.
+LOG_MONITOR_INOTIFY_BATCH_S = 0.1
+
+# The time without writes after which an incomplete line at the end of a
+# file is taken as the last line, such as the last line of a crashed process.
+LOG_MONITOR_PARTIAL_LINE_IDLE_S = float(
+    os.getenv("CLOUDTIK_LOG_MONITOR_PARTIAL_LINE_IDLE_S", 1.0))
+
+LOG_MONITOR_INOTIFY_MASK = (
+        IN_MODIFY | IN_CLOSE_WRITE | IN_CREATE | IN_MOVED_TO | IN_ONLYDIR)
+
+# The size and time budget of a batch of log lines to publish
+LOG_PUBLISH_BATCH_BYTES = int(
+    os.getenv("CLOUDTIK_LOG_PUBLISH_BATCH_BYTES", 256 * 1024))
+LOG_PUBLISH_BATCH_S = float(
+    os.getenv("CLOUDTIK_LOG_PUBLISH_BATCH_S", 0.2))
+# The max bytes of the log lines pending to publish. The log files will not be
+# read when half of it is reached and the lines are dropped when it is full.
+LOG_PUBLISH_MAX_PENDING_BYTES = int(
+    os.getenv("CLOUDTIK_LOG_PUBLISH_MAX_PENDING_BYTES", 16 * 1024 * 1024))
+LOG_PUBLISH_COMPRESS = os.getenv(
+    "CLOUDTIK_LOG_PUBLISH_COMPRESS", "true").lower() == "true"
+
+LOGGER_ID_LOG_MONITOR = "log-monitor"
+
 # print every 30 minutes for repeating errors
 LOG_ERROR_REPEAT_SECONDS = 30 * 60
 
@@ -76,6 +115,54 @@ def _get_pid_from_log_file(file_path):
     return log_file_stem
 
 
+def read_log_lines(file_handle, max_bytes, max_lines, flush_partial=False):
+    """Read the complete lines from the current position in one chunk.
+
+    An incomplete line at the end of the file is left for the next read
+    unless flush_partial which takes it as the last line.
+
+    Returns:
+        The lines read and whether the end of the file is reached.
+    """
+    data = file_handle.read(max_bytes)
+    if not data:
+        return [], True
+    size = len(data)
+    end = data.rfind(b"\n") + 1
+    if flush_partial and size < max_bytes:
+        end = size
+    if end == 0:
+        if size < max_bytes:
+            # Wait for the rest of the line
+            file_handle.seek(-size, os.SEEK_CUR)
+            return [], True
+        # A line longer than the chunk
+        end = size
+    else:
+        num_lines = data.count(b"\n", 0, end)
+        if data[end - 1:end] != b"\n":
+            num_lines += 1
+        if num_lines > max_lines:
+            pos = -1
+            for _ in range(max_lines):
+                pos = data.find(b"\n", pos + 1)
+            end = pos + 1
+
+    if end < size:
+        file_handle.seek(end - size, os.SEEK_CUR)
+
+    # Replace any characters not in UTF-8 with
+    # a replacement character, see
+    # https://stackoverflow.com/a/38565489/10891801
+    text = data[:end].decode("utf-8", "replace")
+    lines = text.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    if "\r" in text:
+        lines = [line.rstrip("\r") for line in lines]
+    return lines, size < max_bytes and end == size
+
+
 class LogFileInfo:
     def __init__(
             self,
@@ -95,20 +182,55 @@ class LogFileInfo:
         self.is_err_file = is_err_file
         self.worker_pid = worker_pid
         self.runtime_name = runtime_name
+        # The file size and the time when an incomplete line is left at the end
+        self.partial_line_size = None
+        self.partial_line_time = None
 
     def reopen_if_necessary(self):
         """Check if the file's inode has changed and reopen it if necessary.
         There are a variety of reasons what we would logically consider a file
         would have different inodes, such as log rotation or file syncing
         semantics.
+
+        Returns:
+            The lines left in the old file including the incomplete line at
+            the end which will not be completed.
         """
         open_inode = None
         if self.file_handle and not self.file_handle.closed:
             open_inode = os.fstat(self.file_handle.fileno()).st_ino
         new_inode = os.stat(self.filename).st_ino
+        lines = []
         if open_inode != new_inode:
+            if open_inode is not None:
+                lines, _ = read_log_lines(
+                    self.file_handle,
+                    constants.LOG_MONITOR_READ_CHUNK_BYTES,
+                    constants.LOG_MONITOR_NUM_LINES_TO_READ,
+                    flush_partial=True)
+                self.file_handle.close()
+                self.partial_line_size = None
             self.file_handle = open(self.filename, "rb")
             self.file_handle.seek(self.file_position)
+        return lines
+
+    def is_partial_line_idle(self):
+        """Whether the file has no writes for a while since an incomplete
+        line is left at the end, such as the last line of a process exited."""
+        if self.partial_line_size is None:
+            return False
+        if time.time() - self.partial_line_time < LOG_MONITOR_PARTIAL_LINE_IDLE_S:
+            return False
+        return os.fstat(
+            self.file_handle.fileno()).st_size == self.partial_line_size
+
+    def update_partial_line(self, reached_end):
+        size = os.fstat(self.file_handle.fileno()).st_size
+        if not reached_end or self.file_handle.tell() >= size:
+            self.partial_line_size = None
+        elif size != self.partial_line_size:
+            self.partial_line_size = size
+            self.partial_line_time = time.time()
 
     def __repr__(self):
         return (
@@ -124,6 +246,90 @@ class LogFileInfo:
         )
 
 
+class LogBatchPublisher:
+    """Publish the log lines of the files in batches.
+
+    The log lines of all the files are accumulated until the size or time
+    budget of a batch is reached. The batch is compressed and published
+    with one pipelined call. If publishing falls behind, the log monitor
+    stops reading the files when the pending lines reach half of the max
+    pending bytes, and the lines are dropped with a counter when full.
+    """
+
+    def __init__(
+            self,
+            redis_client,
+            batch_bytes: int = LOG_PUBLISH_BATCH_BYTES,
+            batch_seconds: float = LOG_PUBLISH_BATCH_S,
+            max_pending_bytes: int = LOG_PUBLISH_MAX_PENDING_BYTES,
+            compress: bool = LOG_PUBLISH_COMPRESS):
+        self.redis_client = redis_client
+        self.batch_bytes = batch_bytes
+        self.batch_seconds = batch_seconds
+        self.max_pending_bytes = max_pending_bytes
+        self.compress = compress
+        # list of (data, bytes)
+        self.pending = []
+        self.pending_bytes = 0
+        self.first_pending_time = None
+        self.dropped_lines = 0
+        self.dropped_lines_to_report = 0
+
+    def add(self, data):
+        lines = data["lines"]
+        num_bytes = sum(len(line) for line in lines) + len(lines)
+        if self.pending_bytes + num_bytes > self.max_pending_bytes:
+            self.dropped_lines += len(lines)
+            self.dropped_lines_to_report += len(lines)
+            return
+        if not self.pending:
+            self.first_pending_time = time.time()
+        self.pending.append((data, num_bytes))
+        self.pending_bytes += num_bytes
+
+    def is_backpressured(self):
+        return self.pending_bytes >= self.max_pending_bytes // 2
+
+    def should_flush(self):
+        if not self.pending:
+            return False
+        return (self.pending_bytes >= self.batch_bytes
+                or time.time() - self.first_pending_time >= self.batch_seconds)
+
+    def flush_if_needed(self):
+        if self.should_flush():
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        messages = []
+        batch = []
+        batch_bytes = 0
+        for data, num_bytes in self.pending:
+            if batch and batch_bytes + num_bytes > self.batch_bytes:
+                messages.append(encode_logs_batch(batch, self.compress))
+                batch = []
+                batch_bytes = 0
+            batch.append(data)
+            batch_bytes += num_bytes
+        messages.append(encode_logs_batch(batch, self.compress))
+
+        pipeline = self.redis_client.pipeline(transaction=False)
+        for message in messages:
+            pipeline.publish(constants.LOG_FILE_CHANNEL, message)
+        # The pending lines are kept for retrying if failed
+        pipeline.execute()
+        self.pending = []
+        self.pending_bytes = 0
+        self.first_pending_time = None
+
+    def get_dropped_lines_to_report(self):
+        dropped_lines = self.dropped_lines_to_report
+        self.dropped_lines_to_report = 0
+        return dropped_lines
+
+
 class LogMonitor:
     """A monitor process for monitoring log files.
 
@@ -142,6 +348,12 @@ class LogMonitor:
     4. Then we will loop through the open files and see if there are any new
        lines in the file. If so, we will publish them to Redis.
 
+    The lines are published in batches across the files by LogBatchPublisher.
+
+    If inotify is available, the log directories are watched and only the
+    files with writes since the last check are checked and read. The monitor
+    sleeps until there are writes or creates of the files instead of polling.
+
     Attributes:
         node_id (str): The id of this node. Typical the stable host name if available
         node_ip (str): The ip address of this node.
@@ -167,6 +379,7 @@ class LogMonitor:
             redis_password=None,
             runtimes=None,
             max_files_open: int = constants.LOG_MONITOR_MAX_OPEN_FILES,
+            use_inotify: bool = LOG_MONITOR_USE_INOTIFY,
     ):
         """Initialize the log monitor object."""
         if not node_ip:
@@ -180,6 +393,7 @@ class LogMonitor:
         self.logs_dir = logs_dir
         self.redis_client = create_redis_client(
             redis_address, password=redis_password)
+        self.publisher = LogBatchPublisher(self.redis_client)
         self.runtimes = split_list(runtimes) if runtimes else None
         self.log_filenames = set()
         self.open_file_infos = []
@@ -188,6 +402,73 @@ class LogMonitor:
         self.max_files_open: int = max_files_open
         self.runtime_logs = self._get_runtime_log_dirs()
 
+        # The files with writes not yet read, only used with inotify
+        self.dirty_filenames = set()
+        self.filenames_changed = True
+        self.last_events_time = 0
+        self.watcher = self._create_watcher() if use_inotify else None
+
+    @staticmethod
+    def _create_watcher():
+        if not is_inotify_available():
+            logger.info("Inotify is not available. Use polling for log files.")
+            return None
+        try:
+            return InotifyWatcher()
+        except OSError as e:
+            logger.warning(
+                "Failed to create inotify watcher: {}. "
+                "Use polling for log files.".format(e))
+            return None
+
+    def _get_log_dirs(self):
+        log_dirs = [self.logs_dir]
+        if self.runtime_logs:
+            for runtime_log_dirs in self.runtime_logs.values():
+                log_dirs += runtime_log_dirs
+        log_dirs.append(os.path.expanduser("~/user/logs"))
+        return [os.path.normpath(log_dir) for log_dir in log_dirs]
+
+    def _update_watches(self):
+        watched_dirs = self.watcher.get_watched_paths()
+        for log_dir in self._get_log_dirs():
+            if log_dir in watched_dirs:
+                continue
+            try:
+                self.watcher.add_watch(log_dir, LOG_MONITOR_INOTIFY_MASK)
+            except OSError as e:
+                # The dir may not exist yet, try again on next rescan
+                if e.errno not in (errno.ENOENT, errno.ENOTDIR):
+                    raise e
+
+    def _process_events(self, timeout):
+        """Wait for the file events and mark the files with writes."""
+        events = self.watcher.read_events(timeout)
+        self.last_events_time = time.time()
+        for event in events:
+            if event.mask & IN_Q_OVERFLOW:
+                # Events lost, check all the files
+                self.dirty_filenames.update(
+                    os.path.normpath(filename) for filename in self.log_filenames)
+                self.filenames_changed = True
+                continue
+            log_dir = self.watcher.get_path(event.wd)
+            if log_dir is None or not event.name:
+                continue
+            if event.mask & (IN_CREATE | IN_MOVED_TO):
+                self.filenames_changed = True
+            self.dirty_filenames.add(os.path.join(log_dir, event.name))
+        return len(events) > 0
+
+    def _is_file_dirty(self, file_info):
+        if self.watcher is None:
+            return True
+        return os.path.normpath(file_info.filename) in self.dirty_filenames
+
+    def _clear_file_dirty(self, file_info):
+        if self.watcher is not None:
+            self.dirty_filenames.discard(os.path.normpath(file_info.filename))
+
     def _get_runtime_log_dirs(self):
         if not self.runtimes:
             return None
@@ -212,6 +493,9 @@ class LogMonitor:
             file_info = self.open_file_infos.pop(0)
             file_info.file_handle.close()
             file_info.file_handle = None
+            if file_info.partial_line_size is not None:
+                # Open it again to read the incomplete line at the end
+                file_info.size_when_last_opened = file_info.file_position
             proc_alive = True
             # Test if the worker process that generated the log file
             # is still alive. Only applies to worker processes.
@@ -249,6 +533,10 @@ class LogMonitor:
 
     def update_log_filenames(self):
         """Update the list of log files to monitor."""
+        if self.watcher is not None:
+            self._update_watches()
+            self.filenames_changed = False
+
         system_log_paths = []
         # segfaults and other serious errors are logged here
         system_log_paths += glob.glob(
@@ -288,6 +576,9 @@ class LogMonitor:
                 worker_pid = _get_pid_from_log_file(file_path)
 
                 self.log_filenames.add(file_path)
+                if self.watcher is not None:
+                    # Check the content written before being watched
+                    self.dirty_filenames.add(os.path.normpath(file_path))
                 self.closed_file_infos.append(
                     LogFileInfo(
                         filename=file_path,
@@ -318,6 +609,9 @@ class LogMonitor:
 
             file_info = self.closed_file_infos.pop(0)
             assert file_info.file_handle is None
+            if not self._is_file_dirty(file_info):
+                files_with_no_updates.append(file_info)
+                continue
             # Get the file size to see if it has gotten bigger since we last
             # opened it.
             try:
@@ -352,6 +646,7 @@ class LogMonitor:
                 file_info.file_handle = f
                 self.open_file_infos.append(file_info)
             else:
+                self._clear_file_dirty(file_info)
                 files_with_no_updates.append(file_info)
 
         if len(self.open_file_infos) >= self.max_files_open:
@@ -363,7 +658,7 @@ class LogMonitor:
         """Get any changes to the log files and push updates to Redis.
 
         Returns:
-            True if anything was published and false otherwise.
+            True if anything was read for publishing and false otherwise.
         """
         anything_published = False
         lines_to_publish = []
@@ -372,43 +667,41 @@ class LogMonitor:
             nonlocal lines_to_publish
             nonlocal anything_published
             if len(lines_to_publish) > 0:
-                data = {
-                    LOGGING_DATA_NODE_ID: self.node_id,
-                    LOGGING_DATA_NODE_IP: self.node_ip,
-                    LOGGING_DATA_NODE_TYPE: self.node_type,
-                    LOGGING_DATA_PID: file_info.worker_pid,
-                    LOGGING_DATA_RUNTIME: file_info.runtime_name,
-                    "is_err": file_info.is_err_file,
-                    "lines": lines_to_publish,
-                }
-                self.redis_client.publish(constants.LOG_FILE_CHANNEL,
-                                          json.dumps(data))
+                data = self._make_logging_data(
+                    file_info.worker_pid, file_info.runtime_name,
+                    file_info.is_err_file, lines_to_publish)
+                self.publisher.add(data)
                 anything_published = True
                 lines_to_publish = []
 
+        # Try to publish the pending lines if we are pressured
+        self.publisher.flush_if_needed()
         for file_info in self.open_file_infos:
             assert not file_info.file_handle.closed
-            file_info.reopen_if_necessary()
+            if not self._is_file_dirty(file_info):
+                continue
+            if self.publisher.is_backpressured():
+                # Leave the lines in the files until the publishing catches up
+                break
+            lines_to_publish += file_info.reopen_if_necessary()
 
-            max_num_lines_to_read = constants.LOG_MONITOR_NUM_LINES_TO_READ
-            for _ in range(max_num_lines_to_read):
-                try:
-                    next_line = file_info.file_handle.readline()
-                    # Replace any characters not in UTF-8 with
-                    # a replacement character, see
-                    # https://stackoverflow.com/a/38565489/10891801
-                    next_line = next_line.decode("utf-8", "replace")
-                    if next_line == "":
-                        break
-                    next_line = next_line.rstrip("\r\n")
-
-                    lines_to_publish.append(next_line)
-                except Exception:
-                    logger.error(
-                        f"Error: Reading file: {file_info.filename}, "
-                        f"position: {file_info.file_info.file_handle.tell()} "
-                        "failed.")
-                    raise
+            try:
+                lines, reached_end = read_log_lines(
+                    file_info.file_handle,
+                    constants.LOG_MONITOR_READ_CHUNK_BYTES,
+                    constants.LOG_MONITOR_NUM_LINES_TO_READ,
+                    flush_partial=file_info.is_partial_line_idle())
+                lines_to_publish += lines
+            except Exception:
+                logger.error(
+                    f"Error: Reading file: {file_info.filename}, "
+                    f"position: {file_info.file_handle.tell()} "
+                    "failed.")
+                raise
+            file_info.update_partial_line(reached_end)
+            # Check again for the incomplete line at the end
+            if reached_end and file_info.partial_line_size is None:
+                self._clear_file_dirty(file_info)
 
             # TODO (haifeng) : correct and add the processes we will have
             if file_info.file_position == 0:
@@ -421,8 +714,38 @@ class LogMonitor:
             file_info.file_position = file_info.file_handle.tell()
             flush()
 
+        self._report_dropped_lines()
+        if anything_published:
+            self.publisher.flush_if_needed()
+        else:
+            # Nothing more to wait for the batch
+            self.publisher.flush()
         return anything_published
 
+    def _make_logging_data(self, pid, runtime_name, is_err, lines):
+        return {
+            LOGGING_DATA_NODE_ID: self.node_id,
+            LOGGING_DATA_NODE_IP: self.node_ip,
+            LOGGING_DATA_NODE_TYPE: self.node_type,
+            LOGGING_DATA_PID: pid,
+            LOGGING_DATA_RUNTIME: runtime_name,
+            "is_err": is_err,
+            "lines": lines,
+        }
+
+    def _report_dropped_lines(self):
+        dropped_lines = self.publisher.get_dropped_lines_to_report()
+        if not dropped_lines:
+            return
+        message = ("Warning: {} log lines dropped because publishing falls "
+                   "behind ({} in total).".format(
+                    dropped_lines, self.publisher.dropped_lines))
+        logger.warning(message)
+        data = self._make_logging_data(
+            LOGGER_ID_LOG_MONITOR, constants.CLOUDTIK_RUNTIME_NAME,
+            True, [message])
+        self.publisher.add(data)
+
     def should_update_filenames(self, last_file_updated_time: float) -> bool:
         """Return true if filenames should be updated.
         This method is used to apply the backpressure on file updates because
@@ -433,11 +756,32 @@ class LogMonitor:
             True if filenames should be updated. False otherwise.
         """
         elapsed_seconds = float(time.time() - last_file_updated_time)
+        if self.watcher is not None:
+            return (
+                self.filenames_changed
+                or elapsed_seconds > LOG_MONITOR_RESCAN_INTERVAL_S
+            )
         return (
                 len(self.log_filenames) < LOG_MONITOR_MANY_FILES_THRESHOLD
                 or elapsed_seconds > LOG_NAME_UPDATE_INTERVAL_S
         )
 
+    def wait_for_updates(self, anything_published):
+        """Wait before checking for logs to avoid using too much CPU."""
+        if self.watcher is not None:
+            if not anything_published:
+                # Sleep until there are writes or creates of the files
+                if self._process_events(LOG_MONITOR_INOTIFY_WAIT_S):
+                    time.sleep(LOG_MONITOR_INOTIFY_BATCH_S)
+                    self._process_events(0)
+            elif (time.time() - self.last_events_time
+                    >= LOG_MONITOR_INOTIFY_BATCH_S):
+                self._process_events(0)
+        elif not anything_published:
+            # If nothing was published, then wait a little bit before checking
+            # for logs to avoid using too much CPU.
+            time.sleep(0.1)
+
     def run(self):
         """Run the log monitor.
 
@@ -482,10 +826,7 @@ class LogMonitor:
                 # if there is error, wait for some time
                 time.sleep(interval)
             else:
-                # If nothing was published, then wait a little bit before checking
-                # for logs to avoid using too much CPU.
-                if not anything_published:
-                    time.sleep(0.1)
+                self.wait_for_updates(anything_published)
 
 
 if __name__ == "__main__":
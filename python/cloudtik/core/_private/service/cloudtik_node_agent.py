@@ -10,15 +10,22 @@ import threading
 from multiprocessing.synchronize import Event
 from typing import Optional
 import json
-import psutil
-import subprocess
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
 
 import cloudtik
 from cloudtik.core._private import constants
-from cloudtik.core._private.util.core_utils import get_node_ip_address, split_list, get_process_of_pid_file
+from cloudtik.core._private.prometheus_metrics import NodePrometheusMetrics
+from cloudtik.core._private.util.core_utils import get_node_ip_address, split_list
+from cloudtik.core._private.util.process_scanner import ProcessScanner
 from cloudtik.core._private.util.logging_utils import setup_component_logger
+from cloudtik.core._private.metrics.metrics_codec import NodeMetricsEncoder
 from cloudtik.core._private.metrics.metrics_collector import MetricsCollector
 from cloudtik.core._private.state.control_state import ControlState
+from cloudtik.core._private.state.store_client import StoreWriteBatch
 from cloudtik.core._private.state.state_utils import NODE_STATE_NODE_IP, NODE_STATE_NODE_ID, NODE_STATE_NODE_KIND, \
     NODE_STATE_HEARTBEAT_TIME, NODE_STATE_NODE_TYPE, NODE_STATE_TIME, NODE_STATE_NODE_SEQ_ID
 from cloudtik.core._private.utils import get_runtime_processes, make_node_id
@@ -84,6 +91,10 @@ class NodeMonitor:
             "process": self.old_processes
         }
         self.metrics_collector = None
+        self.metrics_encoder = None
+        if constants.CLOUDTIK_NODE_METRICS_COMPACT:
+            self.metrics_encoder = NodeMetricsEncoder(
+                constants.CLOUDTIK_NODE_METRICS_KEYFRAME_INTERVAL)
 
         # Can be used to signal graceful exit from monitor loop.
         self.stop_event = stop_event  # type: Optional[Event]
@@ -94,13 +105,44 @@ class NodeMonitor:
         self.node_table = self.control_state.get_node_table()
         self.node_processes_table = self.control_state.get_node_processes_table()
         self.node_metrics_table = self.control_state.get_node_metrics_table()
+        self.node_metrics_base_table = self.control_state.get_node_metrics_base_table()
+        # The heartbeat is also carried by the batched flush of the update
+        # loop. The heartbeat thread skips its own write if there is a
+        # heartbeat written within the heartbeat period.
+        self.heartbeat_lock = threading.Lock()
+        self.last_heartbeat_time = 0
 
         self.processes_to_check = constants.CLOUDTIK_PROCESSES
         runtime_list = split_list(runtimes) if runtimes else None
         self.processes_to_check.extend(get_runtime_processes(runtime_list))
+        self.process_scanner = ProcessScanner(
+            self.processes_to_check, self.node_kind)
+
+        self.prometheus_metrics = NodePrometheusMetrics(node_id=node_id)
+        self._start_metrics_server()
 
         logger.info("Monitor: Started")
 
+    def _start_metrics_server(self):
+        if not constants.CLOUDTIK_NODE_METRIC_PORT:
+            return
+        if prometheus_client is None:
+            logger.warning(
+                "`prometheus_client` not found, so metrics will "
+                "not be exported.")
+            return
+        try:
+            logger.info(
+                "Starting metrics server on port {}".format(
+                    constants.CLOUDTIK_NODE_METRIC_PORT))
+            prometheus_client.start_http_server(
+                port=constants.CLOUDTIK_NODE_METRIC_PORT,
+                addr=self.node_ip,
+                registry=self.prometheus_metrics.registry)
+        except Exception:
+            logger.exception(
+                "An exception occurred while starting the metrics server.")
+
     def _run(self):
         """Run the monitor loop."""
         self._run_heartbeat()
@@ -118,8 +160,7 @@ class NodeMonitor:
             # Wait for update interval before processing the next
             # round of messages.
             try:
-                self._update_processes()
-                self._update_metrics()
+                self._update_node_state()
                 if last_error_str is not None:
                     # if this is a recover from many errors, we print a recovering message
                     if last_error_num >= log_repeat_errors:
@@ -165,11 +206,8 @@ class NodeMonitor:
         log_repeat_errors = LOG_ERROR_REPEAT_SECONDS // interval
         while True:
             time.sleep(interval)
-            now = time.time()
-            self.node_info[NODE_STATE_HEARTBEAT_TIME] = now
-            node_info_as_json = json.dumps(self.node_info)
             try:
-                self.node_table.put(self.node_id, node_info_as_json)
+                self._publish_heartbeat()
                 if last_error_str is not None:
                     # if this is a recover from many errors, we print a recovering message
                     if last_error_num >= log_repeat_errors:
@@ -191,44 +229,48 @@ class NodeMonitor:
                             "Error happened {} times for heartbeat: {}".format(
                                 last_error_num, error_str))
 
-    def _update_processes(self):
+    def _publish_heartbeat(self):
+        with self.heartbeat_lock:
+            now = time.time()
+            if now - self.last_heartbeat_time < \
+                    constants.CLOUDTIK_HEARTBEAT_PERIOD_SECONDS:
+                # The update loop flushed a heartbeat recently
+                return
+            batch = StoreWriteBatch()
+            self._batch_heartbeat(batch, now)
+            self.control_state.write_batch(batch)
+            self.last_heartbeat_time = now
+
+    def _batch_heartbeat(self, batch, now):
+        self.node_info[NODE_STATE_HEARTBEAT_TIME] = now
+        node_info_as_json = json.dumps(self.node_info)
+        self.node_table.batch_put(batch, self.node_id, node_info_as_json)
+
+    def _update_node_state(self):
         self._refresh_processes()
-        self._publish_processes()
+        self._refresh_metrics()
+        self._publish_node_state()
+
+    def _publish_node_state(self):
+        # Coalesce the processes, metrics and heartbeat into one flush
+        # which is a single pipelined round trip for each shard
+        batch = StoreWriteBatch()
+        self._publish_processes(batch)
+        self._publish_metrics(batch)
+        with self.heartbeat_lock:
+            now = time.time()
+            self._batch_heartbeat(batch, now)
+            self.control_state.write_batch(batch)
+            self.last_heartbeat_time = now
 
     def _refresh_processes(self):
         """check CloudTik runtime processes on the local machine."""
-        processes_info = []
-        for proc in psutil.process_iter(["name", "cmdline"]):
-            try:
-                processes_info.append((proc, proc.name(), proc.cmdline()))
-            except psutil.Error:
-                pass
-
-        found_process = {}
-        for keyword, filter_by_cmd, process_name, node_kind in self.processes_to_check:
-            if (self.node_kind != node_kind) and ("node" != node_kind):
-                continue
-
-            if filter_by_cmd is None:
-                # the keyword is the path to PID file
-                proc = get_process_of_pid_file(keyword)
-                if proc is not None:
-                    found_process[process_name] = proc.status()
-            else:
-                # the keyword is command name or arguments
-                if filter_by_cmd and len(keyword) > 15:
-                    # getting here is an internal bug, so we do not use cli_logger
-                    msg = ("The filter string should not be more than {} "
-                           "characters. Actual length: {}. Filter: {}").format(
-                        15, len(keyword), keyword)
-                    raise ValueError(msg)
-                found_process[process_name] = "-"
-                for candidate in processes_info:
-                    proc, proc_cmd, proc_args = candidate
-                    corpus = (proc_cmd
-                              if filter_by_cmd else subprocess.list2cmdline(proc_args))
-                    if keyword in corpus:
-                        found_process[process_name] = proc.status()
+        start_time = time.time()
+        found_process = self.process_scanner.scan()
+        self.prometheus_metrics.process_scan_time.observe(
+            time.time() - start_time)
+        self.prometheus_metrics.processes_scanned.set(
+            self.process_scanner.num_processes_scanned)
 
         if found_process != self.old_processes:
             logger.info(
@@ -237,10 +279,6 @@ class NodeMonitor:
             self.node_processes["process"] = found_process
             self.old_processes = found_process
 
-    def _update_metrics(self):
-        self._refresh_metrics()
-        self._publish_metrics()
-
     def _refresh_metrics(self):
         if self.metrics_collector is None:
             self.metrics_collector = MetricsCollector()
@@ -251,19 +289,31 @@ class NodeMonitor:
                 "Metrics collected for node: {}".format(metrics))
         self.node_metrics["metrics"] = metrics
 
-    def _publish_processes(self):
+    def _publish_processes(self, batch):
         now = time.time()
         node_processes = self.node_processes
         node_processes[NODE_STATE_TIME] = now
         node_processes_as_json = json.dumps(node_processes)
-        self.node_processes_table.put(self.node_id, node_processes_as_json)
+        self.node_processes_table.batch_put(
+            batch, self.node_id, node_processes_as_json)
 
-    def _publish_metrics(self):
+    def _publish_metrics(self, batch):
         now = time.time()
         node_metrics = self.node_metrics
         node_metrics[NODE_STATE_TIME] = now
+        if self.metrics_encoder is not None:
+            node_metrics_frame, keyframe = self.metrics_encoder.encode(
+                node_metrics)
+            self.node_metrics_table.batch_put(
+                batch, self.node_id, node_metrics_frame)
+            if keyframe is not None:
+                self.node_metrics_base_table.batch_put(
+                    batch, self.node_id, keyframe)
+            return
+
         node_metrics_as_json = json.dumps(node_metrics)
-        self.node_metrics_table.put(self.node_id, node_metrics_as_json)
+        self.node_metrics_table.batch_put(
+            batch, self.node_id, node_metrics_as_json)
 
     def run(self):
         # Register signal handlers for cluster scaler termination.
@@ -13,6 +13,7 @@ __NS_START_CHAR = b"@namespace_"
 
 NODE_PROCESSES_TABLE = "node_processes_table"
 NODE_METRICS_TABLE = "node_metrics_table"
+NODE_METRICS_BASE_TABLE = "node_metrics_base_table"
 
 
 def _make_key(namespace: Optional[str], key: bytes) -> bytes:
@@ -147,6 +148,10 @@ class ControlStateAccessor:
         assert self.connected, "Control state accessor not connected"
         return self.state_table_store.get_user_state_table(table_name)
 
+    def write_batch(self, batch):
+        assert self.connected, "Control state accessor not connected"
+        self.state_table_store.write_batch(batch)
+
 
 class ControlState:
     """A class used to interface with the global control state.
@@ -231,7 +236,18 @@ class ControlState:
             NODE_METRICS_TABLE)
         return node_metrics_table
 
+    def get_node_metrics_base_table(self):
+        self._check_connected()
+        node_metrics_base_table = self.control_state_accessor.get_user_state_table(
+            NODE_METRICS_BASE_TABLE)
+        return node_metrics_base_table
+
     def get_user_state_table(self, table_name):
         self._check_connected()
         state_table = self.control_state_accessor.get_user_state_table(table_name)
         return state_table
+
+    def write_batch(self, batch):
+        """Flush the writes of a StoreWriteBatch with one round trip per shard."""
+        self._check_connected()
+        self.control_state_accessor.write_batch(batch)
@@ -1,3 +1,4 @@
+import copy
 import json
 import logging
 import os
@@ -7,6 +8,24 @@ from filelock import FileLock
 
 logger = logging.getLogger(__name__)
 
+# The suffix of the journal file of mutations next to the state file
+STATE_JOURNAL_SUFFIX = ".journal"
+# Compact the journal into the state file when the journal is larger than
+# both the state file and this minimum size
+STATE_JOURNAL_MIN_COMPACT_BYTES = 256 * 1024
+
+JOURNAL_OP_PUT = "put"
+JOURNAL_OP_REMOVE = "remove"
+JOURNAL_OP_TAGS = "tags"
+
+
+def _get_file_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
 
 class TransactionContext(object):
     def __init__(self, lock_path):
@@ -23,19 +42,84 @@ class TransactionContext(object):
         self.lock.release()
 
 
+class _TagIndex:
+    """The index of the node ids by the (tag key, tag value) pairs."""
+
+    def __init__(self):
+        # (key, value) -> set of node ids
+        self._node_ids = {}
+        # node id -> the tags indexed
+        self._indexed_tags = {}
+
+    def clear(self):
+        self._node_ids = {}
+        self._indexed_tags = {}
+
+    def update(self, node_id, node):
+        self.remove(node_id)
+        tags = node.get("tags") if node else None
+        if not tags:
+            return
+        indexed_tags = dict(tags)
+        self._indexed_tags[node_id] = indexed_tags
+        for item in indexed_tags.items():
+            self._node_ids.setdefault(item, set()).add(node_id)
+
+    def remove(self, node_id):
+        indexed_tags = self._indexed_tags.pop(node_id, None)
+        if not indexed_tags:
+            return
+        for item in indexed_tags.items():
+            node_ids = self._node_ids.get(item)
+            if node_ids is None:
+                continue
+            node_ids.discard(node_id)
+            if not node_ids:
+                del self._node_ids[item]
+
+    def get_node_ids(self, tag_filters):
+        matched = None
+        # Intersect from the smallest set
+        for node_ids in sorted(
+                (self._node_ids.get(item, set()) for item in tag_filters.items()),
+                key=len):
+            matched = set(node_ids) if matched is None else matched & node_ids
+            if not matched:
+                break
+        return matched
+
+
 class FileStateStore:
+    """The state of the nodes stored in a state file with a journal.
+
+    The state is cached in memory together with an index of the node tags.
+    The cache is validated with the signatures (inode, size and modification
+    time) of the state file and the journal file, so the files are read only
+    when changed by others. The mutations are appended to the journal instead
+    of rewriting the whole state file, and the journal is compacted into the
+    state file when it grows larger than the state file. The journal
+    operations are idempotent so that replaying a journal not truncated after
+    a compaction gives the same state.
+    """
+
     def __init__(self, lock_path, state_path):
         os.makedirs(os.path.dirname(lock_path), exist_ok=True)
         os.makedirs(os.path.dirname(state_path), exist_ok=True)
 
         self.ctx = TransactionContext(lock_path)
         self.state_path = state_path
+        self.journal_path = state_path + STATE_JOURNAL_SUFFIX
         # this state object is just for convenience to pass among load and save
         self.state = None
+        self._tag_index = _TagIndex()
+        self._state_signature = None
+        self._journal_signature = None
+        # the bytes of the journal applied to the state
+        self._journal_offset = 0
 
     def get_nodes(self):
         with self.ctx:
-            return self.get_nodes_safe()
+            return copy.deepcopy(self.get_nodes_safe())
 
     def get_nodes_safe(self):
         state = self._load()
@@ -44,7 +128,7 @@ class FileStateStore:
 
     def get_node(self, node_id):
         with self.ctx:
-            return self.get_node_safe(node_id)
+            return copy.deepcopy(self.get_node_safe(node_id))
 
     def get_node_safe(self, node_id):
         nodes = self.get_nodes_safe()
@@ -52,6 +136,18 @@ class FileStateStore:
             return None
         return nodes[node_id]
 
+    def get_nodes_by_tags(self, tag_filters):
+        """Return the nodes with all the tags of the filters."""
+        with self.ctx:
+            nodes = self.get_nodes_safe()
+            if not tag_filters:
+                return copy.deepcopy(nodes)
+            node_ids = self._tag_index.get_node_ids(tag_filters)
+            return {
+                node_id: copy.deepcopy(nodes[node_id])
+                for node_id in node_ids or [] if node_id in nodes
+            }
+
     def put_node(self, node_id, node):
         assert "tags" in node
         with self.ctx:
@@ -60,8 +156,12 @@ class FileStateStore:
     def put_node_safe(self, node_id, node):
         state = self._load()
         nodes = state["nodes"]
+        # the cached node is not shared with the caller
+        node = copy.deepcopy(node)
         nodes[node_id] = node
-        self._save()
+        self._tag_index.update(node_id, node)
+        self._append_journal(
+            {"op": JOURNAL_OP_PUT, "nodes": {node_id: node}})
 
     def remove_node(self, node_id):
         with self.ctx:
@@ -72,8 +172,9 @@ class FileStateStore:
         nodes = state["nodes"]
         if node_id not in nodes:
             return
-        del nodes[node_id]
-        self._save()
+        self._remove_nodes(nodes, [node_id])
+        self._append_journal(
+            {"op": JOURNAL_OP_REMOVE, "node_ids": [node_id]})
 
     def cleanup(self, valid_ids):
         with self.ctx:
@@ -82,30 +183,36 @@ class FileStateStore:
     def cleanup_safe(self, valid_ids):
         state = self._load()
         nodes = state["nodes"]
-        updated = False
         if not valid_ids:
-            if nodes:
-                state["nodes"] = {}
-                updated = True
+            node_ids = list(nodes)
         else:
-            for node_id in list(nodes):
-                if node_id not in valid_ids:
-                    del nodes[node_id]
-                    updated = True
-        if updated:
-            self._save()
+            node_ids = [
+                node_id for node_id in nodes if node_id not in valid_ids]
+        if not node_ids:
+            return
+        self._remove_nodes(nodes, node_ids)
+        self._append_journal(
+            {"op": JOURNAL_OP_REMOVE, "node_ids": node_ids})
 
     def set_node_tags(self, node_id, tags, non_exists_ok=True):
+        self.set_nodes_tags({node_id: tags}, non_exists_ok)
+
+    def set_nodes_tags(self, nodes_tags, non_exists_ok=True):
+        """Update the tags of multiple nodes in a single transaction.
+
+        The nodes_tags is a dict of node id to the tags to update.
+        """
         with self.ctx:
             state = self._load()
             nodes = state["nodes"]
-            if node_id not in nodes:
-                if not non_exists_ok:
-                    raise RuntimeError("Node with id {} doesn't exist.".format(node_id))
-                nodes[node_id] = {}
-            node = nodes[node_id]
-            self.update_node_tags(node, tags)
-            self._save()
+            if not non_exists_ok:
+                for node_id in nodes_tags:
+                    if node_id not in nodes:
+                        raise RuntimeError(
+                            "Node with id {} doesn't exist.".format(node_id))
+            self._set_nodes_tags(nodes, nodes_tags)
+            self._append_journal(
+                {"op": JOURNAL_OP_TAGS, "nodes": nodes_tags})
 
     def get_node_tags(self, node_id):
         node = self.get_node(node_id)
@@ -113,32 +220,144 @@ class FileStateStore:
             return {}
         return node["tags"]
 
-    def _load(self):
-        if os.path.exists(self.state_path):
-            with open(self.state_path) as f:
-                try:
-                    state = json.loads(f.read())
-                except Exception as e:
-                    logger.error("Error load state file {}: {}".format(
-                        self.state_path, str(e)))
-                    state = {}
-        else:
-            state = {}
+    def _set_nodes_tags(self, nodes, nodes_tags):
+        for node_id, tags in nodes_tags.items():
+            if node_id not in nodes:
+                nodes[node_id] = {}
+            node = nodes[node_id]
+            # copy the tags so that the tags passed in are not shared
+            self.update_node_tags(node, dict(tags))
+            self._tag_index.update(node_id, node)
 
-        if logger.isEnabledFor(logging.DEBUG):
-            logger.debug("Loaded cluster state: {}".format(state))
+    def _remove_nodes(self, nodes, node_ids):
+        for node_id in node_ids:
+            if nodes.pop(node_id, None) is not None:
+                self._tag_index.remove(node_id)
+
+    def _load(self):
+        state_signature = _get_file_signature(self.state_path)
+        journal_signature = _get_file_signature(self.journal_path)
+        if (self.state is not None
+                and state_signature == self._state_signature):
+            if journal_signature == self._journal_signature:
+                # No changes since the last load or save
+                return self.state
+            if (journal_signature is not None
+                    and self._journal_signature is not None
+                    and journal_signature[0] == self._journal_signature[0]
+                    and journal_signature[1] >= self._journal_offset):
+                # Others appended to the same journal
+                self._replay_journal()
+                return self.state
 
+        state = self._load_state_file()
         if "nodes" not in state:
             state["nodes"] = {}
         self.state = state
+        self._state_signature = state_signature
+        self._rebuild_tag_index()
+        self._journal_offset = 0
+        self._journal_signature = None
+        self._replay_journal()
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Loaded cluster state: {}".format(state))
         return state
 
+    def _load_state_file(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as f:
+            try:
+                return json.loads(f.read())
+            except Exception as e:
+                logger.error("Error load state file {}: {}".format(
+                    self.state_path, str(e)))
+                return {}
+
+    def _rebuild_tag_index(self):
+        self._tag_index.clear()
+        for node_id, node in self.state["nodes"].items():
+            self._tag_index.update(node_id, node)
+
+    def _replay_journal(self):
+        try:
+            with open(self.journal_path, "rb") as f:
+                f.seek(self._journal_offset)
+                data = f.read()
+                signature = os.fstat(f.fileno())
+        except FileNotFoundError:
+            self._journal_signature = None
+            return
+
+        # Only the complete lines are applied
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except Exception as e:
+                logger.error("Error load state journal record of {}: {}".format(
+                    self.journal_path, str(e)))
+                continue
+            self._apply_record(record)
+        self._journal_offset += end
+        self._journal_signature = (
+            signature.st_ino, signature.st_size, signature.st_mtime_ns)
+
+    def _apply_record(self, record):
+        nodes = self.state["nodes"]
+        op = record.get("op")
+        if op == JOURNAL_OP_PUT:
+            for node_id, node in record["nodes"].items():
+                nodes[node_id] = node
+                self._tag_index.update(node_id, node)
+        elif op == JOURNAL_OP_REMOVE:
+            self._remove_nodes(nodes, record["node_ids"])
+        elif op == JOURNAL_OP_TAGS:
+            self._set_nodes_tags(nodes, record["nodes"])
+        else:
+            logger.warning("Unknown state journal operation: {}".format(op))
+
+    def _append_journal(self, record):
+        journal_size = 0
+        if self._journal_signature is not None:
+            journal_size = self._journal_signature[1]
+        state_size = 0
+        if self._state_signature is not None:
+            state_size = self._state_signature[1]
+        if journal_size > max(state_size, STATE_JOURNAL_MIN_COMPACT_BYTES):
+            # The record is already applied to the state
+            self._save()
+            return
+
+        data = (json.dumps(record) + "\n").encode()
+        with open(self.journal_path, "ab") as f:
+            f.write(data)
+            signature = os.fstat(f.fileno())
+        self._journal_offset += len(data)
+        self._journal_signature = (
+            signature.st_ino, signature.st_size, signature.st_mtime_ns)
+
     def _save(self):
+        """Write the whole state to the state file and clear the journal."""
         state = self.state
-        with open(self.state_path, "w") as f:
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w") as f:
             if logger.isEnabledFor(logging.DEBUG):
                 logger.debug("Writing cluster state: {}".format(list(state)))
             f.write(json.dumps(state))
+        os.replace(temp_path, self.state_path)
+        # the nodes may be changed in place before saving
+        self._rebuild_tag_index()
+        self._state_signature = _get_file_signature(self.state_path)
+        # the journal is applied to the state file
+        with open(self.journal_path, "wb") as f:
+            signature = os.fstat(f.fileno())
+        self._journal_offset = 0
+        self._journal_signature = (
+            signature.st_ino, signature.st_size, signature.st_mtime_ns)
 
     @staticmethod
     def update_node_tags(node, tags):
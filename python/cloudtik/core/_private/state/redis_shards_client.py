@@ -52,6 +52,15 @@ class RedisShard:
     def mget(self, keys):
         return self._redis_client.mget(keys)
 
+    def mset(self, key_values):
+        self._redis_client.mset(
+            {key: value.encode() for key, value in key_values.items()})
+
+    def pipeline(self):
+        # Commands of the pipeline are sent in one round trip
+        # without the overhead of MULTI/EXEC
+        return self._redis_client.pipeline(transaction=False)
+
     def scan(self, cursor, match_pattern, batch_size):
         return self._redis_client.scan(cursor, match_pattern, batch_size)
 
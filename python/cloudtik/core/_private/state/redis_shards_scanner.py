@@ -1,5 +1,7 @@
 import logging
-import redis
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from cloudtik.core._private.state.redis_shards_client import \
     RedisShardsClient, get_real_key
@@ -7,62 +9,124 @@ from cloudtik.core._private.state.redis_shards_client import \
 logger = logging.getLogger(__name__)
 
 SCAN_BATCH_SIZE = 1024
+SCAN_MAX_WORKERS = 16
+# The max number of the scanned batches waiting for the consumer
+SCAN_QUEUE_SIZE = 32
+# The interval to check whether the scan is stopped when the queue is full
+SCAN_QUEUE_PUT_TIMEOUT_S = 0.1
+
+# Marks that the scan of a shard is done
+_SHARD_SCAN_DONE = object()
 
 
 class RedisShardsScanner:
+    """Scan the keys and values of a table from all the shards.
+
+    The shards are scanned in parallel. For each shard, the MGET of the keys
+    returned by a SCAN batch is pipelined with the SCAN of the next batch so
+    that each batch costs one round trip. The key values can be consumed as a
+    stream without materializing the whole table: the scanned batches are
+    queued up to a bound for a slow consumer and the scan is stopped if the
+    consumer abandons the stream.
+    """
+
     def __init__(self, redis_shards_client: RedisShardsClient, table_name):
         self._redis_shards_client = redis_shards_client
         self._table_name = table_name
 
     def scan_keys_and_values(self, match_pattern):
         all_key_value = {}
-
-        def values_callback(key_value_map):
+        for key_value_map in self.scan_key_value_batches(match_pattern):
             all_key_value.update(key_value_map)
-
-        def keys_callback(keys):
-            scan_values(self._redis_shards_client, self._table_name, keys, values_callback)
-
-        self.scan_keys(match_pattern, keys_callback)
         return all_key_value
 
-    def scan_keys(self, match_pattern, keys_callback):
-        batch_size = SCAN_BATCH_SIZE
+    def iter_keys_and_values(self, match_pattern):
+        """A generator of (key, value) for all the keys matching the pattern."""
+        for key_value_map in self.scan_key_value_batches(match_pattern):
+            for key, value in key_value_map.items():
+                yield key, value
+
+    def scan_key_value_batches(self, match_pattern):
+        """A generator of key value maps with each map for a scan batch."""
         shard_size = self._redis_shards_client.get_shards_size()
-        for shard_index in range(shard_size):
-            # Scan by prefix from Redis.
-            shard_context = self._redis_shards_client.get_shard_by_index(shard_index)
-            new_cursor, keys = shard_context.scan(0, match_pattern, batch_size)
-            # Callback the keys
-            keys_callback(keys)
-            while new_cursor != 0:
-                new_cursor, keys = shard_context.scan(
-                    new_cursor, match_pattern, batch_size)
-                keys_callback(keys)
-
-
-def get_scan_by_shards(shards_client: RedisShardsClient, keys):
-    scan_by_shards = {}
-    for key in keys:
-        redis_shard = shards_client.get_shard(key)
-        shard_keys = scan_by_shards.get(redis_shard)
-        if shard_keys is not None:
-            shard_keys.append(key)
-        else:
-            shard_keys = [key]
-            scan_by_shards[redis_shard] = shard_keys
-
-    return scan_by_shards
-
-
-def scan_values(shards_client: RedisShardsClient, table_name, keys, values_callback):
-    # Use `mget` command for each shard
-    key_value_map = {}
-    scan_by_shards = get_scan_by_shards(shards_client, keys)
-    for shard, shard_keys in scan_by_shards.items():
-        key_values = shard.mget(shard_keys)
-        for k, v in zip(shard_keys, key_values):
+        if shard_size <= 1:
+            for shard_index in range(shard_size):
+                yield from self._scan_shard(shard_index, match_pattern)
+            return
+
+        results = queue.Queue(maxsize=SCAN_QUEUE_SIZE)
+        stopped = threading.Event()
+
+        def put_result(result):
+            while not stopped.is_set():
+                try:
+                    results.put(result, timeout=SCAN_QUEUE_PUT_TIMEOUT_S)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def scan_shard(shard_index):
+            try:
+                if stopped.is_set():
+                    return
+                # The next batch is scanned only if not stopped
+                for key_value_map in self._scan_shard(shard_index, match_pattern):
+                    if not put_result(key_value_map) or stopped.is_set():
+                        return
+                put_result(_SHARD_SCAN_DONE)
+            except Exception as e:
+                put_result(e)
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(shard_size, SCAN_MAX_WORKERS))
+        try:
+            for shard_index in range(shard_size):
+                executor.submit(scan_shard, shard_index)
+
+            remaining = shard_size
+            while remaining > 0:
+                result = results.get()
+                if result is _SHARD_SCAN_DONE:
+                    remaining -= 1
+                elif isinstance(result, Exception):
+                    raise result
+                else:
+                    yield result
+        finally:
+            stopped.set()
+            executor.shutdown(wait=False)
+
+    def _scan_shard(self, shard_index, match_pattern):
+        batch_size = SCAN_BATCH_SIZE
+        redis_shard = self._redis_shards_client.get_shard_by_index(shard_index)
+        cursor, keys = redis_shard.scan(0, match_pattern, batch_size)
+        while True:
+            keys = self._get_shard_keys(redis_shard, keys)
+            if cursor == 0:
+                if keys:
+                    yield self._get_key_value_map(keys, redis_shard.mget(keys))
+                break
+
+            # Get the values of this batch and scan the next batch in one round trip
+            pipeline = redis_shard.pipeline()
+            if keys:
+                pipeline.mget(keys)
+            pipeline.scan(cursor, match_pattern, batch_size)
+            responses = pipeline.execute()
+            if keys:
+                yield self._get_key_value_map(keys, responses[0])
+            cursor, keys = responses[-1]
+
+    def _get_shard_keys(self, redis_shard, keys):
+        # Only the keys belonging to the shard are kept. This avoids duplicates
+        # in the case that more than one shard are served by the same server.
+        return [key for key in keys
+                if self._redis_shards_client.get_shard(key) is redis_shard]
+
+    def _get_key_value_map(self, keys, values):
+        key_value_map = {}
+        for k, v in zip(keys, values):
             if v is not None:
-                key_value_map[get_real_key(k, table_name).decode("utf-8")] = v.decode("utf-8")
-
-    values_callback(key_value_map)
+                key_value_map[get_real_key(k, self._table_name).decode("utf-8")] = v.decode("utf-8")
+        return key_value_map
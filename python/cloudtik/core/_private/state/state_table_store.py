@@ -1,7 +1,7 @@
 import logging
 
 from cloudtik.core._private.state.redis_shards_client import RedisShardsClient
-from cloudtik.core._private.state.store_client import StoreClient
+from cloudtik.core._private.state.store_client import StoreClient, StoreWriteBatch
 
 logger = logging.getLogger(__name__)
 
@@ -14,12 +14,25 @@ class StateTable:
     def put(self, key, value):
         self._store_client.put(self._table_name, key, value)
 
+    def put_all(self, key_values):
+        self._store_client.put_all(self._table_name, key_values)
+
+    def batch_put(self, batch: StoreWriteBatch, key, value):
+        """Add a put of this table to the batch which is flushed later."""
+        batch.put(self._table_name, key, value)
+
+    def batch_delete(self, batch: StoreWriteBatch, key):
+        batch.delete(self._table_name, key)
+
     def get(self, key):
         return self._store_client.get(self._table_name, key)
 
     def get_all(self):
         return self._store_client.get_all(self._table_name)
 
+    def iter_all(self):
+        return self._store_client.iter_all(self._table_name)
+
     def delete(self, key):
         self._store_client.delete(self._table_name, key)
 
@@ -39,6 +52,9 @@ class StateTableStore:
         self._node_table = NodeStateTable(self._store_client)
         self._user_state_tables = {}
 
+    def write_batch(self, batch: StoreWriteBatch):
+        self._store_client.write_batch(batch)
+
     def get_node_table(self) -> NodeStateTable:
         return self._node_table
 
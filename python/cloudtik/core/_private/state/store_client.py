@@ -7,6 +7,47 @@ from cloudtik.core._private.state.redis_shards_scanner import RedisShardsScanner
 logger = logging.getLogger(__name__)
 
 
+class StoreWriteBatch:
+    """A batch of writes across tables to be flushed together.
+
+    The writes of a batch are grouped by the shard of the keys and each
+    shard is written with one pipelined round trip. A later write to the
+    same key in the batch overrides the previous one.
+    """
+
+    def __init__(self):
+        # redis key -> value to put or None for delete
+        self._writes = {}
+
+    def put(self, table_name, key, value):
+        self._writes[generate_redis_key(table_name, key)] = value
+
+    def delete(self, table_name, key):
+        self._writes[generate_redis_key(table_name, key)] = None
+
+    def get_writes(self):
+        return self._writes
+
+    def clear(self):
+        self._writes = {}
+
+    def __len__(self):
+        return len(self._writes)
+
+
+def get_writes_by_shards(shards_client: RedisShardsClient, writes):
+    writes_by_shards = {}
+    for redis_key, value in writes.items():
+        redis_shard = shards_client.get_shard(redis_key)
+        shard_writes = writes_by_shards.get(redis_shard)
+        if shard_writes is not None:
+            shard_writes[redis_key] = value
+        else:
+            writes_by_shards[redis_shard] = {redis_key: value}
+
+    return writes_by_shards
+
+
 class StoreClient:
     def __init__(self, redis_shards_client: RedisShardsClient):
         self._redis_shards_client = redis_shards_client
@@ -16,6 +57,36 @@ class StoreClient:
         redis_shard = self._redis_shards_client.get_shard(redis_key)
         redis_shard.put(redis_key, value)
 
+    def put_all(self, table_name, key_values):
+        # Use `mset` command for each shard
+        writes = {generate_redis_key(table_name, key): value
+                  for key, value in key_values.items()}
+        writes_by_shards = get_writes_by_shards(
+            self._redis_shards_client, writes)
+        for redis_shard, shard_writes in writes_by_shards.items():
+            redis_shard.mset(shard_writes)
+
+    def write_batch(self, batch: StoreWriteBatch):
+        writes = batch.get_writes()
+        if not writes:
+            return
+        writes_by_shards = get_writes_by_shards(
+            self._redis_shards_client, writes)
+        for redis_shard, shard_writes in writes_by_shards.items():
+            puts = {redis_key: value for redis_key, value in shard_writes.items()
+                    if value is not None}
+            deletes = [redis_key for redis_key, value in shard_writes.items()
+                       if value is None]
+            if not deletes:
+                redis_shard.mset(puts)
+                continue
+            pipeline = redis_shard.pipeline()
+            if puts:
+                pipeline.mset(
+                    {redis_key: value.encode() for redis_key, value in puts.items()})
+            pipeline.delete(*deletes)
+            pipeline.execute()
+
     def get(self, table_name, key):
         redis_key = generate_redis_key(table_name, key)
         redis_shard = self._redis_shards_client.get_shard(redis_key)
@@ -30,3 +101,9 @@ class StoreClient:
         match_pattern = generate_match_pattern(table_name)
         scanner = RedisShardsScanner(self._redis_shards_client, table_name)
         return scanner.scan_keys_and_values(match_pattern)
+
+    def iter_all(self, table_name):
+        """A generator of (key, value) for all the rows of the table."""
+        match_pattern = generate_match_pattern(table_name)
+        scanner = RedisShardsScanner(self._redis_shards_client, table_name)
+        return scanner.iter_keys_and_values(match_pattern)
@@ -280,6 +280,24 @@ def _run_and_process_output(cmd,
             return p.returncode
 
 
+def get_output_redirected_file(name):
+    """Open a new file in the outputs temp dir for the redirected output."""
+    outputs_temp_dir = os.path.join(get_cloudtik_temp_dir(), "outputs")
+    # TODO: make dirs at some top level so that we don't need check creating everytime
+    os.makedirs(outputs_temp_dir, exist_ok=True)
+    tmpfile_path = os.path.join(
+        outputs_temp_dir, "{}-{}.txt".format(
+            name, time.time()))
+    tmp = open(
+        tmpfile_path,
+        mode="w",
+        # line buffering
+        buffering=1)
+    cli_logger.verbose("Command stdout is redirected to {}",
+                       cf.bold(tmp.name))
+    return tmp
+
+
 def run_cmd_redirected(cmd,
                        process_runner=subprocess,
                        silent=False,
@@ -321,20 +339,7 @@ def run_cmd_redirected(cmd,
             output_redirected=output_redirected,
             cmd_to_print=cmd_to_print)
     else:
-        outputs_temp_dir = os.path.join(get_cloudtik_temp_dir(), "outputs")
-        # TODO: make dirs at some top level so that we don't need check creating everytime
-        os.makedirs(outputs_temp_dir, exist_ok=True)
-        tmpfile_path = os.path.join(
-            outputs_temp_dir, "{}-{}.txt".format(
-                cmd[0], time.time()))
-        with open(
-                tmpfile_path,
-                mode="w",
-                # line buffering
-                buffering=1) as tmp:
-            cli_logger.verbose("Command stdout is redirected to {}",
-                               cf.bold(tmp.name))
-
+        with get_output_redirected_file(cmd[0]) as tmp:
             return _run_and_process_output(
                 cmd,
                 process_runner=process_runner,
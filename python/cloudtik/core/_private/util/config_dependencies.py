@@ -0,0 +1,63 @@
+"""Track the files a config is resolved from.
+
+The functions loading the template and the default files record the paths
+they read (or probed but not found) so that a cached config can be checked
+against the files it depends on.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+_tracking = threading.local()
+
+
+@contextmanager
+def track_config_dependencies():
+    """Collect the paths recorded in the context in the yielded set."""
+    trackers = getattr(_tracking, "trackers", None)
+    if trackers is None:
+        trackers = []
+        _tracking.trackers = trackers
+    dependencies = set()
+    trackers.append(dependencies)
+    try:
+        yield dependencies
+    finally:
+        trackers.pop()
+
+
+def record_config_dependency(path: str):
+    trackers = getattr(_tracking, "trackers", None)
+    if not trackers:
+        return
+    path = os.path.abspath(path)
+    for dependencies in trackers:
+        dependencies.add(path)
+
+
+def get_config_dependency_hashes(
+        paths: Iterable[str], file_hash_cache) -> Dict[str, Optional[str]]:
+    """Return the hashes of the files. The hash of a missing file is None."""
+    existing_paths = []
+    dependency_hashes = {}
+    for path in sorted(paths):
+        if os.path.isfile(path):
+            existing_paths.append(path)
+        else:
+            dependency_hashes[path] = None
+    if existing_paths:
+        file_hashes = file_hash_cache.get_file_hashes(existing_paths)
+        dependency_hashes.update(zip(existing_paths, file_hashes))
+    return dependency_hashes
+
+
+def is_config_dependency_changed(
+        dependency_hashes: Dict[str, Optional[str]], file_hash_cache) -> bool:
+    try:
+        current_hashes = get_config_dependency_hashes(
+            dependency_hashes.keys(), file_hash_cache)
+    except OSError:
+        return True
+    return current_hashes != dependency_hashes
+
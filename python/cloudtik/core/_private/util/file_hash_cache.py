@@ -0,0 +1,174 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from cloudtik.core._private.util.core_utils import get_cloudtik_temp_dir
+
+logger = logging.getLogger(__name__)
+
+FILE_HASH_MANIFEST_VERSION = 1
+FILE_HASH_MANIFEST_FILE = "file-hashes.json"
+
+# The entries not used for this long are removed from the manifest
+FILE_HASH_MANIFEST_EXPIRY_S = 30 * 24 * 3600
+# Refresh the last used time of the entries not refreshed for this long
+FILE_HASH_LAST_USED_REFRESH_S = 24 * 3600
+
+# The files modified in this window may be modified again without changing
+# the modification time. The hashes of these files are not cached.
+FILE_HASH_RACY_WINDOW_NS = 2 * 1000 * 1000 * 1000
+
+# Hash the files with a thread pool when there are at least these files
+PARALLEL_HASH_MIN_FILES = 4
+PARALLEL_HASH_MAX_WORKERS = 8
+
+FILE_HASH_CHUNK_SIZE = 2 ** 20
+
+
+def _hash_file(path):
+    hasher = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(FILE_HASH_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class FileHashCache:
+    """The SHA1 hashes of the files cached in an on-disk manifest.
+
+    The hash of a file is reused if the size, the modification time and the
+    inode of the file are the same as when it was hashed. The files to hash
+    are hashed in parallel with threads (the hashing releases the GIL).
+    """
+
+    def __init__(self, manifest_path=None):
+        if manifest_path is None:
+            manifest_path = os.path.join(
+                get_cloudtik_temp_dir(), FILE_HASH_MANIFEST_FILE)
+        self.manifest_path = manifest_path
+        self.lock = threading.RLock()
+        # path -> [size, mtime_ns, inode, hash, last used time]
+        self.entries = None
+        # the paths of the entries added or refreshed since the last save
+        self.updated_paths = set()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self.lock:
+            self.hashed_files = 0
+            self.hashed_bytes = 0
+            self.cached_files = 0
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "hashed_files": self.hashed_files,
+                "hashed_bytes": self.hashed_bytes,
+                "cached_files": self.cached_files,
+            }
+
+    def clear(self):
+        """Forget all the hashes so that all the files are hashed again."""
+        with self.lock:
+            self.entries = {}
+
+    def get_file_hash(self, path) -> str:
+        return self.get_file_hashes([path])[0]
+
+    def get_file_hashes(self, paths: List[str]) -> List[str]:
+        """Return the hashes of the files in the order of the paths."""
+        hashes = [None] * len(paths)
+        to_hash = []
+        now = time.time()
+        with self.lock:
+            self._load()
+            for i, path in enumerate(paths):
+                stat = os.stat(path)
+                signature = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+                entry = self.entries.get(path)
+                if entry is not None and entry[:3] == signature:
+                    hashes[i] = entry[3]
+                    self.cached_files += 1
+                    if now - entry[4] > FILE_HASH_LAST_USED_REFRESH_S:
+                        entry[4] = now
+                        self.updated_paths.add(path)
+                else:
+                    to_hash.append((i, path, signature))
+
+        if not to_hash:
+            return hashes
+
+        if len(to_hash) >= PARALLEL_HASH_MIN_FILES:
+            with ThreadPoolExecutor(
+                    max_workers=min(PARALLEL_HASH_MAX_WORKERS, len(to_hash))) as executor:
+                results = list(executor.map(
+                    lambda item: _hash_file(item[1]), to_hash))
+        else:
+            results = [_hash_file(path) for _, path, _ in to_hash]
+
+        now_ns = time.time_ns()
+        with self.lock:
+            for (i, path, signature), file_hash in zip(to_hash, results):
+                hashes[i] = file_hash
+                self.hashed_files += 1
+                self.hashed_bytes += signature[0]
+                if now_ns - signature[1] < FILE_HASH_RACY_WINDOW_NS:
+                    # The file may change again with the same signature
+                    continue
+                self.entries[path] = signature + [file_hash, now]
+                self.updated_paths.add(path)
+        return hashes
+
+    def save(self):
+        """Save the updated hashes to the manifest.
+
+        The manifest is read again and merged so that the hashes saved by
+        others are kept.
+        """
+        with self.lock:
+            if not self.updated_paths:
+                return
+            entries = self._load_manifest()
+            for path in self.updated_paths:
+                entry = self.entries.get(path)
+                if entry is not None:
+                    entries[path] = entry
+            expiry = time.time() - FILE_HASH_MANIFEST_EXPIRY_S
+            entries = {
+                path: entry for path, entry in entries.items()
+                if entry[4] >= expiry}
+            try:
+                os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+                temp_path = "{}.{}.tmp".format(self.manifest_path, os.getpid())
+                with open(temp_path, "w") as f:
+                    json.dump({
+                        "version": FILE_HASH_MANIFEST_VERSION,
+                        "files": entries}, f)
+                os.replace(temp_path, self.manifest_path)
+            except OSError as e:
+                logger.warning("Failed to save the file hash manifest {}: {}".format(
+                    self.manifest_path, str(e)))
+            self.updated_paths = set()
+
+    def _load(self):
+        if self.entries is None:
+            self.entries = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning("Failed to load the file hash manifest {}: {}".format(
+                self.manifest_path, str(e)))
+            return {}
+        if manifest.get("version") != FILE_HASH_MANIFEST_VERSION:
+            return {}
+        return manifest.get("files", {})
@@ -0,0 +1,153 @@
+"""A minimal inotify binding based on ctypes for watching the directories.
+
+The watcher is only available on Linux. Use is_inotify_available to check
+before creating a watcher and fall back to polling if not available.
+"""
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+
+logger = logging.getLogger(__name__)
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_BUFFER_SIZE = 64 * 1024
+
+_libc = None
+
+
+def _get_libc():
+    global _libc
+    if _libc is None:
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        for name in ["inotify_init1", "inotify_add_watch", "inotify_rm_watch"]:
+            if not hasattr(libc, name):
+                raise OSError(errno.ENOSYS, "{} is not available.".format(name))
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        _libc = libc
+    return _libc
+
+
+def is_inotify_available():
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        _get_libc()
+        return True
+    except OSError:
+        return False
+
+
+class InotifyEvent:
+    __slots__ = ("wd", "mask", "cookie", "name")
+
+    def __init__(self, wd, mask, cookie, name):
+        self.wd = wd
+        self.mask = mask
+        self.cookie = cookie
+        self.name = name
+
+    def __repr__(self):
+        return "InotifyEvent(wd={}, mask={:#x}, name={})".format(
+            self.wd, self.mask, self.name)
+
+
+class InotifyWatcher:
+    """Watch the events of the files in a set of directories."""
+
+    def __init__(self):
+        libc = _get_libc()
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._libc = libc
+        self._fd = fd
+        # watch descriptor -> path
+        self._watches = {}
+
+    def fileno(self):
+        return self._fd
+
+    def add_watch(self, path, mask):
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        self._watches[wd] = path
+        return wd
+
+    def remove_watch(self, wd):
+        path = self._watches.pop(wd, None)
+        if path is not None:
+            self._libc.inotify_rm_watch(self._fd, wd)
+
+    def get_path(self, wd):
+        return self._watches.get(wd)
+
+    def get_watched_paths(self):
+        return set(self._watches.values())
+
+    def read_events(self, timeout=None):
+        """Wait up to timeout seconds and return the events available.
+
+        The events of the same file are coalesced into one event with
+        the masks combined, so the order of the events is not kept.
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        # (wd, name) -> mask
+        coalesced = {}
+        while True:
+            try:
+                data = os.read(self._fd, _READ_BUFFER_SIZE)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            self._parse_events(data, coalesced)
+        return [InotifyEvent(wd, mask, 0, os.fsdecode(name.rstrip(b"\0")))
+                for (wd, name), mask in coalesced.items()]
+
+    def _parse_events(self, data, coalesced):
+        offset = 0
+        size = len(data)
+        header_size = _EVENT_HEADER.size
+        unpack_from = _EVENT_HEADER.unpack_from
+        while offset + header_size <= size:
+            wd, mask, _, name_len = unpack_from(data, offset)
+            offset += header_size
+            key = (wd, data[offset:offset + name_len])
+            offset += name_len
+            if mask & IN_IGNORED:
+                # The watch was removed
+                self._watches.pop(wd, None)
+            coalesced[key] = coalesced.get(key, 0) | mask
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+            self._watches = {}
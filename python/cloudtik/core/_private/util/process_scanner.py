@@ -0,0 +1,171 @@
+import logging
+import os
+import re
+import subprocess
+from typing import Dict, List, Optional
+
+import psutil
+
+from cloudtik.core._private.util.core_utils import read_pid_from_pid_file
+
+logger = logging.getLogger(__name__)
+
+# The max length of the process name (comm) on Linux
+PROCESS_NAME_MAX_LENGTH = 15
+
+PROCESS_STATUS_NOT_FOUND = "-"
+
+
+class _KeywordMatcher:
+    """Match a set of keywords against a string in a single pass.
+
+    A combined regex of all the keywords filters out the strings without
+    any of the keywords, which are the most of the processes. Only for the
+    strings matched, each keyword is checked to find all the keywords
+    matched including the overlapped ones.
+    """
+
+    def __init__(self, keywords: List[str]):
+        self.keywords = sorted(set(keywords))
+        self._pattern = re.compile(
+            "|".join(re.escape(keyword) for keyword in self.keywords)
+        ) if self.keywords else None
+
+    def match(self, corpus: str) -> List[str]:
+        if self._pattern is None or not self._pattern.search(corpus):
+            return []
+        return [keyword for keyword in self.keywords if keyword in corpus]
+
+
+class _PidFileCache:
+    """Cache the pid of the pid files by the inode and modification time."""
+
+    def __init__(self):
+        # pid file -> (inode, mtime_ns, pid)
+        self._entries = {}
+
+    def get_pid(self, pid_file) -> Optional[int]:
+        try:
+            stat = os.stat(pid_file)
+        except OSError:
+            self._entries.pop(pid_file, None)
+            return None
+        entry = self._entries.get(pid_file)
+        if (entry is not None and entry[0] == stat.st_ino
+                and entry[1] == stat.st_mtime_ns):
+            return entry[2]
+        pid = read_pid_from_pid_file(pid_file)
+        self._entries[pid_file] = (stat.st_ino, stat.st_mtime_ns, pid)
+        return pid
+
+
+class ProcessScanner:
+    """Find the status of the processes to check with one scan of processes.
+
+    The processes are listed once for each scan with their names and the
+    command lines. All the keywords are matched with a single pass over
+    the processes. The pid files are read only if changed.
+
+    Each process to check is a list of: the keyword, whether to filter by
+    command name (True), by command with all the arguments (False) or by
+    a pid file (None), the process name and the node kind.
+    """
+
+    def __init__(self, processes_to_check, node_kind):
+        # keyword -> process names
+        self.names_by_cmd_keyword: Dict[str, List[str]] = {}
+        self.names_by_args_keyword: Dict[str, List[str]] = {}
+        # (pid file, process name)
+        self.pid_files = []
+        # The process names in the order of checking
+        self.process_names = []
+        for keyword, filter_by_cmd, process_name, process_node_kind in processes_to_check:
+            if (node_kind != process_node_kind) and ("node" != process_node_kind):
+                continue
+            self.process_names.append(process_name)
+            if filter_by_cmd is None:
+                # the keyword is the path to PID file
+                self.pid_files.append((keyword, process_name))
+                continue
+            if filter_by_cmd:
+                if len(keyword) > PROCESS_NAME_MAX_LENGTH:
+                    # getting here is an internal bug, so we do not use cli_logger
+                    msg = ("The filter string should not be more than {} "
+                           "characters. Actual length: {}. Filter: {}").format(
+                        PROCESS_NAME_MAX_LENGTH, len(keyword), keyword)
+                    raise ValueError(msg)
+                self.names_by_cmd_keyword.setdefault(
+                    keyword, []).append(process_name)
+            else:
+                self.names_by_args_keyword.setdefault(
+                    keyword, []).append(process_name)
+
+        self._cmd_matcher = _KeywordMatcher(list(self.names_by_cmd_keyword))
+        self._args_matcher = _KeywordMatcher(list(self.names_by_args_keyword))
+        self._pid_file_cache = _PidFileCache()
+        self.num_processes_scanned = 0
+
+    def _list_processes(self):
+        attrs = ["pid", "name"]
+        if self.names_by_args_keyword:
+            attrs.append("cmdline")
+        processes = {}
+        for proc in psutil.process_iter(attrs):
+            processes[proc.info["pid"]] = proc
+        return processes
+
+    def scan(self) -> Dict[str, str]:
+        """Return the status of the processes found.
+
+        A process filtered by keyword and not found has the status "-".
+        A process of pid file not found is not in the result.
+        """
+        processes = self._list_processes()
+        self.num_processes_scanned = len(processes)
+
+        found_process = {}
+        for process_name in self.process_names:
+            found_process[process_name] = PROCESS_STATUS_NOT_FOUND
+        matched = {}
+        for proc in processes.values():
+            process_names = self._match(proc)
+            for process_name in process_names:
+                matched[process_name] = proc
+
+        for process_name, proc in matched.items():
+            status = self._get_status(proc)
+            if status is not None:
+                found_process[process_name] = status
+
+        for pid_file, process_name in self.pid_files:
+            pid = self._pid_file_cache.get_pid(pid_file)
+            proc = processes.get(pid) if pid is not None else None
+            status = self._get_status(proc) if proc is not None else None
+            if status is None:
+                del found_process[process_name]
+            else:
+                found_process[process_name] = status
+        return found_process
+
+    def _match(self, proc):
+        process_names = []
+        info = proc.info
+        if self.names_by_cmd_keyword:
+            name = info.get("name") or ""
+            for keyword in self._cmd_matcher.match(name):
+                process_names += self.names_by_cmd_keyword[keyword]
+        if self.names_by_args_keyword:
+            cmdline = info.get("cmdline")
+            if cmdline:
+                # Build the command line string once for each process
+                corpus = subprocess.list2cmdline(cmdline)
+                for keyword in self._args_matcher.match(corpus):
+                    process_names += self.names_by_args_keyword[keyword]
+        return process_names
+
+    @staticmethod
+    def _get_status(proc):
+        try:
+            return proc.status()
+        except psutil.Error:
+            return None
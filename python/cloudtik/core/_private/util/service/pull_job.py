@@ -22,41 +22,85 @@ class PullJob(ServiceRunner):
             self.interval = DEFAULT_PULL_INTERVAL
 
     def run(self):
-        last_error_str = None
-        last_error_num = 0
+        self._reset_errors()
         interval = self.interval
-        log_repeat_errors = LOG_ERROR_REPEAT_SECONDS // interval
         while True:
             if self.stop_event and self.stop_event.is_set():
                 break
 
             try:
                 self.pull()
-                if last_error_str is not None:
-                    # if this is a recover from many errors, we print a recovering message
-                    if last_error_num >= log_repeat_errors:
-                        logger.info(
-                            "Recovering from {} repeated errors.".format(last_error_num))
-                    last_error_str = None
+                self._on_success()
             except Exception as e:
-                error_str = str(e)
-                if last_error_str != error_str:
-                    logger.exception(
-                        "Error happened when pulling: " + error_str)
-                    last_error_str = error_str
-                    last_error_num = 1
-                else:
-                    last_error_num += 1
-                    if last_error_num % log_repeat_errors == 0:
-                        logger.error(
-                            "Error happened {} times for pulling: {}".format(
-                                last_error_num, error_str))
+                self._on_error(e)
             time.sleep(interval)
 
+    def _reset_errors(self):
+        self.last_error_str = None
+        self.last_error_num = 0
+        self.log_repeat_errors = max(
+            LOG_ERROR_REPEAT_SECONDS // self.interval, 1)
+
+    def _on_success(self):
+        if self.last_error_str is not None:
+            # if this is a recover from many errors, we print a recovering message
+            if self.last_error_num >= self.log_repeat_errors:
+                logger.info(
+                    "Recovering from {} repeated errors.".format(self.last_error_num))
+            self.last_error_str = None
+
+    def _on_error(self, e):
+        error_str = str(e)
+        if self.last_error_str != error_str:
+            logger.exception(
+                "Error happened when pulling: " + error_str)
+            self.last_error_str = error_str
+            self.last_error_num = 1
+        else:
+            self.last_error_num += 1
+            if self.last_error_num % self.log_repeat_errors == 0:
+                logger.error(
+                    "Error happened {} times for pulling: {}".format(
+                        self.last_error_num, error_str))
+
     def pull(self):
         pass
 
 
+class WatchPullJob(PullJob):
+    """A pulling job which pulls when a change is watched instead of
+    pulling with a fixed interval.
+
+    The watch method blocks until there may be a change or the watch times
+    out and returns whether to pull. After an error, the job waits for
+    the interval before watching again.
+    """
+
+    def run(self):
+        self._reset_errors()
+        interval = self.interval
+        while True:
+            if self.stop_event and self.stop_event.is_set():
+                break
+
+            try:
+                if self.watch():
+                    self.pull()
+                self._on_success()
+            except Exception as e:
+                self._on_error(e)
+                self.reset_watch()
+                time.sleep(interval)
+
+    def watch(self) -> bool:
+        time.sleep(self.interval)
+        return True
+
+    def reset_watch(self):
+        """Reset the watch so that the next watch returns immediately."""
+        pass
+
+
 class ScriptPullJob(PullJob):
     def __init__(
             self,
@@ -26,6 +26,8 @@ from cloudtik.core._private.call_context import CallContext
 from cloudtik.core._private.cli_logger import cli_logger, cf
 from cloudtik.core._private.cluster.cluster_metrics import ClusterMetricsSummary
 from cloudtik.core._private.concurrent_cache import ConcurrentObjectCache
+from cloudtik.core._private.util.config_dependencies import record_config_dependency
+from cloudtik.core._private.util.file_hash_cache import FileHashCache
 from cloudtik.core._private.constants import CLOUDTIK_WHEELS, \
     CLOUDTIK_DEFAULT_MAX_WORKERS, CLOUDTIK_NODE_SSH_INTERVAL_S, CLOUDTIK_NODE_START_WAIT_S, MAX_PARALLEL_EXEC_NODES, \
     CLOUDTIK_CLUSTER_URI_TEMPLATE, CLOUDTIK_RUNTIME_NAME, CLOUDTIK_RUNTIME_ENV_NODE_IP, CLOUDTIK_RUNTIME_ENV_HEAD_IP, \
@@ -48,7 +50,8 @@ from cloudtik.core._private.workspace_provider_factory import _get_workspace_pro
 from cloudtik.core._private.storage_provider_factory import _get_storage_provider
 from cloudtik.core._private.database_provider_factory import _get_database_provider
 from cloudtik.core._private.docker import validate_docker_config
-from cloudtik.core.scaling_policy import ScalingState
+from cloudtik.core.scaling_policy import ScalingState, SCALING_INSTRUCTIONS_RESOURCE_DEMANDS, \
+    SCALING_INSTRUCTIONS_RESOURCE_DEMAND_SHAPES
 from cloudtik.core.tags import CLOUDTIK_TAG_USER_NODE_TYPE, CLOUDTIK_TAG_NODE_STATUS, STATUS_UP_TO_DATE, \
     STATUS_UPDATE_FAILED, CLOUDTIK_TAG_NODE_KIND, NODE_KIND_HEAD, NODE_KIND_WORKER
 
@@ -470,6 +473,7 @@ def _get_user_template_file(template_name: str):
                 user_template_dir.strip() for user_template_dir in user_template_dirs_str.split(',')]
             for user_template_dir in user_template_dirs:
                 template_file = os.path.join(user_template_dir, template_name)
+                record_config_dependency(template_file)
                 if os.path.exists(template_file):
                     return template_file
 
@@ -497,6 +501,7 @@ def _get_template_config(
             template_file = os.path.join(
                 os.path.dirname(cloudtik_home.__file__), "templates", template_name)
 
+    record_config_dependency(template_file)
     with open(template_file) as f:
         template_config = yaml.safe_load(f)
 
@@ -566,6 +571,7 @@ def _get_rooted_template_config(
         template_name += ".yaml"
 
     template_file = os.path.join(root, template_name)
+    record_config_dependency(template_file)
     with open(template_file) as f:
         template_config = yaml.safe_load(f)
 
@@ -1543,16 +1549,19 @@ def prepare_config_for_runtime_hash(
 # This global cache needs to be protected for thread concurrency for future cases
 _hash_cache = ConcurrentObjectCache()
 
+# The hashes of the files are cached on disk across the runs and the
+# unchanged files are not read again.
+_file_hash_cache = FileHashCache()
+
 HASH_CONTEXT_HEAD_NODE_CONTENTS_HASH = "head_node_contents_hash"
 HASH_CONTEXT_CONTENTS_HASHER = "contents_hasher"
 
 
-def add_content_hashes(hasher, path, allow_non_existing_paths: bool = False):
-    def add_hash_of_file(fpath):
-        with open(fpath, "rb") as f:
-            for chunk in iter(lambda: f.read(2 ** 20), b""):
-                hasher.update(chunk)
+def get_file_hash_cache() -> FileHashCache:
+    return _file_hash_cache
 
+
+def add_content_hashes(hasher, path, allow_non_existing_paths: bool = False):
     path = os.path.expanduser(path)
     if allow_non_existing_paths and not os.path.exists(path):
         return
@@ -1560,14 +1569,18 @@ def add_content_hashes(hasher, path, allow_non_existing_paths: bool = False):
         dirs = []
         for dirpath, _, filenames in os.walk(path):
             dirs.append((dirpath, sorted(filenames)))
-        for dirpath, filenames in sorted(dirs):
+        dirs = sorted(dirs)
+        # Hash all the files of the directory at once for parallel hashing
+        file_hashes = iter(_file_hash_cache.get_file_hashes([
+            os.path.join(dirpath, name)
+            for dirpath, filenames in dirs for name in filenames]))
+        for dirpath, filenames in dirs:
             hasher.update(dirpath.encode("utf-8"))
             for name in filenames:
                 hasher.update(name.encode("utf-8"))
-                fpath = os.path.join(dirpath, name)
-                add_hash_of_file(fpath)
+                hasher.update(next(file_hashes).encode("utf-8"))
     else:
-        add_hash_of_file(path)
+        hasher.update(_file_hash_cache.get_file_hash(path).encode("utf-8"))
 
 
 def load_runtime_hash(hash_context: Dict[str, Any], file_mounts, hash_str: str):
@@ -1647,6 +1660,7 @@ def hash_runtime_conf(
     else:
         runtime_hash_for_node_types = None
 
+    _file_hash_cache.save()
     return runtime_hash, file_mounts_contents_hash, runtime_hash_for_node_types
 
 
@@ -2750,8 +2764,10 @@ def _get_runtime_config_object(config_home: str, provider_config, object_name: s
     provider_type = provider_config["type"]
 
     path_to_config_file = os.path.join(config_home, provider_type, object_name)
+    record_config_dependency(path_to_config_file)
     if not os.path.exists(path_to_config_file):
         path_to_config_file = os.path.join(config_home, object_name)
+        record_config_dependency(path_to_config_file)
 
     if not os.path.exists(path_to_config_file):
         return {}
@@ -3034,17 +3050,32 @@ def get_resource_demands_for_memory(memory_in_bytes, config):
 
 
 def get_resource_demands_for(amount, resource_id, config):
-    if resource_id == constants.CLOUDTIK_RESOURCE_CPU:
-        return get_resource_demands_for_cpu(amount, config)
-    elif resource_id == constants.CLOUDTIK_RESOURCE_GPU:
-        return get_resource_demands_for_gpu(amount, config)
-    elif resource_id == constants.CLOUDTIK_RESOURCE_MEMORY:
-        return get_resource_demands_for_memory(amount, config)
+    resource_demand_shapes = get_resource_demand_shapes_for(
+        amount, resource_id, config)
+    if resource_demand_shapes is None:
+        return None
+    return _expand_resource_demand_shapes(resource_demand_shapes)
+
+
+def get_resource_demand_shapes_for(amount, resource_id, config):
+    """Return the resource demands as a list of [bundle, count]."""
+    if resource_id == constants.CLOUDTIK_RESOURCE_MEMORY:
+        default_bundle_size = pow(1024, 3)
     else:
-        return get_resource_demands(amount, resource_id, config, 1)
+        default_bundle_size = 1
+    return get_resource_demand_shapes(
+        amount, resource_id, config, default_bundle_size)
 
 
 def get_resource_demands(amount, resource_id, config, default_bundle_size):
+    resource_demand_shapes = get_resource_demand_shapes(
+        amount, resource_id, config, default_bundle_size)
+    if resource_demand_shapes is None:
+        return None
+    return _expand_resource_demand_shapes(resource_demand_shapes)
+
+
+def get_resource_demand_shapes(amount, resource_id, config, default_bundle_size):
     if amount is None:
         return None
 
@@ -3059,13 +3090,20 @@ def get_resource_demands(amount, resource_id, config, default_bundle_size):
     remaining = amount % bundle_size
     to_request = []
     if count > 0:
-        to_request += [{resource_id: bundle_size}] * count
+        to_request.append([{resource_id: bundle_size}, count])
     if remaining > 0:
-        to_request += [{resource_id: remaining}]
+        to_request.append([{resource_id: remaining}, 1])
 
     return to_request
 
 
+def _expand_resource_demand_shapes(resource_demand_shapes):
+    to_request = []
+    for bundle, count in resource_demand_shapes:
+        to_request += [bundle] * count
+    return to_request
+
+
 def get_node_type(provider, node_id: str):
     node_tags = provider.node_tags(node_id)
     node_type = node_tags.get(CLOUDTIK_TAG_USER_NODE_TYPE)
@@ -3553,8 +3591,16 @@ def merge_optional_dict(config, updates):
 
 
 def merge_scaling_state(scaling_state: ScalingState, new_scaling_state: ScalingState):
+    autoscaling_instructions = scaling_state.autoscaling_instructions
+    new_autoscaling_instructions = new_scaling_state.autoscaling_instructions
+    if autoscaling_instructions and new_autoscaling_instructions:
+        # The resource demands in either form override both forms
+        if (SCALING_INSTRUCTIONS_RESOURCE_DEMANDS in new_autoscaling_instructions
+                or SCALING_INSTRUCTIONS_RESOURCE_DEMAND_SHAPES in new_autoscaling_instructions):
+            autoscaling_instructions.pop(SCALING_INSTRUCTIONS_RESOURCE_DEMANDS, None)
+            autoscaling_instructions.pop(SCALING_INSTRUCTIONS_RESOURCE_DEMAND_SHAPES, None)
     autoscaling_instructions = merge_optional_dict(
-        scaling_state.autoscaling_instructions, new_scaling_state.autoscaling_instructions)
+        autoscaling_instructions, new_autoscaling_instructions)
     node_resource_states = merge_optional_dict(
         scaling_state.node_resource_states, new_scaling_state.node_resource_states)
     lost_nodes = merge_optional_dict(
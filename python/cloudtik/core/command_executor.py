@@ -1,4 +1,5 @@
 import time
+from contextlib import contextmanager
 from typing import Any, List, Tuple, Dict, Optional
 
 from cloudtik.core._private.annotations import DeveloperAPI
@@ -184,3 +185,34 @@ class CommandExecutor:
     def bootstrap_data_disks(self) -> None:
         """Used to format and mount data disks on host."""
         pass
+
+    @contextmanager
+    def command_session(self):
+        """Run the commands in the context with a long-lived session on the
+        node if it is supported by the executor."""
+        yield
+
+    def with_node_cmd(self, cmd: str, with_input: bool = False) -> str:
+        """Return the command to run on the host of the node which runs the
+        command on the node, for example, in the container of the node.
+
+        Args:
+            cmd (str): The command to run on the node.
+            with_input (bool): Whether the command reads the standard input.
+        """
+        return cmd
+
+    def get_ssh_host(self) -> Optional[Tuple[str, str, Optional[int]]]:
+        """Return the ssh user, ip and port of the host of the node if the
+        host can be reached by ssh from the other nodes, otherwise None."""
+        return None
+
+    def run_with_ssh_agent(self, cmd: str, ssh_agent_socket: str) -> None:
+        """Run the command on the host of the node with the local ssh agent
+        forwarded to the host.
+
+        Args:
+            cmd (str): The command to run on the host of the node.
+            ssh_agent_socket (str): The socket of the local ssh agent.
+        """
+        raise NotImplementedError
@@ -185,6 +185,14 @@ class NodeProvider:
         """Sets the tag values (string dict) for the specified node."""
         raise NotImplementedError
 
+    def set_nodes_tags(self, nodes_tags: Dict[str, Dict[str, str]]) -> None:
+        """Sets the tag values (string dict) for a set of nodes.
+
+        May be overridden with a batch method.
+        """
+        for node_id, tags in nodes_tags.items():
+            self.set_node_tags(node_id, tags)
+
     def terminate_node(self, node_id: str) -> Optional[Dict[str, Any]]:
         """Terminates the specified node.
 
@@ -7,6 +7,8 @@ logger = logging.getLogger(__name__)
 
 SCALING_INSTRUCTIONS_SCALING_TIME = "scaling_time"
 SCALING_INSTRUCTIONS_RESOURCE_DEMANDS = "resource_demands"
+# The resource demands as a list of [resource bundle, count] of identical bundles
+SCALING_INSTRUCTIONS_RESOURCE_DEMAND_SHAPES = "resource_demand_shapes"
 SCALING_INSTRUCTIONS_RESOURCE_REQUESTS = "resource_requests"
 
 SCALING_NODE_STATE_TOTAL_RESOURCES = "total_resources"
@@ -1,4 +1,6 @@
+import concurrent.futures
 import copy
+import functools
 import logging
 import time
 from typing import Dict, Any
@@ -24,9 +26,11 @@ from cloudtik.providers._private._kubernetes.config import bootstrap_kubernetes,
     with_kubernetes_environment_variables, get_head_hostname, \
     get_worker_hostname, prepare_kubernetes_config, _get_node_info, \
     _get_node_public_ip, get_default_kubernetes_cloud_storage, get_default_kubernetes_cloud_database
+from cloudtik.providers._private._kubernetes.pod_informer import PodInformer
 from cloudtik.providers._private._kubernetes.utils import to_label_selector, \
     create_and_configure_pvc_for_pod, delete_persistent_volume_claims, get_pod_persistent_volume_claims, \
-    delete_persistent_volume_claims_by_name
+    delete_persistent_volume_claims_by_name, get_persistent_volume_claims_of_pod, call_api_with_retry, \
+    call_create_api_with_retry
 from cloudtik.providers._private.utils import validate_config_dict
 
 logger = logging.getLogger(__name__)
@@ -34,6 +38,11 @@ logger = logging.getLogger(__name__)
 MAX_TAG_RETRIES = 3
 DELAY_BEFORE_TAG_RETRY = .5
 
+CLOUDTIK_TAG_NODE_UUID = "cloudtik-node-uuid"
+
+# Max concurrent API calls to create or terminate the pods
+MAX_PARALLEL_OPERATIONS = 16
+
 
 class KubernetesNodeProvider(NodeProvider):
     """
@@ -47,6 +56,12 @@ class KubernetesNodeProvider(NodeProvider):
         NodeProvider.__init__(self, provider_config, cluster_name)
         self.cluster_name = cluster_name
         self.namespace = provider_config["namespace"]
+        # Serve the pod reads from a local cache fed by watching the pods
+        self.pod_informer = None
+        if provider_config.get("pod_informer", True):
+            self.pod_informer = PodInformer(
+                self.namespace,
+                to_label_selector({CLOUDTIK_TAG_CLUSTER_NAME: cluster_name}))
 
     def with_environment_variables(
             self, node_type_config: Dict[str, Any], node_id: str):
@@ -66,6 +81,11 @@ class KubernetesNodeProvider(NodeProvider):
         ])
 
         tag_filters[CLOUDTIK_TAG_CLUSTER_NAME] = self.cluster_name
+        if self.pod_informer is not None:
+            pods = self.pod_informer.list_non_terminated_pods(tag_filters)
+            if pods is not None:
+                return [pod.metadata.name for pod in pods]
+
         label_selector = to_label_selector(tag_filters)
         pod_list = core_api().list_namespaced_pod(
             self.namespace,
@@ -80,20 +100,20 @@ class KubernetesNodeProvider(NodeProvider):
         ]
 
     def get_node_info(self, node_id):
-        pod = core_api().read_namespaced_pod(node_id, self.namespace)
+        pod = self._get_pod(node_id)
         return _get_node_info(
             pod, self.provider_config, self.namespace, self.cluster_name)
 
     def is_running(self, node_id):
-        pod = core_api().read_namespaced_pod(node_id, self.namespace)
+        pod = self._get_pod(node_id)
         return pod.status.phase == "Running"
 
     def is_terminated(self, node_id):
-        pod = core_api().read_namespaced_pod(node_id, self.namespace)
+        pod = self._get_pod(node_id)
         return pod.status.phase not in ["Running", "Pending"]
 
     def node_tags(self, node_id):
-        pod = core_api().read_namespaced_pod(node_id, self.namespace)
+        pod = self._get_pod(node_id)
         return pod.metadata.labels
 
     def external_ip(self, node_id):
@@ -106,7 +126,7 @@ class KubernetesNodeProvider(NodeProvider):
         return _get_node_public_ip(tags, self.namespace, self.cluster_name)
 
     def internal_ip(self, node_id):
-        pod = core_api().read_namespaced_pod(node_id, self.namespace)
+        pod = self._get_pod(node_id)
         return pod.status.pod_ip
 
     def get_node_id(self, ip_address, use_internal_ip=True) -> str:
@@ -132,9 +152,21 @@ class KubernetesNodeProvider(NodeProvider):
         self._set_node_tags(node_ids, tags)
 
     def _set_node_tags(self, node_id, tags):
-        pod = core_api().read_namespaced_pod(node_id, self.namespace)
-        pod.metadata.labels.update(tags)
-        core_api().patch_namespaced_pod(node_id, self.namespace, pod)
+        if self.pod_informer is None:
+            pod = core_api().read_namespaced_pod(node_id, self.namespace)
+            pod.metadata.labels.update(tags)
+            core_api().patch_namespaced_pod(node_id, self.namespace, pod)
+            return
+
+        # Patch the labels only which doesn't need the latest pod
+        pod = core_api().patch_namespaced_pod(
+            node_id, self.namespace, {"metadata": {"labels": tags}})
+        self.pod_informer.update_pod(pod)
+
+    def _get_pod(self, node_id):
+        if self.pod_informer is not None:
+            return self.pod_informer.get_pod(node_id)
+        return core_api().read_namespaced_pod(node_id, self.namespace)
 
     def create_node(self, node_config, tags, count):
         conf = copy.deepcopy(node_config)
@@ -142,9 +174,7 @@ class KubernetesNodeProvider(NodeProvider):
         pod_spec = conf["pod"]
         service_spec = conf.get("service")
         ingress_spec = conf.get("ingress")
-        node_uuid = str(uuid4())
         tags[CLOUDTIK_TAG_CLUSTER_NAME] = self.cluster_name
-        tags["cloudtik-node-uuid"] = node_uuid
         pod_spec["metadata"]["namespace"] = self.namespace
         if "labels" in pod_spec["metadata"]:
             pod_spec["metadata"]["labels"].update(tags)
@@ -159,52 +189,71 @@ class KubernetesNodeProvider(NodeProvider):
         logger.debug(log_prefix + "calling create_namespaced_pod "
                                   "(count={}).".format(count))
 
-        new_nodes = []
-        for _ in range(count):
-            _pod_spec = copy.deepcopy(pod_spec)
-            # Generate a random hostname
-            _pod_spec["spec"]["hostname"] = get_head_hostname() if (
-                    tags[CLOUDTIK_TAG_NODE_KIND] == NODE_KIND_HEAD) else get_worker_hostname()
-            created_pvcs = create_and_configure_pvc_for_pod(
-                self.provider_config, tags,
-                _pod_spec, data_disks,
-                self.cluster_name, self.namespace)
-            try:
-                pod = core_api().create_namespaced_pod(self.namespace, _pod_spec)
-                new_nodes.append(pod)
-            except ApiException:
-                logger.error(
-                    "Error happened when creating the pod. Try clean up its PVCs...")
-                delete_persistent_volume_claims(created_pvcs, self.namespace)
-                raise
+        def create_one_node():
+            self._create_node(
+                pod_spec, service_spec, ingress_spec,
+                data_disks, tags)
 
-        new_svcs = []
-        if service_spec is not None:
-            logger.debug(
-                log_prefix + "calling create_namespaced_service "
-                             "(count={}).".format(count))
-
-            for new_node in new_nodes:
-                metadata = service_spec.get("metadata", {})
-                metadata["name"] = new_node.metadata.name
-                service_spec["metadata"] = metadata
-                service_spec["spec"]["selector"] = {"cloudtik-node-uuid": node_uuid}
-                svc = core_api().create_namespaced_service(
-                    self.namespace, service_spec)
-                new_svcs.append(svc)
-
-        if ingress_spec is not None:
-            logger.debug(
-                log_prefix + "calling create_namespaced_ingress "
-                             "(count={}).".format(count))
-            for new_svc in new_svcs:
-                metadata = ingress_spec.get("metadata", {})
-                metadata["name"] = new_svc.metadata.name
-                ingress_spec["metadata"] = metadata
-                ingress_spec = _add_service_name_to_service_port(
-                    ingress_spec, new_svc.metadata.name)
-                networking_api().create_namespaced_ingress(
-                    self.namespace, ingress_spec)
+        start_time = time.time()
+        self._run_in_parallel(
+            [create_one_node for _ in range(count)])
+        logger.debug(
+            log_prefix + "Created {} pods in {:.3f} seconds.".format(
+                count, time.time() - start_time))
+
+    def _create_node(
+            self, pod_spec, service_spec, ingress_spec,
+            data_disks, tags):
+        _pod_spec = copy.deepcopy(pod_spec)
+        # Each pod has its own uuid to select the pod by the service
+        # and to delete the pods which are listed only
+        node_uuid = str(uuid4())
+        _pod_spec["metadata"]["labels"][CLOUDTIK_TAG_NODE_UUID] = node_uuid
+        # Generate a random hostname
+        _pod_spec["spec"]["hostname"] = get_head_hostname() if (
+                tags[CLOUDTIK_TAG_NODE_KIND] == NODE_KIND_HEAD) else get_worker_hostname()
+        created_pvcs = create_and_configure_pvc_for_pod(
+            self.provider_config, tags,
+            _pod_spec, data_disks,
+            self.cluster_name, self.namespace)
+        try:
+            pod = call_create_api_with_retry(
+                core_api().create_namespaced_pod, self.namespace, _pod_spec)
+        except ApiException:
+            logger.error(
+                "Error happened when creating the pod. Try clean up its PVCs...")
+            delete_persistent_volume_claims(created_pvcs, self.namespace)
+            raise
+        if self.pod_informer is not None:
+            # Visible to the reads before the watch sees it
+            self.pod_informer.update_pod(pod)
+
+        if service_spec is None:
+            return
+        logger.debug(
+            log_prefix + "calling create_namespaced_service.")
+        _service_spec = copy.deepcopy(service_spec)
+        metadata = _service_spec.get("metadata", {})
+        metadata["name"] = pod.metadata.name
+        _service_spec["metadata"] = metadata
+        _service_spec["spec"]["selector"] = {CLOUDTIK_TAG_NODE_UUID: node_uuid}
+        svc = call_create_api_with_retry(
+            core_api().create_namespaced_service,
+            self.namespace, _service_spec)
+
+        if ingress_spec is None:
+            return
+        logger.debug(
+            log_prefix + "calling create_namespaced_ingress.")
+        _ingress_spec = copy.deepcopy(ingress_spec)
+        metadata = _ingress_spec.get("metadata", {})
+        metadata["name"] = svc.metadata.name
+        _ingress_spec["metadata"] = metadata
+        _ingress_spec = _add_service_name_to_service_port(
+            _ingress_spec, svc.metadata.name)
+        call_create_api_with_retry(
+            networking_api().create_namespaced_ingress,
+            self.namespace, _ingress_spec)
 
     def terminate_node(self, node_id):
         logger.debug(
@@ -215,8 +264,85 @@ class KubernetesNodeProvider(NodeProvider):
 
         logger.debug(
             log_prefix + "Calling delete_namespaced_pod")
+        self._delete_pod(node_id)
+        self._delete_node_resources(node_id, pod_pvcs)
+
+    def terminate_nodes(self, node_ids):
+        if not node_ids:
+            return
+        if len(node_ids) == 1:
+            self.terminate_node(node_ids[0])
+            return
+
+        start_time = time.time()
+        # Get the PVCs of the pods with one list. The list is from the API
+        # server instead of the cache because the bulk delete of the pods
+        # is decided by whether any other pods of the cluster exist.
+        pods = self._list_pods_from_api()
+        pods_to_terminate = {
+            pod.metadata.name: pod for pod in pods
+            if pod.metadata.name in set(node_ids)}
+        pod_pvcs = {
+            node_id: get_persistent_volume_claims_of_pod(
+                pod, self.cluster_name, self.namespace)
+            for node_id, pod in pods_to_terminate.items()}
+
+        node_uuids = self._get_node_uuids(pods_to_terminate.values())
+        bulk = bool(pods) and len(pods_to_terminate) == len(pods) and (
+            node_uuids is not None)
+        if bulk:
+            # All the pods of the cluster are terminated (teardown). The
+            # pods are selected by the node uuids in addition so that the
+            # pods created after the list are not deleted.
+            logger.debug(
+                log_prefix + "Calling delete_collection_namespaced_pod")
+            call_api_with_retry(
+                core_api().delete_collection_namespaced_pod,
+                self.namespace,
+                label_selector=self._get_nodes_label_selector(node_uuids))
+        else:
+            self._run_in_parallel(
+                [functools.partial(self._delete_pod, node_id)
+                 for node_id in node_ids])
+
+        self._run_in_parallel(
+            [functools.partial(
+                self._delete_node_resources, node_id,
+                pod_pvcs.get(node_id))
+             for node_id in node_ids])
+        logger.debug(
+            log_prefix + "Terminated {} pods in {:.3f} seconds.".format(
+                len(node_ids), time.time() - start_time))
+
+    def _get_cluster_label_selector(self):
+        return to_label_selector(
+            {CLOUDTIK_TAG_CLUSTER_NAME: self.cluster_name})
+
+    def _get_nodes_label_selector(self, node_uuids):
+        return "{},{} in ({})".format(
+            self._get_cluster_label_selector(), CLOUDTIK_TAG_NODE_UUID,
+            ",".join(sorted(node_uuids)))
+
+    @staticmethod
+    def _get_node_uuids(pods):
+        node_uuids = set()
+        for pod in pods:
+            node_uuid = (pod.metadata.labels or {}).get(CLOUDTIK_TAG_NODE_UUID)
+            if not node_uuid:
+                return None
+            node_uuids.add(node_uuid)
+        return node_uuids
+
+    def _list_pods_from_api(self):
+        pod_list = core_api().list_namespaced_pod(
+            self.namespace,
+            label_selector=self._get_cluster_label_selector())
+        return pod_list.items
+
+    def _delete_pod(self, node_id):
         try:
-            core_api().delete_namespaced_pod(node_id, self.namespace)
+            call_api_with_retry(
+                core_api().delete_namespaced_pod, node_id, self.namespace)
         except ApiException as e:
             if e.status == 404:
                 logger.warning(
@@ -225,8 +351,9 @@ class KubernetesNodeProvider(NodeProvider):
             else:
                 raise
 
+    def _delete_node_resources(self, node_id, pod_pvcs):
         try:
-            if not _is_permanent_data_volumes(
+            if pod_pvcs and not _is_permanent_data_volumes(
                     self.provider_config):
                 delete_persistent_volume_claims_by_name(
                     pod_pvcs, self.namespace)
@@ -236,22 +363,43 @@ class KubernetesNodeProvider(NodeProvider):
             pass
 
         try:
-            core_api().delete_namespaced_service(
+            call_api_with_retry(
+                core_api().delete_namespaced_service,
                 node_id, self.namespace)
         except ApiException:
             pass
 
         try:
-            networking_api().delete_namespaced_ingress(
+            call_api_with_retry(
+                networking_api().delete_namespaced_ingress,
                 node_id,
                 self.namespace,
             )
         except ApiException:
             pass
 
-    def terminate_nodes(self, node_ids):
-        for node_id in node_ids:
-            self.terminate_node(node_id)
+    @staticmethod
+    def _run_in_parallel(calls):
+        """Run the calls with a bounded worker pool and raise the first
+        error after all the calls are done."""
+        if len(calls) == 1:
+            calls[0]()
+            return
+
+        errors = []
+        max_workers = min(MAX_PARALLEL_OPERATIONS, len(calls))
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers) as executor:
+            futures = [executor.submit(call) for call in calls]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(
+                        log_prefix + "Error happened in the operation: {}".format(e))
+                    errors.append(e)
+        if errors:
+            raise errors[0]
 
     def get_command_executor(
             self,
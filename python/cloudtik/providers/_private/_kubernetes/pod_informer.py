@@ -0,0 +1,178 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+from cloudtik.providers._private._kubernetes import core_api, log_prefix
+
+logger = logging.getLogger(__name__)
+
+# The server side timeout of a watch request after which it is restarted
+# from the last resource version
+POD_WATCH_TIMEOUT_S = 300
+# The time to wait for the first list before falling back to the API server.
+# Once the first list failed, the reads fall back without waiting until a
+# later list succeeds.
+POD_INFORMER_SYNC_TIMEOUT_S = 30
+POD_INFORMER_RETRY_INTERVAL_S = 1
+POD_INFORMER_MAX_RETRY_INTERVAL_S = 30
+
+# The resource version is too old to watch from
+HTTP_STATUS_GONE = 410
+
+POD_TERMINATED_PHASES = ["Failed", "Unknown", "Succeeded", "Terminating"]
+
+
+def _is_pod_matched(pod, tag_filters: Dict[str, str]) -> bool:
+    labels = pod.metadata.labels or {}
+    for k, v in tag_filters.items():
+        if labels.get(k) != v:
+            return False
+    return True
+
+
+class PodInformer:
+    """A local cache of the pods selected by a label selector which is fed by
+    a list and then a watch stream from the last resource version. The pods
+    are listed again if the watch fails or the resource version is gone.
+    The watching thread is started on the first read.
+    """
+
+    def __init__(self, namespace: str, label_selector: str):
+        self.namespace = namespace
+        self.label_selector = label_selector
+        self.lock = threading.Lock()
+        self.pods = {}
+        self.resource_version = None
+        self.synced = threading.Event()
+        # Set after the first list is done or failed
+        self.sync_attempted = threading.Event()
+        self.thread = None
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(
+                target=self._run, name="PodInformer", daemon=True)
+            self.thread.start()
+
+    def get_pod(self, pod_name: str):
+        """Get the pod from the cache or from the API server if the pod is
+        not in the cache (not synced or not seen by the watch yet)."""
+        if self._wait_for_synced():
+            with self.lock:
+                pod = self.pods.get(pod_name)
+            if pod is not None:
+                return pod
+        pod = core_api().read_namespaced_pod(pod_name, self.namespace)
+        self.update_pod(pod)
+        return pod
+
+    def list_pods(self) -> Optional[List]:
+        """List the cached pods or None if the cache is not synced."""
+        if not self._wait_for_synced():
+            return None
+        with self.lock:
+            return list(self.pods.values())
+
+    def list_non_terminated_pods(self, tag_filters: Dict[str, str]) -> Optional[List]:
+        pods = self.list_pods()
+        if pods is None:
+            return None
+        return [
+            pod for pod in pods
+            if pod.status.phase not in POD_TERMINATED_PHASES
+            and pod.metadata.deletion_timestamp is None
+            and _is_pod_matched(pod, tag_filters)
+        ]
+
+    def update_pod(self, pod):
+        """Update the cache with a pod returned by the API server which may
+        be newer than the one seen by the watch."""
+        with self.lock:
+            self._update_pod(pod)
+
+    def _update_pod(self, pod):
+        name = pod.metadata.name
+        cached_pod = self.pods.get(name)
+        if cached_pod is not None and _get_resource_version(
+                cached_pod) > _get_resource_version(pod):
+            return
+        self.pods[name] = pod
+
+    def _wait_for_synced(self) -> bool:
+        self.start()
+        self.sync_attempted.wait(POD_INFORMER_SYNC_TIMEOUT_S)
+        return self.synced.is_set()
+
+    def _list(self):
+        pod_list = core_api().list_namespaced_pod(
+            self.namespace, label_selector=self.label_selector)
+        with self.lock:
+            self.pods = {pod.metadata.name: pod for pod in pod_list.items}
+            self.resource_version = pod_list.metadata.resource_version
+        self.synced.set()
+        self.sync_attempted.set()
+
+    def _watch(self):
+        w = watch.Watch()
+        for event in w.stream(
+                core_api().list_namespaced_pod,
+                self.namespace,
+                label_selector=self.label_selector,
+                resource_version=self.resource_version,
+                timeout_seconds=POD_WATCH_TIMEOUT_S):
+            event_type = event["type"]
+            if event_type == "ERROR":
+                status = event["raw_object"]
+                if status.get("code") == HTTP_STATUS_GONE:
+                    raise ApiException(
+                        status=HTTP_STATUS_GONE, reason=status.get("message"))
+                continue
+            pod = event["object"]
+            with self.lock:
+                if event_type == "DELETED":
+                    self.pods.pop(pod.metadata.name, None)
+                else:
+                    self._update_pod(pod)
+                self.resource_version = pod.metadata.resource_version
+
+    def _run(self):
+        retry_interval = POD_INFORMER_RETRY_INTERVAL_S
+        need_list = True
+        while True:
+            try:
+                if need_list:
+                    self._list()
+                    need_list = False
+                self._watch()
+                retry_interval = POD_INFORMER_RETRY_INTERVAL_S
+            except ApiException as e:
+                self.sync_attempted.set()
+                if e.status == HTTP_STATUS_GONE:
+                    logger.debug(
+                        log_prefix + "Pod resource version is gone. Listing again.")
+                    need_list = True
+                    continue
+                logger.warning(
+                    log_prefix + "Error watching the pods: {}".format(e))
+                need_list = True
+            except Exception as e:
+                self.sync_attempted.set()
+                logger.warning(
+                    log_prefix + "Error watching the pods: {}".format(e))
+                need_list = True
+            time.sleep(retry_interval)
+            retry_interval = min(
+                retry_interval * 2, POD_INFORMER_MAX_RETRY_INTERVAL_S)
+
+
+def _get_resource_version(pod) -> int:
+    try:
+        return int(pod.metadata.resource_version)
+    except (TypeError, ValueError):
+        return 0
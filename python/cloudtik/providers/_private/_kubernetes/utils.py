@@ -1,6 +1,7 @@
 import os
 import re
 import logging
+import time
 
 from kubernetes.client.rest import ApiException
 
@@ -26,6 +27,14 @@ KUBERNETES_HEAD_SERVICE_CONFIG_KEY = "head_service"
 KUBERNETES_HEAD_EXTERNAL_SERVICE_CONFIG_KEY = "head_external_service"
 KUBERNETES_NODE_SERVICE_CONFIG_KEY = "node_service"
 
+# Retry the API calls on conflicts and throttling with backoff. A conflict
+# of a create means the object already exists which is never retried.
+API_RETRY_STATUSES = [409, 429]
+API_CREATE_RETRY_STATUSES = [429]
+MAX_API_RETRIES = 5
+API_RETRY_INTERVAL_S = 0.5
+API_MAX_RETRY_INTERVAL_S = 8
+
 logger = logging.getLogger(__name__)
 
 
@@ -90,6 +99,46 @@ def _get_service_account(namespace, name):
     return None
 
 
+def call_api_with_retry(func, *args, **kwargs):
+    """Call the Kubernetes API to update or delete and retry with backoff if
+    the call failed with a conflict or was throttled by the API server."""
+    return _call_api_with_retry(API_RETRY_STATUSES, func, *args, **kwargs)
+
+
+def call_create_api_with_retry(func, *args, **kwargs):
+    """Call the Kubernetes API to create and retry with backoff if the call
+    was throttled by the API server."""
+    return _call_api_with_retry(
+        API_CREATE_RETRY_STATUSES, func, *args, **kwargs)
+
+
+def _call_api_with_retry(retry_statuses, func, *args, **kwargs):
+    retry_interval = API_RETRY_INTERVAL_S
+    for _ in range(MAX_API_RETRIES - 1):
+        try:
+            return func(*args, **kwargs)
+        except ApiException as e:
+            if e.status not in retry_statuses:
+                raise
+            logger.debug(
+                "Caught a {} error calling {}. Retrying...".format(
+                    e.status, func.__name__))
+            time.sleep(_get_retry_after(e, retry_interval))
+            retry_interval = min(retry_interval * 2, API_MAX_RETRY_INTERVAL_S)
+    # One more try
+    return func(*args, **kwargs)
+
+
+def _get_retry_after(e, retry_interval):
+    retry_after = e.headers.get("Retry-After") if e.headers else None
+    if retry_after:
+        try:
+            return min(float(retry_after), API_MAX_RETRY_INTERVAL_S)
+        except ValueError:
+            pass
+    return retry_interval
+
+
 def delete_persistent_volume_claims(pvcs, namespace):
     if not pvcs:
         return
@@ -105,7 +154,8 @@ def delete_persistent_volume_claims_by_name(names, namespace):
 
 def delete_persistent_volume_claim(name, namespace):
     try:
-        core_api().delete_namespaced_persistent_volume_claim(
+        call_api_with_retry(
+            core_api().delete_namespaced_persistent_volume_claim,
             name, namespace)
     except ApiException as e:
         if e.status == 404:
@@ -313,6 +363,11 @@ def get_pod_persistent_volume_claims(pod_name, cluster_name, namespace):
         else:
             raise
 
+    return get_persistent_volume_claims_of_pod(pod, cluster_name, namespace)
+
+
+def get_persistent_volume_claims_of_pod(pod, cluster_name, namespace):
+    pod_pvcs = []
     volumes = pod.spec.volumes
     if volumes is not None:
         for volume in volumes:
@@ -168,6 +168,11 @@ class AWSNodeProvider(NodeProvider):
         return node.private_ip_address
 
     def set_node_tags(self, node_id, tags):
+        self.set_nodes_tags({node_id: tags})
+
+    def set_nodes_tags(self, nodes_tags):
+        if not nodes_tags:
+            return
         is_batching_thread = False
         with self.tag_cache_lock:
             if not self.tag_cache_pending:
@@ -176,13 +181,17 @@ class AWSNodeProvider(NodeProvider):
                 self.ready_for_new_batch.wait()
                 self.ready_for_new_batch.clear()
                 self.batch_update_done.clear()
-            self.tag_cache_pending[node_id].update(tags)
+            for node_id, tags in nodes_tags.items():
+                self.tag_cache_pending[node_id].update(tags)
 
         if is_batching_thread:
             time.sleep(TAG_BATCH_DELAY)
             with self.tag_cache_lock:
-                self._update_node_tags()
-                self.batch_update_done.set()
+                try:
+                    self._update_node_tags()
+                finally:
+                    # Don't leave the waiting threads hanging on failures
+                    self.batch_update_done.set()
 
         with self.count_lock:
             self.batch_thread_count += 1
@@ -103,18 +103,12 @@ class LocalScheduler:
 
     def _list_nodes(self, tag_filters):
         # List nodes that are not cluster specific, ignoring the cluster name
-        nodes = self.state.get_nodes()
+        nodes = self.state.get_nodes_by_tags(tag_filters)
         matching_nodes = []
         for node_id, node in nodes.items():
             if node["state"] == "terminated":
                 continue
-            ok = True
-            for k, v in tag_filters.items():
-                if node["tags"].get(k) != v:
-                    ok = False
-                    break
-            if ok:
-                matching_nodes.append(node)
+            matching_nodes.append(node)
         return matching_nodes
 
     def non_terminated_nodes(self, tag_filters):
@@ -153,6 +147,16 @@ class LocalScheduler:
             # update the cached node tags, although it will refresh at next non_terminated_nodes
             FileStateStore.update_node_tags(node, tags)
 
+    def set_nodes_tags(self, nodes_tags):
+        with self.lock:
+            nodes = {
+                node_id: self._get_cached_node(node_id)
+                for node_id in nodes_tags}
+            # Write the tags of all the nodes in one state transaction
+            self.state.set_nodes_tags(nodes_tags, False)
+            for node_id, tags in nodes_tags.items():
+                FileStateStore.update_node_tags(nodes[node_id], tags)
+
     def terminate_node(self, node_id):
         with self.lock:
             node = self._get_cached_node(node_id)
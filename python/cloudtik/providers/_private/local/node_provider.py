@@ -54,6 +54,9 @@ class LocalNodeProvider(NodeProvider):
     def set_node_tags(self, node_id, tags):
         self.local_scheduler.set_node_tags(node_id, tags)
 
+    def set_nodes_tags(self, nodes_tags):
+        self.local_scheduler.set_nodes_tags(nodes_tags)
+
     def terminate_node(self, node_id):
         self.local_scheduler.terminate_node(node_id)
 
@@ -22,6 +22,8 @@ logger = logging.getLogger(__name__)
 
 DEFAULT_SSH_SERVER_PORT = 3371
 MAX_PORT_MAPPING_BASE_RETRY = 20
+# Seconds to use the cached containers without querying docker
+DEFAULT_INVENTORY_CACHE_TTL = 5
 
 
 def _get_provider_bridge_address(provider_config):
@@ -306,6 +308,11 @@ def get_virtual_scheduler_state_file_name() -> str:
     return "cloudtik-virtual-scheduler.state"
 
 
+def _get_inventory_cache_ttl(provider_config):
+    return provider_config.get(
+        "inventory_cache_ttl", DEFAULT_INVENTORY_CACHE_TTL)
+
+
 def _get_request_instance_type(node_config):
     if "instance_type" not in node_config:
         raise ValueError(
@@ -0,0 +1,122 @@
+import copy
+import logging
+import math
+import time
+from threading import RLock
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# The container events which may change the container list or the states
+CONTAINER_EVENTS = [
+    "create", "start", "restart", "stop", "die", "kill",
+    "pause", "unpause", "rename", "update", "destroy",
+]
+
+# Extra seconds of events to query for the clock granularity of docker
+EVENTS_QUERY_MARGIN_S = 1
+
+
+class ContainerInventory:
+    """The in-memory inventory of the containers of a cluster.
+
+    The containers are listed and inspected in full on the first use and
+    then kept in memory. Within the TTL, the containers are returned from
+    memory without calling docker. After the TTL, the docker events since
+    the last refresh are queried and only the containers with events are
+    inspected again. A full refresh is done if the events cannot be queried
+    or every full refresh interval as a safety net.
+    """
+
+    def __init__(
+            self,
+            list_containers: Callable[[], List[Dict[str, Any]]],
+            inspect_containers: Callable[[List[str]], List[Dict[str, Any]]],
+            query_events: Callable[[int], Optional[List[str]]],
+            is_member: Callable[[Dict[str, Any]], bool],
+            ttl: float,
+            full_refresh_interval: float):
+        self._list_containers = list_containers
+        self._inspect_containers = inspect_containers
+        self._query_events = query_events
+        self._is_member = is_member
+        self.ttl = ttl
+        self.full_refresh_interval = full_refresh_interval
+
+        self.lock = RLock()
+        # container name -> container
+        self.containers: Optional[Dict[str, Dict[str, Any]]] = None
+        # the containers changed by us and need to refresh
+        self.dirty_names = set()
+        self.last_refresh_time = 0
+        self.last_full_refresh_time = 0
+
+        self.hits = 0
+        self.full_refreshes = 0
+        self.incremental_refreshes = 0
+
+    def get_containers(self) -> List[Dict[str, Any]]:
+        """Return a copy of the containers of the cluster."""
+        with self.lock:
+            now = time.monotonic()
+            if (self.containers is None
+                    or now - self.last_full_refresh_time >= self.full_refresh_interval):
+                self._refresh_all(now)
+            elif self.dirty_names or now - self.last_refresh_time >= self.ttl:
+                self._refresh_changed(now)
+            else:
+                self.hits += 1
+            return copy.deepcopy(list(self.containers.values()))
+
+    def mark_dirty(self, container_name):
+        """Refresh the container at the next use, ignoring the TTL."""
+        with self.lock:
+            self.dirty_names.add(container_name)
+
+    def invalidate(self):
+        with self.lock:
+            self.containers = None
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "full_refreshes": self.full_refreshes,
+                "incremental_refreshes": self.incremental_refreshes,
+            }
+
+    def _refresh_all(self, now):
+        self.full_refreshes += 1
+        containers = self._list_containers()
+        self.containers = {
+            container["name"]: container for container in containers}
+        self.dirty_names = set()
+        self.last_refresh_time = now
+        self.last_full_refresh_time = now
+
+    def _refresh_changed(self, now):
+        since_seconds = int(math.ceil(
+            now - self.last_refresh_time)) + EVENTS_QUERY_MARGIN_S
+        changed_names = self._query_events(since_seconds)
+        if changed_names is None:
+            # failed to know the changes
+            self._refresh_all(now)
+            return
+
+        self.incremental_refreshes += 1
+        changed_names = set(changed_names) | self.dirty_names
+        self.dirty_names = set()
+        self.last_refresh_time = now
+        if not changed_names:
+            return
+
+        containers = {
+            container["name"]: container
+            for container in self._inspect_containers(sorted(changed_names))
+        }
+        for name in changed_names:
+            container = containers.get(name)
+            if container is None or not self._is_member(container):
+                self.containers.pop(name, None)
+            else:
+                self.containers[name] = container
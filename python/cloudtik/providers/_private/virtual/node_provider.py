@@ -64,6 +64,9 @@ class VirtualNodeProvider(NodeProvider):
     def set_node_tags(self, node_id, tags):
         self.virtual_scheduler.set_node_tags(node_id, tags)
 
+    def set_nodes_tags(self, nodes_tags):
+        self.virtual_scheduler.set_nodes_tags(nodes_tags)
+
     def terminate_node(self, node_id):
         self.virtual_scheduler.terminate_node(node_id)
 
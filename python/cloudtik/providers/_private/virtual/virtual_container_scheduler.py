@@ -22,7 +22,8 @@ from cloudtik.core.tags import CLOUDTIK_TAG_NODE_KIND, CLOUDTIK_TAG_CLUSTER_NAME
 from cloudtik.providers._private.virtual.config import \
     _get_provider_bridge_address, _get_request_instance_type, get_virtual_scheduler_lock_path, \
     get_virtual_scheduler_state_path, \
-    get_virtual_scheduler_state_file_name
+    get_virtual_scheduler_state_file_name, _get_inventory_cache_ttl
+from cloudtik.providers._private.virtual.container_inventory import ContainerInventory, CONTAINER_EVENTS
 from cloudtik.providers._private.virtual.virtual_docker_command_executor import VirtualDockerCommandExecutor
 from cloudtik.providers._private.virtual.utils import _get_node_info, _get_tags
 
@@ -53,6 +54,9 @@ INSPECT_FORMAT_FOR_EXIST = (
     '"name":{{json .Name}}'
     '}')
 
+# The interval to list all the containers even if the inventory is cached
+INVENTORY_FULL_REFRESH_INTERVAL_S = 300
+
 
 def _get_merged_docker_config_from_node_config(
         docker_config, node_config):
@@ -159,6 +163,8 @@ class VirtualContainerScheduler:
         # Cache of node objects from the last nodes() call. This avoids
         # excessive remote requests.
         self.cached_nodes: Dict[str, Any] = {}
+        # The number of docker commands run for listing and inspecting
+        self.docker_cmd_calls = 0
 
         # shared scheduler container for common operations
         self.scheduler_executor = self._get_scheduler_executor(
@@ -178,9 +184,35 @@ class VirtualContainerScheduler:
         else:
             self.state = None
 
+        self.inventory = self._create_inventory()
+
+    def _create_inventory(self):
+        # The inventory is only for the containers of this cluster
+        if not self.cluster_name:
+            return None
+        ttl = _get_inventory_cache_ttl(self.provider_config)
+        if not ttl:
+            return None
+        return ContainerInventory(
+            list_containers=self._list_cluster_containers,
+            inspect_containers=self._inspect_containers,
+            query_events=self._query_container_events,
+            is_member=self._is_cluster_container,
+            ttl=ttl,
+            full_refresh_interval=INVENTORY_FULL_REFRESH_INTERVAL_S)
+
+    def get_inventory_stats(self):
+        stats = {"docker_cmd_calls": self.docker_cmd_calls}
+        if self.inventory is not None:
+            stats.update(self.inventory.get_stats())
+        return stats
+
     def _create_node(
             self, call_context: CallContext, node_config, tags):
-        return self._start_container(call_context, node_config, tags)
+        container_name = self._start_container(call_context, node_config, tags)
+        if self.inventory is not None:
+            self.inventory.mark_dirty(container_name)
+        return container_name
 
     def create_node(self, node_config, tags, count):
         # We should not lock here
@@ -229,7 +261,13 @@ class VirtualContainerScheduler:
             tag_filters[CLOUDTIK_TAG_CLUSTER_NAME] = self.cluster_name
         with self.lock:
             # list all containers include stopped
-            containers = self._list_containers(tag_filters, True)
+            if self._is_inventory_usable(tag_filters):
+                containers = self.inventory.get_containers()
+            else:
+                containers = self._list_containers(tag_filters, True)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Container inventory stats: {}".format(
+                    self.get_inventory_stats()))
 
             # Cannot do cleanup if the tag filters has filters other than cluster name and workspace
             if len(tag_filters) == 2 and (
@@ -278,6 +316,16 @@ class VirtualContainerScheduler:
             # update the cached node tags, although it will refresh at next non_terminated_nodes
             FileStateStore.update_node_tags(node, tags)
 
+    def set_nodes_tags(self, nodes_tags):
+        with self.lock:
+            nodes = {
+                node_id: self._get_cached_node(node_id)
+                for node_id in nodes_tags}
+            # Write the tags of all the nodes in one state transaction
+            self.state.set_nodes_tags(nodes_tags)
+            for node_id, tags in nodes_tags.items():
+                FileStateStore.update_node_tags(nodes[node_id], tags)
+
     def terminate_node(self, node_id):
         # We shall not lock here
         self._terminate_node(self.call_context, node_id)
@@ -288,6 +336,8 @@ class VirtualContainerScheduler:
             node = self._get_cached_node(node_id)
 
         self._stop_container(call_context, node_id, node)
+        if self.inventory is not None:
+            self.inventory.mark_dirty(node_id)
 
         # shall we remove the node from cached node
         # the cached node list will be refreshed at next non_terminated_nodes
@@ -624,7 +674,7 @@ class VirtualContainerScheduler:
         return True
 
     def _get_container(self, container_name):
-        output = self.scheduler_executor.run_docker_cmd(
+        output = self._run_docker_cmd(
             "inspect --format='" + INSPECT_FORMAT + "' " + container_name + " || true")
         if not output:
             return None
@@ -682,20 +732,69 @@ class VirtualContainerScheduler:
         if effective_filters:
             for label, label_value in effective_filters.items():
                 op_str += ' --filter "label={}={}"'.format(label, label_value)
-        output = self.scheduler_executor.run_docker_cmd(op_str)
+        output = self._run_docker_cmd(op_str)
         if not output:
             return []
 
         container_names = output.splitlines()
         return self._inspect_containers(container_names)
 
+    def _run_docker_cmd(self, cmd):
+        self.docker_cmd_calls += 1
+        return self.scheduler_executor.run_docker_cmd(cmd)
+
+    def _is_inventory_usable(self, tag_filters):
+        if self.inventory is None:
+            return False
+        workspace_name = self.provider_config["workspace_name"]
+        return (tag_filters.get(CLOUDTIK_TAG_CLUSTER_NAME) == self.cluster_name
+                and tag_filters.get(
+                    CLOUDTIK_TAG_WORKSPACE_NAME, workspace_name) == workspace_name)
+
+    def _get_cluster_tag_filters(self):
+        return {
+            CLOUDTIK_TAG_WORKSPACE_NAME: self.provider_config["workspace_name"],
+            CLOUDTIK_TAG_CLUSTER_NAME: self.cluster_name,
+        }
+
+    def _list_cluster_containers(self):
+        return self._list_containers(
+            self._get_cluster_tag_filters(), include_stopped=True)
+
+    def _is_cluster_container(self, container):
+        tags = container.get("tags") or {}
+        for k, v in self._get_cluster_tag_filters().items():
+            if tags.get(k) != v:
+                return False
+        return True
+
+    def _query_container_events(self, since_seconds):
+        # Query the events in the past seconds and return immediately.
+        # The times are relative to the docker host clock.
+        op_str = "events --since {}s --until 0s --format '{{{{.Actor.Attributes.name}}}}'".format(
+            since_seconds)
+        op_str += ' --filter "type=container"'
+        op_str += ' --filter "label={}={}"'.format(
+            CLOUDTIK_TAG_CLUSTER_NAME, self.cluster_name)
+        for event in CONTAINER_EVENTS:
+            op_str += ' --filter "event={}"'.format(event)
+        try:
+            output = self._run_docker_cmd(op_str)
+        except Exception as e:
+            logger.warning(
+                "Failed to query the container events: {}".format(str(e)))
+            return None
+        if output is None:
+            return None
+        return [name for name in output.splitlines() if name]
+
     def _inspect_containers(self, container_names):
         containers = []
         if not container_names:
             return containers
 
         name_option = " ".join(container_names)
-        output = self.scheduler_executor.run_docker_cmd(
+        output = self._run_docker_cmd(
             "inspect --format='" + INSPECT_FORMAT + "' " + name_option + " || true")
         if not output:
             return containers
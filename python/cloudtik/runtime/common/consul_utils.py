@@ -9,6 +9,10 @@ CONSUL_ENDPOINT_LOCAL = "127.0.0.1"
 CONSUL_HTTP_PORT = CONSUL_HTTP_PORT_DEFAULT
 CONSUL_REQUEST_TIMEOUT = 5
 CONSUL_BLOCKING_QUERY_TIMEOUT = 10 * 60
+# The maximum wait time of a blocking query which is less than the timeout
+CONSUL_BLOCKING_QUERY_WAIT = "5m"
+
+CONSUL_HEADER_INDEX = "X-Consul-Index"
 
 CONSUL_REST_ENDPOINT_SESSION = "/v1/session"
 CONSUL_REST_ENDPOINT_SESSION_CREATE = CONSUL_REST_ENDPOINT_SESSION + "/create"
@@ -31,13 +35,22 @@ class ConsulClient(MultiEndpointClient):
 def consul_api_get(
         client,
         endpoint: str,
-        timeout=CONSUL_REQUEST_TIMEOUT):
+        timeout=CONSUL_REQUEST_TIMEOUT,
+        with_headers=False):
     def func(endpoint_url):
-        return rest_api_get_json(endpoint_url, timeout=timeout)
+        return rest_api_get_json(
+            endpoint_url, timeout=timeout, with_headers=with_headers)
 
     return client.request(endpoint, func)
 
 
+def get_consul_index(headers):
+    index = headers.get(CONSUL_HEADER_INDEX)
+    if not index:
+        return None
+    return int(index)
+
+
 def consul_api_put(
         client,
         endpoint: str, body):
@@ -1,6 +1,13 @@
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from urllib.parse import quote
 
+from cloudtik.core._private.constants import CLOUDTIK_CONSUL_CATALOG_SNAPSHOT_TTL_S, \
+    CLOUDTIK_CONSUL_MAX_PARALLEL_QUERIES
 from cloudtik.core._private.service_discovery.naming import get_cluster_node_fqdn, get_cluster_node_sqdn
 from cloudtik.core._private.service_discovery.utils import SERVICE_SELECTOR_SERVICES, SERVICE_SELECTOR_TAGS, \
     SERVICE_SELECTOR_LABELS, SERVICE_SELECTOR_EXCLUDE_LABELS, SERVICE_DISCOVERY_LABEL_CLUSTER, \
@@ -8,11 +15,15 @@ from cloudtik.core._private.service_discovery.utils import SERVICE_SELECTOR_SERV
     SERVICE_DISCOVERY_TAG_CLUSTER_PREFIX, SERVICE_DISCOVERY_TAG_SYSTEM_PREFIX, ServiceAddressType, \
     SERVICE_DISCOVERY_LABEL_RUNTIME, SERVICE_SELECTOR_SERVICE_TYPES, SERVICE_DISCOVERY_LABEL_SERVICE, \
     SERVICE_DISCOVERY_LABEL_SEQ_ID, SERVICE_DISCOVERY_LABEL_NODE_ID
-from cloudtik.core._private.util.core_utils import get_intersect_labels
+from cloudtik.core._private.util.core_utils import get_intersect_labels, get_json_object_hash, \
+    get_cloudtik_temp_dir
 from cloudtik.core._private.util.rest_api import EndPointAddress
-from cloudtik.runtime.common.consul_utils import consul_api_get, ConsulClient
+from cloudtik.runtime.common.consul_utils import consul_api_get, ConsulClient, get_consul_index, \
+    CONSUL_BLOCKING_QUERY_TIMEOUT, CONSUL_BLOCKING_QUERY_WAIT
 from cloudtik.runtime.common.service_discovery.utils import ServiceInstance
 
+logger = logging.getLogger(__name__)
+
 REST_ENDPOINT_CATALOG = "/v1/catalog"
 REST_ENDPOINT_CATALOG_SERVICES = REST_ENDPOINT_CATALOG + "/services"
 REST_ENDPOINT_CATALOG_SERVICE = REST_ENDPOINT_CATALOG + "/service"
@@ -360,15 +371,9 @@ def get_addresses_of_service_nodes(
         service_node, address_type=address_type) for service_node in service_nodes]
 
 
-def query_service(
-        service_name, service_selector,
-        address_type: ServiceAddressType = ServiceAddressType.NODE_IP,
-        address: Optional[EndPointAddress] = None):
-    service_nodes = query_service_nodes(
-        service_name, service_selector, address=address)
-    if not service_nodes:
-        return None
-
+def _get_service_instance(
+        service_name, service_nodes,
+        address_type: ServiceAddressType = ServiceAddressType.NODE_IP):
     # Common labels
     labels = get_labels_of_service_nodes(service_nodes)
     # the runtime of the service nodes usually be the same
@@ -402,85 +407,192 @@ def query_service(
         labels=labels)
 
 
-def query_services_from_consul(
-        service_selector,
+def query_service(
+        service_name, service_selector,
         address_type: ServiceAddressType = ServiceAddressType.NODE_IP,
-        address: Optional[EndPointAddress] = None,
-        first: bool = False):
-    services = query_services(service_selector, address=address)
-    if not services:
+        address: Optional[EndPointAddress] = None):
+    service_nodes = query_service_nodes(
+        service_name, service_selector, address=address)
+    if not service_nodes:
         return None
+    return _get_service_instance(
+        service_name, service_nodes, address_type=address_type)
 
-    if first:
-        service_name, service_tags = next(iter(services.items()))
-        service_instance = query_service(
-            service_name, service_selector,
-            address_type=address_type, address=address
-        )
-        return service_instance
-    else:
-        services_to_return = {}
-        for service_name, service_tags in services.items():
-            service_instance = query_service(
-                service_name, service_selector,
-                address_type=address_type, address=address
-            )
-            if service_instance:
-                services_to_return[service_name] = service_instance
 
-        return services_to_return
+def _get_catalog_snapshot_path(service_selector, address, first):
+    snapshot_key = get_json_object_hash(
+        [service_selector, str(address), first])
+    return os.path.join(
+        get_cloudtik_temp_dir(), "consul-catalog",
+        "services-{}.json".format(snapshot_key))
 
 
-def query_services_with_nodes(
+def _load_catalog_snapshot(snapshot_path, ttl):
+    try:
+        with open(snapshot_path) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - snapshot.get("time", 0) > ttl:
+        return None
+    return snapshot.get("services")
+
+
+def _save_catalog_snapshot(snapshot_path, services_with_nodes):
+    try:
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        temp_path = "{}.{}.tmp".format(snapshot_path, os.getpid())
+        with open(temp_path, "w") as f:
+            json.dump({
+                "time": time.time(),
+                "services": services_with_nodes}, f)
+        os.replace(temp_path, snapshot_path)
+    except OSError as e:
+        logger.debug(
+            "Failed to save the service catalog snapshot: {}".format(str(e)))
+
+
+def _query_service_nodes_of(
+        service_names, service_selector,
+        address: Optional[EndPointAddress] = None):
+    # The nodes of each service are queried concurrently
+    def query_nodes(service_name):
+        return query_service_nodes(
+            service_name, service_selector, address)
+
+    if len(service_names) <= 1:
+        return [query_nodes(service_name) for service_name in service_names]
+    max_workers = min(
+        CLOUDTIK_CONSUL_MAX_PARALLEL_QUERIES, len(service_names))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(query_nodes, service_names))
+
+
+def query_services_nodes(
         service_selector,
         address: Optional[EndPointAddress] = None,
-        first: bool = False):
-    services_with_nodes = {}
+        first: bool = False,
+        snapshot_ttl: Optional[int] = None):
+    """Query the matched services and their nodes.
+
+    The nodes of the services are queried concurrently. The result is saved
+    as a snapshot on this node and is reused by the queries of the same
+    service selector and address in the snapshot TTL.
+    """
+    if snapshot_ttl is None:
+        snapshot_ttl = CLOUDTIK_CONSUL_CATALOG_SNAPSHOT_TTL_S
+    snapshot_path = None
+    if snapshot_ttl > 0:
+        snapshot_path = _get_catalog_snapshot_path(
+            service_selector, address, first)
+        services_with_nodes = _load_catalog_snapshot(
+            snapshot_path, snapshot_ttl)
+        if services_with_nodes is not None:
+            return services_with_nodes
+
+    start_time = time.time()
     services = query_services(service_selector, address=address)
-    if not services:
-        return services_with_nodes
-
+    service_names = list(services.keys()) if services else []
     if first:
-        service_name, service_tags = next(iter(services.items()))
-        service_nodes = query_service_nodes(
-            service_name, service_selector, address=address)
-        if service_nodes:
-            services_with_nodes[service_name] = service_nodes
-    else:
-        for service_name, service_tags in services.items():
-            service_nodes = query_service_nodes(
-                service_name, service_selector, address=address)
-            if service_nodes:
-                services_with_nodes[service_name] = service_nodes
-
+        service_names = service_names[:1]
+    services_nodes = _query_service_nodes_of(
+        service_names, service_selector, address=address)
+    services_with_nodes = {
+        service_name: service_nodes
+        for service_name, service_nodes in zip(service_names, services_nodes)
+        if service_nodes}
+    logger.debug(
+        "Queried {} services with {} nodes from Consul in {:.3f}s.".format(
+            len(services_with_nodes),
+            sum(len(service_nodes) for service_nodes in services_with_nodes.values()),
+            time.time() - start_time))
+
+    if snapshot_path is not None:
+        _save_catalog_snapshot(snapshot_path, services_with_nodes)
     return services_with_nodes
 
 
-def query_services_with_addresses(
+def query_services_from_consul(
         service_selector,
         address_type: ServiceAddressType = ServiceAddressType.NODE_IP,
         address: Optional[EndPointAddress] = None,
         first: bool = False):
-    services_with_addresses = {}
-    services = query_services(service_selector, address=address)
-    if not services:
-        return services_with_addresses
+    services_with_nodes = query_services_nodes(
+        service_selector, address=address, first=first)
+    if not services_with_nodes:
+        return None
 
+    services_to_return = {
+        service_name: _get_service_instance(
+            service_name, service_nodes, address_type=address_type)
+        for service_name, service_nodes in services_with_nodes.items()}
     if first:
-        service_name, service_tags = next(iter(services.items()))
-        service_nodes = query_service_nodes(
-            service_name, service_selector, address=address)
-        if service_nodes:
-            service_addresses = get_addresses_of_service_nodes(
-                service_nodes, address_type=address_type)
-            services_with_addresses[service_name] = service_addresses
-    else:
-        for service_name, service_tags in services.items():
-            service_nodes = query_service_nodes(
-                service_name, service_selector, address=address)
-            if service_nodes:
-                service_addresses = get_addresses_of_service_nodes(
-                    service_nodes, address_type=address_type)
-                services_with_addresses[service_name] = service_addresses
-
-    return services_with_addresses
+        return next(iter(services_to_return.values()))
+    return services_to_return
+
+
+def query_services_with_nodes(
+        service_selector,
+        address: Optional[EndPointAddress] = None,
+        first: bool = False,
+        snapshot_ttl: Optional[int] = None):
+    return query_services_nodes(
+        service_selector, address=address, first=first,
+        snapshot_ttl=snapshot_ttl)
+
+
+def query_services_with_addresses(
+        service_selector,
+        address_type: ServiceAddressType = ServiceAddressType.NODE_IP,
+        address: Optional[EndPointAddress] = None,
+        first: bool = False,
+        snapshot_ttl: Optional[int] = None):
+    services_with_nodes = query_services_nodes(
+        service_selector, address=address, first=first,
+        snapshot_ttl=snapshot_ttl)
+    return {
+        service_name: get_addresses_of_service_nodes(
+            service_nodes, address_type=address_type)
+        for service_name, service_nodes in services_with_nodes.items()}
+
+
+class ServiceCatalogWatcher:
+    """Watch the services in the catalog with Consul blocking queries.
+
+    The index of the catalog changes with the changes of any services,
+    so a change watched doesn't mean the selected services changed.
+    """
+
+    def __init__(
+            self, service_selector,
+            address: Optional[EndPointAddress] = None):
+        self.query_endpoint = _get_endpoint_with_service_selector(
+            REST_ENDPOINT_CATALOG_SERVICES, service_selector)
+        self.client = ConsulClient(address)
+        self.index = 0
+
+    def watch(self) -> bool:
+        """Block until the catalog changes or the wait time ends.
+        Return True if the catalog changed since the last watch."""
+        separator = "&" if "?" in self.query_endpoint else "?"
+        query_endpoint = "{}{}index={}&wait={}".format(
+            self.query_endpoint, separator, self.index,
+            CONSUL_BLOCKING_QUERY_WAIT)
+        _, headers = consul_api_get(
+            self.client, query_endpoint,
+            timeout=CONSUL_BLOCKING_QUERY_TIMEOUT, with_headers=True)
+        index = get_consul_index(headers)
+        if index is None:
+            raise RuntimeError(
+                "No index returned for the blocking query of the services.")
+        if index < self.index:
+            # The index can go backwards in some cases such as a restore
+            # of the snapshot. The blocking starts again from the beginning.
+            self.index = 0
+            return True
+        changed = index != self.index
+        self.index = index
+        return changed
+
+    def reset(self):
+        self.index = 0
@@ -259,14 +259,17 @@ def get_service_node_addresses(
 
 def query_services_with_nodes(
         service_selector,
-        first: bool = False):
+        first: bool = False,
+        snapshot_ttl: Optional[int] = None):
     return query_services_with_nodes_from_consul(
-        service_selector, first=first)
+        service_selector, first=first, snapshot_ttl=snapshot_ttl)
 
 
 def query_services_with_addresses(
         service_selector,
         address_type: ServiceAddressType = ServiceAddressType.NODE_IP,
-        first: bool = False):
+        first: bool = False,
+        snapshot_ttl: Optional[int] = None):
     return query_services_with_addresses_from_consul(
-        service_selector, address_type=address_type, first=first)
+        service_selector, address_type=address_type, first=first,
+        snapshot_ttl=snapshot_ttl)
@@ -0,0 +1,41 @@
+from cloudtik.core._private.service_discovery.utils import deserialize_service_selector
+from cloudtik.core._private.util.service.pull_job import WatchPullJob
+from cloudtik.runtime.common.service_discovery.consul import ServiceCatalogWatcher
+from cloudtik.runtime.common.service_discovery.discovery import query_services_with_nodes
+
+
+class ServiceDiscoveryJob(WatchPullJob):
+    """Pulling job for discovering the services selected by the service
+    selector. The services are pulled when the Consul catalog changes
+    (watched with blocking queries) or with the interval if not watching.
+    """
+
+    def __init__(
+            self,
+            interval=None,
+            service_selector=None,
+            watch=True):
+        super().__init__(interval)
+        self.service_selector = deserialize_service_selector(
+            service_selector)
+        self.service_watcher = None
+        if watch:
+            self.service_watcher = ServiceCatalogWatcher(
+                self.service_selector)
+
+    def watch(self) -> bool:
+        if self.service_watcher is None:
+            return super().watch()
+        return self.service_watcher.watch()
+
+    def reset_watch(self):
+        if self.service_watcher is not None:
+            self.service_watcher.reset()
+
+    def _get_snapshot_ttl(self):
+        # The snapshot may be older than the change watched
+        return 0 if self.service_watcher is not None else None
+
+    def _query_services(self):
+        return query_services_with_nodes(
+            self.service_selector, snapshot_ttl=self._get_snapshot_ttl())
@@ -2,6 +2,10 @@ import socket
 
 from cloudtik.core._private.util.core_utils import address_string
 
+HAPROXY_SOCKET_BUFFER_SIZE = 4096
+# Keep the command line of a session in the default buffer size of HAProxy
+HAPROXY_COMMAND_LINE_MAX = 8192
+
 
 def get_backend_server_address(backend_server):
     return address_string(backend_server[0], backend_server[1])
@@ -51,6 +55,26 @@ def _parse_backends(stat_string):
 
 
 def send_haproxy_command(haproxy_server, command):
+    return send_haproxy_commands(haproxy_server, [command])
+
+
+def send_haproxy_commands(haproxy_server, commands):
+    """Send the commands in as few sessions as possible. The commands of
+    a session are separated with semicolons in one line."""
+    retval = ""
+    line = ""
+    for command in commands:
+        command = command.rstrip("\n")
+        if line and len(line) + len(command) + 2 > HAPROXY_COMMAND_LINE_MAX:
+            retval += _send_haproxy_line(haproxy_server, line)
+            line = ""
+        line = command if not line else line + "; " + command
+    if line:
+        retval += _send_haproxy_line(haproxy_server, line)
+    return retval
+
+
+def _send_haproxy_line(haproxy_server, line):
     if haproxy_server[0] == "/":
         haproxy_sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
     else:
@@ -58,48 +82,77 @@ def send_haproxy_command(haproxy_server, command):
     haproxy_sock.settimeout(10)
     try:
         haproxy_sock.connect(haproxy_server)
-        haproxy_sock.send(command.encode("utf-8"))
-        retval = ""
+        haproxy_sock.sendall((line + "\n").encode("utf-8"))
+        chunks = []
         while True:
-            buf = haproxy_sock.recv(16)
+            buf = haproxy_sock.recv(HAPROXY_SOCKET_BUFFER_SIZE)
             if buf:
-                retval += buf.decode("utf-8")
+                chunks.append(buf)
             else:
                 break
     finally:
         haproxy_sock.close()
-    return retval
+    return b"".join(chunks).decode("utf-8")
 
 
-def list_backend_servers(haproxy_server, backend_name):
+def show_stat(haproxy_server):
     stat_string = send_haproxy_command(haproxy_server, "show stat\n")
     if not stat_string:
         raise RuntimeError(
-            "Failed to get current backend servers from HAProxy socket.")
+            "Failed to get the stat from HAProxy socket.")
+    return stat_string
 
+
+def list_backend_servers(haproxy_server, backend_name, stat_string=None):
+    if stat_string is None:
+        stat_string = show_stat(haproxy_server)
     return _parse_servers_of_backend(
         backend_name, stat_string)
 
 
-def list_backends(haproxy_server):
-    stat_string = send_haproxy_command(haproxy_server, "show stat\n")
-    if not stat_string:
-        raise RuntimeError(
-            "Failed to get backends from HAProxy socket.")
-
+def list_backends(haproxy_server, stat_string=None):
+    if stat_string is None:
+        stat_string = show_stat(haproxy_server)
     return _parse_backends(stat_string)
 
 
-def add_backend_slot(
-        haproxy_server, backend_name, server_name, backend_server):
+def get_add_backend_slot_commands(backend_name, server_name, backend_server):
     # add a new dynamic server with address and enable it
-    send_haproxy_command(
-        haproxy_server,
+    return [
         "add server %s/%s %s check enabled\n" % (
             backend_name, server_name,
-            get_backend_server_address(backend_server)))
-    enable_health_check(
-        haproxy_server, backend_name, server_name)
+            get_backend_server_address(backend_server)),
+        get_enable_health_check_command(backend_name, server_name)]
+
+
+def get_delete_backend_slot_command(backend_name, server_name):
+    # delete a dynamic server (the server need to be in maintenance mode)
+    return "del server %s/%s\n" % (backend_name, server_name)
+
+
+def get_enable_backend_slot_commands(backend_name, server_name, backend_server):
+    return [
+        "set server %s/%s addr %s port %s\n" % (
+            backend_name, server_name,
+            backend_server[0], backend_server[1]),
+        "set server %s/%s state ready\n" % (
+            backend_name, server_name)]
+
+
+def get_disable_backend_slot_command(backend_name, server_name):
+    return "set server %s/%s state maint\n" % (backend_name, server_name)
+
+
+def get_enable_health_check_command(backend_name, server_name):
+    return "enable health %s/%s\n" % (backend_name, server_name)
+
+
+def add_backend_slot(
+        haproxy_server, backend_name, server_name, backend_server):
+    send_haproxy_commands(
+        haproxy_server,
+        get_add_backend_slot_commands(
+            backend_name, server_name, backend_server))
 
 
 def add_disabled_backend_slot(
@@ -113,36 +166,28 @@ def add_disabled_backend_slot(
 
 def delete_backend_slot(
         haproxy_server, backend_name, server_name):
-    # delete a dynamic server (the server need to be in maintenance mode)
     send_haproxy_command(
         haproxy_server,
-        "del server %s/%s\n" % (
-            backend_name, server_name))
+        get_delete_backend_slot_command(backend_name, server_name))
 
 
 def enable_backend_slot(
         haproxy_server, backend_name, server_name, backend_server):
-    send_haproxy_command(
-        haproxy_server, "set server %s/%s addr %s port %s\n" % (
-            backend_name, server_name,
-            backend_server[0], backend_server[1]))
-    send_haproxy_command(
+    send_haproxy_commands(
         haproxy_server,
-        "set server %s/%s state ready\n" % (
-            backend_name, server_name))
+        get_enable_backend_slot_commands(
+            backend_name, server_name, backend_server))
 
 
 def disable_backend_slot(
         haproxy_server, backend_name, server_name):
     send_haproxy_command(
         haproxy_server,
-        "set server %s/%s state maint\n" % (
-            backend_name, server_name))
+        get_disable_backend_slot_command(backend_name, server_name))
 
 
 def enable_health_check(
         haproxy_server, backend_name, server_name):
     send_haproxy_command(
         haproxy_server,
-        "enable health %s/%s\n" % (
-            backend_name, server_name))
+        get_enable_health_check_command(backend_name, server_name))
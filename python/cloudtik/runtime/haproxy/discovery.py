@@ -1,13 +1,14 @@
 import logging
 
-from cloudtik.core._private.service_discovery.utils import deserialize_service_selector
-from cloudtik.core._private.util.service.pull_job import PullJob
+from cloudtik.core._private.util.core_utils import get_json_object_hash
 from cloudtik.runtime.common.service_discovery.consul import \
     get_service_address_of_node
-from cloudtik.runtime.common.service_discovery.discovery import query_services_with_addresses, query_services_with_nodes
+from cloudtik.runtime.common.service_discovery.discovery import query_services_with_addresses
+from cloudtik.runtime.common.service_discovery.discovery_job import ServiceDiscoveryJob
 from cloudtik.runtime.common.service_discovery.load_balancer import get_application_route_from_service_nodes
-from cloudtik.runtime.haproxy.admin_api import list_backend_servers, enable_backend_slot, disable_backend_slot, \
-    add_backend_slot, get_backend_server_address, delete_backend_slot, list_backends
+from cloudtik.runtime.haproxy.admin_api import list_backend_servers, get_backend_server_address, list_backends, \
+    show_stat, send_haproxy_commands, get_enable_backend_slot_commands, get_disable_backend_slot_command, \
+    get_add_backend_slot_commands, get_delete_backend_slot_command
 from cloudtik.runtime.haproxy.scripting import update_configuration, update_api_gateway_configuration, \
     APIGatewayBackendService
 from cloudtik.runtime.haproxy.utils import get_default_server_name, \
@@ -19,83 +20,101 @@ logger = logging.getLogger(__name__)
 HAPROXY_SERVERS = [("127.0.0.1", 19999)]
 
 
-def _list_backends():
-    return list_backends(HAPROXY_SERVERS[0])
+def _get_backend_update_commands(
+        backend_name, backend_servers, active_servers, inactive_servers):
+    # The runtime API commands to update the server slots of the backend
+    # from the active and inactive slots to the backend servers
+    active_servers = dict(active_servers)
+    inactive_servers = list(inactive_servers)
+    total_server_slots = len(active_servers) + len(inactive_servers)
+    commands = []
+
+    missing_backend_servers = []
+    for backend_server in backend_servers:
+        server_address = get_backend_server_address(backend_server)
+        if server_address in active_servers:
+            # Ignore backends already set
+            del active_servers[server_address]
+        else:
+            if len(inactive_servers) > 0:
+                server_name = inactive_servers.pop(0)
+                commands += get_enable_backend_slot_commands(
+                    backend_name, server_name, backend_server)
+            else:
+                # we need a reload of the configuration after
+                missing_backend_servers.append(backend_server)
+
+    # mark inactive for remaining servers in active servers set but not appearing
+    for remaining_server, server_name in active_servers.items():
+        # disable
+        commands.append(get_disable_backend_slot_command(
+            backend_name, server_name))
+        # if there are missing backend, use it
+        if missing_backend_servers:
+            backend_server = missing_backend_servers.pop(0)
+            commands += get_enable_backend_slot_commands(
+                backend_name, server_name, backend_server)
+
+    if missing_backend_servers:
+        num_adds = len(missing_backend_servers)
+        logger.info(
+            "Not enough free server slots in backend. Add {} slots.".format(num_adds))
+        for server_id, backend_server in enumerate(
+                missing_backend_servers, start=total_server_slots + 1):
+            server_name = get_default_server_name(server_id)
+            commands += get_add_backend_slot_commands(
+                backend_name, server_name, backend_server)
+    else:
+        num_deletes = len(inactive_servers) - HAPROXY_BACKEND_DYNAMIC_FREE_SLOTS
+        if num_deletes > 0:
+            # if there are more inactive servers, check the spare limit for last server ids
+            for server_id in range(total_server_slots,
+                                   total_server_slots - num_deletes, -1):
+                server_name = get_default_server_name(server_id)
+                if server_name in inactive_servers:
+                    commands.append(get_delete_backend_slot_command(
+                        backend_name, server_name))
+                else:
+                    # this make sure only delete the last ones so that
+                    break
+    return commands
 
 
-def _update_backend(backend_name, backend_servers):
-    # Now update each HAProxy server with the backends
+def _update_backends(backends):
+    """Update the servers of the backends of each HAProxy server with
+    the runtime API. Return the backends not existing in HAProxy."""
+    new_backends = set()
     for haproxy_server in HAPROXY_SERVERS:
-        active_servers, inactive_servers = list_backend_servers(
-            haproxy_server, backend_name)
-        total_server_slots = len(active_servers) + len(inactive_servers)
-
-        missing_backend_servers = []
-        for backend_server in backend_servers:
-            server_address = get_backend_server_address(backend_server)
-            if server_address in active_servers:
-                # Ignore backends already set
-                del active_servers[server_address]
-            else:
-                if len(inactive_servers) > 0:
-                    server_name = inactive_servers.pop(0)
-                    enable_backend_slot(
-                        haproxy_server, backend_name,
-                        server_name, backend_server)
-                else:
-                    # we need a reload of the configuration after
-                    missing_backend_servers.append(backend_server)
-
-        # mark inactive for remaining servers in active servers set but not appearing
-        for remaining_server, server_name in active_servers.items():
-            # disable
-            disable_backend_slot(
-                haproxy_server, backend_name, server_name)
-            # if there are missing backend, use it
-            if missing_backend_servers:
-                backend_server = missing_backend_servers.pop(0)
-                enable_backend_slot(
-                    haproxy_server, backend_name,
-                    server_name, backend_server)
+        # The stat and the updates of all the backends in one session each
+        stat_string = show_stat(haproxy_server)
+        active_backends = list_backends(
+            haproxy_server, stat_string=stat_string)
+        commands = []
+        for backend_name, backend_servers in backends.items():
+            if backend_name not in active_backends:
+                new_backends.add(backend_name)
+                continue
+            active_servers, inactive_servers = list_backend_servers(
+                haproxy_server, backend_name, stat_string=stat_string)
+            commands += _get_backend_update_commands(
+                backend_name, backend_servers,
+                active_servers, inactive_servers)
+        send_haproxy_commands(haproxy_server, commands)
+    return new_backends
 
-        if missing_backend_servers:
-            num_adds = len(missing_backend_servers)
-            logger.info(
-                "Not enough free server slots in backend. Add {} slots.".format(num_adds))
-            for server_id, backend_server in enumerate(
-                    missing_backend_servers, start=total_server_slots + 1):
-                server_name = get_default_server_name(server_id)
-                add_backend_slot(
-                    haproxy_server, backend_name,
-                    server_name, backend_server)
-        else:
-            num_deletes = len(inactive_servers) - HAPROXY_BACKEND_DYNAMIC_FREE_SLOTS
-            if num_deletes > 0:
-                # if there are more inactive servers, check the spare limit for last server ids
-                for server_id in range(total_server_slots,
-                                       total_server_slots - num_deletes, -1):
-                    server_name = get_default_server_name(server_id)
-                    if server_name in inactive_servers:
-                        delete_backend_slot(
-                            haproxy_server, backend_name,
-                            server_name)
-                    else:
-                        # this make sure only delete the last ones so that
-                        break
-
-
-class DiscoverBackendService(PullJob):
+
+class DiscoverBackendService(ServiceDiscoveryJob):
     """Pulling job for discovering backend targets and update HAProxy using Runtime API"""
 
     def __init__(
             self,
             interval=None,
             service_selector=None,
-            backend_name=None):
-        super().__init__(interval)
-        self.service_selector = deserialize_service_selector(
-            service_selector)
+            backend_name=None,
+            watch=True):
+        super().__init__(interval, service_selector, watch)
         self.backend_name = backend_name
+        self.last_config_hash = None
 
     def pull(self):
         selected_services = self._query_services()
@@ -105,18 +124,24 @@ class DiscoverBackendService(PullJob):
         if not backend_servers:
             logger.warning(
                 "No live servers return from the service selector.")
-        else:
-            _update_backend(self.backend_name, backend_servers)
+
+        servers_hash = get_json_object_hash(backend_servers)
+        if servers_hash == self.last_config_hash:
+            return
+
+        if backend_servers:
+            _update_backends({self.backend_name: backend_servers})
 
         # Finally, rebuild the HAProxy configuration for restarts/reloads
         update_configuration(backend_servers)
+        self.last_config_hash = servers_hash
 
     def _query_services(self):
         return query_services_with_addresses(
-            self.service_selector)
+            self.service_selector, snapshot_ttl=self._get_snapshot_ttl())
 
 
-class DiscoverAPIGatewayBackendServers(PullJob):
+class DiscoverAPIGatewayBackendServers(ServiceDiscoveryJob):
     """Pulling job for discovering backend targets for API gateway backends
     and update HAProxy using Runtime API"""
 
@@ -126,35 +151,35 @@ class DiscoverAPIGatewayBackendServers(PullJob):
             service_selector=None,
             bind_ip=None,
             bind_port=None,
-            balance_method=None):
-        super().__init__(interval)
-        self.service_selector = deserialize_service_selector(
-            service_selector)
+            balance_method=None,
+            watch=True):
+        super().__init__(interval, service_selector, watch)
         self.bind_ip = bind_ip
         self.bind_port = bind_port
         self.balance_method = balance_method
+        self.last_config_hash = None
         # TODO: logging the job parameters
 
     def pull(self):
         selected_services = self._query_services()
-        active_backends = _list_backends()
-        new_backends = set()
         api_gateway_backends = {}
         for service_name, service_nodes in selected_services.items():
-            backend_service = self.get_backend_service(
+            api_gateway_backends[service_name] = self.get_backend_service(
                 service_name, service_nodes)
-            backend_name = service_name
+
+        backends_hash = get_json_object_hash(api_gateway_backends)
+        if backends_hash == self.last_config_hash:
+            return
+
+        for backend_name, backend_service in api_gateway_backends.items():
             if not backend_service.backend_servers:
                 logger.warning(
                     "No live servers return from the service selector.")
 
-            if backend_name in active_backends:
-                # update only backend servers for active backend
-                _update_backend(backend_name, backend_service.backend_servers)
-            else:
-                new_backends.add(backend_name)
-
-            api_gateway_backends[backend_name] = backend_service
+        # update only backend servers for active backends
+        new_backends = _update_backends({
+            backend_name: backend_service.backend_servers
+            for backend_name, backend_service in api_gateway_backends.items()})
 
         # Finally, rebuild the HAProxy configuration for restarts/reloads
         update_api_gateway_configuration(
@@ -162,9 +187,7 @@ class DiscoverAPIGatewayBackendServers(PullJob):
             bind_ip=self.bind_ip,
             bind_port=self.bind_port,
             balance_method=self.balance_method)
-
-    def _query_services(self):
-        return query_services_with_nodes(self.service_selector)
+        self.last_config_hash = backends_hash
 
     @staticmethod
     def get_backend_service(service_name, service_nodes):
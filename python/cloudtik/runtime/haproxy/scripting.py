@@ -120,24 +120,38 @@ def _get_backend_server_block(backend_servers):
     return backend_server_block
 
 
-def update_configuration(backend_servers):
-    # write haproxy config file
-    conf_dir = os.path.join(_get_home_dir(), "conf")
+def _get_template_configuration(conf_dir):
     template_file = os.path.join(
         conf_dir, "haproxy-template.cfg")
-    working_file = os.path.join(
-        conf_dir, "haproxy-working.cfg")
-    shutil.copyfile(template_file, working_file)
+    with open(template_file) as f:
+        return f.read()
 
-    backend_server_block = _get_backend_server_block(
-        backend_servers)
-    with open(working_file, "a") as f:
-        f.write(backend_server_block)
 
+def _write_configuration(conf_dir, config_content):
+    """Write the config file if the content changed. Return True if written."""
     config_file = os.path.join(
         conf_dir, "haproxy.cfg")
+    if os.path.exists(config_file):
+        with open(config_file) as f:
+            if f.read() == config_content:
+                return False
+
+    working_file = os.path.join(
+        conf_dir, "haproxy-working.cfg")
+    with open(working_file, "w") as f:
+        f.write(config_content)
     # move overwritten
     shutil.move(working_file, config_file)
+    return True
+
+
+def update_configuration(backend_servers):
+    # write haproxy config file
+    conf_dir = os.path.join(_get_home_dir(), "conf")
+    config_content = _get_template_configuration(conf_dir)
+    config_content += _get_backend_server_block(
+        backend_servers)
+    return _write_configuration(conf_dir, config_content)
 
 
 class APIGatewayBackendService(ApplicationBackendService):
@@ -168,11 +182,7 @@ def update_api_gateway_configuration(
         bind_port = HAPROXY_SERVICE_PORT_DEFAULT
     service_protocol = HAPROXY_SERVICE_PROTOCOL_HTTP
     conf_dir = os.path.join(_get_home_dir(), "conf")
-    template_file = os.path.join(
-        conf_dir, "haproxy-template.cfg")
-    working_file = os.path.join(
-        conf_dir, "haproxy-working.cfg")
-    shutil.copyfile(template_file, working_file)
+    config_lines = [_get_template_configuration(conf_dir)]
 
     # The backends should be reverse sorted by the route paths
     # reversed to make sure the shortest route with the same prefix showing after
@@ -180,62 +190,61 @@ def update_api_gateway_configuration(
     sorted_api_gateway_backends = _get_sorted_api_gateway_backends(
         api_gateway_backends)
 
-    with open(working_file, "a") as f:
-        f.write("frontend api_gateway\n")
-        if bind_ip:
-            f.write(f"    bind {bind_ip}:{bind_port}\n")
+    config_lines.append("frontend api_gateway\n")
+    if bind_ip:
+        config_lines.append(f"    bind {bind_ip}:{bind_port}\n")
+    else:
+        config_lines.append(f"    bind :{bind_port}\n")
+    config_lines.append(f"    mode {service_protocol}\n")
+    config_lines.append(f"    option {service_protocol}log\n")
+    # IMPORTANT NOTE:
+    # There may be as many "use_backend" rules as desired. All of these rules are
+    # evaluated in their declaration order, and the first one which matches will
+    # assign the backend.
+    for backend_name, backend_service in sorted_api_gateway_backends:
+        route_path = backend_service.get_route_path()
+        if route_path.endswith('/'):
+            # if the route path ends with /, we don't need two conditions
+            # /abc/ will use path_beg /abc/ to match (it will not match /abc)
+            config_lines.append(
+                "    use_backend " + backend_name +
+                " if { path_beg " + route_path +
+                " }\n")
         else:
-            f.write(f"    bind :{bind_port}\n")
-        f.write(f"    mode {service_protocol}\n")
-        f.write(f"    option {service_protocol}log\n")
-        # IMPORTANT NOTE:
-        # There may be as many "use_backend" rules as desired. All of these rules are
-        # evaluated in their declaration order, and the first one which matches will
-        # assign the backend.
-        for backend_name, backend_service in sorted_api_gateway_backends:
-            route_path = backend_service.get_route_path()
-            if route_path.endswith('/'):
-                # if the route path ends with /, we don't need two conditions
-                # /abc/ will use path_beg /abc/ to match (it will not match /abc)
-                f.write("    use_backend " + backend_name +
-                        " if { path_beg " + route_path +
-                        " }\n")
-            else:
-                # match two cases
-                # path /abc match exactly the /abc
-                # path_beg /abc/ match paths that prefixed by /abc/
-                # route to a backend based on path's prefix
-                f.write("    use_backend " + backend_name +
-                        " if { path " + route_path +
-                        " } || { path_beg " + route_path +
-                        "/ }\n")
-
-        f.write("\n")
-        # write each backend
-        for backend_name, backend_service in sorted_api_gateway_backends:
-            backend_servers = backend_service.backend_servers
-            route_path = backend_service.get_route_path()
-            backend_server_block = _get_backend_server_block(
-                backend_servers)
-            f.write(f"backend {backend_name}\n")
-            f.write(f"    mode {service_protocol}\n")
-            if balance_method:
-                f.write(f"    balance {balance_method}\n")
-
-            # IMPORTANT NOTE:
-            # strip the route path and replace this part with service path if there is one
-            target_path = "/\\2"
-            service_path = backend_service.get_service_path()
-            if service_path:
-                target_path = service_path + target_path
-            f.write("    http-request replace-path " + route_path +
-                    "(/)?(.*) " + target_path + "\n")
-            f.write(backend_server_block)
+            # match two cases
+            # path /abc match exactly the /abc
+            # path_beg /abc/ match paths that prefixed by /abc/
+            # route to a backend based on path's prefix
+            config_lines.append(
+                "    use_backend " + backend_name +
+                " if { path " + route_path +
+                " } || { path_beg " + route_path +
+                "/ }\n")
+
+    config_lines.append("\n")
+    # write each backend
+    for backend_name, backend_service in sorted_api_gateway_backends:
+        backend_servers = backend_service.backend_servers
+        route_path = backend_service.get_route_path()
+        backend_server_block = _get_backend_server_block(
+            backend_servers)
+        config_lines.append(f"backend {backend_name}\n")
+        config_lines.append(f"    mode {service_protocol}\n")
+        if balance_method:
+            config_lines.append(f"    balance {balance_method}\n")
 
-    config_file = os.path.join(
-        conf_dir, "haproxy.cfg")
-    # move overwritten
-    shutil.move(working_file, config_file)
+        # IMPORTANT NOTE:
+        # strip the route path and replace this part with service path if there is one
+        target_path = "/\\2"
+        service_path = backend_service.get_service_path()
+        if service_path:
+            target_path = service_path + target_path
+        config_lines.append(
+            "    http-request replace-path " + route_path +
+            "(/)?(.*) " + target_path + "\n")
+        config_lines.append(backend_server_block)
+
+    _write_configuration(conf_dir, "".join(config_lines))
 
     if new_backends:
         # Need reload haproxy if there is new backend added
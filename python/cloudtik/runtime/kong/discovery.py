@@ -1,12 +1,10 @@
 import logging
 
-from cloudtik.core._private.service_discovery.utils import deserialize_service_selector
 from cloudtik.core._private.util.core_utils import get_json_object_hash, get_address_string
-from cloudtik.core._private.util.service.pull_job import PullJob
 from cloudtik.runtime.common.service_discovery.consul import \
     get_service_address_of_node, get_service_fqdn_address, \
     get_tags_of_service_nodes
-from cloudtik.runtime.common.service_discovery.discovery import query_services_with_nodes
+from cloudtik.runtime.common.service_discovery.discovery_job import ServiceDiscoveryJob
 from cloudtik.runtime.common.service_discovery.load_balancer import \
     get_application_route_from_service_nodes
 from cloudtik.runtime.kong.admin_api import add_or_update_backend, \
@@ -39,19 +37,15 @@ def _get_delete_backends(backends, existing_backends):
     return delete_backends
 
 
-class DiscoverJob(PullJob):
+class DiscoverJob(ServiceDiscoveryJob):
     def __init__(
             self,
             interval=None,
-            service_selector=None):
-        super().__init__(interval)
-        self.service_selector = deserialize_service_selector(
-            service_selector)
+            service_selector=None,
+            watch=True):
+        super().__init__(interval, service_selector, watch)
         self.last_config_hash = None
 
-    def _query_services(self):
-        return query_services_with_nodes(self.service_selector)
-
 
 class DiscoverBackendService(DiscoverJob):
     """Pulling job for discovering backend targets for API gateway
@@ -64,8 +58,9 @@ class DiscoverBackendService(DiscoverJob):
             config_mode=None,
             balance_method=None,
             admin_endpoint=None,
+            watch=True,
     ):
-        super().__init__(interval, service_selector)
+        super().__init__(interval, service_selector, watch)
         self.config_mode = config_mode
         self.balance_method = balance_method
         self.admin_endpoint = admin_endpoint
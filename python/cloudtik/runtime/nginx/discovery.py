@@ -1,11 +1,9 @@
 import logging
 
-from cloudtik.core._private.service_discovery.utils import deserialize_service_selector
 from cloudtik.core._private.util.core_utils import get_json_object_hash, get_address_string
-from cloudtik.core._private.util.service.pull_job import PullJob
 from cloudtik.runtime.common.service_discovery.consul import \
     get_service_address_of_node, get_tags_of_service_nodes, get_service_fqdn_address
-from cloudtik.runtime.common.service_discovery.discovery import query_services_with_nodes
+from cloudtik.runtime.common.service_discovery.discovery_job import ServiceDiscoveryJob
 from cloudtik.runtime.common.service_discovery.load_balancer import \
     get_application_route_from_service_nodes
 from cloudtik.runtime.nginx.scripting import update_load_balancer_configuration, \
@@ -15,21 +13,17 @@ from cloudtik.runtime.nginx.scripting import update_load_balancer_configuration,
 logger = logging.getLogger(__name__)
 
 
-class DiscoverJob(PullJob):
+class DiscoverJob(ServiceDiscoveryJob):
     def __init__(
             self,
             interval=None,
             service_selector=None,
-            balance_method=None):
-        super().__init__(interval)
-        self.service_selector = deserialize_service_selector(
-            service_selector)
+            balance_method=None,
+            watch=True):
+        super().__init__(interval, service_selector, watch)
         self.balance_method = balance_method
         self.last_config_hash = None
 
-    def _query_services(self):
-        return query_services_with_nodes(self.service_selector)
-
 
 class DiscoverBackendService(DiscoverJob):
     """Pulling job for discovering backend targets and
@@ -40,8 +34,9 @@ class DiscoverBackendService(DiscoverJob):
             self,
             interval=None,
             service_selector=None,
-            balance_method=None):
-        super().__init__(interval, service_selector, balance_method)
+            balance_method=None,
+            watch=True):
+        super().__init__(interval, service_selector, balance_method, watch)
 
     def pull(self):
         selected_services = self._query_services()
@@ -76,8 +71,9 @@ class DiscoverAPIGatewayBackendService(DiscoverJob):
             self,
             interval=None,
             service_selector=None,
-            balance_method=None):
-        super().__init__(interval, service_selector, balance_method)
+            balance_method=None,
+            watch=True):
+        super().__init__(interval, service_selector, balance_method, watch)
         # TODO: logging the job parameters
 
     def pull(self):
@@ -120,8 +116,9 @@ class DiscoverAPIGatewayDNSBackendService(DiscoverJob):
             self,
             interval=None,
             service_selector=None,
-            balance_method=None):
-        super().__init__(interval, service_selector, balance_method)
+            balance_method=None,
+            watch=True):
+        super().__init__(interval, service_selector, balance_method, watch)
         # TODO: logging the job parameters
 
     def pull(self):
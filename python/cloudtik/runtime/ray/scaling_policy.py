@@ -3,10 +3,11 @@ import os
 import time
 from typing import Any, Dict, Optional
 
+from cloudtik.core._private.cluster.resource_demand_shapes import clip_demand_shapes
 from cloudtik.core._private.util.core_utils import get_address_string, address_to_ip
 from cloudtik.core._private.state.state_utils import NODE_STATE_NODE_ID, NODE_STATE_NODE_IP, NODE_STATE_TIME
 from cloudtik.core._private.utils import make_node_id, get_runtime_config
-from cloudtik.core.scaling_policy import ScalingPolicy, ScalingState, SCALING_INSTRUCTIONS_RESOURCE_DEMANDS, \
+from cloudtik.core.scaling_policy import ScalingPolicy, ScalingState, SCALING_INSTRUCTIONS_RESOURCE_DEMAND_SHAPES, \
     SCALING_INSTRUCTIONS_SCALING_TIME, SCALING_NODE_STATE_TOTAL_RESOURCES, \
     SCALING_NODE_STATE_AVAILABLE_RESOURCES, SCALING_NODE_STATE_RESOURCE_LOAD
 
@@ -25,62 +26,61 @@ def _address_to_ip(address):
         return None
 
 
-def parse_resource_demands(resource_load_by_shape):
+def parse_resource_demand_shapes(resource_load_by_shape):
     """Handle the message.resource_load_by_shape protobuf for the demand
     based autoscaling. Catch and log all exceptions so this doesn't
-    interfere with the utilization based autoscaler until we're confident
-    this is stable. Worker queue backlogs are added to the appropriate
-    resource demand vector.
+    interfere with the utilization based autoscaler. The worker queue
+    backlogs are added to the count of the shape. The bundles of each shape
+    are collapsed into a [shape, count] instead of the identical bundles.
 
     Args:
         resource_load_by_shape (pb2.gcs.ResourceLoad): The resource demands
             in protobuf form or None.
 
     Returns:
-        List[ResourceDict]: Waiting bundles (ready and feasible).
-        List[ResourceDict]: Infeasible bundles.
+        List[[ResourceDict, int]]: Waiting bundle shapes (ready and feasible).
+        List[[ResourceDict, int]]: Infeasible bundle shapes.
     """
-    waiting_bundles, infeasible_bundles = [], []
+    waiting_shapes, infeasible_shapes = [], []
+    num_bundles = 0
     try:
         for resource_demand_pb in list(resource_load_by_shape.resource_demands):
             request_shape = dict(resource_demand_pb.shape)
-            for _ in range(resource_demand_pb.num_ready_requests_queued):
-                waiting_bundles.append(request_shape)
-            for _ in range(resource_demand_pb.num_infeasible_requests_queued):
-                infeasible_bundles.append(request_shape)
+            num_waiting = resource_demand_pb.num_ready_requests_queued
+            num_infeasible = resource_demand_pb.num_infeasible_requests_queued
 
             # Infeasible and ready states for tasks are (logically)
             # mutually exclusive.
-            if resource_demand_pb.num_infeasible_requests_queued > 0:
-                backlog_queue = infeasible_bundles
+            if num_infeasible > 0:
+                num_infeasible += resource_demand_pb.backlog_size
             else:
-                backlog_queue = waiting_bundles
-            for _ in range(resource_demand_pb.backlog_size):
-                backlog_queue.append(request_shape)
-            if (
-                    len(waiting_bundles + infeasible_bundles)
-                    > MAX_RESOURCE_DEMAND_VECTOR_SIZE
-            ):
+                num_waiting += resource_demand_pb.backlog_size
+            if num_waiting > 0:
+                waiting_shapes.append([request_shape, num_waiting])
+            if num_infeasible > 0:
+                infeasible_shapes.append([request_shape, num_infeasible])
+            num_bundles += num_waiting + num_infeasible
+            if num_bundles > MAX_RESOURCE_DEMAND_VECTOR_SIZE:
                 break
     except Exception:
         logger.exception(
             "Failed to parse resource demands.")
 
-    return waiting_bundles, infeasible_bundles
+    return waiting_shapes, infeasible_shapes
 
 
-def get_resource_demands(waiting_bundles, infeasible_bundles, clip=True):
+def get_resource_demand_shapes(waiting_shapes, infeasible_shapes, clip=True):
     if clip:
         # Bound the total number of bundles to
         # 2xMAX_RESOURCE_DEMAND_VECTOR_SIZE. This guarantees the resource
         # demand scheduler bin packing algorithm takes a reasonable amount
         # of time to run.
         return (
-            waiting_bundles[:MAX_RESOURCE_DEMAND_VECTOR_SIZE]
-            + infeasible_bundles[:MAX_RESOURCE_DEMAND_VECTOR_SIZE]
+            clip_demand_shapes(waiting_shapes, MAX_RESOURCE_DEMAND_VECTOR_SIZE)
+            + clip_demand_shapes(infeasible_shapes, MAX_RESOURCE_DEMAND_VECTOR_SIZE)
         )
     else:
-        return waiting_bundles + infeasible_bundles
+        return waiting_shapes + infeasible_shapes
 
 
 class RayScalingPolicy(ScalingPolicy):
@@ -129,19 +129,19 @@ class RayScalingPolicy(ScalingPolicy):
             return None
 
         resources_batch_data = all_resource_usage.resource_usage_data
-        waiting_bundles, infeasible_bundles = parse_resource_demands(
+        waiting_shapes, infeasible_shapes = parse_resource_demand_shapes(
             resources_batch_data.resource_load_by_shape
         )
-        resource_demands = get_resource_demands(
-            waiting_bundles, infeasible_bundles)
+        resource_demand_shapes = get_resource_demand_shapes(
+            waiting_shapes, infeasible_shapes)
 
         autoscaling_instructions = {
             SCALING_INSTRUCTIONS_SCALING_TIME: self.last_state_time,
-            SCALING_INSTRUCTIONS_RESOURCE_DEMANDS: resource_demands
+            SCALING_INSTRUCTIONS_RESOURCE_DEMAND_SHAPES: resource_demand_shapes
         }
-        if len(resource_demands) > 0:
+        if len(resource_demand_shapes) > 0:
             logger.debug(
-                "Resource demands: {}".format(resource_demands))
+                "Resource demands: {}".format(resource_demand_shapes))
         return autoscaling_instructions
 
     def _get_node_resource_states(self, all_resource_usage):
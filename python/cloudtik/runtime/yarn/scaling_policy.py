@@ -10,9 +10,9 @@ from cloudtik.core._private.util.core_utils import address_to_ip, url_read
 from cloudtik.core._private.state.state_utils import NODE_STATE_NODE_ID, NODE_STATE_NODE_IP, NODE_STATE_TIME
 from cloudtik.core._private.utils import make_node_id, \
     convert_nodes_to_cpus, convert_nodes_to_memory, get_runtime_config, \
-    get_resource_demands_for
+    get_resource_demand_shapes_for
 from cloudtik.core.scaling_policy import ScalingPolicy, ScalingState, SCALING_INSTRUCTIONS_SCALING_TIME, \
-    SCALING_INSTRUCTIONS_RESOURCE_DEMANDS, SCALING_NODE_STATE_TOTAL_RESOURCES, \
+    SCALING_INSTRUCTIONS_RESOURCE_DEMAND_SHAPES, SCALING_NODE_STATE_TOTAL_RESOURCES, \
     SCALING_NODE_STATE_AVAILABLE_RESOURCES, SCALING_NODE_STATE_RESOURCE_LOAD
 
 YARN_REST_ENDPOINT_CLUSTER_NODES = "http://{}:{}/ws/v1/cluster/nodes"
@@ -208,7 +208,7 @@ class YARNScalingPolicy(ScalingPolicy):
         cluster_metrics_response = json.loads(content)
 
         autoscaling_instructions = {}
-        resource_demands = []
+        resource_demand_shapes = []
 
         if "clusterMetrics" in cluster_metrics_response:
             cluster_metrics = cluster_metrics_response["clusterMetrics"]
@@ -234,9 +234,8 @@ class YARNScalingPolicy(ScalingPolicy):
             resource_requesting = self._need_more_resources(cluster_metrics)
             if resource_requesting:
                 for resource_id, resource_amount in resource_requesting.items():
-                    resource_demands_for_resource = get_resource_demands_for(
+                    resource_demand_shapes += get_resource_demand_shapes_for(
                         resource_amount, resource_id, self.config)
-                    resource_demands += resource_demands_for_resource
                     self._log_scaling(resource_id, resource_amount, cluster_metrics)
 
                 self.last_resource_demands_time = self.last_state_time
@@ -251,10 +250,11 @@ class YARNScalingPolicy(ScalingPolicy):
                 }
 
         autoscaling_instructions[SCALING_INSTRUCTIONS_SCALING_TIME] = self.last_state_time
-        autoscaling_instructions[SCALING_INSTRUCTIONS_RESOURCE_DEMANDS] = resource_demands
-        if len(resource_demands) > 0:
+        autoscaling_instructions[
+            SCALING_INSTRUCTIONS_RESOURCE_DEMAND_SHAPES] = resource_demand_shapes
+        if len(resource_demand_shapes) > 0:
             logger.debug(
-                "Resource demands: {}".format(resource_demands))
+                "Resource demands: {}".format(resource_demand_shapes))
 
         return autoscaling_instructions
 
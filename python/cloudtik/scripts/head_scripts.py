@@ -339,9 +339,28 @@ def scale(
     is_flag=True,
     default=False,
     help="Whether to upload to all workers.")
+@click.option(
+    "--max-parallel",
+    required=False,
+    type=click.IntRange(min=1),
+    default=None,
+    help="The max number of workers to upload to concurrently.")
+@click.option(
+    "--checksum/--no-checksum",
+    is_flag=True,
+    default=True,
+    help="Whether to skip the workers with the same checksum of the files.")
+@click.option(
+    "--fan-out",
+    required=False,
+    type=click.IntRange(min=1),
+    default=None,
+    help="Relay the files from the synced workers to the other workers "
+         "with each synced worker or head uploading to this number of workers "
+         "at the same time. By default, all the workers are uploaded from head.")
 @add_click_logging_options
 def upload(
-        source, target, node_ip, all_workers):
+        source, target, node_ip, all_workers, max_parallel, checksum, fan_out):
     """Upload files to a specified worker node or all nodes."""
     config = load_head_cluster_config()
     call_context = cli_call_context()
@@ -352,7 +371,10 @@ def upload(
         target,
         down=False,
         node_ip=node_ip,
-        all_workers=all_workers)
+        all_workers=all_workers,
+        max_parallel=max_parallel,
+        checksum=checksum,
+        fan_out=fan_out)
 
 
 @head.command()
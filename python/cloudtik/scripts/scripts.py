@@ -1,4 +1,6 @@
-import importlib
+import ast
+import functools
+import importlib.util
 import logging
 import os
 import pkgutil
@@ -14,24 +16,7 @@ from cloudtik.core._private import constants
 from cloudtik.core._private.util import logging_utils
 from cloudtik.core._private.cli_logger import (
     add_click_logging_options, cli_logger, cf)
-from cloudtik.core._private.cluster.cluster_config import _load_cluster_config
-from cloudtik.core._private.cluster.cluster_operator import (
-    attach_cluster, create_or_update_cluster, monitor_cluster,
-    teardown_cluster, get_head_node_ip, kill_node_from_head, get_worker_node_ips,
-    dump_cluster, RUN_ENV_TYPES,
-    show_cluster_status, start_ssh_proxy, stop_ssh_proxy, cluster_debug_status,
-    cluster_health_check, cluster_process_status, attach_worker, scale_cluster,
-    exec_on_nodes, submit_and_exec, _wait_for_ready, _rsync, cli_call_context, cluster_resource_metrics,
-    show_info, _run_script, cluster_logs, get_worker_node_hosts, get_head_node_host)
-from cloudtik.core._private.util.core_utils import url_read
-from cloudtik.core._private.utils import parse_bundles_json, parse_resources
-from cloudtik.scripts.head_scripts import head
-from cloudtik.scripts.node_scripts import node
-from cloudtik.scripts.runtime_scripts import runtime
-from cloudtik.scripts.utils import NaturalOrderGroup, add_command_alias, fail_command
-from cloudtik.scripts.workspace import workspace
-from cloudtik.scripts.storage import storage
-from cloudtik.scripts.database import database
+from cloudtik.scripts.utils import LazyGroup, add_command_alias, fail_command
 
 logger = logging.getLogger(__name__)
 
@@ -46,27 +31,46 @@ def _register_runtime_commands():
 
 
 def _search_and_register_runtime_commands():
-    from cloudtik import runtime
-
-    base_dir = os.path.dirname(runtime.__file__)
+    # Find the runtime packages without importing them
+    runtime_spec = importlib.util.find_spec("cloudtik.runtime")
     for loader, module_name, is_pkg in pkgutil.iter_modules(
-            runtime.__path__):
+            runtime_spec.submodule_search_locations):
         # walk packages will return global packages not in the current path
         # if the name is also package in the global namespace
         if not is_pkg or "." in module_name:
             continue
-        scripts_file = os.path.join(base_dir, module_name, "scripts.py")
-        if not os.path.exists(scripts_file):
+        scripts_files = [
+            os.path.join(base_dir, module_name, "scripts.py")
+            for base_dir in runtime_spec.submodule_search_locations]
+        scripts_file = next(
+            (f for f in scripts_files if os.path.exists(f)), None)
+        if scripts_file is None:
             continue
 
-        scripts_module_name = runtime.__name__ + '.' + module_name + "." + "scripts"
-        _module = importlib.import_module(scripts_module_name)
-        if module_name in _module.__dict__:
-            runtime_command_group = _module.__dict__[module_name]
-            cli.add_command(runtime_command_group)
+        scripts_module_name = runtime_spec.name + '.' + module_name + "." + "scripts"
+        cli.add_lazy_command(
+            module_name, scripts_module_name + ":" + module_name,
+            functools.partial(
+                _get_runtime_command_help, scripts_file, module_name))
+
 
+def _get_runtime_command_help(scripts_file, module_name):
+    # Read the docstring of the runtime command group without importing
+    default_help = "Commands for {} runtime.".format(module_name.capitalize())
+    try:
+        with open(scripts_file) as f:
+            tree = ast.parse(f.read())
+    except (OSError, SyntaxError):
+        return default_help
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == module_name:
+            docstring = ast.get_docstring(node)
+            if docstring:
+                return docstring.strip().splitlines()[0]
+    return default_help
 
-@click.group(cls=NaturalOrderGroup)
+
+@click.group(cls=LazyGroup)
 @click.option(
     "--logging-level",
     required=False,
@@ -139,12 +143,20 @@ def cli(logging_level, logging_format):
     help=("We uses login shells (bash --login -i) to run cluster commands "
           "by default. If your workflow is compatible with normal shells, "
           "this can be disabled for a better user experience."))
+@click.option(
+    "--rehash",
+    is_flag=True,
+    default=False,
+    help="Hash all the file mounts again instead of using the cached file hashes.")
 @add_click_logging_options
 def start(
         cluster_config_file, min_workers, max_workers, no_restart, restart_only,
         yes, cluster_name, workspace_name, redirect_command_output,
-        use_login_shells):
+        use_login_shells, rehash):
     """Start or update a cluster."""
+    from cloudtik.core._private.cluster.cluster_operator import (
+        create_or_update_cluster, cli_call_context)
+    from cloudtik.core._private.util.core_utils import url_read
     if restart_only or no_restart:
         cli_logger.doassert(restart_only != no_restart,
                             "`{}` is incompatible with `{}`.",
@@ -176,7 +188,8 @@ def start(
         override_workspace_name=workspace_name,
         no_config_cache=True,
         redirect_command_output=redirect_command_output,
-        use_login_shells=use_login_shells)
+        use_login_shells=use_login_shells,
+        rehash=rehash)
 
 
 @cli.command()
@@ -218,6 +231,7 @@ def stop(
         cluster_config_file, yes, workers_only, cluster_name,
         keep_min_workers, hard, deep):
     """Stop a cluster."""
+    from cloudtik.core._private.cluster.cluster_operator import teardown_cluster
     teardown_cluster(
         cluster_config_file, yes, workers_only,
         cluster_name, keep_min_workers,
@@ -274,6 +288,7 @@ def attach(
         no_config_cache, new, port_forward, node_ip, host,
         with_env):
     """Create or attach to SH session to a cluster or a worker node."""
+    from cloudtik.core._private.cluster.cluster_operator import attach_cluster, attach_worker
     port_forward = [(port, port) for port in list(port_forward)]
     try:
         if not node_ip:
@@ -317,7 +332,7 @@ def attach(
 @click.option(
     "--run-env",
     required=False,
-    type=click.Choice(RUN_ENV_TYPES),
+    type=click.Choice(constants.RUN_ENV_TYPES),
     default="auto",
     help="Choose whether to execute this command in a container or directly on"
     " the cluster head. Only applies when docker is configured in the YAML.")
@@ -414,6 +429,8 @@ def exec(
         no_config_cache, port_forward, node_ip, all_nodes, parallel, yes, job_waiter,
         force, with_env):
     """Execute a command via SSH on a cluster or a specified node."""
+    from cloudtik.core._private.cluster.cluster_operator import exec_on_nodes, cli_call_context
+    from cloudtik.core._private.cluster.cluster_config import _load_cluster_config
     port_forward = [(port, port) for port in list(port_forward)]
 
     try:
@@ -557,6 +574,8 @@ def submit(
 
         os.path.join("~/user/jobs", os.path.basename(script))
     """
+    from cloudtik.core._private.cluster.cluster_operator import submit_and_exec, cli_call_context
+    from cloudtik.core._private.cluster.cluster_config import _load_cluster_config
     # Don't use config cache so that we will run a full bootstrap needed for start
     if start:
         no_config_cache = True
@@ -684,6 +703,8 @@ def run(
 
     If you want to execute any commands or user scripts, use exec or submit.
     """
+    from cloudtik.core._private.cluster.cluster_operator import cli_call_context, _run_script
+    from cloudtik.core._private.cluster.cluster_config import _load_cluster_config
     # Don't use config cache so that we will run a full bootstrap needed for start
     if start:
         no_config_cache = True
@@ -774,6 +795,8 @@ def scale(
         cpus, gpus, workers, worker_type,
         resources, bundles, up_only, override):
     """Scale the cluster with a specific number cpus or nodes."""
+    from cloudtik.core._private.cluster.cluster_operator import scale_cluster
+    from cloudtik.core._private.utils import parse_bundles_json, parse_resources
     if bundles:
         bundles = parse_bundles_json(bundles)
     if resources:
@@ -807,10 +830,32 @@ def scale(
     is_flag=True,
     default=False,
     help="Whether to upload to all nodes.")
+@click.option(
+    "--max-parallel",
+    required=False,
+    type=click.IntRange(min=1),
+    default=None,
+    help="The max number of workers to upload to at the same time.")
+@click.option(
+    "--checksum/--no-checksum",
+    is_flag=True,
+    default=True,
+    help="Whether to skip the workers with the same checksum of the files.")
+@click.option(
+    "--fan-out",
+    required=False,
+    type=click.IntRange(min=1),
+    default=None,
+    help="Relay the files from the synced workers to the other workers "
+         "with each synced worker or head uploading to this number of workers "
+         "at the same time. By default, all the workers are uploaded from head.")
 @add_click_logging_options
 def upload(
-        cluster_config_file, source, target, cluster_name, node_ip, all_nodes):
+        cluster_config_file, source, target, cluster_name, node_ip, all_nodes,
+        max_parallel, checksum, fan_out):
     """Upload files to a cluster or a specified node."""
+    from cloudtik.core._private.cluster.cluster_operator import _rsync, cli_call_context
+    from cloudtik.core._private.cluster.cluster_config import _load_cluster_config
 
     try:
         config = _load_cluster_config(
@@ -822,7 +867,10 @@ def upload(
             target=target,
             down=False,
             node_ip=node_ip,
-            all_nodes=all_nodes)
+            all_nodes=all_nodes,
+            max_parallel=max_parallel,
+            checksum=checksum,
+            fan_out=fan_out)
     except RuntimeError as re:
         fail_command("Failed to rsync up.", re)
 
@@ -847,6 +895,8 @@ def upload(
 def download(
         cluster_config_file, source, target, cluster_name, node_ip):
     """Download files from a cluster or a specified node."""
+    from cloudtik.core._private.cluster.cluster_operator import _rsync, cli_call_context
+    from cloudtik.core._private.cluster.cluster_config import _load_cluster_config
     try:
         config = _load_cluster_config(
             cluster_config_file, cluster_name)
@@ -870,6 +920,7 @@ def download(
 @add_click_logging_options
 def status(cluster_config_file, cluster_name):
     """Show cluster summary status."""
+    from cloudtik.core._private.cluster.cluster_operator import show_cluster_status
     show_cluster_status(
         cluster_config_file,
         cluster_name)
@@ -930,6 +981,8 @@ def info(
         cpus_per_worker, gpus_per_worker, memory_per_worker,
         sockets_per_worker, total_workers):
     """Show cluster summary information and useful links to use the cluster."""
+    from cloudtik.core._private.cluster.cluster_operator import show_info
+    from cloudtik.core._private.cluster.cluster_config import _load_cluster_config
     config = _load_cluster_config(cluster_config_file, cluster_name)
     show_info(
         config, cluster_config_file,
@@ -954,6 +1007,7 @@ def info(
 @add_click_logging_options
 def head_ip(cluster_config_file, cluster_name, public):
     """Return the head node IP of a cluster."""
+    from cloudtik.core._private.cluster.cluster_operator import get_head_node_ip
     try:
         ip = get_head_node_ip(
             cluster_config_file, cluster_name, public)
@@ -973,6 +1027,7 @@ def head_ip(cluster_config_file, cluster_name, public):
 @add_click_logging_options
 def head_host(cluster_config_file, cluster_name):
     """Return the head node host of a cluster."""
+    from cloudtik.core._private.cluster.cluster_operator import get_head_node_host
     try:
         host = get_head_node_host(
             cluster_config_file, cluster_name)
@@ -1013,6 +1068,7 @@ def worker_ips(
         cluster_config_file, cluster_name,
         runtime, node_status, separator):
     """Return the list of worker IPs of a cluster."""
+    from cloudtik.core._private.cluster.cluster_operator import get_worker_node_ips
     try:
         ips = get_worker_node_ips(
             cluster_config_file, cluster_name,
@@ -1058,6 +1114,7 @@ def worker_hosts(
         cluster_config_file, cluster_name,
         runtime, node_status, separator):
     """Return the list of worker hosts of a cluster."""
+    from cloudtik.core._private.cluster.cluster_operator import get_worker_node_hosts
     try:
         hosts = get_worker_node_hosts(
             cluster_config_file, cluster_name,
@@ -1095,6 +1152,7 @@ def worker_hosts(
 def monitor(
         cluster_config_file, lines, cluster_name, file_type):
     """Tails the monitor logs of a cluster."""
+    from cloudtik.core._private.cluster.cluster_operator import monitor_cluster
     try:
         monitor_cluster(
             cluster_config_file, lines, cluster_name, file_type=file_type)
@@ -1138,6 +1196,7 @@ def logs(
         cluster_config_file, cluster_name, no_config_cache,
         runtimes, node_types, node_ips):
     """Print logs of runtimes."""
+    from cloudtik.core._private.cluster.cluster_operator import cluster_logs
     try:
         cluster_logs(
             cluster_config_file, cluster_name,
@@ -1171,6 +1230,7 @@ def start_proxy(
         cluster_config_file, no_config_cache, cluster_name,
         bind_address):
     """Start the SOCKS5 proxy to the cluster through SSH tunnel forwarding to the head."""
+    from cloudtik.core._private.cluster.cluster_operator import start_ssh_proxy
     start_ssh_proxy(
         cluster_config_file,
         override_cluster_name=cluster_name,
@@ -1189,6 +1249,7 @@ def start_proxy(
 @add_click_logging_options
 def stop_proxy(cluster_config_file, cluster_name):
     """Stop the SOCKS5 proxy to the cluster."""
+    from cloudtik.core._private.cluster.cluster_operator import stop_ssh_proxy
     stop_ssh_proxy(cluster_config_file, cluster_name)
 
 
@@ -1221,6 +1282,7 @@ def stop_proxy(cluster_config_file, cluster_name):
 def kill_node(
         cluster_config_file, yes, hard, cluster_name, node_ip):
     """Kills a specified node or a random node."""
+    from cloudtik.core._private.cluster.cluster_operator import kill_node_from_head
     kill_node_from_head(
         cluster_config_file, yes, hard, cluster_name,
         node_ip)
@@ -1256,6 +1318,8 @@ def wait_for_ready(
         cluster_config_file, cluster_name, no_config_cache,
         min_workers, timeout):
     """Wait for the minimum number of workers to be ready."""
+    from cloudtik.core._private.cluster.cluster_operator import _wait_for_ready, cli_call_context
+    from cloudtik.core._private.cluster.cluster_config import _load_cluster_config
     config = _load_cluster_config(
         cluster_config_file, cluster_name,
         no_config_cache=no_config_cache)
@@ -1286,6 +1350,7 @@ def wait_for_ready(
 def process_status(
         cluster_config_file, cluster_name, no_config_cache, runtimes):
     """Show process status of cluster nodes."""
+    from cloudtik.core._private.cluster.cluster_operator import cluster_process_status
     try:
         cluster_process_status(
             cluster_config_file, cluster_name,
@@ -1311,6 +1376,7 @@ def process_status(
 def resource_metrics(
         cluster_config_file, cluster_name, no_config_cache):
     """Show cluster resource metrics and the metrics for each node."""
+    from cloudtik.core._private.cluster.cluster_operator import cluster_resource_metrics
     try:
         cluster_resource_metrics(
             cluster_config_file, cluster_name,
@@ -1336,6 +1402,7 @@ def resource_metrics(
 def debug_status(
         cluster_config_file, cluster_name, no_config_cache):
     """Show debug status of cluster scaling."""
+    from cloudtik.core._private.cluster.cluster_operator import cluster_debug_status
     try:
         cluster_debug_status(
             cluster_config_file, cluster_name,
@@ -1367,6 +1434,7 @@ def health_check(
         cluster_config_file, cluster_name, no_config_cache,
         with_details):
     """Do cluster health check."""
+    from cloudtik.core._private.cluster.cluster_operator import cluster_health_check
     try:
         cluster_health_check(
             cluster_config_file, cluster_name,
@@ -1475,6 +1543,8 @@ def cluster_dump(
     You can also manually specify a list of hosts using the
     ``--hosts <host1,host2,...>`` parameter.
     """
+    from cloudtik.core._private.cluster.cluster_operator import dump_cluster, cli_call_context
+    from cloudtik.core._private.cluster.cluster_config import _load_cluster_config
     config = _load_cluster_config(
         cluster_config_file, cluster_name,
         no_config_cache=no_config_cache)
@@ -1548,22 +1618,34 @@ cli.add_command(cluster_dump)
 _add_command_alias(cluster_dump, name="cluster_dump", hidden=True)
 
 # workspace commands
-cli.add_command(workspace)
+cli.add_lazy_command(
+    "workspace", "cloudtik.scripts.workspace:workspace",
+    "Commands for working with workspace.")
 
 # storage commands
-cli.add_command(storage)
+cli.add_lazy_command(
+    "storage", "cloudtik.scripts.storage:storage",
+    "Commands for working with storage.")
 
 # database commands
-cli.add_command(database)
+cli.add_lazy_command(
+    "database", "cloudtik.scripts.database:database",
+    "Commands for working with database.")
 
 # runtime commands
-cli.add_command(runtime)
+cli.add_lazy_command(
+    "runtime", "cloudtik.scripts.runtime_scripts:runtime",
+    "Commands for runtime service control.")
 
 # head commands
-cli.add_command(head)
+cli.add_lazy_command(
+    "head", "cloudtik.scripts.head_scripts:head",
+    "Commands running on head node only.")
 
 # node commands (not facing, running on node)
-cli.add_command(node)
+cli.add_lazy_command(
+    "node", "cloudtik.scripts.node_scripts:node",
+    "Commands running on node local only.")
 
 # dynamic command of runtime
 _register_runtime_commands()
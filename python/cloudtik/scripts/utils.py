@@ -1,4 +1,5 @@
 import copy
+import importlib
 from collections import OrderedDict
 
 import click
@@ -26,6 +27,72 @@ class NaturalOrderGroup(click.Group):
         return self.commands.keys()
 
 
+class LazyGroup(NaturalOrderGroup):
+    """A group with subcommands imported only when used.
+
+    A lazy subcommand is registered with the import path of the command
+    in the form of "module:attribute" and the short help to show in the
+    command list, so that listing the commands doesn't import the modules.
+    """
+
+    def __init__(self, name=None, commands=None, **attrs):
+        NaturalOrderGroup.__init__(self, name=name, commands=commands, **attrs)
+        # name -> (import path, short help, hidden)
+        self.lazy_commands = OrderedDict()
+
+    def add_lazy_command(self, name, import_path, short_help, hidden=False):
+        self.lazy_commands[name] = (import_path, short_help, hidden)
+
+    def list_commands(self, ctx):
+        return list(self.commands.keys()) + [
+            name for name in self.lazy_commands if name not in self.commands]
+
+    def get_command(self, ctx, cmd_name):
+        command = self.commands.get(cmd_name)
+        if command is None and cmd_name in self.lazy_commands:
+            command = self._load_lazy_command(cmd_name)
+        return command
+
+    def _load_lazy_command(self, cmd_name):
+        import_path, _, hidden = self.lazy_commands[cmd_name]
+        module_name, attr_name = import_path.split(":")
+        module = importlib.import_module(module_name)
+        command = getattr(module, attr_name, None)
+        if command is None:
+            return None
+        if hidden:
+            command = copy.deepcopy(command)
+            command.hidden = hidden
+        self.commands[cmd_name] = command
+        return command
+
+    def format_commands(self, ctx, formatter):
+        # The same as click.MultiCommand.format_commands except that the
+        # short help of the lazy commands not loaded is used
+        commands = []
+        for subcommand in self.list_commands(ctx):
+            command = self.commands.get(subcommand)
+            if command is not None:
+                if command.hidden:
+                    continue
+                commands.append((subcommand, command.get_short_help_str))
+            else:
+                _, short_help, hidden = self.lazy_commands[subcommand]
+                if hidden:
+                    continue
+                if callable(short_help):
+                    short_help = short_help()
+                commands.append(
+                    (subcommand, lambda limit, text=short_help: text))
+
+        if commands:
+            limit = formatter.width - 6 - max(len(cmd[0]) for cmd in commands)
+            rows = [(subcommand, get_short_help(limit))
+                    for subcommand, get_short_help in commands]
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+
 def fail_command(msg, e):
     cli_logger.error(msg + " {}", str(e))
     if cli_logger.verbosity == 0:
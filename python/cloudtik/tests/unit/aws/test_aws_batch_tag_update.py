@@ -50,7 +50,52 @@ def batch_test(num_threads, delay):
         return provider.batch_counter, provider.tag_update_counter
 
 
+def mixed_batch_test(num_threads):
+    """Run AWSNodeProvider.set_node_tags and set_nodes_tags concurrently.
+
+    Return the number of tags updated and whether any thread hung.
+    """
+    with mock.patch("cloudtik.providers._private.aws.utils.make_ec2_client"
+                    ), mock.patch.object(AWSNodeProvider, "_create_tags",
+                                         mock_create_tags):
+        provider = AWSNodeProvider(
+            provider_config={"region": "nowhere"}, cluster_name="default")
+        provider.batch_counter = 0
+        provider.tag_update_counter = 0
+        provider.tag_cache = {str(x): {} for x in range(num_threads * 2)}
+
+        threads = []
+        for x in range(num_threads):
+            if x % 2:
+                thread = threading.Thread(
+                    target=provider.set_node_tags, args=(str(x), {
+                        "foo": "bar"
+                    }))
+            else:
+                thread = threading.Thread(
+                    target=provider.set_nodes_tags, args=({
+                        str(x): {"foo": "bar"},
+                        str(x + num_threads): {"foo": "bar"},
+                    },))
+            threads.append(thread)
+
+        for thread in threads:
+            thread.start()
+            time.sleep(TAG_BATCH_DELAY / 10)
+        for thread in threads:
+            thread.join(timeout=TAG_BATCH_DELAY * 10)
+        hung = any(thread.is_alive() for thread in threads)
+        return provider.tag_update_counter, hung
+
+
 class TagBatchTest(unittest.TestCase):
+    def test_concurrent_batches(self):
+        num_threads = 20
+        tags_updated, hung = mixed_batch_test(num_threads)
+        self.assertFalse(hung)
+        self.assertEqual(tags_updated, num_threads + num_threads // 2)
+
+
     def test_concurrent(self):
         num_threads = 100
         batches_sent, tags_updated = batch_test(num_threads, delay=0)
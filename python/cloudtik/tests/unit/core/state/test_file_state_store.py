@@ -0,0 +1,77 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+from cloudtik.core._private.state import file_state_store
+from cloudtik.core._private.state.file_state_store import FileStateStore
+
+
+def _new_store(temp_dir):
+    return FileStateStore(
+        os.path.join(temp_dir, "state.lock"),
+        os.path.join(temp_dir, "state.json"))
+
+
+def _node(name, tags):
+    return {"name": name, "state": "running", "tags": tags}
+
+
+class TestFileStateStore:
+    def test_put_and_tags(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = _new_store(temp_dir)
+            for i in range(10):
+                kind = "head" if i == 0 else "worker"
+                store.put_node(
+                    "node-{}".format(i), _node("node-{}".format(i), {"kind": kind}))
+            store.set_nodes_tags(
+                {"node-1": {"status": "up-to-date"},
+                 "node-2": {"status": "up-to-date"}})
+            store.remove_node("node-9")
+
+            workers = store.get_nodes_by_tags(
+                {"kind": "worker", "status": "up-to-date"})
+            assert set(workers) == {"node-1", "node-2"}
+            assert set(store.get_nodes_by_tags({"kind": "worker"})) == {
+                "node-{}".format(i) for i in range(1, 9)}
+            with pytest.raises(RuntimeError):
+                store.set_node_tags("node-9", {"status": "up-to-date"}, False)
+
+            # The changes are journaled and seen by another store
+            other = _new_store(temp_dir)
+            assert other.get_nodes() == store.get_nodes()
+            assert other.get_node_tags("node-1") == {
+                "kind": "worker", "status": "up-to-date"}
+
+            # The changes of other are replayed incrementally
+            other.cleanup(["node-0", "node-1"])
+            assert set(store.get_nodes()) == {"node-0", "node-1"}
+            assert set(store.get_nodes_by_tags({"kind": "worker"})) == {"node-1"}
+
+    def test_nodes_not_shared(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = _new_store(temp_dir)
+            node = _node("node-1", {"kind": "worker"})
+            store.put_node("node-1", node)
+            node["tags"]["kind"] = "head"
+            store.get_node("node-1")["tags"]["kind"] = "head"
+            assert store.get_node_tags("node-1") == {"kind": "worker"}
+
+    def test_compaction(self, monkeypatch):
+        monkeypatch.setattr(
+            file_state_store, "STATE_JOURNAL_MIN_COMPACT_BYTES", 1024)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = _new_store(temp_dir)
+            for i in range(100):
+                store.set_node_tags("node-{}".format(i % 5), {"seq": str(i)})
+            assert os.path.getsize(store.journal_path) <= 2048
+
+            other = _new_store(temp_dir)
+            assert other.get_node_tags("node-4") == {"seq": "99"}
+            assert store.get_nodes() == other.get_nodes()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
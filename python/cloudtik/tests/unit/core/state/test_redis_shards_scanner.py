@@ -0,0 +1,97 @@
+import sys
+import threading
+import time
+
+import pytest
+
+import cloudtik.core._private.state.redis_shards_scanner as scanner
+from cloudtik.core._private.state.redis_shards_scanner import RedisShardsScanner
+
+TABLE_NAME = "table"
+NUM_SHARDS = 4
+NUM_BATCHES = 50
+
+
+class FakePipeline:
+    def __init__(self, shard):
+        self.shard = shard
+        self.commands = []
+
+    def mget(self, keys):
+        self.commands.append(lambda: self.shard.mget(keys))
+
+    def scan(self, cursor, match_pattern, count):
+        self.commands.append(
+            lambda: self.shard.scan(cursor, match_pattern, count))
+
+    def execute(self):
+        return [command() for command in self.commands]
+
+
+class FakeShard:
+    """A shard with a batch of one key for each cursor."""
+
+    def __init__(self, index):
+        self.index = index
+        self.scans = 0
+        self.lock = threading.Lock()
+
+    def scan(self, cursor, match_pattern, count):
+        with self.lock:
+            self.scans += 1
+        next_cursor = cursor + 1 if cursor + 1 < NUM_BATCHES else 0
+        key = "{}:{}-{}".format(TABLE_NAME, self.index, cursor).encode()
+        return next_cursor, [key]
+
+    def mget(self, keys):
+        return [b"value" for _ in keys]
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakeShardsClient:
+    def __init__(self):
+        self.shards = [FakeShard(i) for i in range(NUM_SHARDS)]
+
+    def get_shards_size(self):
+        return len(self.shards)
+
+    def get_shard_by_index(self, index):
+        return self.shards[index]
+
+    def get_shard(self, key):
+        return self.shards[int(key.decode().split(":")[1].split("-")[0])]
+
+    def scans(self):
+        return sum(shard.scans for shard in self.shards)
+
+
+class TestRedisShardsScanner:
+
+    def test_scan_all(self):
+        shards_client = FakeShardsClient()
+        key_values = RedisShardsScanner(
+            shards_client, TABLE_NAME).scan_keys_and_values("*")
+        assert len(key_values) == NUM_SHARDS * NUM_BATCHES
+        assert key_values["0-0"] == "value"
+
+    def test_bounded_and_stopped(self, monkeypatch):
+        monkeypatch.setattr(scanner, "SCAN_QUEUE_SIZE", 2)
+        shards_client = FakeShardsClient()
+        batches = RedisShardsScanner(
+            shards_client, TABLE_NAME).scan_key_value_batches("*")
+        next(batches)
+        time.sleep(0.5)
+        # The shards wait for the consumer when the queue is full
+        scans = shards_client.scans()
+        assert scans < NUM_SHARDS * NUM_BATCHES / 2
+
+        # The shards stop scanning when the consumer abandons the scan
+        batches.close()
+        time.sleep(0.5)
+        assert shards_client.scans() <= scans + NUM_SHARDS
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
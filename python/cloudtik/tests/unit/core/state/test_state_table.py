@@ -13,6 +13,7 @@ from cloudtik.core._private.services import start_cloudtik_process
 from cloudtik.core._private.util.redis_utils import wait_for_redis_to_start
 import cloudtik.core._private.constants as constants
 from cloudtik.core._private.state.control_state import ControlState
+from cloudtik.core._private.state.store_client import StoreWriteBatch
 
 processes = []
 TEST_KEYS = ['node-1', 'node-2', 'node-3', 'node-4', 'node-5']
@@ -80,6 +81,29 @@ class TestNodeTable:
         for key in TEST_KEYS:
             assert key in res.keys()
 
+    def test_iter_all(self):
+        res = dict(self.node_table.iter_all())
+        assert res == self.node_table.get_all()
+        for key in TEST_KEYS:
+            assert key in res.keys()
+
+    def test_write_batch(self):
+        metrics_table = self.control_state.get_node_metrics_table()
+        batch = StoreWriteBatch()
+        for key in TEST_KEYS:
+            self.node_table.batch_put(batch, key, json.dumps({"ip": key}))
+            metrics_table.batch_put(batch, key, json.dumps({"metrics": key}))
+        metrics_table.batch_delete(batch, TEST_KEYS[0])
+        self.control_state.write_batch(batch)
+
+        res = self.node_table.get_all()
+        for key in TEST_KEYS:
+            assert json.loads(res[key]) == {"ip": key}
+        res = metrics_table.get_all()
+        assert TEST_KEYS[0] not in res
+        for key in TEST_KEYS[1:]:
+            assert json.loads(res[key]) == {"metrics": key}
+
 
 if __name__ == "__main__":
     import sys
@@ -0,0 +1,117 @@
+import random
+import sys
+
+import pytest
+
+from cloudtik.core._private.cluster import bin_packing
+from cloudtik.core._private.cluster.resource_demand_shapes import expand_demand_shapes
+from cloudtik.core._private.cluster.resource_demand_scheduler import get_bin_pack_residual, \
+    get_nodes_for, _default_utilization_scorer
+from cloudtik.core._private.cluster.node_availability_tracker import NodeAvailabilitySummary
+
+SHAPES = [
+    {"CPU": 1},
+    {"CPU": 2, "memory": 4},
+    {"CPU": 4, "GPU": 1},
+    {"GPU": 1},
+    {"CPU": 1, "custom": 1},
+    {"memory": 10},
+    {"CPU": 0},
+    {},
+]
+
+FRACTIONAL_SHAPES = [
+    {"CPU": 0.1},
+    {"CPU": 0.5, "memory": 1.5},
+    {"CPU": 0.3, "GPU": 0.25},
+]
+
+NODE_TYPES = {
+    "head": {"resources": {"CPU": 4, "memory": 16}, "max_workers": 0},
+    "cpu.small": {"resources": {"CPU": 4, "memory": 16}, "max_workers": 10},
+    "cpu.large": {"resources": {"CPU": 16, "memory": 64}, "max_workers": 5},
+    "gpu": {"resources": {"CPU": 8, "GPU": 2, "memory": 32}, "max_workers": 3},
+    "custom": {"resources": {"CPU": 2, "custom": 4}, "max_workers": 2},
+}
+
+
+def _utilization_scorer(node_resources, resources, node_type):
+    return _default_utilization_scorer(
+        node_resources, resources, node_type,
+        node_availability_summary=NodeAvailabilitySummary({}))
+
+
+def _random_demands(rand, shapes, num_demands):
+    return [dict(rand.choice(shapes)) for _ in range(num_demands)]
+
+
+def _random_nodes(rand, num_nodes):
+    nodes = []
+    for _ in range(num_nodes):
+        node_type = rand.choice(list(NODE_TYPES))
+        resources = dict(NODE_TYPES[node_type]["resources"])
+        # Some nodes are partially used
+        for key in resources:
+            resources[key] = rand.choice([resources[key], resources[key] // 2, 0])
+        nodes.append(resources)
+    return nodes
+
+
+@pytest.mark.parametrize("shapes", [SHAPES, SHAPES + FRACTIONAL_SHAPES])
+@pytest.mark.parametrize("seed", range(10))
+def test_bin_pack_residual_same_as_python(shapes, seed):
+    rand = random.Random(seed)
+    nodes = _random_nodes(rand, rand.randint(0, 20))
+    demands = _random_demands(rand, shapes, rand.randint(0, 200))
+    expected = get_bin_pack_residual(nodes, demands)
+    assert bin_packing.get_bin_pack_residual(nodes, demands) == expected
+
+
+@pytest.mark.parametrize("shapes", [SHAPES, SHAPES + FRACTIONAL_SHAPES])
+@pytest.mark.parametrize("seed", range(10))
+def test_nodes_for_same_as_python(shapes, seed):
+    rand = random.Random(seed)
+    demands = _random_demands(rand, shapes, rand.randint(0, 300))
+    existing_nodes = {"head": 1, "cpu.small": rand.randint(0, 10)}
+    max_to_add = rand.randint(0, 30)
+    expected = get_nodes_for(
+        NODE_TYPES, existing_nodes, "head", max_to_add, demands,
+        utilization_scorer=_utilization_scorer)
+    assert bin_packing.get_nodes_for(
+        NODE_TYPES, existing_nodes, "head", max_to_add, demands) == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_shapes_same_as_bundles(seed):
+    rand = random.Random(seed)
+    shapes = [(dict(rand.choice(SHAPES)), rand.randint(1, 50))
+              for _ in range(rand.randint(0, 10))]
+    demands = expand_demand_shapes(shapes)
+    nodes = _random_nodes(rand, rand.randint(0, 20))
+    unfulfilled, updated_nodes = bin_packing.get_bin_pack_residual_for_shapes(
+        nodes, shapes)
+    expected = get_bin_pack_residual(nodes, demands)
+    assert (expand_demand_shapes(unfulfilled), updated_nodes) == expected
+
+    existing_nodes = {"head": 1}
+    nodes_to_add, residual = bin_packing.get_nodes_for_shapes(
+        NODE_TYPES, existing_nodes, "head", 10, shapes)
+    expected = get_nodes_for(
+        NODE_TYPES, existing_nodes, "head", 10, demands,
+        utilization_scorer=_utilization_scorer)
+    assert (nodes_to_add, expand_demand_shapes(residual)) == expected
+
+
+def test_negative_resources_not_supported():
+    assert bin_packing.get_bin_pack_residual([{"CPU": 1}], [{"CPU": -1}]) is None
+
+
+def test_nothing_packed_not_used(monkeypatch):
+    # The result is not used if the node type chosen takes no bundles
+    monkeypatch.setattr(bin_packing, "_pack_group", lambda *args: 0)
+    assert bin_packing.get_nodes_for_shapes(
+        NODE_TYPES, {}, "head", 10, [({"CPU": 1}, 4)]) is None
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
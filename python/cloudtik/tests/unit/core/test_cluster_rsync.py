@@ -0,0 +1,242 @@
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from shlex import quote
+
+import pytest
+
+from cloudtik.core._private.call_context import CallContext
+from cloudtik.core._private.cluster.cluster_operator import _rsync_nodes_in_tree
+from cloudtik.core._private.cluster.cluster_rsync import get_path_checksum, \
+    get_path_checksum_cmd, get_rsync_source_path, get_relay_path, get_relay_cmd, \
+    distribute_in_tree, ssh_agent, HEAD_SOURCE
+from cloudtik.core.command_executor import CommandExecutor
+
+# Run the remote command of ssh locally
+FAKE_SSH = """#!/bin/bash
+while [ $# -gt 0 ] && [[ "$1" != *@* ]]; do shift; done
+shift
+exec bash -c "$*"
+"""
+
+
+class FakeExecutor(CommandExecutor):
+    """A node with the home at a local directory."""
+
+    def __init__(self, home):
+        super().__init__(None)
+        self.home = home
+
+    def with_node_cmd(self, cmd, with_input=False):
+        return "HOME={} bash -c {}".format(quote(self.home), quote(cmd))
+
+    def get_ssh_host(self):
+        return "user", "127.0.0.1", 2222
+
+
+def _run_checksum_cmd(path):
+    return subprocess.check_output(
+        get_path_checksum_cmd(path), shell=True).decode().strip()
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    source = tmp_path / "source"
+    (source / "sub dir").mkdir(parents=True)
+    (source / "a.txt").write_text("a")
+    (source / "B.txt").write_text("b")
+    (source / "sub dir" / "c.txt").write_text("c" * 10000)
+    return source
+
+
+class TestClusterRsync:
+
+    def test_checksum_matches_cmd(self, source_dir):
+        checksum = get_path_checksum(str(source_dir))
+        assert checksum == _run_checksum_cmd(str(source_dir) + "/")
+
+        file_path = str(source_dir / "a.txt")
+        assert get_path_checksum(file_path) == _run_checksum_cmd(file_path)
+
+        assert get_path_checksum(str(source_dir / "none")) is None
+        assert _run_checksum_cmd(str(source_dir / "none")) == ""
+
+    def test_checksum_changes(self, source_dir):
+        checksum = get_path_checksum(str(source_dir))
+        (source_dir / "sub dir" / "c.txt").write_text("d")
+        assert get_path_checksum(str(source_dir)) != checksum
+        os.rename(source_dir / "a.txt", source_dir / "e.txt")
+        assert get_path_checksum(str(source_dir)) != checksum
+
+    def test_rsync_source_path(self, source_dir):
+        source = str(source_dir)
+        assert get_rsync_source_path(source + "/.") == source
+        assert get_rsync_source_path(source + "/") == source + "/"
+        # Synced as a subdirectory of the target
+        assert get_rsync_source_path(source) is None
+        assert get_rsync_source_path(
+            source + "/a.txt") == source + "/a.txt"
+
+    def test_relay_path(self, source_dir):
+        source = str(source_dir)
+        assert get_relay_path(source + "/.", "~/target/") == ("~/target", True)
+        assert get_relay_path(source, "/target") == ("/target/source", True)
+        file_path = source + "/a.txt"
+        assert get_relay_path(file_path, "/target/") == ("/target/a.txt", False)
+        assert get_relay_path(file_path, "/target/b.txt") == (
+            "/target/b.txt", False)
+        assert get_relay_path(source + "/none", "/target") is None
+
+    def test_relay_cmd(self, source_dir, tmp_path):
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        (bin_dir / "ssh").write_text(FAKE_SSH)
+        (bin_dir / "ssh").chmod(0o755)
+        env = dict(os.environ, PATH="{}:{}".format(bin_dir, os.environ["PATH"]))
+
+        source_home = tmp_path / "source home"
+        shutil.copytree(str(source_dir), str(source_home / "sub dir"))
+        target_home = tmp_path / "target home"
+        target_home.mkdir()
+        source_node = FakeExecutor(str(source_home))
+        target_node = FakeExecutor(str(target_home))
+
+        subprocess.check_call(get_relay_cmd(
+            source_node, target_node, "~/sub dir", True), shell=True, env=env)
+        assert get_path_checksum(
+            str(target_home / "sub dir")) == get_path_checksum(str(source_dir))
+
+        # Relay a file
+        (source_home / "b.txt").write_text("b")
+        subprocess.check_call(get_relay_cmd(
+            source_node, target_node, "~/b.txt", False), shell=True, env=env)
+        assert (target_home / "b.txt").read_text() == "b"
+        # The file is not there
+        assert subprocess.call(get_relay_cmd(
+            source_node, target_node, "~/none", False),
+            shell=True, env=env) != 0
+
+    def test_ssh_agent(self, tmp_path):
+        key_file = str(tmp_path / "key")
+        subprocess.check_call(
+            ["ssh-keygen", "-q", "-t", "ed25519", "-N", "", "-f", key_file])
+        with ssh_agent(key_file) as ssh_agent_socket:
+            assert os.path.exists(ssh_agent_socket)
+            output = subprocess.check_output(
+                ["ssh-add", "-l"],
+                env=dict(os.environ, SSH_AUTH_SOCK=ssh_agent_socket))
+            assert b"ED25519" in output
+        assert not os.path.exists(ssh_agent_socket)
+
+        with pytest.raises(RuntimeError):
+            with ssh_agent(None):
+                pass
+        with pytest.raises(subprocess.CalledProcessError):
+            with ssh_agent(str(tmp_path / "no-key")):
+                pass
+
+
+class TestDistributeInTree:
+
+    @staticmethod
+    def _distribute(nodes, synced_nodes, fan_out, max_workers, relay_fails=()):
+        lock = threading.Lock()
+        busy = {}
+        max_busy = {}
+        syncs = []
+
+        def sync(source, node_id):
+            with lock:
+                busy[source] = busy.get(source, 0) + 1
+                max_busy[source] = max(max_busy.get(source, 0), busy[source])
+            time.sleep(0.01)
+            with lock:
+                busy[source] -= 1
+                syncs.append((source, node_id))
+
+        def relay(source, node_id):
+            if node_id in relay_fails:
+                raise RuntimeError("relay failed")
+            sync(source, node_id)
+
+        succeeded, failures = distribute_in_tree(
+            nodes, synced_nodes, fan_out, max_workers,
+            sync_from_head=lambda node_id: sync(HEAD_SOURCE, node_id),
+            relay=relay)
+        return succeeded, failures, syncs, max_busy
+
+    def test_tree(self):
+        nodes = ["node-{}".format(i) for i in range(40)]
+        succeeded, failures, syncs, max_busy = self._distribute(
+            nodes, set(), fan_out=2, max_workers=16)
+        assert (succeeded, failures) == (40, 0)
+        assert sorted(node_id for _, node_id in syncs) == sorted(nodes)
+        # Each source syncs at most fan_out nodes at the same time
+        assert max(max_busy.values()) <= 2
+        # Most of the nodes are relayed from the synced nodes
+        from_head = [node_id for source, node_id in syncs
+                     if source == HEAD_SOURCE]
+        assert len(from_head) < len(nodes) / 4
+        # A node relays only after being synced
+        synced = set()
+        for source, node_id in syncs:
+            assert source == HEAD_SOURCE or source in synced
+            synced.add(node_id)
+
+    def test_synced_sources_and_fallback(self):
+        nodes = ["node-{}".format(i) for i in range(10)]
+        succeeded, failures, syncs, _ = self._distribute(
+            nodes, {"synced"}, fan_out=1, max_workers=4,
+            relay_fails={"node-1", "node-2"})
+        assert (succeeded, failures) == (10, 0)
+        sources = dict((node_id, source) for source, node_id in syncs)
+        assert "synced" in sources.values()
+        # Failed to relay and synced from head
+        assert sources["node-1"] == HEAD_SOURCE
+        assert sources["node-2"] == HEAD_SOURCE
+
+    def test_invalid_fan_out(self):
+        with pytest.raises(ValueError):
+            self._distribute(["node-1", "node-2"], set(), fan_out=-1, max_workers=4)
+        with pytest.raises(ValueError):
+            self._distribute(["node-1", "node-2"], set(), fan_out=2, max_workers=0)
+
+
+class TestRsyncNodesInTree:
+
+    @staticmethod
+    def _rsync_nodes_in_tree(executor, config):
+        synced = []
+
+        class Updater:
+            cmd_executor = executor
+
+        relayed = _rsync_nodes_in_tree(
+            config, CallContext(), ["node-1", "node-2"],
+            get_updater=lambda node_id, call_context: Updater(),
+            rsync_to_node=lambda node_id, call_context: synced.append(node_id),
+            relay_path=("/tmp/a", False),
+            source_checksum=None,
+            max_parallel=4,
+            fan_out=1)
+        return relayed, synced
+
+    def test_no_ssh_host(self):
+        # The executors which cannot be reached by ssh
+        relayed, synced = self._rsync_nodes_in_tree(
+            CommandExecutor(None), {"auth": {}})
+        assert not relayed
+        assert synced == []
+
+    def test_no_ssh_private_key(self, tmp_path):
+        relayed, synced = self._rsync_nodes_in_tree(
+            FakeExecutor(str(tmp_path)), {"auth": {}})
+        assert not relayed
+        assert synced == []
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
@@ -0,0 +1,89 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from cloudtik.core._private.node.command_bundle import render_command_bundle, \
+    get_command_bundle_path, get_command_bundle_run_cmd
+
+
+def _run_command_bundle(tmp_path, commands, number_of_retries=1):
+    script = render_command_bundle(
+        "test", commands, commands,
+        number_of_retries=number_of_retries, retry_interval=0,
+        use_login_shells=False)
+    script_file = tmp_path / "commands.sh"
+    script_file.write_text(script)
+    result = subprocess.run(
+        ["bash", str(script_file)], cwd=str(tmp_path),
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    return result.returncode, result.stdout.decode()
+
+
+class TestCommandBundle:
+
+    def test_run_steps(self, tmp_path):
+        exit_code, output = _run_command_bundle(
+            tmp_path, ["echo 'a b'", "X=1", "echo ${X:-none}"])
+        assert exit_code == 0
+        assert output.splitlines() == [
+            "[cloudtik-step 1/3] start: echo 'a b'",
+            "a b",
+            "[cloudtik-step 1/3] done",
+            "[cloudtik-step 2/3] start: X=1",
+            "[cloudtik-step 2/3] done",
+            "[cloudtik-step 3/3] start: echo ${X:-none}",
+            "none",
+            "[cloudtik-step 3/3] done",
+        ]
+
+    def test_retry_and_fail(self, tmp_path):
+        # Fails for the first time
+        flaky = "[ -f tried ] || (touch tried; exit 2)"
+        exit_code, output = _run_command_bundle(
+            tmp_path, [flaky, "exit 3", "echo never"], number_of_retries=2)
+        assert exit_code == 3
+        assert "[cloudtik-step 1/3] failed with exit code 2. Retrying" in output
+        assert "[cloudtik-step 1/3] done" in output
+        assert "[cloudtik-step 2/3] failed with exit code 3\n" in output
+        assert "never" not in output
+
+    def test_bundle_path(self):
+        script = render_command_bundle(
+            "test", ["echo a"], ["echo a"], 1, 0, True)
+        assert "bash --login -c -i" in script
+        assert get_command_bundle_path(script) == get_command_bundle_path(script)
+        assert get_command_bundle_path(script) != get_command_bundle_path(
+            script + "\n")
+        assert get_command_bundle_path(script).startswith("~/")
+
+    def test_environment_variables_override_bashrc(self, tmp_path):
+        (tmp_path / ".bashrc").write_text("export X=bashrc\n")
+        script_file = tmp_path / "commands.sh"
+        script_file.write_text(render_command_bundle(
+            "test", ["echo X=$X", "echo Y=$Y"], ["echo X", "echo Y"], 1, 0,
+            True, environment_variables={"X": "env", "Y": "y"}))
+        result = subprocess.run(
+            ["bash", str(script_file)], cwd=str(tmp_path),
+            env={"HOME": str(tmp_path), "PATH": os.environ["PATH"]},
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        assert result.returncode == 0
+        output = result.stdout.decode().splitlines()
+        assert "X=env" in output
+        assert "Y=y" in output
+
+    def test_run_and_remove(self, tmp_path):
+        script_file = tmp_path / "commands.sh"
+        script_file.write_text(render_command_bundle(
+            "test", ["exit 3"], ["exit 3"], 1, 0, False))
+        result = subprocess.run(
+            ["bash", "-c", get_command_bundle_run_cmd(str(script_file))],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        # The exit code of the script is kept after it is removed
+        assert result.returncode == 3
+        assert not script_file.exists()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
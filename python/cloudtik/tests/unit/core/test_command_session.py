@@ -0,0 +1,50 @@
+import io
+import sys
+
+import pytest
+
+from cloudtik.core._private.command_executor.command_session import CommandSession, \
+    CommandSessionError
+
+
+@pytest.fixture
+def command_session():
+    command_session = CommandSession(["bash", "-s"])
+    command_session.start()
+    yield command_session
+    command_session.close()
+
+
+class TestCommandSession:
+
+    def test_run_commands(self, command_session):
+        assert command_session.run(
+            "echo hello", with_output=True) == (0, b"hello\n")
+        assert command_session.run(
+            "printf abc", with_output=True) == (0, b"abc")
+        assert command_session.run(
+            "echo error >&2; exit 3", with_output=True) == (3, b"error\n")
+        # The commands run in subshells and don't read the session input
+        assert command_session.run(
+            "cd /; X=1; cat", with_output=True) == (0, b"")
+        assert command_session.run(
+            "echo ${X:-none}", with_output=True) == (0, b"none\n")
+
+    def test_output_file(self, command_session):
+        output_file = io.StringIO()
+        exit_code, output = command_session.run(
+            "echo a; echo b", output_file=output_file)
+        assert exit_code == 0
+        assert output is None
+        assert output_file.getvalue() == "a\nb\n"
+
+    def test_session_exited(self, command_session):
+        with pytest.raises(CommandSessionError):
+            command_session.run("kill -9 $$")
+        assert not command_session.is_alive()
+        with pytest.raises(CommandSessionError):
+            command_session.run("echo hello")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
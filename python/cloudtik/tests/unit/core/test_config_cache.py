@@ -0,0 +1,96 @@
+import copy
+import sys
+
+import pytest
+
+from cloudtik.core._private.cluster import cluster_config
+from cloudtik.core._private.cluster.cluster_config import _prepare_config
+from cloudtik.core._private.constants import CLOUDTIK_USER_TEMPLATES
+from cloudtik.core._private.util.config_dependencies import \
+    track_config_dependencies
+from cloudtik.core._private.util.file_hash_cache import FileHashCache
+from cloudtik.core._private.utils import _get_runtime_config_object
+from cloudtik.tests.unit.core.test_provider import EXTERNAL_PROVIDER_CONFIG
+
+TEST_TEMPLATE = """
+available_node_types:
+    worker.default:
+        node_config:
+            disk_size: {}
+"""
+
+
+@pytest.fixture
+def prepare_calls(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        cluster_config, "get_cloudtik_temp_dir", lambda: str(tmp_path / "temp"))
+    # Don't read or write the manifest of the process wide file hash cache
+    file_hash_cache = FileHashCache(str(tmp_path / "file-hashes.json"))
+    monkeypatch.setattr(
+        cluster_config, "get_file_hash_cache", lambda: file_hash_cache)
+    calls = []
+    prepare_config = cluster_config.prepare_config
+
+    def _prepare_config_counted(config):
+        calls.append(config)
+        return prepare_config(config)
+
+    monkeypatch.setattr(
+        cluster_config, "prepare_config", _prepare_config_counted)
+    return calls
+
+
+def _write_template(template_dir, disk_size):
+    with open(template_dir / "test-base.yaml", "w") as f:
+        f.write(TEST_TEMPLATE.format(disk_size))
+
+
+class TestConfigCache:
+
+    def test_prepared_config_cached(self, tmp_path, monkeypatch, prepare_calls):
+        template_dir = tmp_path / "templates"
+        template_dir.mkdir()
+        monkeypatch.setenv(CLOUDTIK_USER_TEMPLATES, str(template_dir))
+        _write_template(template_dir, 100)
+
+        config = copy.deepcopy(EXTERNAL_PROVIDER_CONFIG)
+        config["from"] = "test-base"
+        prepared_config = _prepare_config(copy.deepcopy(config))
+        worker_node_config = prepared_config["available_node_types"][
+            "worker.default"]["node_config"]
+        assert worker_node_config["disk_size"] == 100
+        assert len(prepare_calls) == 1
+
+        assert _prepare_config(copy.deepcopy(config)) == prepared_config
+        assert len(prepare_calls) == 1
+
+        # The template the config was prepared from changed
+        _write_template(template_dir, 200)
+        prepared_config = _prepare_config(copy.deepcopy(config))
+        worker_node_config = prepared_config["available_node_types"][
+            "worker.default"]["node_config"]
+        assert worker_node_config["disk_size"] == 200
+        assert len(prepare_calls) == 2
+
+        _prepare_config(copy.deepcopy(config), no_config_cache=True)
+        assert len(prepare_calls) == 3
+
+    def test_runtime_config_object_dependencies(self, tmp_path):
+        config_home = tmp_path / "runtime"
+        config_home.mkdir()
+        with open(config_home / "defaults.yaml", "w") as f:
+            f.write("key: value\n")
+
+        with track_config_dependencies() as dependencies:
+            config_object = _get_runtime_config_object(
+                str(config_home), {"type": "local"}, "defaults")
+        assert config_object == {"key": "value"}
+        # The provider specific file is probed first
+        assert dependencies == {
+            str(config_home / "local" / "defaults.yaml"),
+            str(config_home / "defaults.yaml"),
+        }
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
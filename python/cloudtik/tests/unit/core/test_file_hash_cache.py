@@ -0,0 +1,63 @@
+import hashlib
+import os
+import sys
+import time
+
+import pytest
+
+from cloudtik.core._private.util.file_hash_cache import FileHashCache
+
+
+def _write_file(path, content, age=60):
+    with open(path, "wb") as f:
+        f.write(content)
+    # Out of the window of the files which may change without a new mtime
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+def _sha1(content):
+    return hashlib.sha1(content).hexdigest()
+
+
+class TestFileHashCache:
+
+    def test_file_hashes_cached(self, tmp_path):
+        manifest_path = str(tmp_path / "manifest.json")
+        paths = []
+        for i in range(10):
+            path = str(tmp_path / "file-{}".format(i))
+            _write_file(path, "content-{}".format(i).encode())
+            paths.append(path)
+
+        file_hash_cache = FileHashCache(manifest_path)
+        hashes = file_hash_cache.get_file_hashes(paths)
+        assert hashes == [
+            _sha1("content-{}".format(i).encode()) for i in range(10)]
+        assert file_hash_cache.get_stats()["hashed_files"] == 10
+        file_hash_cache.save()
+
+        # A new cache loads the hashes from the manifest
+        file_hash_cache = FileHashCache(manifest_path)
+        _write_file(paths[3], b"changed")
+        assert file_hash_cache.get_file_hashes(paths)[3] == _sha1(b"changed")
+        stats = file_hash_cache.get_stats()
+        assert stats["hashed_files"] == 1
+        assert stats["cached_files"] == 9
+
+        file_hash_cache.clear()
+        file_hash_cache.reset_stats()
+        assert file_hash_cache.get_file_hashes(paths)[0] == _sha1(b"content-0")
+        assert file_hash_cache.get_stats()["hashed_files"] == 10
+
+    def test_recently_modified_not_cached(self, tmp_path):
+        path = str(tmp_path / "file")
+        _write_file(path, b"content", age=0)
+        file_hash_cache = FileHashCache(str(tmp_path / "manifest.json"))
+        file_hash_cache.get_file_hash(path)
+        file_hash_cache.get_file_hash(path)
+        assert file_hash_cache.get_stats()["hashed_files"] == 2
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
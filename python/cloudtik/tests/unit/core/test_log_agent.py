@@ -0,0 +1,155 @@
+import io
+import os
+
+import pytest
+
+from cloudtik.core._private.cluster.cluster_logging import decode_logs_message
+from cloudtik.core._private.service import cloudtik_log_agent
+from cloudtik.core._private.service.cloudtik_log_agent import read_log_lines, LogMonitor, LogBatchPublisher
+from cloudtik.core._private.util.inotify_utils import is_inotify_available
+
+
+class MockRedisClient:
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, channel, data):
+        self.messages.append(data)
+
+    def pipeline(self, transaction=True):
+        return MockPipeline(self)
+
+
+class MockPipeline:
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.commands = []
+
+    def publish(self, channel, data):
+        self.commands.append((channel, data))
+
+    def execute(self):
+        for channel, data in self.commands:
+            self.redis_client.publish(channel, data)
+        self.commands = []
+
+
+def _check_and_publish(log_monitor):
+    log_monitor.update_log_filenames()
+    log_monitor.open_closed_files()
+    anything_published = log_monitor.check_log_files_and_publish_updates()
+    log_monitor.publisher.flush()
+    return anything_published
+
+
+class TestLogAgent:
+    def test_read_log_lines(self):
+        f = io.BytesIO(b"line-1\r\nline-2\nline-3\nincomplete")
+        assert read_log_lines(f, 1024, 2) == (["line-1", "line-2"], False)
+        assert read_log_lines(f, 1024, 2) == (["line-3"], False)
+        # The incomplete line is left for the next read
+        assert read_log_lines(f, 1024, 2) == ([], True)
+        assert f.tell() == len(b"line-1\r\nline-2\nline-3\n")
+
+        # A line longer than the chunk
+        f = io.BytesIO(b"x" * 10 + b"\n")
+        assert read_log_lines(f, 4, 10) == (["xxxx"], False)
+
+        # The incomplete line is taken as the last line
+        f = io.BytesIO(b"line-1\nincomplete")
+        assert read_log_lines(f, 1024, 2, flush_partial=True) == (
+            ["line-1", "incomplete"], True)
+        f = io.BytesIO(b"line-1\nline-2\nincomplete")
+        assert read_log_lines(f, 1024, 2, flush_partial=True) == (
+            ["line-1", "line-2"], False)
+
+    def test_final_line_without_newline(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            cloudtik_log_agent, "LOG_MONITOR_PARTIAL_LINE_IDLE_S", 0)
+        log_file = os.path.join(str(tmp_path), "cloudtik_cluster_controller.log")
+        with open(log_file, "wb") as f:
+            f.write(b"line-1\npartial")
+        log_monitor = LogMonitor(
+            None, "127.0.0.1", None, str(tmp_path), "127.0.0.1:6379",
+            use_inotify=False)
+        redis_client = MockRedisClient()
+        log_monitor.publisher = LogBatchPublisher(redis_client)
+
+        def published_lines():
+            lines = []
+            for message in redis_client.messages:
+                for data in decode_logs_message(message):
+                    lines += data["lines"]
+            return lines
+
+        assert _check_and_publish(log_monitor)
+        assert published_lines() == ["line-1"]
+        # The line is completed before the file is idle
+        with open(log_file, "ab") as f:
+            f.write(b" line\nfinal")
+        assert _check_and_publish(log_monitor)
+        assert published_lines() == ["line-1", "partial line"]
+        # The file is idle with the incomplete line
+        assert not _check_and_publish(log_monitor)
+        assert _check_and_publish(log_monitor)
+        assert published_lines() == ["line-1", "partial line", "final"]
+        assert not _check_and_publish(log_monitor)
+
+        # The rest of the old file is read when rotated
+        with open(log_file, "ab") as f:
+            f.write(b"\nbefore rotated")
+        assert _check_and_publish(log_monitor)
+        os.rename(log_file, log_file + ".1")
+        with open(log_file, "wb") as f:
+            f.write(b"")
+        _check_and_publish(log_monitor)
+        assert published_lines()[-1] == "before rotated"
+
+    @pytest.mark.skipif(not is_inotify_available(), reason="Inotify is not available.")
+    def test_inotify_tailing(self, tmp_path):
+        log_file = os.path.join(str(tmp_path), "cloudtik_cluster_controller.log")
+        with open(log_file, "wb") as f:
+            f.write(b"before watching\n")
+        log_monitor = LogMonitor(
+            None, "127.0.0.1", None, str(tmp_path), "127.0.0.1:6379",
+            use_inotify=True)
+        redis_client = MockRedisClient()
+        log_monitor.publisher = LogBatchPublisher(redis_client)
+        assert log_monitor.watcher is not None
+
+        assert _check_and_publish(log_monitor)
+        assert len(redis_client.messages) == 1
+        # No writes, nothing to read
+        assert not _check_and_publish(log_monitor)
+
+        with open(log_file, "ab") as f:
+            f.write(b"after watching\n")
+        log_monitor.wait_for_updates(False)
+        assert _check_and_publish(log_monitor)
+        batch = decode_logs_message(redis_client.messages[-1])
+        assert batch[0]["lines"] == ["after watching"]
+
+    def test_batch_publisher(self):
+        redis_client = MockRedisClient()
+        publisher = LogBatchPublisher(
+            redis_client, batch_bytes=1000, batch_seconds=60,
+            max_pending_bytes=4000)
+        for i in range(50):
+            publisher.add({"pid": i, "lines": ["x" * 99]})
+        # Lines beyond the max pending bytes are dropped
+        assert publisher.dropped_lines == 10
+        assert publisher.is_backpressured()
+
+        publisher.flush()
+        assert not publisher.is_backpressured()
+        assert len(redis_client.messages) == 4
+        batch = []
+        for message in redis_client.messages:
+            batch += decode_logs_message(message)
+        assert [data["pid"] for data in batch] == list(range(40))
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(pytest.main(["-v", __file__]))
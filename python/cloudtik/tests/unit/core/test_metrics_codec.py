@@ -0,0 +1,146 @@
+import json
+
+import pytest
+
+from cloudtik.core._private.metrics.metrics_codec import NodeMetricsEncoder, NodeMetricsDecoder
+from cloudtik.core._private.state.state_utils import NODE_STATE_NODE_ID, NODE_STATE_NODE_IP, \
+    NODE_STATE_NODE_KIND, NODE_STATE_TIME
+
+
+class MockStateTable:
+    def __init__(self):
+        self.rows = {}
+
+    def iter_all(self):
+        return iter(self.rows.items())
+
+    def delete(self, key):
+        del self.rows[key]
+
+
+def _make_node_metrics(node_id, state_time, cpu):
+    return {
+        NODE_STATE_NODE_ID: node_id,
+        NODE_STATE_NODE_IP: "10.0.0.1",
+        NODE_STATE_NODE_KIND: "worker",
+        NODE_STATE_TIME: state_time,
+        "metrics": {
+            "now": state_time,
+            "cpu": cpu,
+            "cpus": (4, 2),
+            "mem": (100, 60, 0.4, 40),
+            "gpu": [],
+            "custom": {"a": 1},
+        }
+    }
+
+
+def _as_json(node_metrics):
+    return json.loads(json.dumps(node_metrics))
+
+
+class TestMetricsCodec:
+    def test_encode_decode(self):
+        encoder = NodeMetricsEncoder(keyframe_interval=3)
+        base_table = MockStateTable()
+        decoder = NodeMetricsDecoder()
+        for i in range(10):
+            node_metrics = _make_node_metrics("node-1", 1000.0 + i, float(i))
+            frame, keyframe = encoder.encode(node_metrics)
+            if keyframe is not None:
+                base_table.rows["node-1"] = keyframe
+            else:
+                assert len(frame) < len(json.dumps(node_metrics))
+
+            decoded = list(decoder.decode_all([("node-1", frame)], base_table))
+            assert decoded == [_as_json(node_metrics)]
+
+            # A decoder without the keyframe cached reads the base table
+            decoded = list(NodeMetricsDecoder().decode_all(
+                [("node-1", frame)], base_table))
+            assert decoded == [_as_json(node_metrics)]
+
+    def test_decode_json(self):
+        node_metrics = _make_node_metrics("node-1", 1000.0, 1.0)
+        decoded = list(NodeMetricsDecoder().decode_all(
+            [("node-1", json.dumps(node_metrics))]))
+        assert decoded == [_as_json(node_metrics)]
+
+    def test_missing_keyframe(self):
+        encoder = NodeMetricsEncoder()
+        encoder.encode(_make_node_metrics("node-1", 1000.0, 1.0))
+        frame, _ = encoder.encode(_make_node_metrics("node-1", 1005.0, 2.0))
+        decoded = list(NodeMetricsDecoder().decode_all(
+            [("node-1", frame)], MockStateTable()))
+        assert decoded == []
+
+    def test_agent_restart(self):
+        encoder = NodeMetricsEncoder(epoch=1)
+        base_table = MockStateTable()
+        decoder = NodeMetricsDecoder()
+        frame, keyframe = encoder.encode(_make_node_metrics("node-1", 1000.0, 1.0))
+        base_table.rows["node-1"] = keyframe
+        list(decoder.decode_all([("node-1", frame)], base_table))
+
+        # The seq numbers of the restarted agent start from the beginning
+        encoder = NodeMetricsEncoder(epoch=2)
+        node_metrics = _make_node_metrics("node-1", 2000.0, 5.0)
+        node_metrics["metrics"]["cpus"] = (8, 4)
+        _, keyframe = encoder.encode(node_metrics)
+        base_table.rows["node-1"] = keyframe
+        node_metrics = _make_node_metrics("node-1", 2005.0, 6.0)
+        node_metrics["metrics"]["cpus"] = (8, 4)
+        frame, _ = encoder.encode(node_metrics)
+        # The keyframe cached before the restart is not used for the delta
+        decoded = list(decoder.decode_all([("node-1", frame)], base_table))
+        assert decoded == [_as_json(node_metrics)]
+
+    def test_skip_bad_rows(self):
+        base_table = MockStateTable()
+        rows = []
+        expected = []
+        for node_id in ["node-1", "node-2"]:
+            encoder = NodeMetricsEncoder()
+            _, keyframe = encoder.encode(
+                _make_node_metrics(node_id, 1000.0, 1.0))
+            base_table.rows[node_id] = keyframe
+            # The deltas are decoded with the keyframes of the base table
+            node_metrics = _make_node_metrics(node_id, 1005.0, 2.0)
+            frame, _ = encoder.encode(node_metrics)
+            rows.append((node_id, frame))
+            expected.append(_as_json(node_metrics))
+
+        # A corrupt row and a row of an unsupported version
+        frame, _ = NodeMetricsEncoder().encode(
+            _make_node_metrics("node-3", 1000.0, 1.0))
+        unsupported = json.loads(frame)
+        unsupported[0] = 99
+        rows.insert(1, ("node-3", json.dumps(unsupported)))
+        rows.insert(0, ("node-4", "[1, 2, "))
+        base_table.rows["node-4"] = "[1, 2, "
+
+        decoded = list(NodeMetricsDecoder().decode_all(rows, base_table))
+        assert decoded == expected
+
+    def test_delete_gone_bases(self):
+        base_table = MockStateTable()
+        decoder = NodeMetricsDecoder()
+        rows = []
+        for node_id, state_time in [
+                ("node-1", 1000.0), ("node-2", 1000.0), ("node-3", 2000.0)]:
+            frame, keyframe = NodeMetricsEncoder().encode(
+                _make_node_metrics(node_id, state_time, 1.0))
+            base_table.rows[node_id] = keyframe
+            rows.append((node_id, frame))
+        list(decoder.decode_all(rows, base_table))
+
+        # node-1 is live and the keyframe of node-3 is not expired
+        assert decoder.delete_gone_bases(
+            base_table, {"node-1"}, expiry_time=1500.0) == 1
+        assert sorted(base_table.rows) == ["node-1", "node-3"]
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(pytest.main(["-v", __file__]))
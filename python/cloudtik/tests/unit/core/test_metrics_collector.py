@@ -0,0 +1,36 @@
+import pytest
+
+from cloudtik.core._private.metrics.metrics_collector import StatsHistory
+
+
+class TestStatsHistory:
+    def test_bounded_capacity(self):
+        history = StatsHistory(2, 5)
+        for i in range(100):
+            history.append(i * 5.0, (i * 10.0, i * 20.0))
+        assert len(history) == 5
+        assert history.get_rate(7) == (2.0, 4.0)
+
+    def test_window_rates(self):
+        history = StatsHistory(1, 200)
+        # The counter speed is 1 for the first 10 minutes and 3 after
+        value = 0.0
+        for i in range(181):
+            history.append(i * 5.0, (value,))
+            value += 5.0 if i < 120 else 15.0
+        rate_1m, rate_5m, rate_15m = history.get_window_rates()
+        assert rate_1m == (3.0,)
+        assert rate_5m == (3.0,)
+        assert rate_15m[0] == pytest.approx((600 + 900) / 900)
+
+    def test_not_enough_samples(self):
+        history = StatsHistory(4, 10)
+        assert history.get_rate(7) == (0.0, 0.0, 0.0, 0.0)
+        history.append(1.0, (1, 2, 3, 4))
+        assert history.get_window_rate(60) == (0.0, 0.0, 0.0, 0.0)
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(pytest.main(["-v", __file__]))
@@ -0,0 +1,98 @@
+import sys
+import threading
+
+import pytest
+
+from cloudtik.core._private.node.node_status_reporter import NodeStatusReporter, \
+    get_node_status_reporter
+from cloudtik.core.node_provider import NodeProvider
+
+
+class RecordingProvider(NodeProvider):
+    def __init__(self):
+        super().__init__({}, "test")
+        self.lock = threading.Lock()
+        self.tags = {}
+        self.writes = []
+
+    def set_node_tags(self, node_id, tags):
+        with self.lock:
+            self.writes.append((node_id, dict(tags)))
+            self.tags.setdefault(node_id, {}).update(tags)
+
+
+class TestNodeStatusReporter:
+
+    def test_coalesce_tags(self):
+        provider = RecordingProvider()
+        # A long interval so that only the explicit flushes write
+        reporter = NodeStatusReporter(provider, interval=3600)
+        reporter.set_node_tags("a", {"status": "waiting-for-ssh"})
+        reporter.set_node_tags("b", {"status": "waiting-for-ssh"})
+        reporter.set_node_tags("a", {"status": "syncing-files"})
+        reporter.set_node_tags("a", {"status": "setting-up"})
+        assert provider.writes == []
+
+        reporter.flush()
+        assert sorted(provider.writes) == [
+            ("a", {"status": "setting-up"}),
+            ("b", {"status": "waiting-for-ssh"}),
+        ]
+        reporter.flush()
+        assert len(provider.writes) == 2
+
+    def test_flush_terminal_tags(self):
+        provider = RecordingProvider()
+        reporter = NodeStatusReporter(provider, interval=3600)
+        reporter.set_node_tags("a", {"status": "setting-up", "other": "1"})
+        reporter.set_node_tags("b", {"status": "setting-up"})
+        reporter.set_node_tags("a", {"status": "up-to-date"}, flush=True)
+        # The pending tags of the node are written together
+        assert provider.writes == [
+            ("a", {"status": "up-to-date", "other": "1"})]
+
+        reporter.flush()
+        assert provider.writes[1:] == [("b", {"status": "setting-up"})]
+        assert provider.tags["a"]["status"] == "up-to-date"
+
+    def test_drop_gone_node(self):
+        class GoneNodeProvider(RecordingProvider):
+            def set_node_tags(self, node_id, tags):
+                if node_id == "gone":
+                    raise RuntimeError("Node {} doesn't exist.".format(node_id))
+                super().set_node_tags(node_id, tags)
+
+            def set_nodes_tags(self, nodes_tags):
+                # The batch fails as a whole
+                if "gone" in nodes_tags:
+                    raise RuntimeError("Node gone doesn't exist.")
+                for node_id, tags in nodes_tags.items():
+                    super().set_node_tags(node_id, tags)
+
+        provider = GoneNodeProvider()
+        reporter = NodeStatusReporter(provider, interval=3600)
+        reporter.set_node_tags("a", {"status": "setting-up"})
+        reporter.set_node_tags("gone", {"status": "setting-up"})
+        reporter.flush()
+        # The other nodes of the failed batch are written one by one
+        assert provider.writes == [("a", {"status": "setting-up"})]
+        assert "gone" in reporter.pending
+
+        reporter.set_node_tags("a", {"status": "up-to-date"})
+        for _ in range(5):
+            reporter.flush()
+        assert provider.writes[1:] == [("a", {"status": "up-to-date"})]
+        # The gone node is dropped after the failed writes in a row
+        assert not reporter.pending
+        assert not reporter.failures
+
+    def test_shared_reporter(self):
+        provider = RecordingProvider()
+        assert get_node_status_reporter(provider) is get_node_status_reporter(
+            provider)
+        assert get_node_status_reporter(
+            provider) is not get_node_status_reporter(RecordingProvider())
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
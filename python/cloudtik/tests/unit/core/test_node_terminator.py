@@ -0,0 +1,94 @@
+import sys
+import threading
+
+import pytest
+
+from cloudtik.core._private.call_context import CallContext
+from cloudtik.core._private.cluster.node_terminator import NodeTerminator
+from cloudtik.core.node_provider import NodeProvider
+
+
+class MockTerminateNodeProvider(NodeProvider):
+    def __init__(self, nodes, max_terminate_nodes=None, ignored_nodes=None):
+        NodeProvider.__init__(self, {}, "test")
+        self.nodes = set(nodes)
+        self._max_terminate_nodes = max_terminate_nodes
+        # The nodes for which the first termination request is lost
+        self.ignored_nodes = set(ignored_nodes or [])
+        self.lock = threading.Lock()
+        self.requests = []
+        self.list_calls = 0
+
+    @property
+    def max_terminate_nodes(self):
+        return self._max_terminate_nodes
+
+    def terminate_nodes(self, node_ids):
+        with self.lock:
+            self.requests.append(list(node_ids))
+            for node_id in node_ids:
+                if node_id in self.ignored_nodes:
+                    self.ignored_nodes.remove(node_id)
+                else:
+                    self.nodes.discard(node_id)
+
+    def non_terminated_nodes(self, tag_filters):
+        with self.lock:
+            self.list_calls += 1
+            return sorted(self.nodes)
+
+
+def _get_node_terminator(provider, max_workers=4):
+    return NodeTerminator(
+        provider, CallContext(), max_workers=max_workers,
+        poll_interval=0.001, max_poll_interval=0.004,
+        retry_interval=0.005, max_retry_interval=0.01)
+
+
+class TestNodeTerminator:
+
+    def test_terminate_in_chunks(self):
+        nodes = ["node-{}".format(i) for i in range(35)]
+        provider = MockTerminateNodeProvider(nodes, max_terminate_nodes=10)
+        _get_node_terminator(provider).terminate(
+            nodes, lambda: provider.non_terminated_nodes({}))
+        assert not provider.nodes
+        assert sorted(len(request) for request in provider.requests) == [5, 10, 10, 10]
+        assert provider.list_calls == 1
+
+    def test_terminate_in_chunks_without_limit(self):
+        nodes = ["node-{}".format(i) for i in range(10)]
+        provider = MockTerminateNodeProvider(nodes)
+        _get_node_terminator(provider, max_workers=4).terminate(
+            nodes, lambda: provider.non_terminated_nodes({}))
+        assert not provider.nodes
+        # The nodes are split evenly to the workers
+        assert sorted(len(request) for request in provider.requests) == [1, 3, 3, 3]
+
+    def test_terminate_retry_and_new_nodes(self):
+        nodes = ["node-{}".format(i) for i in range(5)]
+        provider = MockTerminateNodeProvider(
+            nodes + ["node-new"], ignored_nodes=["node-1"])
+        _get_node_terminator(provider, max_workers=1).terminate(
+            nodes, lambda: provider.non_terminated_nodes({}),
+            include_new_nodes=True)
+        assert not provider.nodes
+        assert provider.requests[0] == nodes
+        # Only the nodes not terminated and the new nodes are requested later
+        requested_later = [
+            node_id for request in provider.requests[1:] for node_id in request]
+        assert sorted(requested_later) == ["node-1", "node-new"]
+
+    def test_terminate_failed(self):
+        class FailedNodeProvider(MockTerminateNodeProvider):
+            def terminate_nodes(self, node_ids):
+                raise RuntimeError("Failed")
+
+        provider = FailedNodeProvider(["node-1"])
+        with pytest.raises(RuntimeError):
+            _get_node_terminator(provider).terminate(
+                ["node-1"], lambda: provider.non_terminated_nodes({}))
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
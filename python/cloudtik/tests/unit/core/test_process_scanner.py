@@ -0,0 +1,56 @@
+import os
+import sys
+import tempfile
+
+import psutil
+import pytest
+
+from cloudtik.core._private.util.process_scanner import ProcessScanner
+
+
+class TestProcessScanner:
+    def test_scan_keywords(self):
+        proc_name = psutil.Process().name()[:15]
+        processes_to_check = [
+            [proc_name, True, "ByName", "node"],
+            ["test_process_scanner", False, "ByArgs", "node"],
+            ["cloudtik-no-such-process", False, "NotFound", "node"],
+            ["cloudtik-head-only", False, "HeadOnly", "head"],
+        ]
+        scanner = ProcessScanner(processes_to_check, "worker")
+        found_process = scanner.scan()
+        assert found_process["ByName"] != "-"
+        assert "NotFound" in found_process
+        assert found_process["NotFound"] == "-"
+        assert "HeadOnly" not in found_process
+        assert scanner.num_processes_scanned > 0
+        if "test_process_scanner" in " ".join(psutil.Process().cmdline()):
+            assert found_process["ByArgs"] != "-"
+
+    def test_scan_pid_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pid_file = os.path.join(temp_dir, "test.pid")
+            missing_pid_file = os.path.join(temp_dir, "missing.pid")
+            with open(pid_file, "w") as f:
+                f.write(str(os.getpid()))
+            processes_to_check = [
+                [pid_file, None, "ByPidFile", "node"],
+                [missing_pid_file, None, "Missing", "node"],
+            ]
+            scanner = ProcessScanner(processes_to_check, "head")
+            found_process = scanner.scan()
+            assert found_process["ByPidFile"] != "-"
+            assert "Missing" not in found_process
+
+            # The cached pid is refreshed when the pid file changes
+            os.remove(pid_file)
+            found_process = scanner.scan()
+            assert "ByPidFile" not in found_process
+
+    def test_name_keyword_too_long(self):
+        with pytest.raises(ValueError):
+            ProcessScanner([["a" * 16, True, "TooLong", "node"]], "head")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
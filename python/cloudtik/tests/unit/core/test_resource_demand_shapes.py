@@ -0,0 +1,61 @@
+import sys
+
+import pytest
+
+from cloudtik.core._private.cluster.cluster_metrics import ClusterMetrics, freq_of_dicts
+from cloudtik.core._private.cluster.resource_demand_shapes import aggregate_demands, \
+    expand_demand_shapes, clip_demand_shapes, normalize_demand_shapes, count_demands
+from cloudtik.core._private.utils import get_resource_demands_for, get_resource_demand_shapes_for
+from cloudtik.core.scaling_policy import SCALING_INSTRUCTIONS_SCALING_TIME, \
+    SCALING_INSTRUCTIONS_RESOURCE_DEMANDS, SCALING_INSTRUCTIONS_RESOURCE_DEMAND_SHAPES
+
+
+class TestResourceDemandShapes:
+
+    def test_aggregate_and_expand(self):
+        bundles = [{"CPU": 1}, {"CPU": 1}, {"GPU": 1}, {"CPU": 1}]
+        shapes = aggregate_demands(bundles)
+        assert shapes == [({"CPU": 1}, 2), ({"GPU": 1}, 1), ({"CPU": 1}, 1)]
+        assert expand_demand_shapes(shapes) == bundles
+        assert expand_demand_shapes(shapes, limit=3) == bundles[:3]
+        assert count_demands(shapes) == 4
+
+    def test_clip_and_normalize(self):
+        shapes = normalize_demand_shapes(
+            [[{"CPU": 4}, 100], [{"CPU": 4}, 50], [{"GPU": 1}, 0], [{"GPU": 1}, 10]])
+        assert shapes == [({"CPU": 4}, 150), ({"GPU": 1}, 10)]
+        assert clip_demand_shapes(shapes, 155) == [({"CPU": 4}, 150), ({"GPU": 1}, 5)]
+        assert clip_demand_shapes(shapes, 100) == [({"CPU": 4}, 100)]
+
+    def test_resource_demand_shapes_for(self):
+        shapes = get_resource_demand_shapes_for(10.5, "CPU", None)
+        assert shapes == [[{"CPU": 1}, 10], [{"CPU": 0.5}, 1]]
+        assert get_resource_demands_for(10.5, "CPU", None) == expand_demand_shapes(shapes)
+
+    def test_cluster_metrics_shapes(self):
+        cluster_metrics = ClusterMetrics()
+        cluster_metrics.update_autoscaling_instructions({
+            SCALING_INSTRUCTIONS_SCALING_TIME: 1,
+            SCALING_INSTRUCTIONS_RESOURCE_DEMAND_SHAPES: [[{"CPU": 4}, 5000]],
+        })
+        assert cluster_metrics.get_resource_demand_shapes(clip=False) == [
+            ({"CPU": 4}, 5000)]
+        clipped = cluster_metrics.get_resource_demand_shapes()
+        assert count_demands(clipped) == 1000
+        assert len(cluster_metrics.get_resource_demands()) == 1000
+        assert cluster_metrics.summary().resource_demand == [({"CPU": 4}, 5000)]
+
+    def test_cluster_metrics_bundles(self):
+        # The bundles from the scaling policies not using the shapes
+        bundles = [{"CPU": 1}, {"CPU": 1}, {"GPU": 1}]
+        cluster_metrics = ClusterMetrics()
+        cluster_metrics.update_autoscaling_instructions({
+            SCALING_INSTRUCTIONS_SCALING_TIME: 1,
+            SCALING_INSTRUCTIONS_RESOURCE_DEMANDS: bundles,
+        })
+        assert cluster_metrics.get_resource_demands() == bundles
+        assert cluster_metrics.summary().resource_demand == freq_of_dicts(bundles)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
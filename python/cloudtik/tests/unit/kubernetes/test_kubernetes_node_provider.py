@@ -0,0 +1,218 @@
+import re
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from kubernetes.client.rest import ApiException
+
+from cloudtik.core.tags import CLOUDTIK_TAG_NODE_KIND, NODE_KIND_WORKER
+from cloudtik.providers._private._kubernetes import node_provider
+from cloudtik.providers._private._kubernetes import utils as kubernetes_utils
+from cloudtik.providers._private._kubernetes.node_provider import \
+    KubernetesNodeProvider
+from cloudtik.providers._private._kubernetes.utils import call_api_with_retry, \
+    call_create_api_with_retry
+
+NAMESPACE = "cloudtik"
+CLUSTER_NAME = "test"
+
+
+def _parse_label_selector(label_selector):
+    requirements = []
+    for k, values in re.findall(r"([\w./-]+) in \(([^)]*)\)", label_selector):
+        requirements.append((k, set(values.split(","))))
+    label_selector = re.sub(r"[\w./-]+ in \([^)]*\)", "", label_selector)
+    for term in label_selector.split(","):
+        if term:
+            k, v = term.split("=")
+            requirements.append((k, {v}))
+    return requirements
+
+
+def _is_selected(pod, label_selector):
+    labels = pod.metadata.labels
+    return all(
+        labels.get(k) in values
+        for k, values in _parse_label_selector(label_selector))
+
+
+class FakeCoreApi:
+    def __init__(self, create_delay=0):
+        self.lock = threading.Lock()
+        self.pods = {}
+        self.create_delay = create_delay
+        self.deleted_pods = []
+        self.collection_deletes = []
+        # Called after a list to simulate the changes after the list
+        self.after_list = None
+
+    def create_namespaced_pod(self, namespace, body):
+        time.sleep(self.create_delay)
+        with self.lock:
+            name = "cloudtik-test-worker-{}".format(len(self.pods) + len(
+                self.deleted_pods))
+            pod = SimpleNamespace(
+                metadata=SimpleNamespace(
+                    name=name, labels=dict(body["metadata"]["labels"]),
+                    resource_version="1", deletion_timestamp=None),
+                spec=SimpleNamespace(volumes=None),
+                status=SimpleNamespace(phase="Running"))
+            self.pods[name] = pod
+        return pod
+
+    def list_namespaced_pod(self, namespace, label_selector=None, **kwargs):
+        with self.lock:
+            pods = [pod for pod in self.pods.values()
+                    if _is_selected(pod, label_selector)]
+        after_list, self.after_list = self.after_list, None
+        if after_list is not None:
+            after_list()
+        return SimpleNamespace(items=pods)
+
+    def delete_namespaced_pod(self, name, namespace):
+        with self.lock:
+            if self.pods.pop(name, None) is None:
+                raise ApiException(status=404, reason="Not Found")
+            self.deleted_pods.append(name)
+
+    def delete_collection_namespaced_pod(self, namespace, label_selector=None):
+        with self.lock:
+            self.collection_deletes.append(label_selector)
+            for pod in list(self.pods.values()):
+                if _is_selected(pod, label_selector):
+                    del self.pods[pod.metadata.name]
+                    self.deleted_pods.append(pod.metadata.name)
+
+    def delete_namespaced_service(self, name, namespace):
+        raise ApiException(status=404, reason="Not Found")
+
+    def delete_namespaced_ingress(self, name, namespace):
+        raise ApiException(status=404, reason="Not Found")
+
+
+@pytest.fixture
+def api(monkeypatch):
+    api = FakeCoreApi()
+    monkeypatch.setattr(node_provider, "core_api", lambda: api)
+    monkeypatch.setattr(node_provider, "networking_api", lambda: api)
+    return api
+
+
+def make_provider():
+    return KubernetesNodeProvider(
+        {"namespace": NAMESPACE, "pod_informer": False}, CLUSTER_NAME)
+
+
+def create_workers(provider, count):
+    node_config = {"pod": {"metadata": {}, "spec": {"containers": [{}]}}}
+    provider.create_node(
+        node_config, {CLOUDTIK_TAG_NODE_KIND: NODE_KIND_WORKER}, count)
+
+
+class FailingCall:
+    def __init__(self, statuses):
+        # The error status of each call, None to succeed
+        self.statuses = statuses
+        self.calls = 0
+        self.__name__ = "failing_call"
+
+    def __call__(self):
+        status = self.statuses[min(self.calls, len(self.statuses) - 1)]
+        self.calls += 1
+        if status is not None:
+            raise ApiException(status=status, reason="Error")
+        return "done"
+
+
+class TestCallApiWithRetry:
+
+    @pytest.fixture(autouse=True)
+    def no_backoff(self, monkeypatch):
+        monkeypatch.setattr(kubernetes_utils, "API_RETRY_INTERVAL_S", 0)
+
+    def test_retry_conflict_of_update(self):
+        call = FailingCall([409, 429, None])
+        assert call_api_with_retry(call) == "done"
+        assert call.calls == 3
+
+    def test_no_retry_conflict_of_create(self):
+        call = FailingCall([409, None])
+        with pytest.raises(ApiException) as e:
+            call_create_api_with_retry(call)
+        assert e.value.status == 409
+        assert call.calls == 1
+
+        call = FailingCall([429, None])
+        assert call_create_api_with_retry(call) == "done"
+        assert call.calls == 2
+
+    def test_no_retry_other_errors(self):
+        call = FailingCall([404, None])
+        with pytest.raises(ApiException):
+            call_api_with_retry(call)
+        assert call.calls == 1
+
+    def test_retry_exhausted(self):
+        call = FailingCall([429])
+        with pytest.raises(ApiException):
+            call_api_with_retry(call)
+        assert call.calls == kubernetes_utils.MAX_API_RETRIES
+
+
+class TestTerminateNodes:
+
+    def test_bulk_terminate(self, api):
+        provider = make_provider()
+        create_workers(provider, 3)
+        node_ids = sorted(api.pods)
+        uuids = {pod.metadata.labels["cloudtik-node-uuid"]
+                 for pod in api.pods.values()}
+        # Each pod has its own uuid
+        assert len(uuids) == 3
+
+        provider.terminate_nodes(node_ids)
+        assert api.pods == {}
+        assert len(api.collection_deletes) == 1
+        assert sorted(api.deleted_pods) == node_ids
+
+    def test_terminate_part_of_pods(self, api):
+        provider = make_provider()
+        create_workers(provider, 3)
+        node_ids = sorted(api.pods)
+
+        provider.terminate_nodes(node_ids[:2])
+        assert sorted(api.pods) == node_ids[2:]
+        assert api.collection_deletes == []
+
+    def test_pod_created_after_list(self, api):
+        provider = make_provider()
+        create_workers(provider, 2)
+        node_ids = sorted(api.pods)
+        # A pod is created after the list which decides the bulk delete
+        api.after_list = lambda: create_workers(provider, 1)
+
+        provider.terminate_nodes(node_ids)
+        assert len(api.collection_deletes) == 1
+        assert len(api.pods) == 1
+        assert sorted(api.deleted_pods) == node_ids
+
+    def test_concurrent_create_and_terminate(self, api):
+        provider = make_provider()
+        create_workers(provider, 4)
+        node_ids = sorted(api.pods)
+        api.create_delay = 0.01
+
+        creating = threading.Thread(
+            target=create_workers, args=(provider, 8))
+        creating.start()
+        provider.terminate_nodes(node_ids)
+        creating.join()
+
+        assert len(api.pods) == 8
+        assert not set(node_ids) & set(api.pods)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
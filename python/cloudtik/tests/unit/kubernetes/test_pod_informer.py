@@ -0,0 +1,182 @@
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from kubernetes.client.rest import ApiException
+
+from cloudtik.providers._private._kubernetes import pod_informer
+from cloudtik.providers._private._kubernetes.pod_informer import PodInformer
+
+NAMESPACE = "cloudtik"
+LABEL_SELECTOR = "cloudtik-cluster-name=test"
+
+
+def make_pod(name, resource_version, phase="Running"):
+    return SimpleNamespace(
+        metadata=SimpleNamespace(
+            name=name, resource_version=str(resource_version),
+            labels={"cloudtik-cluster-name": "test"},
+            deletion_timestamp=None),
+        status=SimpleNamespace(phase=phase))
+
+
+def make_pod_list(pods, resource_version):
+    return SimpleNamespace(
+        items=pods,
+        metadata=SimpleNamespace(resource_version=str(resource_version)))
+
+
+class FakeCoreApi:
+    def __init__(self, pod_lists, pods=None):
+        # The results of the list calls, the last one is repeated.
+        # An exception is raised instead of returned.
+        self.pod_lists = pod_lists
+        self.pods = pods or {}
+        self.list_calls = 0
+        self.read_calls = 0
+
+    def list_namespaced_pod(self, namespace, label_selector=None, **kwargs):
+        assert namespace == NAMESPACE
+        assert label_selector == LABEL_SELECTOR
+        result = self.pod_lists[min(self.list_calls, len(self.pod_lists) - 1)]
+        self.list_calls += 1
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def read_namespaced_pod(self, name, namespace):
+        self.read_calls += 1
+        return self.pods[name]
+
+
+class FakeWatch:
+    """Streams the events of the next script on each call. The stream blocks
+    when the scripts are exhausted as a watch without events does."""
+
+    def __init__(self, scripts, stopped):
+        self.scripts = scripts
+        self.stopped = stopped
+        self.resource_versions = []
+
+    def __call__(self):
+        return self
+
+    def stream(self, func, namespace, label_selector=None,
+               resource_version=None, timeout_seconds=None):
+        self.resource_versions.append(resource_version)
+        if not self.scripts:
+            self.stopped.wait()
+            return
+        for event in self.scripts.pop(0):
+            yield event
+
+
+def event(event_type, pod):
+    return {"type": event_type, "object": pod}
+
+
+def wait_for(condition, timeout=5):
+    start = time.time()
+    while not condition():
+        if time.time() - start > timeout:
+            raise TimeoutError("Condition is not met in time.")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def stopped():
+    stopped = threading.Event()
+    yield stopped
+    stopped.set()
+
+
+def make_informer(monkeypatch, stopped, api, scripts):
+    fake_watch = FakeWatch(scripts, stopped)
+    monkeypatch.setattr(pod_informer, "core_api", lambda: api)
+    monkeypatch.setattr(
+        pod_informer, "watch", SimpleNamespace(Watch=fake_watch))
+    return PodInformer(NAMESPACE, LABEL_SELECTOR), fake_watch
+
+
+class TestPodInformer:
+
+    def test_list_and_watch_events(self, monkeypatch, stopped):
+        api = FakeCoreApi(
+            [make_pod_list([make_pod("a", 1), make_pod("b", 2)], 2)])
+        informer, fake_watch = make_informer(monkeypatch, stopped, api, [[
+            event("ADDED", make_pod("c", 3)),
+            event("MODIFIED", make_pod("a", 4)),
+            event("DELETED", make_pod("b", 5)),
+        ]])
+
+        pods = informer.list_pods()
+        assert pods is not None
+        wait_for(lambda: informer.resource_version == "5")
+        assert fake_watch.resource_versions[0] == "2"
+        pods = {pod.metadata.name: pod for pod in informer.list_pods()}
+        assert sorted(pods) == ["a", "c"]
+        assert pods["a"].metadata.resource_version == "4"
+        # The watch is restarted from the last resource version
+        wait_for(lambda: len(fake_watch.resource_versions) == 2)
+        assert fake_watch.resource_versions[1] == "5"
+        assert api.list_calls == 1
+
+    def test_gone_relists(self, monkeypatch, stopped):
+        api = FakeCoreApi([
+            make_pod_list([make_pod("a", 1)], 1),
+            make_pod_list([make_pod("b", 7)], 7),
+        ])
+        gone = {"type": "ERROR", "object": None,
+                "raw_object": {"code": 410, "message": "too old"}}
+        informer, fake_watch = make_informer(
+            monkeypatch, stopped, api, [[gone]])
+
+        informer.start()
+        wait_for(lambda: api.list_calls == 2)
+        wait_for(lambda: len(fake_watch.resource_versions) == 2)
+        assert fake_watch.resource_versions == ["1", "7"]
+        assert [pod.metadata.name for pod in informer.list_pods()] == ["b"]
+
+    def test_update_pod_not_regress(self):
+        informer = PodInformer(NAMESPACE, LABEL_SELECTOR)
+        informer.update_pod(make_pod("a", 5, phase="Running"))
+        informer.update_pod(make_pod("a", 3, phase="Pending"))
+        assert informer.pods["a"].metadata.resource_version == "5"
+        assert informer.pods["a"].status.phase == "Running"
+        informer.update_pod(make_pod("a", 6, phase="Succeeded"))
+        assert informer.pods["a"].status.phase == "Succeeded"
+
+    def test_get_pod_read_through(self, monkeypatch, stopped):
+        api = FakeCoreApi(
+            [make_pod_list([make_pod("a", 1)], 1)],
+            pods={"b": make_pod("b", 2)})
+        informer, _ = make_informer(monkeypatch, stopped, api, [])
+
+        assert informer.get_pod("a").metadata.resource_version == "1"
+        assert api.read_calls == 0
+        # Not seen by the watch yet
+        assert informer.get_pod("b").metadata.resource_version == "2"
+        assert api.read_calls == 1
+        assert sorted(
+            pod.metadata.name for pod in informer.list_pods()) == ["a", "b"]
+
+    def test_sync_failure_fallback(self, monkeypatch, stopped):
+        api = FakeCoreApi(
+            [ApiException(status=500, reason="unavailable")],
+            pods={"a": make_pod("a", 1)})
+        informer, _ = make_informer(monkeypatch, stopped, api, [])
+
+        start = time.time()
+        assert informer.get_pod("a").metadata.name == "a"
+        # The reads don't wait for the sync again after the failure
+        for _ in range(3):
+            assert informer.list_pods() is None
+            assert informer.get_pod("a").metadata.name == "a"
+        assert time.time() - start < 5
+        assert api.read_calls == 4
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
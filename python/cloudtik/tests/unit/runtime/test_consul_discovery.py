@@ -0,0 +1,115 @@
+import sys
+import threading
+
+import pytest
+
+from cloudtik.core._private.service_discovery.utils import SERVICE_SELECTOR_CLUSTERS
+from cloudtik.runtime.common.service_discovery import consul
+from cloudtik.runtime.common.service_discovery.consul import query_services_with_addresses, \
+    query_services_from_consul, REST_ENDPOINT_CATALOG_SERVICES, ServiceCatalogWatcher
+from cloudtik.runtime.common.service_discovery.discovery_job import ServiceDiscoveryJob
+
+TEST_SERVICES = {
+    "service-{}".format(i): [
+        {
+            "ServiceName": "service-{}".format(i),
+            "ServiceAddress": "10.0.{}.{}".format(i, j),
+            "ServicePort": 80,
+            "ServiceMeta": {"cloudtik-cluster": "cluster-1"},
+        } for j in range(2)] for i in range(10)
+}
+
+
+@pytest.fixture
+def consul_requests(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        consul, "get_cloudtik_temp_dir", lambda: str(tmp_path))
+    requests = []
+    lock = threading.Lock()
+
+    def _consul_api_get(client, endpoint):
+        with lock:
+            requests.append(endpoint)
+        endpoint = endpoint.split("?")[0]
+        if endpoint == REST_ENDPOINT_CATALOG_SERVICES:
+            return {service_name: [] for service_name in TEST_SERVICES}
+        return TEST_SERVICES[endpoint.split("/")[-1]]
+
+    monkeypatch.setattr(consul, "consul_api_get", _consul_api_get)
+    return requests
+
+
+class TestConsulDiscovery:
+
+    def test_query_services(self, consul_requests):
+        service_selector = {SERVICE_SELECTOR_CLUSTERS: ["cluster-1"]}
+        services = query_services_with_addresses(service_selector)
+        assert list(services.keys()) == list(TEST_SERVICES.keys())
+        assert services["service-3"] == [("10.0.3.0", 80), ("10.0.3.1", 80)]
+        assert len(consul_requests) == 11
+
+        # Shared from the snapshot in the TTL
+        service_instances = query_services_from_consul(service_selector)
+        assert len(consul_requests) == 11
+        assert service_instances["service-3"].cluster_name == "cluster-1"
+
+        service_instance = query_services_from_consul(
+            service_selector, first=True)
+        assert service_instance.service_name == "service-0"
+        assert len(consul_requests) == 13
+
+    def test_query_services_no_snapshot(self, consul_requests, monkeypatch):
+        monkeypatch.setattr(
+            consul, "CLOUDTIK_CONSUL_CATALOG_SNAPSHOT_TTL_S", 0)
+        query_services_with_addresses(None)
+        query_services_with_addresses(None)
+        assert len(consul_requests) == 22
+
+    def test_service_catalog_watcher(self, monkeypatch):
+        indexes = iter(["10", "10", "12", "5"])
+        endpoints = []
+
+        def _consul_api_get(client, endpoint, timeout=None, with_headers=False):
+            endpoints.append(endpoint)
+            return {}, {"X-Consul-Index": next(indexes)}
+
+        monkeypatch.setattr(consul, "consul_api_get", _consul_api_get)
+        watcher = ServiceCatalogWatcher(
+            {SERVICE_SELECTOR_CLUSTERS: ["cluster-1"]})
+        assert watcher.watch()
+        assert "&index=0&" in endpoints[-1]
+        # Timed out without changes
+        assert not watcher.watch()
+        assert "&index=10&" in endpoints[-1]
+        assert watcher.watch()
+        # The index went backwards
+        assert watcher.watch()
+        assert watcher.index == 0
+
+    def test_discovery_job_pulls_on_changes(self, monkeypatch):
+        changes = iter([True, False, True])
+        pulls = []
+
+        class TestDiscoveryJob(ServiceDiscoveryJob):
+            def pull(self):
+                pulls.append(self._get_snapshot_ttl())
+
+        job = TestDiscoveryJob(interval=1)
+        stop_event = threading.Event()
+
+        def _watch():
+            try:
+                return next(changes)
+            except StopIteration:
+                stop_event.set()
+                return False
+
+        monkeypatch.setattr(job.service_watcher, "watch", _watch)
+        job.stop_event = stop_event
+        job.run()
+        # Pulled without the shared snapshot for the changes only
+        assert pulls == [0, 0]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
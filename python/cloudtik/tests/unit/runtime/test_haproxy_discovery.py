@@ -0,0 +1,62 @@
+import sys
+
+import pytest
+
+from cloudtik.runtime.haproxy import admin_api
+from cloudtik.runtime.haproxy.admin_api import send_haproxy_commands
+from cloudtik.runtime.haproxy.discovery import _get_backend_update_commands
+from cloudtik.runtime.haproxy.scripting import _write_configuration
+
+
+class TestHAProxyDiscovery:
+
+    def test_backend_update_commands(self):
+        active_servers = {
+            "10.0.0.1:80": "server1",
+            "10.0.0.2:80": "server2",
+        }
+        inactive_servers = ["server3"]
+        commands = _get_backend_update_commands(
+            "backend", [("10.0.0.1", 80), ("10.0.0.3", 80)],
+            active_servers, inactive_servers)
+        assert commands == [
+            "set server backend/server3 addr 10.0.0.3 port 80\n",
+            "set server backend/server3 state ready\n",
+            "set server backend/server2 state maint\n",
+        ]
+
+        # No changes
+        assert _get_backend_update_commands(
+            "backend", [("10.0.0.1", 80), ("10.0.0.2", 80)],
+            active_servers, inactive_servers) == []
+        # The slots are not changed
+        assert inactive_servers == ["server3"]
+
+    def test_send_commands_in_sessions(self, monkeypatch):
+        lines = []
+
+        def _send_haproxy_line(haproxy_server, line):
+            lines.append(line)
+            return ""
+
+        monkeypatch.setattr(admin_api, "_send_haproxy_line", _send_haproxy_line)
+        monkeypatch.setattr(admin_api, "HAPROXY_COMMAND_LINE_MAX", 100)
+        commands = ["set server backend/server{} state maint\n".format(
+            i) for i in range(5)]
+        send_haproxy_commands(("127.0.0.1", 19999), commands)
+        assert len(lines) == 3
+        assert lines[0] == "; ".join(
+            command.rstrip("\n") for command in commands[:2])
+        assert all(len(line) <= 100 for line in lines)
+
+    def test_write_configuration(self, tmp_path):
+        conf_dir = str(tmp_path)
+        assert _write_configuration(conf_dir, "global\n")
+        assert not _write_configuration(conf_dir, "global\n")
+        assert _write_configuration(conf_dir, "defaults\n")
+        with open(tmp_path / "haproxy.cfg") as f:
+            assert f.read() == "defaults\n"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
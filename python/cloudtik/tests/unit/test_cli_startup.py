@@ -0,0 +1,57 @@
+import subprocess
+import sys
+
+import pytest
+
+CLI_MODULE = "cloudtik.scripts.scripts"
+
+# The budget of the cumulative import time of the CLI module in microseconds
+CLI_IMPORT_TIME_BUDGET_US = 1000 * 1000
+
+# The modules which must not be imported by the CLI before a command runs
+CLI_DEFERRED_MODULES = [
+    "cloudtik.core._private.cluster.cluster_operator",
+    "cloudtik.core._private.cluster.cluster_config",
+    "cloudtik.scripts.head_scripts",
+    "boto3",
+    "azure",
+    "google",
+    "kubernetes",
+    "numpy",
+    "paramiko",
+]
+
+
+def _get_import_times(module):
+    # name -> cumulative import time in microseconds
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        cumulative = cumulative.strip()
+        if not cumulative.isdigit():
+            # The header line
+            continue
+        import_times[name.strip()] = int(cumulative)
+    return import_times
+
+
+class TestCLIStartup:
+
+    def test_cli_import_time(self):
+        import_times = _get_import_times(CLI_MODULE)
+        assert CLI_MODULE in import_times
+        for name in import_times:
+            for deferred_module in CLI_DEFERRED_MODULES:
+                assert name != deferred_module and not name.startswith(
+                    deferred_module + "."), \
+                    "{} is imported at the CLI startup.".format(name)
+        assert import_times[CLI_MODULE] < CLI_IMPORT_TIME_BUDGET_US
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
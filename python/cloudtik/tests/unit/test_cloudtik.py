@@ -45,7 +45,7 @@ from cloudtik.core._private.utils import prepare_config, validate_config, fill_w
 from cloudtik.core._private.cluster import cluster_operator
 from cloudtik.core._private.cluster.cluster_metrics import ClusterMetrics
 from cloudtik.core._private.provider_factory import _NODE_PROVIDERS, _PROVIDER_HOMES, \
-    _load_aws_provider_home
+    _load_aws_provider_home, _clear_provider_cache
 
 from cloudtik.core.node_provider import NodeProvider
 from cloudtik.core.tags import CLOUDTIK_TAG_NODE_KIND, CLOUDTIK_TAG_NODE_STATUS, CLOUDTIK_TAG_USER_NODE_TYPE, \
@@ -221,6 +221,7 @@ class MockProvider(NodeProvider):
         # everything.
         self.lock = threading.Lock()
         self.num_non_terminated_nodes_calls = 0
+        self.num_node_tags_calls = 0
         super().__init__(None, None)
 
     def non_terminated_nodes(self, tag_filters):
@@ -253,6 +254,7 @@ class MockProvider(NodeProvider):
             return self.mock_nodes[node_id].state in ["stopped", "terminated"]
 
     def node_tags(self, node_id):
+        self.num_node_tags_calls += 1
         # Don't assume that node providers can retrieve tags from
         # terminated nodes.
         if self.is_terminated(node_id):
@@ -1166,10 +1168,13 @@ class CloudTikTest(unittest.TestCase):
             self.fail(
                 "Config did not pass validation test!")
 
-    def ScaleUpHelper(self, disable_node_updaters):
+    def ScaleUpHelper(self, disable_node_updaters, incremental_reconciliation=False):
         config = copy.deepcopy(SMALL_CLUSTER)
         config["provider"]["disable_node_updaters"] = disable_node_updaters
+        config["options"]["incremental_reconciliation"] = incremental_reconciliation
         config_path = self.write_config(config)
+        # The provider config is the same for the variants of scale up
+        _clear_provider_cache()
         self.provider = MockProvider()
         runner = MockProcessRunner()
         mock_metrics = Mock(spec=ClusterPrometheusMetrics())
@@ -1221,6 +1226,7 @@ class CloudTikTest(unittest.TestCase):
                 2, tag_filters={CLOUDTIK_TAG_NODE_STATUS: STATUS_UPDATE_FAILED}
             )
         assert mock_metrics.drain_node_exceptions.inc.call_count == 0
+        return cluster_scaler, mock_metrics
 
     def testScaleUp(self):
         self.ScaleUpHelper(disable_node_updaters=False)
@@ -1228,6 +1234,49 @@ class CloudTikTest(unittest.TestCase):
     def testScaleUpNoUpdaters(self):
         self.ScaleUpHelper(disable_node_updaters=True)
 
+    def testScaleUpIncrementalReconciliation(self):
+        def steady_update(incremental_reconciliation):
+            cluster_scaler, mock_metrics = self.ScaleUpHelper(
+                disable_node_updaters=True,
+                incremental_reconciliation=incremental_reconciliation)
+            # The mock head type is launched on every update. Pin the
+            # availability timestamps of the launches so that the launches
+            # crossing a second don't change the fingerprint.
+            tracker = cluster_scaler.node_availability_tracker
+            update_node_availability = tracker.update_node_availability
+            launch_timestamp = int(time.time())
+            tracker.update_node_availability = (
+                lambda node_type, timestamp, node_launch_exception:
+                update_node_availability(
+                    node_type, launch_timestamp, node_launch_exception))
+
+            # Let the pending launches finish and settle the fingerprint
+            def wait_for_launches():
+                self.waitFor(
+                    lambda: cluster_scaler.launch_queue.empty() and
+                    cluster_scaler.pending_launches.value == 0)
+
+            for _ in range(2):
+                wait_for_launches()
+                cluster_scaler.update()
+            wait_for_launches()
+            self.provider.num_non_terminated_nodes_calls = 0
+            self.provider.num_node_tags_calls = 0
+            mock_metrics.scheduling_skipped.inc.reset_mock()
+            # Neither the demands nor the nodes change
+            cluster_scaler.update()
+            return (self.provider.num_non_terminated_nodes_calls,
+                    self.provider.num_node_tags_calls,
+                    mock_metrics.scheduling_skipped.inc.call_count)
+
+        full_list_calls, full_tags_calls, full_skipped = steady_update(False)
+        list_calls, tags_calls, skipped = steady_update(True)
+        assert full_skipped == 0
+        assert skipped == 1
+        # The node index reads the tags of the unchanged nodes from the cache
+        assert list_calls <= full_list_calls
+        assert tags_calls < full_tags_calls
+
     def testDockerFileMountsAdded(self):
         config = copy.deepcopy(SMALL_CLUSTER)
         config["file_mounts"] = {"source": "/dev/null"}
@@ -0,0 +1,134 @@
+import sys
+
+import pytest
+
+from cloudtik.providers._private.virtual import container_inventory
+from cloudtik.providers._private.virtual.container_inventory import ContainerInventory
+
+
+class FakeDocker:
+    def __init__(self):
+        self.containers = {}
+        self.events = []
+        self.list_calls = 0
+        self.inspect_calls = 0
+        self.events_calls = 0
+
+    def add(self, name, cluster="c1", state="running"):
+        self.containers[name] = {
+            "name": name, "state": state, "tags": {"cluster": cluster}}
+        self.events.append(name)
+
+    def remove(self, name):
+        self.containers.pop(name, None)
+        self.events.append(name)
+
+    def list_containers(self):
+        self.list_calls += 1
+        return [dict(c) for c in self.containers.values()
+                if c["tags"]["cluster"] == "c1"]
+
+    def inspect_containers(self, names):
+        self.inspect_calls += 1
+        return [dict(self.containers[name])
+                for name in names if name in self.containers]
+
+    def query_events(self, since_seconds):
+        self.events_calls += 1
+        events, self.events = self.events, []
+        return events
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(container_inventory.time, "monotonic", fake_clock.monotonic)
+    return fake_clock
+
+
+def _new_inventory(docker):
+    return ContainerInventory(
+        list_containers=docker.list_containers,
+        inspect_containers=docker.inspect_containers,
+        query_events=docker.query_events,
+        is_member=lambda c: c["tags"]["cluster"] == "c1",
+        ttl=5, full_refresh_interval=300)
+
+
+def _names(containers):
+    return sorted(c["name"] for c in containers)
+
+
+def test_inventory_refresh(clock):
+    docker = FakeDocker()
+    docker.add("n1")
+    docker.add("n2")
+    docker.events = []
+    inventory = _new_inventory(docker)
+
+    assert _names(inventory.get_containers()) == ["n1", "n2"]
+    # Within the TTL, no docker calls
+    docker.add("n3")
+    assert _names(inventory.get_containers()) == ["n1", "n2"]
+    assert docker.list_calls == 1
+    assert docker.events_calls == 0
+
+    # After the TTL, only the changed containers are inspected
+    clock.now += 6
+    docker.remove("n1")
+    docker.add("other", cluster="c2")
+    assert _names(inventory.get_containers()) == ["n2", "n3"]
+    assert docker.list_calls == 1
+    assert docker.inspect_calls == 1
+
+    # No events, no inspect
+    clock.now += 6
+    inventory.get_containers()
+    assert docker.inspect_calls == 1
+
+    # Changes by us are refreshed ignoring the TTL
+    docker.containers["n2"]["state"] = "exited"
+    docker.events = []
+    inventory.mark_dirty("n2")
+    containers = {c["name"]: c for c in inventory.get_containers()}
+    assert containers["n2"]["state"] == "exited"
+
+    # A full refresh after the interval
+    clock.now += 300
+    inventory.get_containers()
+    assert docker.list_calls == 2
+    assert inventory.get_stats()["hits"] == 1
+
+
+def test_inventory_events_failure(clock):
+    docker = FakeDocker()
+    docker.add("n1")
+    inventory = _new_inventory(docker)
+    inventory.get_containers()
+
+    docker.query_events = lambda since_seconds: None
+    inventory._query_events = docker.query_events
+    clock.now += 6
+    docker.add("n2")
+    assert _names(inventory.get_containers()) == ["n1", "n2"]
+    assert docker.list_calls == 2
+
+
+def test_inventory_returns_copies(clock):
+    docker = FakeDocker()
+    docker.add("n1")
+    inventory = _new_inventory(docker)
+    inventory.get_containers()[0]["tags"]["cluster"] = "changed"
+    assert inventory.get_containers()[0]["tags"]["cluster"] == "c1"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-v", __file__]))
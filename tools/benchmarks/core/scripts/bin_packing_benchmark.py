@@ -0,0 +1,113 @@
+"""Benchmark the bin packing engines of the resource demand scheduler.
+
+The pending resource bundles are packed to the existing nodes and the nodes
+to launch are planned for the unfulfilled bundles with the python engine and
+the numpy engine. The time of both engines is compared and the decisions are
+checked to be the same.
+"""
+import argparse
+import logging
+import random
+import time
+
+from cloudtik.core._private.cluster import bin_packing
+from cloudtik.core._private.cluster.node_availability_tracker import NodeAvailabilitySummary
+from cloudtik.core._private.cluster.resource_demand_scheduler import get_bin_pack_residual, \
+    get_nodes_for, _default_utilization_scorer
+
+NODE_TYPES = {
+    "head": {"resources": {"CPU": 8, "memory": 640}, "max_workers": 0},
+    "worker.small": {"resources": {"CPU": 16, "memory": 1280}, "max_workers": 500},
+    "worker.large": {"resources": {"CPU": 64, "memory": 5120}, "max_workers": 200},
+    "worker.gpu": {"resources": {"CPU": 32, "GPU": 4, "memory": 2560}, "max_workers": 50},
+}
+
+SHAPES = [
+    ({"CPU": 1}, 60),
+    ({"CPU": 2, "memory": 80}, 25),
+    ({"CPU": 4, "memory": 320}, 10),
+    ({"CPU": 1, "GPU": 1}, 5),
+]
+
+
+def _utilization_scorer(node_resources, resources, node_type):
+    return _default_utilization_scorer(
+        node_resources, resources, node_type,
+        node_availability_summary=NodeAvailabilitySummary({}))
+
+
+def make_inputs(num_bundles, num_nodes, rand):
+    shapes = [shape for shape, _ in SHAPES]
+    weights = [weight for _, weight in SHAPES]
+    demands = [dict(shape) for shape in rand.choices(
+        shapes, weights=weights, k=num_bundles)]
+    node_types = [node_type for node_type in NODE_TYPES if node_type != "head"]
+    existing_nodes = {"head": 1}
+    node_resources = []
+    for _ in range(num_nodes):
+        node_type = rand.choice(node_types)
+        existing_nodes[node_type] = existing_nodes.get(node_type, 0) + 1
+        resources = dict(NODE_TYPES[node_type]["resources"])
+        # The nodes are partially used
+        resources["CPU"] = rand.randint(0, resources["CPU"])
+        node_resources.append(resources)
+    return demands, node_resources, existing_nodes
+
+
+def plan_python(demands, node_resources, existing_nodes, max_to_add):
+    unfulfilled, _ = get_bin_pack_residual(node_resources, demands)
+    return get_nodes_for(
+        NODE_TYPES, existing_nodes, "head", max_to_add, unfulfilled,
+        utilization_scorer=_utilization_scorer)
+
+
+def plan_numpy(demands, node_resources, existing_nodes, max_to_add):
+    unfulfilled, _ = bin_packing.get_bin_pack_residual(node_resources, demands)
+    return bin_packing.get_nodes_for(
+        NODE_TYPES, existing_nodes, "head", max_to_add, unfulfilled)
+
+
+def time_plan(fn, *args):
+    start = time.time()
+    result = fn(*args)
+    return result, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the bin packing engines.")
+    parser.add_argument(
+        "--sizes", default="1000,10000,100000",
+        help="Comma separated number of pending bundles.")
+    parser.add_argument(
+        "--nodes", type=int, default=100,
+        help="The number of existing worker nodes.")
+    parser.add_argument(
+        "--max-to-add", type=int, default=1000,
+        help="The max number of nodes to add.")
+    parser.add_argument(
+        "--python-max-size", type=int, default=100000,
+        help="Skip the python engine for more bundles than this.")
+    args = parser.parse_args()
+    # The bundles more than the max workers are expected to be unfulfilled
+    logging.disable(logging.WARNING)
+
+    print("{:>8} {:>8} {:>12} {:>12} {:>8} {:>6}".format(
+        "bundles", "to_add", "python(s)", "numpy(s)", "speedup", "same"))
+    for size in [int(size) for size in args.sizes.split(",")]:
+        rand = random.Random(size)
+        inputs = make_inputs(size, args.nodes, rand) + (args.max_to_add,)
+        numpy_result, numpy_time = time_plan(plan_numpy, *inputs)
+        num_to_add = sum(numpy_result[0].values())
+        if size > args.python_max_size:
+            print("{:>8} {:>8} {:>12} {:>12.3f} {:>8} {:>6}".format(
+                size, num_to_add, "-", numpy_time, "-", "-"))
+            continue
+        python_result, python_time = time_plan(plan_python, *inputs)
+        print("{:>8} {:>8} {:>12.3f} {:>12.3f} {:>8.1f} {:>6}".format(
+            size, num_to_add, python_time, numpy_time,
+            python_time / numpy_time, str(python_result == numpy_result)))
+
+
+if __name__ == "__main__":
+    main()
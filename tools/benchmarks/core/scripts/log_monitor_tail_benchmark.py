@@ -0,0 +1,142 @@
+"""Benchmark the CPU cost of the log monitor tailing the log files.
+
+The log monitor is run with the polling and the inotify tail modes on a
+directory of log files. A writer process appends lines to random files. The
+CPU time of the log monitor is measured when idle and per MB of log traffic.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from cloudtik.core._private.service.cloudtik_log_agent import LogMonitor, LogBatchPublisher
+
+
+class CountingRedisClient:
+    """Count the bytes of the lines published."""
+
+    def __init__(self):
+        self.publishes = 0
+        self.bytes = 0
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def publish(self, channel, data):
+        self.publishes += 1
+
+    def execute(self):
+        pass
+
+
+class CountingPublisher(LogBatchPublisher):
+    def add(self, data):
+        self.redis_client.bytes += sum(len(line) + 1 for line in data["lines"])
+        super().add(data)
+
+
+def _log_file(logs_dir, i):
+    return os.path.join(logs_dir, "cloudtik_cluster_controller-{}.log".format(i))
+
+
+def write_logs(logs_dir, num_files, total_bytes, line_size, rate):
+    rand = random.Random(0)
+    line = ("x" * (line_size - 1) + "\n").encode()
+    files = [open(_log_file(logs_dir, i), "ab") for i in range(num_files)]
+    written = 0
+    start = time.time()
+    while written < total_bytes:
+        f = files[rand.randrange(num_files)]
+        f.write(line)
+        f.flush()
+        written += len(line)
+        if rate:
+            # Throttle to the rate of bytes per second
+            ahead = written / rate - (time.time() - start)
+            if ahead > 0.01:
+                time.sleep(ahead)
+    for f in files:
+        f.close()
+
+
+def run_monitor(log_monitor, seconds, until_bytes=None):
+    start_cpu = time.process_time()
+    start = time.time()
+    last_updated = 0
+    while time.time() - start < seconds:
+        if log_monitor.should_update_filenames(last_updated):
+            log_monitor.update_log_filenames()
+            last_updated = time.time()
+        log_monitor.open_closed_files()
+        anything_published = log_monitor.check_log_files_and_publish_updates()
+        if until_bytes is not None and log_monitor.publisher.redis_client.bytes >= until_bytes:
+            break
+        log_monitor.wait_for_updates(anything_published)
+    return time.process_time() - start_cpu, time.time() - start
+
+
+def run(num_files, total_mb, line_size, rate_mb, idle_seconds, use_inotify):
+    logs_dir = tempfile.mkdtemp(prefix="cloudtik-log-benchmark-")
+    try:
+        for i in range(num_files):
+            open(_log_file(logs_dir, i), "wb").close()
+        log_monitor = LogMonitor(
+            None, "127.0.0.1", None, logs_dir, "127.0.0.1:6379",
+            use_inotify=use_inotify)
+        log_monitor.publisher = CountingPublisher(CountingRedisClient())
+        # Warm up to track all the files
+        run_monitor(log_monitor, 0.5)
+
+        idle_cpu, idle_time = run_monitor(log_monitor, idle_seconds)
+
+        total_bytes = int(total_mb * 1024 * 1024)
+        writer = multiprocessing.Process(
+            target=write_logs,
+            args=(logs_dir, num_files, total_bytes, line_size, int(rate_mb * 1024 * 1024)))
+        writer.start()
+        busy_cpu, busy_time = run_monitor(
+            log_monitor, 300, until_bytes=total_bytes)
+        writer.join()
+        return (log_monitor.watcher is not None,
+                idle_cpu / idle_time, busy_cpu / total_mb, busy_time)
+    finally:
+        shutil.rmtree(logs_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the CPU cost of the log monitor tailing.")
+    parser.add_argument(
+        "--files", default="100,500",
+        help="Comma separated number of log files.")
+    parser.add_argument(
+        "--mb", type=float, default=10,
+        help="The MB of log lines to write.")
+    parser.add_argument(
+        "--rate-mb", type=float, default=2,
+        help="The MB per second to write the log lines. 0 for no limit.")
+    parser.add_argument(
+        "--line-size", type=int, default=120,
+        help="The bytes of each log line.")
+    parser.add_argument(
+        "--idle-seconds", type=float, default=3,
+        help="The seconds to measure the idle CPU.")
+    args = parser.parse_args()
+
+    print("{:>8} {:>8} {:>14} {:>12} {:>10}".format(
+        "files", "mode", "idle(cpu %)", "cpu(s)/MB", "time(s)"))
+    for num_files in [int(size) for size in args.files.split(",")]:
+        for use_inotify in [False, True]:
+            inotify_used, idle_cpu, cpu_per_mb, busy_time = run(
+                num_files, args.mb, args.line_size, args.rate_mb,
+                args.idle_seconds, use_inotify)
+            mode = "inotify" if inotify_used else "polling"
+            print("{:>8} {:>8} {:>14.2f} {:>12.4f} {:>10.2f}".format(
+                num_files, mode, idle_cpu * 100, cpu_per_mb, busy_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Benchmark the node metrics wire formats.
+
+Synthetic node metrics in the shape of MetricsCollector.get_all_metrics()
+are encoded with the JSON format and the compact delta encoded format. The
+bytes per node and the head side parse time of all the nodes are compared.
+"""
+import argparse
+import json
+import random
+import time
+
+from cloudtik.core._private.metrics.metrics_codec import NodeMetricsEncoder, NodeMetricsDecoder
+from cloudtik.core._private.state.state_utils import NODE_STATE_NODE_ID, NODE_STATE_NODE_IP, \
+    NODE_STATE_NODE_KIND, NODE_STATE_TIME
+
+
+class FakeTable:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def iter_all(self):
+        return iter(self.rows.items())
+
+
+def make_node_metrics(i, now, rand):
+    total_memory = 64 * 1024 * 1024 * 1024
+    used_memory = int(total_memory * rand.random())
+    return {
+        NODE_STATE_NODE_ID: "{:056x}".format(i),
+        NODE_STATE_NODE_IP: "10.0.{}.{}".format(i // 256, i % 256),
+        NODE_STATE_NODE_KIND: "worker",
+        NODE_STATE_TIME: now,
+        "metrics": {
+            "now": now,
+            "cpu": round(rand.random() * 100, 1),
+            "cpus": (16, 8),
+            "mem": (total_memory, total_memory - used_memory,
+                    round(used_memory / total_memory, 3), used_memory),
+            "boot_time": 1690000000.0,
+            "load_avg": ((1.5, 1.2, 1.0), (0.09, 0.07, 0.06)),
+            "disk_io": (123456789, 987654321, 12345, 54321),
+            "disk_io_speed": (rand.random() * 1e6, rand.random() * 1e6, 10.0, 20.0),
+            "network": (1234567890, 9876543210),
+            "network_speed": (rand.random() * 1e7, rand.random() * 1e7),
+            "gpu": [],
+        }
+    }
+
+
+def encode_nodes(num_nodes, encoders, now, rand):
+    json_rows = {}
+    compact_rows = {}
+    base_rows = {}
+    for i in range(num_nodes):
+        node_metrics = make_node_metrics(i, now, rand)
+        node_id = node_metrics[NODE_STATE_NODE_ID]
+        json_rows[node_id] = json.dumps(node_metrics)
+        frame, keyframe = encoders[i].encode(node_metrics)
+        compact_rows[node_id] = frame
+        if keyframe is not None:
+            base_rows[node_id] = keyframe
+    return json_rows, compact_rows, base_rows
+
+
+def average_bytes(rows):
+    return sum(len(row) for row in rows.values()) / len(rows)
+
+
+def time_parse(fn, repeats):
+    start = time.time()
+    for _ in range(repeats):
+        fn()
+    return (time.time() - start) / repeats
+
+
+def run(num_nodes, repeats):
+    rand = random.Random(num_nodes)
+    encoders = [NodeMetricsEncoder(keyframe_interval=12) for _ in range(num_nodes)]
+    now = time.time()
+    # The first update makes the keyframes
+    _, keyframe_rows, base_rows = encode_nodes(num_nodes, encoders, now, rand)
+    json_rows, delta_rows, _ = encode_nodes(num_nodes, encoders, now + 5, rand)
+
+    base_table = FakeTable(base_rows)
+    decoder = NodeMetricsDecoder()
+    list(decoder.decode_all(iter(keyframe_rows.items()), base_table))
+
+    json_time = time_parse(
+        lambda: [json.loads(row) for row in json_rows.values()], repeats)
+    # The head keeps the decoder with the keyframes cached
+    delta_time = time_parse(
+        lambda: list(decoder.decode_all(iter(delta_rows.items()), base_table)), repeats)
+    # A stateless reader loads the keyframes from the base table
+    cold_time = time_parse(
+        lambda: list(NodeMetricsDecoder().decode_all(
+            iter(delta_rows.items()), base_table)), repeats)
+    return (average_bytes(json_rows), average_bytes(keyframe_rows),
+            average_bytes(delta_rows), json_time, delta_time, cold_time)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the node metrics wire formats.")
+    parser.add_argument(
+        "--sizes", default="1000,5000",
+        help="Comma separated number of nodes.")
+    parser.add_argument(
+        "--repeats", type=int, default=10,
+        help="The number of times to parse all the node metrics.")
+    args = parser.parse_args()
+
+    print("{:>8} {:>10} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+        "nodes", "json(B)", "key(B)", "delta(B)",
+        "json(ms)", "delta(ms)", "cold(ms)"))
+    for size in [int(size) for size in args.sizes.split(",")]:
+        (json_bytes, keyframe_bytes, delta_bytes,
+         json_time, delta_time, cold_time) = run(size, args.repeats)
+        print("{:>8} {:>10.0f} {:>10.0f} {:>10.0f} {:>10.2f} {:>10.2f} {:>10.2f}".format(
+            size, json_bytes, keyframe_bytes, delta_bytes,
+            json_time * 1000, delta_time * 1000, cold_time * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark the upload of a file to all the nodes of a cluster.
+
+The upload from head to each worker (--max-parallel) is compared with the
+tree distribution in which the synced workers relay the file to the other
+workers (--fan-out). A running cluster is needed, for example, a cluster of
+the virtual provider with the workers as local containers. The file is
+removed from the nodes before each upload and the checksum of the file on
+each node is verified after the upload.
+"""
+import argparse
+import hashlib
+import os
+import subprocess
+import tempfile
+import time
+
+import yaml
+
+from cloudtik.core.api import Cluster
+
+
+def make_file(path, size_mb):
+    h = hashlib.sha256()
+    with open(path, "wb") as f:
+        for _ in range(size_mb):
+            block = os.urandom(1024 * 1024)
+            f.write(block)
+            h.update(block)
+    return h.hexdigest()
+
+
+def run_cloudtik(args, with_output=False):
+    cmd = ["cloudtik"] + args
+    if with_output:
+        return subprocess.check_output(cmd).decode()
+    subprocess.check_call(
+        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def exec_on_all_nodes(config_file, cmd, with_output=False):
+    return run_cloudtik(
+        ["exec", config_file, cmd, "--all-nodes", "--parallel"],
+        with_output=with_output)
+
+
+def upload(config_file, source, target, max_parallel, fan_out):
+    exec_on_all_nodes(config_file, "rm -f {}".format(target))
+    args = ["upload", config_file, source, target, "--all-nodes",
+            "--no-checksum", "--max-parallel={}".format(max_parallel)]
+    if fan_out:
+        args += ["--fan-out={}".format(fan_out)]
+    start = time.time()
+    run_cloudtik(args)
+    return time.time() - start
+
+
+def count_synced_nodes(config_file, target, checksum):
+    output = exec_on_all_nodes(
+        config_file,
+        "sha256sum < {} | cut -d ' ' -f 1".format(target),
+        with_output=True)
+    return output.count(checksum)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "config_file", help="The config file of a running cluster.")
+    parser.add_argument("--mb", type=int, default=256)
+    parser.add_argument("--max-parallel", type=int, default=16)
+    parser.add_argument(
+        "--fan-outs", type=str, default="1,2,4",
+        help="The fan-out degrees to compare with the upload from head.")
+    parser.add_argument("--target", type=str, default="/tmp/rsync-benchmark.bin")
+    args = parser.parse_args()
+
+    with open(args.config_file) as f:
+        config = yaml.safe_load(f)
+    num_workers = len(Cluster(config).get_worker_node_ips())
+    fan_outs = [int(x) for x in args.fan_outs.split(",")]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, "rsync-benchmark.bin")
+        checksum = make_file(source, args.mb)
+        print("Upload {} MB to {} workers".format(args.mb, num_workers))
+        print("{:<24}{:>12}{:>14}".format("mode", "time (s)", "synced nodes"))
+        for fan_out in [None] + fan_outs:
+            elapsed = upload(
+                args.config_file, source, args.target,
+                args.max_parallel, fan_out)
+            synced = count_synced_nodes(args.config_file, args.target, checksum)
+            mode = "fan-out {}".format(fan_out) if fan_out else "from head"
+            print("{:<24}{:>12.1f}{:>14}".format(mode, elapsed, synced))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Benchmark the per update tick cost of the cluster scaler reconciliation.
+
+A fake node provider with a simulated API latency is used to compare the full
+re-scan of the non-terminated nodes with the incremental reconciliation
+which keeps a persistent node state index and skips the unchanged scheduling.
+"""
+import argparse
+import time
+
+from cloudtik.core._private.cluster.cluster_metrics import ClusterMetrics
+from cloudtik.core._private.cluster.cluster_scaler import NonTerminatedNodes
+from cloudtik.core._private.cluster.node_availability_tracker import NodeAvailabilitySummary
+from cloudtik.core._private.cluster.node_state_index import NodeStateIndex
+from cloudtik.core._private.cluster.resource_demand_scheduler import ResourceDemandScheduler, \
+    get_scheduling_fingerprint
+from cloudtik.core.node_provider import NodeProvider
+from cloudtik.core.tags import CLOUDTIK_TAG_NODE_KIND, CLOUDTIK_TAG_USER_NODE_TYPE, NODE_KIND_HEAD, \
+    NODE_KIND_WORKER
+
+NODE_TYPES = {
+    "head.default": {
+        "resources": {"CPU": 4},
+        "min_workers": 0,
+        "max_workers": 0,
+    },
+    "worker.default": {
+        "resources": {"CPU": 8, "memory": 32 * 1024 * 1024 * 1024},
+        "min_workers": 1,
+        "max_workers": 10000,
+    },
+}
+
+
+class FakeNodeProvider(NodeProvider):
+    def __init__(self, num_workers, api_latency_s):
+        super().__init__({}, "benchmark")
+        self.api_latency_s = api_latency_s
+        self.api_calls = 0
+        self.nodes = {}
+        self._add_node("head", NODE_KIND_HEAD, "head.default")
+        for i in range(num_workers):
+            self._add_node("worker-{}".format(i), NODE_KIND_WORKER, "worker.default")
+
+    def _add_node(self, node_id, node_kind, node_type):
+        self.nodes[node_id] = {
+            "tags": {
+                CLOUDTIK_TAG_NODE_KIND: node_kind,
+                CLOUDTIK_TAG_USER_NODE_TYPE: node_type,
+            },
+            "ip": "10.0.{}.{}".format(len(self.nodes) // 256, len(self.nodes) % 256),
+        }
+
+    def _call_api(self):
+        self.api_calls += 1
+        if self.api_latency_s:
+            time.sleep(self.api_latency_s)
+
+    def non_terminated_nodes(self, tag_filters):
+        self._call_api()
+        return list(self.nodes.keys())
+
+    def node_tags(self, node_id):
+        self._call_api()
+        return self.nodes[node_id]["tags"]
+
+    def internal_ip(self, node_id):
+        self._call_api()
+        return self.nodes[node_id]["ip"]
+
+
+def _get_cluster_metrics(provider):
+    cluster_metrics = ClusterMetrics()
+    now = time.time()
+    for node_id, node in provider.nodes.items():
+        ip = node["ip"]
+        resources = NODE_TYPES[node["tags"][CLOUDTIK_TAG_USER_NODE_TYPE]]["resources"]
+        cluster_metrics.update_heartbeat(ip, node_id, now)
+        cluster_metrics.update_node_resources(
+            ip, node_id, now, resources, resources, {})
+    return cluster_metrics
+
+
+class ReconcileLoop:
+    def __init__(self, provider, incremental):
+        self.provider = provider
+        self.cluster_metrics = _get_cluster_metrics(provider)
+        self.scheduler = ResourceDemandScheduler(
+            provider, NODE_TYPES, max_workers=10000, head_node_type="head.default")
+        self.node_state_index = NodeStateIndex(provider) if incremental else None
+        self.node_availability_summary = NodeAvailabilitySummary({})
+        self.last_fingerprint = None
+
+    def tick(self):
+        cluster_metrics = self.cluster_metrics
+        non_terminated_nodes = NonTerminatedNodes(
+            self.provider, self.node_state_index)
+        if self.node_state_index is not None:
+            active_ips = self.node_state_index.get_internal_ips()
+        else:
+            active_ips = [
+                self.provider.internal_ip(node_id)
+                for node_id in non_terminated_nodes.all_node_ids]
+        cluster_metrics.prune_active_ips(active_ips)
+
+        scheduling_args = (
+            non_terminated_nodes.all_node_ids,
+            {},
+            cluster_metrics.get_resource_demands(),
+            cluster_metrics.get_resource_utilization(),
+            cluster_metrics.get_static_node_resources_by_ip(),
+            cluster_metrics.get_resource_requests(),
+            self.node_availability_summary)
+        if self.node_state_index is not None:
+            fingerprint = get_scheduling_fingerprint(*scheduling_args)
+            if fingerprint == self.last_fingerprint:
+                return
+            self.last_fingerprint = fingerprint
+        self.scheduler.get_nodes_to_launch(*scheduling_args)
+
+
+def run_ticks(num_workers, num_ticks, api_latency_s, incremental):
+    provider = FakeNodeProvider(num_workers, api_latency_s)
+    reconcile_loop = ReconcileLoop(provider, incremental)
+    # The first tick builds the index for incremental mode
+    first_start = time.time()
+    reconcile_loop.tick()
+    first_tick = time.time() - first_start
+
+    provider.api_calls = 0
+    start = time.time()
+    for _ in range(num_ticks):
+        reconcile_loop.tick()
+    elapsed = time.time() - start
+    return first_tick, elapsed / num_ticks, provider.api_calls / num_ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the cluster scaler reconciliation per update tick.")
+    parser.add_argument(
+        "--sizes", default="100,500,1000,2000",
+        help="Comma separated number of workers of the cluster.")
+    parser.add_argument(
+        "--ticks", type=int, default=10,
+        help="The number of update ticks to run for each size.")
+    parser.add_argument(
+        "--api-latency-ms", type=float, default=0.0,
+        help="The simulated latency of each provider API call.")
+    args = parser.parse_args()
+
+    api_latency_s = args.api_latency_ms / 1000
+    print("{:>8} {:>10} {:>10} {:>10} {:>10} {:>12} {:>12}".format(
+        "workers", "full(ms)", "incr(ms)", "full-1st", "incr-1st",
+        "full(calls)", "incr(calls)"))
+    for size in [int(size) for size in args.sizes.split(",")]:
+        full_first, full_time, full_calls = run_ticks(
+            size, args.ticks, api_latency_s, incremental=False)
+        incr_first, incr_time, incr_calls = run_ticks(
+            size, args.ticks, api_latency_s, incremental=True)
+        print("{:>8} {:>10.2f} {:>10.2f} {:>10.2f} {:>10.2f} {:>12.1f} {:>12.1f}".format(
+            size, full_time * 1000, incr_time * 1000,
+            full_first * 1000, incr_first * 1000, full_calls, incr_calls))
+
+if __name__ == "__main__":
+    main()